@@ -1,4 +1,4 @@
-from flask import Flask, redirect, render_template, request, jsonify, send_file, send_from_directory
+from flask import Flask, Response, redirect, render_template, request, jsonify, send_file, send_from_directory
 
 from flask_cors import CORS
 from jinja2 import ChoiceLoader, FileSystemLoader
@@ -27,41 +27,61 @@ except ImportError:
 from logging import FileHandler
 
 from AFL.automation.APIServer.QueueDaemon import QueueDaemon
+from AFL.automation.APIServer.TaskHistory import TaskHistory
 from AFL.automation.APIServer.LoggerFilter import LoggerFilter
 from AFL.automation.APIServer.CAStatusPublisher import CAStatusPublisher
 
 from AFL.automation.shared.MutableQueue import MutableQueue
 from AFL.automation.shared.utilities import listify
 from AFL.automation.shared import serialization
+from AFL.automation.shared import array_transport
+from AFL.automation.shared import codec
 
 import warnings
 import functools
 
-try:
-#this import block is all for the web-ui unqueued rendering code
-    import bokeh
-    import bokeh.plotting
-    from bokeh.resources import INLINE
-    from bokeh.core.templates import JS_RESOURCES
-    from bokeh.core.templates import CSS_RESOURCES
-    from PIL import Image
-    from matplotlib import cm
-    import io
-    import numpy as np
-    from distutils.util import strtobool
-except (ModuleNotFoundError,ImportError):
+import importlib.util
+import io
+import numpy as np
+
+# The web-ui plotting (bokeh, PIL, matplotlib) and zeroconf stacks take ~1.5 s to
+# import; they are imported where they are used so that servers start quickly.
+if not all(importlib.util.find_spec(name) is not None for name in ('bokeh','PIL','matplotlib')):
     warnings.warn('Plotting imports failed! Live data plotting will not work on this server.',stacklevel=2)
 
-try:
-    import socket
-    from zeroconf import IPVersion, ServiceInfo, Zeroconf
-    _ADVERTISE_ZEROCONF=True
-except (ModuleNotFoundError,ImportError):
+_ADVERTISE_ZEROCONF = importlib.util.find_spec('zeroconf') is not None
+if not _ADVERTISE_ZEROCONF:
     warnings.warn('Could not import zeroconf! Network autodiscovery will not work on this server.',stacklevel=2)
-    _ADVERTISE_ZEROCONF=False
+
+
+def _strtobool(value):
+    """Convert a query-string truth value to bool (replacement for the removed distutils.util.strtobool)"""
+    value = value.lower()
+    if value in ('y','yes','t','true','on','1'):
+        return True
+    if value in ('n','no','f','false','off','0'):
+        return False
+    raise ValueError(f'invalid truth value {value!r}')
 
 class APIServer:
-    def __init__(self,name,data = None,experiment='Development',contact='tbm@nist.gov',index_template='server_page/index.html',new_index_template='server_page/index-new.html',plot_template='simple-bokeh.html',afl_home=None):
+    '''
+    Flask server exposing a Driver's queue, history and unqueued functions.
+
+    Requests that are held open (/wait_for_task long-polls, ndjson streams and unqueued
+    functions registered with ``long_poll``) each occupy one waitress worker thread for as
+    long as they last. At most ``max_held_requests`` of them run at once so that ``threads``
+    minus that many workers always remain for ordinary routes; over the cap, /wait_for_task
+    and streams answer 503 with a Retry-After header and long-poll functions answer at once
+    instead of waiting.
+
+    Parameters
+    ----------
+    threads : int
+        Waitress worker threads (default 16).
+    max_held_requests : int, optional
+        Cap on concurrently held-open requests (default: threads - 4, at least 1).
+    '''
+    def __init__(self,name,data = None,experiment='Development',contact='tbm@nist.gov',index_template='server_page/index.html',new_index_template='server_page/index-new.html',plot_template='simple-bokeh.html',afl_home=None,threads=16,max_held_requests=None):
         self.name = name
         self.experiment = experiment
         self.contact = contact
@@ -70,8 +90,13 @@ class APIServer:
         self.plot_template = plot_template
         self.data = data
         self.afl_home = afl_home
+        self.threads = int(threads)
+        if max_held_requests is None:
+            max_held_requests = max(1,self.threads-4)
+        self.max_held_requests = int(max_held_requests)
+        self._held_requests = threading.BoundedSemaphore(self.max_held_requests)
 
-        self.logger_filter= LoggerFilter('get_queue','queue_state','driver_status','get_server_time','get_info')
+        self.logger_filter= LoggerFilter('get_queue','get_history','queue_state','driver_status','get_server_time','get_info','wait_for_task')
 
         # allows the flask server to find the static and templates directories
         root_path = pathlib.Path(__file__).parent.absolute()
@@ -112,8 +137,8 @@ class APIServer:
         return render_template(template_name, **kwargs), 200
 
 
-    def create_queue(self,driver,add_unqueued=True, start_ca=False, ca_prefix=None, ca_port=5064):
-        self.history = []
+    def create_queue(self,driver,add_unqueued=True, start_ca=False, ca_prefix=None, ca_port=5064, history_max_entries=1000, history_spill_path=None):
+        self.history = TaskHistory(max_entries=history_max_entries,spill_path=history_spill_path)
         self.task_queue = MutableQueue()
         self.driver     = driver
         self.driver.app = self.app
@@ -154,6 +179,8 @@ class APIServer:
                         # other stuff here, AFL system serial, etc.
                         }
         print(properties)
+        import socket
+        from zeroconf import IPVersion, ServiceInfo, Zeroconf
         self.zeroconf_info = ServiceInfo(
             "_aflhttp._tcp.local.",
             f"{self.queue_daemon.driver.name}._aflhttp._tcp.local.",
@@ -184,7 +211,8 @@ class APIServer:
             if use_waitress:
                 if not _HAVE_WAITRESS:
                     raise RuntimeError("waitress is not installed")
-                kwargs.setdefault('threads', 1)
+                # held-open requests are capped at max_held_requests, leaving the rest for other routes
+                kwargs.setdefault('threads', self.threads)
                 wsgi_serve(self.app, **kwargs)
             else:
                 kwargs.setdefault('use_debugger', False)
@@ -208,7 +236,8 @@ class APIServer:
         if use_waitress:
             if not _HAVE_WAITRESS:
                 raise RuntimeError("waitress is not installed")
-            kwargs.setdefault('threads', 1)
+            # held-open requests are capped at max_held_requests, leaving the rest for other routes
+            kwargs.setdefault('threads', self.threads)
             target = functools.partial(wsgi_serve,self.app)
         else:
             kwargs.setdefault('use_debugger', False)
@@ -246,7 +275,9 @@ class APIServer:
         self.app.add_url_rule('/pause','pause',self.pause,methods=['POST'])
         self.app.add_url_rule('/halt','halt',self.halt,methods=['POST'])
         self.app.add_url_rule('/get_queue','get_queue',self.get_queue,methods=['GET'])
+        self.app.add_url_rule('/get_history','get_history',self.get_history,methods=['GET'])
         self.app.add_url_rule('/get_queue_iteration', 'get_queue_iteration', self.get_queue_iteration, methods=['GET'])
+        self.app.add_url_rule('/wait_for_task', 'wait_for_task', self.wait_for_task, methods=['GET'])
         self.app.add_url_rule('/queue_state','queue_state',self.queue_state,methods=['GET'])
         self.app.add_url_rule('/driver_status','driver_status',self.driver_status,methods=['GET'])
         self.app.add_url_rule('/login','login',self.login,methods=['POST'])
@@ -278,7 +309,7 @@ class APIServer:
         '''Live, status page of the robot'''
         #self.app.logger.error(print(self.get_queue()[0].json))
         kw = {}
-        kw['queue']       = self.get_queue()[0].json
+        kw['queue']       = [self.history.tail(50),self.queue_daemon.running_task,list(self.task_queue.queue)]
         kw['contact']     = self.contact
         kw['experiment']  = self.experiment
         kw['queue_state'] = self.queue_state()[0]
@@ -425,17 +456,66 @@ class APIServer:
     def jupyterlite(self):
         return redirect('/static/jl/index.html')
 
+    def _acquire_held_request(self):
+        '''Reserve one of the max_held_requests slots for a held-open request; False if none is free'''
+        return self._held_requests.acquire(blocking=False)
+
+    def _release_held_request(self):
+        self._held_requests.release()
+
+    def _held_request_refused(self):
+        return jsonify({'status':'busy','error':f'more than {self.max_held_requests} held-open requests; retry shortly'}),503,{'Retry-After':'1'}
+
     def render_unqueued(self,func,kwargs_add,**kwargs):
-        '''Convert an unqueued return item into web-suitable output'''
+        '''Convert an unqueued return item into web-suitable output
+
+        Functions registered with ``long_poll='<kwarg>'`` hold the request open while that
+        kwarg is positive; when max_held_requests are already held it is set to 0 so the
+        function answers at once. ndjson streams are refused with 503 over the cap.
+        '''
         self.app.logger.info(f'Serving unqueued function: {func.__name__} received with decorator kwargs {kwargs_add}')
         kwargs.update(kwargs_add)
         # if request.json:
         #     kwargs.update(request.json)
         kwargs.update(request.args)
         render_hint = kwargs['render_hint'] if 'render_hint' in kwargs else None
-        result = func(**kwargs)
+        long_poll = kwargs.pop('long_poll',None)
+
+        if render_hint == 'ndjson':
+            if not self._acquire_held_request():
+                return self._held_request_refused()
+            try:
+                result = func(**kwargs)
+            except BaseException:
+                self._release_held_request()
+                raise
+            # result is an iterable of JSON-serializable items; each is sent as one line as soon as it is produced
+            self.app.logger.info('Streaming ndjson to browser')
+            lines = (json.dumps(item,default=str) + '\n' for item in result)
+            response = Response(lines,mimetype='application/x-ndjson',headers={'Cache-Control':'no-cache','X-Accel-Buffering':'no'})
+            response.call_on_close(self._release_held_request)
+            return response
+
+        if long_poll is not None and float(kwargs.get(long_poll) or 0) > 0:
+            if self._acquire_held_request():
+                try:
+                    result = func(**kwargs)
+                finally:
+                    self._release_held_request()
+            else:
+                kwargs[long_poll] = 0
+                result = func(**kwargs)
+        else:
+            result = func(**kwargs)
         ##result = lambda: func(**kwargs)
 
+        if render_hint in (None,'raw','1d_plot','2d_img') and array_transport.binary_requested():
+            # clients that can decode arrays get the data itself rather than a rendering
+            try:
+                return array_transport.make_response(result)
+            except TypeError:
+                pass
+
         if render_hint is None: #try and infer what we should do based on the return type of func.
             res_probe = result[0] if (type(result) == list and len(result)>0) else result
             if type(res_probe) == np.ndarray:
@@ -476,9 +556,15 @@ class APIServer:
             return "Error while rendering output",500
 
     def send_1d_plot(self,result,multi=False,**kwargs):
+        import bokeh.embed
+        import bokeh.models
+        import bokeh.plotting
+        from bokeh.resources import INLINE
+        from bokeh.core.templates import JS_RESOURCES, CSS_RESOURCES
+
         if 'xlin' in kwargs:
             if type(kwargs['xlin']) is str:
-                xlin = strtobool(kwargs['xlin'])
+                xlin = _strtobool(kwargs['xlin'])
             else:
                 xlin = kwargs['xlin']
             xmode = 'linear' if xlin else 'log'
@@ -486,7 +572,7 @@ class APIServer:
             xmode = 'log'
         if 'ylin' in kwargs:
             if type(kwargs['ylin']) is str:
-                ylin = strtobool(kwargs['ylin'])
+                ylin = _strtobool(kwargs['ylin'])
             else:
                 ylin = kwargs['ylin']
             ymode = 'linear' if ylin else 'log'
@@ -532,12 +618,15 @@ class APIServer:
         return render_template(self.plot_template,script=script,div=div,title=title,bokeh_css=bokeh_css,bokeh_js=bokeh_js)
 
     def send_array_as_jpg(self,array,log_image=False,max_val=None,fillna=0.0,**kwargs):
+        from PIL import Image
+        from matplotlib import cm
+
         #img = Image.fromarray(array.astype('uint8'))
         #self.app.logger.info(type(array))
         array = np.nan_to_num(array,nan=fillna)
         #self.app.logger.info(str(array))
         if type(log_image) is str:
-            log_image = strtobool(log_image)
+            log_image = _strtobool(log_image)
         if log_image:
             array = np.ma.log(array).filled(0)
         if max_val is None:
@@ -572,21 +661,142 @@ class APIServer:
 
     def driver_status(self):
         status = self.queue_daemon.driver.status()
+        ws = self.data.writer_status() if hasattr(self.data,'writer_status') else None
+        if ws is not None:
+            status = list(status)
+            status.append(
+                f"Tiled writer: {ws['depth']}/{ws['max_pending']} pending, "
+                f"{ws['written']} written, {ws['retried']} retried, {ws['spooled']} spooled, "
+                f"latency last/mean/max {ws['latency_last']:.2f}/{ws['latency_mean']:.2f}/{ws['latency_max']:.2f} s"
+            )
         return jsonify(status),200
 
     def get_queue(self):
+        '''Return [history, running, queued]
+
+        Query parameters
+        ----------------
+        with_iteration: bool, optional
+            Prepend the queue iteration id to the output.
+        history_limit: int, optional
+            Only include the newest history_limit history entries. Use 0 with
+            /get_history?since= to fetch history incrementally.
+
+        Large return values in the history are summarized; use
+        /get_history?uuid= to fetch a full entry.
+        '''
         data = request.args
         if 'with_iteration' in data:
             with_iteration = bool(data['with_iteration'])
         else:
             with_iteration = False
-        output = [self.history,self.queue_daemon.running_task,list(self.task_queue.queue)]
+        history_limit = data.get('history_limit',None)
+        history = self.history.tail(None if history_limit is None else int(history_limit))
+        output = [history,self.queue_daemon.running_task,list(self.task_queue.queue)]
         if with_iteration:
             output.insert(0,self.task_queue.iterationid())
         return jsonify(output),200
+
     def get_queue_iteration(self):
         return jsonify(self.task_queue.iterationid()),200
 
+    def get_history(self):
+        '''Page through the task history
+
+        Query parameters
+        ----------------
+        uuid: str, optional
+            Return the full history entry for this task (404 if not retained).
+        since: int, optional
+            Return entries with an iteration greater than this cursor.
+        offset: int, optional
+            Return entries starting this many entries after the oldest retained
+            entry. Ignored if since is given.
+        limit: int, optional
+            Maximum number of entries to return (default 100).
+        full: bool, optional
+            If true, do not summarize large return values.
+
+        Returns {'entries':[...],'first_iteration':...,'last_iteration':...,'total':...}.
+        Clients should pass the iteration of the last entry they received as
+        since on the next call; if since is below first_iteration, older entries
+        have been evicted or cleared.
+        '''
+        data = request.args
+        if 'uuid' in data:
+            task = self.history.find(data['uuid'])
+            if task is None:
+                return jsonify({'error':f'No history entry for uuid {data["uuid"]}'}),404
+            return jsonify(task),200
+
+        limit = int(data.get('limit',100))
+        listed = data.get('full','false').lower() in ('0','false','no')
+        if 'since' in data:
+            start = int(data['since']) + 1
+        else:
+            start = self.history.first_iteration + int(data.get('offset',0))
+        output = {
+            'entries':self.history.entries(start,limit,listed=listed),
+            'first_iteration':self.history.first_iteration,
+            'last_iteration':self.history.last_iteration,
+            'total':len(self.history),
+        }
+        return jsonify(output),200
+
+    def wait_for_task(self):
+        '''Long-poll until a task finishes or the queue drains
+
+        Query parameters
+        ----------------
+        uuid: str, optional
+            Task to wait on. If omitted, wait until nothing is running or queued.
+        for_history: bool, optional
+            If true (default), wait until the task appears in the history. If false,
+            wait until it is no longer running or queued (e.g., it was removed).
+        timeout: float, optional
+            Maximum seconds to hold the request open (capped at 60, default 30).
+
+        Returns {'status':'complete','meta':...} once the condition holds or
+        {'status':'pending'} if the timeout expired first, in which case the
+        client should simply ask again. If max_held_requests requests are already
+        held open, returns 503 with a Retry-After header instead of waiting.
+        '''
+        target_uuid = request.args.get('uuid',None)
+        for_history = request.args.get('for_history','true').lower() not in ('0','false','no')
+        timeout = min(float(request.args.get('timeout',30)),60.0)
+
+        def task_uuids():
+            return [str(task['uuid']) for task in self.queue_daemon.running_task + list(self.task_queue.queue)]
+
+        if target_uuid is None:
+            def done():
+                return (not self.queue_daemon.running_task) and self.task_queue.qsize()==0
+        elif for_history:
+            def done():
+                return self.history.find(target_uuid) is not None
+        else:
+            def done():
+                return target_uuid not in task_uuids()
+
+        if self.task_queue.wait_for_change(done,timeout=0):
+            finished = True
+        elif not self._acquire_held_request():
+            return self._held_request_refused()
+        else:
+            try:
+                finished = self.task_queue.wait_for_change(done,timeout=timeout)
+            finally:
+                self._release_held_request()
+        if not finished:
+            return jsonify({'status':'pending'}),200
+
+        if target_uuid is not None:
+            task = self.history.find(target_uuid)
+        else:
+            task = self.history[-1] if len(self.history) else None
+        meta = task['meta'] if task is not None else None
+        return jsonify({'status':'complete','meta':meta}),200
+
     @jwt_required()
     def deposit_obj(self):
         '''
@@ -594,17 +804,28 @@ class APIServer:
         If a uuid is provided, the object will be stored with that uuid
         Otherwise, a new uuid will be generated.
         In either case, the uuid will be returned to the client.
+
+        The object is either sent as JSON {'obj':<serialized str>, 'uuid':...} or
+        streamed as a codec-encoded request body (Content-Type
+        application/x-afl-codec) with the uuid as a query parameter.
         '''
-        task = request.json
         user = get_jwt_identity()
-        obj = request.json['obj']
         self.app.logger.debug('deposit_obj called')
-        if 'uuid' in request.json.keys():
-            uid = request.json['uuid']
+        if request.mimetype == codec.MIMETYPE:
+            uid = request.args.get('uuid',None)
+            payload = bytearray()
+            while True:
+                chunk = request.stream.read(codec.CHUNK_SIZE)
+                if not chunk:
+                    break
+                payload.extend(chunk)
+            obj = codec.decode(payload)
         else:
+            uid = request.json.get('uuid',None)
+            obj = serialization.deserialize(request.json['obj'])
+        if uid is None:
             uid = 'DB-' + str(uuid.uuid4())
-        self.app.logger.info(f'{user} is storing an object w uuid {id} in driver dropbox')
-        obj = serialization.deserialize(obj)
+        self.app.logger.info(f'{user} is storing an object w uuid {uid} in driver dropbox')
         if self.driver.dropbox is None:
             self.driver.dropbox = {}
         self.driver.dropbox[uid] = obj
@@ -629,8 +850,23 @@ class APIServer:
             delete = task['delete']
         if delete:
             del self.driver.dropbox[task['uuid']]
-        result = serialization.serialize(result)
-        return jsonify({'obj':result}),200
+        return self._send_obj(result)
+
+    def _send_obj(self,obj):
+        '''Return obj in the best encoding the client accepts
+
+        Streams codec bytes if the client accepts application/x-afl-codec, then
+        tries the binary array encoding, and otherwise returns JSON holding a
+        serialized string.
+        '''
+        if codec.MIMETYPE in [mimetype for mimetype,_ in request.accept_mimetypes]:
+            return Response(codec.iter_chunks(codec.encode(obj)),mimetype=codec.MIMETYPE),200
+        if array_transport.binary_requested():
+            try:
+                return array_transport.make_response(obj),200
+            except TypeError:
+                pass
+        return jsonify({'obj':serialization.serialize(obj)}),200
 
     def tiled_upload_data(self):
         """Upload an xarray/nc/csv/tsv/dat payload to Tiled via multipart form data."""
@@ -704,8 +940,7 @@ class APIServer:
         user = get_jwt_identity()
         self.app.logger.info(f'{user} is getting an object named {task["name"]} from driver')
         result = getattr(self.driver,task['name'])
-        result = serialization.serialize(result)
-        return jsonify({'obj':result}),200
+        return self._send_obj(result)
 
     @jwt_required()
     def enqueue(self):
@@ -736,32 +971,19 @@ class APIServer:
         data = request.json
         prior_state = data['prior_state']
         reordered_queue = data['queue']
-        matches = True
         
         self.app.logger.debug(prior_state)
         if prior_state != 'Paused':
             self.app.logger.info(f'Setting queue paused state to true')
             self.queue_daemon.paused = True
         
-        temp_queue = list()
-        for n in range(self.task_queue.qsize()):
-            q_task = self.task_queue.queue[n] #server queue task
-            task_found = False
-            for i in range(len(reordered_queue)):
-                rq_task = reordered_queue[i] #reordered queue task
-                if rq_task['uuid'] == str(q_task['uuid']):
-                    task_found = True
-                    temp_queue.insert(i, q_task)
-                    self.app.logger.debug(f'found {rq_task}')
-            if task_found == False:
-                matches = False
-                self.app.logger.debug('failed')
-                return 'Failed',400
-        if matches:
-            self.app.logger.debug('matched')
-            self.task_queue.queue = temp_queue
-            self.app.logger.debug(self.task_queue.queue)
-            
+        try:
+            self.task_queue.reorder([task['uuid'] for task in reordered_queue])
+        except ValueError:
+            self.app.logger.debug('failed')
+            return 'Failed',400
+        self.app.logger.debug(self.task_queue.queue)
+
         if prior_state != 'Paused':
             self.app.logger.info(f'Setting queue paused state to false')
             self.queue_daemon.paused = False
@@ -771,30 +993,34 @@ class APIServer:
     @jwt_required()
     def remove_items(self):
         items = request.json
-        for i in range(len(items)):
-            self.app.logger.debug(f'remove {items[i]}')
-            uuid = items[i]['uuid']
-            self.task_queue.remove(self._uuid_to_qpos(uuid))
+        self.app.logger.debug(f'remove {items}')
+        try:
+            self.task_queue.remove_many([item['uuid'] for item in items])
+        except KeyError as e:
+            return str(e),404
         return 'Success',200
 
     def _uuid_to_qpos(self,uuid):
-        for idx,item in enumerate(list(self.task_queue.queue)):
-            if str(item['uuid']) == uuid:
-                pos = idx
-                break
-        return pos
+        return self.task_queue.index(uuid)
 
     @jwt_required()
     def remove_item(self):
         uuid=request.json['uuid']
-        self.task_queue.remove(self._uuid_to_qpos(uuid))
+        try:
+            self.task_queue.remove_many([uuid])
+        except KeyError as e:
+            return str(e),404
         return 'Success',200
 
     @jwt_required()
     def move_item(self):
         uuid = request.json['uuid']
         pos = request.json['pos']
-        self.task_queue.move(self._uuid_to_qpos(uuid),new_index=pos)
+        try:
+            qpos = self._uuid_to_qpos(uuid)
+        except KeyError:
+            return f'uuid not in queue: {uuid}',404
+        self.task_queue.move(qpos,new_index=pos)
         return 'Success',200
 
     def clear_queue(self):
@@ -802,7 +1028,7 @@ class APIServer:
         return 'Success',200
 
     def clear_history(self):
-        del self.history[:]
+        self.history.clear()
         return 'Success',200
 
     def debug(self):
@@ -1,10 +1,27 @@
 import requests,uuid,time,copy,inspect,io,os,json
 import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from AFL.automation.shared import serialization
+from AFL.automation.shared import array_transport
+from AFL.automation.shared import codec
 try:
     from AFL.automation.shared.ServerDiscovery import ServerDiscovery
 except ModuleNotFoundError:
     pass
+
+class _TimeoutHTTPAdapter(HTTPAdapter):
+    '''HTTPAdapter that applies a default timeout to requests that do not specify one'''
+    def __init__(self,*args,timeout=None,**kwargs):
+        self.timeout = timeout
+        super().__init__(*args,**kwargs)
+
+    def send(self,request,**kwargs):
+        if kwargs.get('timeout',None) is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request,**kwargs)
+
+
 class Client:
     '''
     Communicate with APIServer 
@@ -12,9 +29,36 @@ class Client:
     This class provides an interface to generate HTTP REST requests that are sent to
     an APIServer, monitor the status of those requests, and retrieve the results of
     those requests.  It is intended to be used as a client to the APIServer class.
+
+    All requests go through a single requests.Session so that connections to the
+    server are kept alive and reused. The underlying connection pool is thread-safe,
+    so one Client may be shared by several threads (up to pool_maxsize concurrent
+    connections). Use the Client as a context manager, or call close(), to release
+    the connections.
+
+    Parameters
+    ----------
+    timeout: float or tuple, optional
+        Default (connect, read) timeout in seconds for requests that do not set one.
+        A read timeout of None waits indefinitely.
+    retries: int
+        Number of times a request is retried after failing to connect, or after a
+        502/503/504 response to a GET.
+    backoff_factor: float
+        Exponential backoff between retries, in seconds.
+    pool_maxsize: int
+        Maximum number of connections kept open to the server.
+    binary_arrays: bool
+        Ask the server to send numpy arrays from unqueued commands in the
+        compact binary encoding of array_transport rather than as JSON lists,
+        and to stream dropbox/driver objects as codec bytes rather than base64
+        strings inside JSON. Arrays decoded from unqueued commands are read-only.
+    compression: str, optional
+        Compression applied to objects sent to the server; one of
+        codec.available_compressions().
     '''
 
-    def __init__(self,ip=None,port='5000',username=None,interactive=False):
+    def __init__(self,ip=None,port='5000',username=None,interactive=False,timeout=(5,None),retries=3,backoff_factor=0.2,pool_maxsize=10,binary_arrays=True,compression=None):
         if ip is None:
             raise ValueError('ip (server address) must be specified')
         #trim trailing slash if present
@@ -27,7 +71,14 @@ class Client:
         self.cached_queue = None
         self.queue_iteration = None
         self.supports_queue_iteration = False
+        self.supports_wait_for_task = None # unknown until the first call to wait
+        self.supports_history_paging = None # unknown until the first call to get_queue
+        self.cached_history = []
         self.headers = {}
+        self.binary_arrays = binary_arrays
+        self.compression = compression
+        self.supports_streamed_objects = None # unknown until the first call to deposit_obj
+        self.session = self._make_session(timeout,retries,backoff_factor,pool_maxsize)
         try:
             import AFL.automation.shared.widgetui
             import IPython
@@ -40,6 +91,59 @@ class Client:
             self.login(username)
 
 
+    @staticmethod
+    def _make_session(timeout,retries,backoff_factor,pool_maxsize):
+        retry = Retry(
+            total=retries,
+            read=0,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502,503,504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+        )
+        adapter = _TimeoutHTTPAdapter(timeout=timeout,max_retries=retry,pool_connections=1,pool_maxsize=pool_maxsize)
+        session = requests.Session()
+        session.mount('http://',adapter)
+        session.mount('https://',adapter)
+        return session
+
+    def close(self):
+        '''Close all pooled connections to the server'''
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,exc_type,exc_value,traceback):
+        self.close()
+
+    def _array_headers(self):
+        '''Request headers that negotiate the binary array encoding if enabled'''
+        if not self.binary_arrays:
+            return self.headers
+        headers = dict(self.headers)
+        headers['Accept'] = f'{array_transport.BINARY_MIMETYPE}, application/json;q=0.9, */*;q=0.8'
+        return headers
+
+    def _object_headers(self):
+        '''Request headers that negotiate streamed codec responses if enabled'''
+        if not self.binary_arrays:
+            return self.headers
+        headers = dict(self.headers)
+        headers['Accept'] = f'{codec.MIMETYPE}, application/json;q=0.9'
+        return headers
+
+    def _read_object(self,response):
+        '''Decode an object returned by get_driver_object or retrieve_obj'''
+        if response.headers.get('Content-Type','').split(';')[0].strip() == codec.MIMETYPE:
+            payload = bytearray()
+            for chunk in response.iter_content(codec.CHUNK_SIZE):
+                payload.extend(chunk)
+            return codec.decode(payload)
+        if array_transport.is_binary_response(response):
+            return array_transport.decode(response.content)
+        return serialization.deserialize(response.json()['obj'])
+
     @classmethod
     def from_server_name(cls,server_name,**kwargs):
         sd = ServerDiscovery()
@@ -49,7 +153,7 @@ class Client:
 
     def logged_in(self):
         url = self.url + '/login_test'
-        response = requests.get(url,headers=self.headers)
+        response = self.session.get(url,headers=self.headers)
         if response.status_code == 200:
             return True
         else:
@@ -58,7 +162,7 @@ class Client:
 
     def login(self,username,populate_commands=True):
         url = self.url + '/login'
-        response = requests.post(url,json={'username':username,'password':'domo_arigato'})
+        response = self.session.post(url,json={'username':username,'password':'domo_arigato'})
         if not (response.status_code == 200):
             raise RuntimeError(f'Client login failed with status code {response.status_code}:\n{response.content}')
         # headers should be included in all HTTP requests 
@@ -68,35 +172,85 @@ class Client:
             self.get_queued_commands()
             self.get_unqueued_commands()
         try:
-            response = requests.post(self.url + '/get_queue_iteration',headers=self.headers)
+            response = self.session.post(self.url + '/get_queue_iteration',headers=self.headers)
             self.supports_queue_iteration = True
         except Exception as e:
             self.supports_queue_iteration = False
 
     def driver_status(self):
-        response = requests.get(self.url+'/driver_status',headers=self.headers)
+        response = self.session.get(self.url+'/driver_status',headers=self.headers)
         if response.status_code != 200:
             raise RuntimeError(f'API call to driver_status command failed with status_code {response.status_code}\n{response.text}')
         return response.json()
     def get_queue(self):
+        '''Return [history, running, queued]
+
+        On servers with /get_history only the history entries added since the
+        last call are transferred; the rest are served from a local cache.
+        '''
         if self.supports_queue_iteration:
-            server_queue_iteration = requests.get(self.url+'/get_queue_iteration',headers=self.headers).json()
+            server_queue_iteration = self.session.get(self.url+'/get_queue_iteration',headers=self.headers).json()
             if server_queue_iteration != self.queue_iteration:
                 # the queue in our store is not so fresh, need to update it
-                self.cached_queue = requests.get(self.url + '/get_queue?with_iteration=1',headers=self.headers).json()
-                self.queue_iteration = self.cached_queue.pop(0)
+                if self.supports_history_paging is not False and self._update_history_cache():
+                    queue = self.session.get(self.url + '/get_queue?with_iteration=1&history_limit=0',headers=self.headers).json()
+                    self.queue_iteration = queue.pop(0)
+                    self.cached_queue = [list(self.cached_history)] + queue[1:]
+                else:
+                    self.cached_queue = self.session.get(self.url + '/get_queue?with_iteration=1',headers=self.headers).json()
+                    self.queue_iteration = self.cached_queue.pop(0)
             return self.cached_queue
         else:
-            response = requests.get(self.url+'/get_queue',headers=self.headers)
+            response = self.session.get(self.url+'/get_queue',headers=self.headers)
             if response.status_code != 200:
                 raise RuntimeError(f'API call to set_queue_mode command failed with status_code {response.status_code}\n{response.text}')
             return response.json()
 
-    def wait(self,target_uuid=None,interval=0.1,for_history=True,first_check_delay=5.0):
+    def _update_history_cache(self,page_size=500):
+        '''Append history entries newer than the cache via /get_history
+
+        Returns False if the server does not support paged history.
+        '''
+        while True:
+            since = self.cached_history[-1]['iteration'] if self.cached_history else 0
+            response = self.session.get(self.url+'/get_history',headers=self.headers,params={'since':since,'limit':page_size})
+            if response.status_code == 404:
+                self.supports_history_paging = False
+                return False
+            if response.status_code != 200:
+                raise RuntimeError(f'API call to get_history failed with status_code {response.status_code}\n{response.text}')
+            self.supports_history_paging = True
+            page = response.json()
+            if since > page['last_iteration']:
+                # a server that numbers its history from 1 was restarted
+                self.cached_history = []
+                continue
+            # drop entries the server has evicted or cleared, or that belong to the run
+            # before a restart (a restarted server numbers its history above the old run)
+            first = page['first_iteration']
+            if self.cached_history and self.cached_history[0]['iteration'] < first:
+                self.cached_history = [task for task in self.cached_history if task['iteration'] >= first]
+            self.cached_history.extend(page['entries'])
+            if not page['entries'] or self.cached_history[-1]['iteration'] >= page['last_iteration']:
+                return True
+
+    def wait(self,target_uuid=None,interval=0.1,for_history=True,first_check_delay=5.0,long_poll_timeout=30):
+        '''Block until a task finishes (or until the queue is empty if target_uuid is None)
+
+        Uses the server's /wait_for_task long-poll endpoint when available, so no
+        requests are made while the task runs beyond one every long_poll_timeout
+        seconds. Falls back to polling /get_queue every interval seconds on
+        servers that predate that endpoint.
+        '''
+        if self.supports_wait_for_task is not False:
+            meta = self._wait_long_poll(target_uuid,for_history,long_poll_timeout)
+            if self.supports_wait_for_task:
+                return meta
+
         time.sleep(first_check_delay)
         while True:
             try:
-                response = requests.get(self.url+'/get_queue',headers=self.headers,timeout=15)
+                response = self.session.get(self.url+'/get_queue',headers=self.headers,timeout=15)
             except (TimeoutError,requests.exceptions.ConnectionError) as e:
                 continue
             history,running,queued = response.json()
@@ -116,8 +270,33 @@ class Client:
         #check the return info of the command we waited on
         return history[-1]['meta']
 
+    def _wait_long_poll(self,target_uuid,for_history,long_poll_timeout):
+        params = {'for_history':int(for_history),'timeout':long_poll_timeout}
+        if target_uuid is not None:
+            params['uuid'] = str(target_uuid)
+        while True:
+            try:
+                response = self.session.get(self.url+'/wait_for_task',headers=self.headers,params=params,timeout=long_poll_timeout+15)
+            except (TimeoutError,requests.exceptions.ConnectionError,requests.exceptions.Timeout) as e:
+                time.sleep(1.0)
+                continue
+            if response.status_code == 404:
+                # older server without the long-poll endpoint
+                self.supports_wait_for_task = False
+                return None
+            if response.status_code == 503:
+                # the server is holding as many long-polls as it allows; back off and ask again
+                time.sleep(float(response.headers.get('Retry-After',1)))
+                continue
+            if response.status_code != 200:
+                raise RuntimeError(f'API call to wait_for_task failed with status_code {response.status_code}\n{response.text}')
+            self.supports_wait_for_task = True
+            result = response.json()
+            if result['status'] == 'complete':
+                return result['meta']
+
     def get_quickbar(self):
-        response = requests.get(self.url+'/get_quickbar',headers=self.headers)
+        response = self.session.get(self.url+'/get_quickbar',headers=self.headers)
         if response.status_code != 200:
             raise RuntimeError(f'API call to get_queued_commands command failed with status_code {response.status_code}\n{response.text}')
 
@@ -125,7 +304,7 @@ class Client:
 
     def server_cmd(self,cmd,**kwargs):
         json=kwargs
-        response = requests.get(self.url+'/'+cmd,headers=self.headers,json=json)
+        response = self.session.get(self.url+'/'+cmd,headers=self.headers,json=json)
         if response.status_code != 200:
             raise RuntimeError(f'API call to server command failed with status_code {response.status_code}\n{response.text}')
         return response.json()
@@ -134,13 +313,15 @@ class Client:
         return self.enqueue(**kwargs)
     
     def unqueued_base(self,**kwargs):
-        response = requests.get(self.url+'/'+kwargs['endpoint'],headers=self.headers)
+        response = self.session.get(self.url+'/'+kwargs['endpoint'],headers=self._array_headers())
         if response.status_code != 200:
             raise RuntimeError(f'API call to set_queue_mode command failed with status_code {response.status_code}\n{response.text}')
+        if array_transport.is_binary_response(response):
+            return array_transport.decode(response.content)
         return response.json()
 
     def get_unqueued_commands(self,inherit_commands=True):
-        response = requests.get(self.url+'/get_unqueued_commands',headers=self.headers)
+        response = self.session.get(self.url+'/get_unqueued_commands',headers=self.headers)
         if response.status_code != 200:
             raise RuntimeError(f'API call to get_queued_commands command failed with status_code {response.status_code}\n{response.text}')
             
@@ -163,7 +344,7 @@ class Client:
         return response.json()
         
     def get_queued_commands(self,inherit_commands=True):
-        response = requests.get(self.url+'/get_queued_commands',headers=self.headers)
+        response = self.session.get(self.url+'/get_queued_commands',headers=self.headers)
         if response.status_code != 200:
             raise RuntimeError(f'API call to get_queued_commands command failed with status_code {response.status_code}\n{response.text}')
 
@@ -193,7 +374,7 @@ class Client:
             del kwargs['params']
             kwargs.update(additional_kwargs)
         json=kwargs
-        response = requests.post(self.url+'/enqueue',headers=self.headers,json=json)
+        response = self.session.post(self.url+'/enqueue',headers=self.headers,json=json)
         if response.status_code != 200:
             raise RuntimeError(f'API call to enqueue command failed with status_code {response.status_code}\n{response.text}')
         task_uuid = str(response.text)
@@ -216,14 +397,14 @@ class Client:
    
 
     def get_server_time(self):
-        response = requests.get(self.url+'/get_server_time',headers=self.headers)
+        response = self.session.get(self.url+'/get_server_time',headers=self.headers)
         if response.status_code != 200:
             raise RuntimeError(f'API call to enqueue command failed with status_code {response.status_code}\n{response.text}')
         return response.text
    
     def query_driver(self,**kwargs):
         json=kwargs
-        response = requests.get(self.url+'/query_driver',headers=self.headers,json=json)
+        response = self.session.get(self.url+'/query_driver',headers=self.headers,json=json)
         if response.status_code != 200:
             raise RuntimeError(f'API call to query_driver command failed with status_code {response.status_code}\n{response.text}')
         return response.text
@@ -299,7 +480,7 @@ class Client:
             'file': (payload_filename, bytes(payload_bytes)),
         }
 
-        response = requests.post(
+        response = self.session.post(
             self.url + '/tiled_upload_data',
             headers=self.headers,
             files=files,
@@ -312,53 +493,53 @@ class Client:
         return response.json()
 
     def reset_queue_daemon(self):
-        response = requests.post(self.url+'/reset_queue_daemon',headers=self.headers)
+        response = self.session.post(self.url+'/reset_queue_daemon',headers=self.headers)
         if response.status_code != 200:
             raise RuntimeError(f'API call to reset_queue_daemon command failed with status_code {response.status_code}\n{response.text}')
         
     def pause(self,state):
         json={'state':state}
-        response = requests.post(self.url+'/pause',headers=self.headers,json=json)
+        response = self.session.post(self.url+'/pause',headers=self.headers,json=json)
         if response.status_code != 200:
             raise RuntimeError(f'API call to pause command failed with status_code {response.status_code}\n{response.text}')
         
     def clear_queue(self):
-        response = requests.post(self.url+'/clear_queue',headers=self.headers)
+        response = self.session.post(self.url+'/clear_queue',headers=self.headers)
         if response.status_code != 200:
             raise RuntimeError(f'API call to clear_queue command failed with status_code {response.status_code}\n{response.text}')
 
     def clear_history(self):
-        response = requests.post(self.url+'/clear_history',headers=self.headers)
+        response = self.session.post(self.url+'/clear_history',headers=self.headers)
         if response.status_code != 200:
             raise RuntimeError(f'API call to clear_history command failed with status_code {response.status_code}\n{response.text}')
 
     def debug(self,state):
         json={'state':state}
-        response = requests.post(self.url+'/debug',headers=self.headers,json=json)
+        response = self.session.post(self.url+'/debug',headers=self.headers,json=json)
         if response.status_code != 200:
             raise RuntimeError(f'API call to debug command failed with status_code {response.status_code}\n{response.text}')
 
     def halt(self):
-        response = requests.post(self.url+'/halt',headers=self.headers,json={})
+        response = self.session.post(self.url+'/halt',headers=self.headers,json={})
         if response.status_code != 200:
             raise RuntimeError(f'API call to halt command failed with status_code {response.status_code}\n{response.content}')
 
     def queue_state(self):
-        response = requests.get(self.url+'/queue_state',headers=self.headers,json={})
+        response = self.session.get(self.url+'/queue_state',headers=self.headers,json={})
         if response.status_code != 200:
             raise RuntimeError(f'API call to queue_state command failed with status_code {response.status_code}\n{response.content}')
         return response
     
     
     def remove_item(self,uuid):
-        response = requests.post(self.url+'/remove_item',headers=self.headers,json={'uuid':uuid})
+        response = self.session.post(self.url+'/remove_item',headers=self.headers,json={'uuid':uuid})
         if response.status_code != 200:
             raise RuntimeError(f'API call to remove_item command failed with status_code {response.status_code}\n{response.content}')
         return response
     
     
     def move_item(self,uuid,pos):
-        response = requests.post(self.url+'/move_item',headers=self.headers,json={'uuid':uuid,'pos':pos})
+        response = self.session.post(self.url+'/move_item',headers=self.headers,json={'uuid':uuid,'pos':pos})
         if response.status_code != 200:
             raise RuntimeError(f'API call to move_item command failed with status_code {response.status_code}\n{response.content}')
         return response
@@ -366,15 +547,15 @@ class Client:
     def set_driver_object(self,**kw):
         json = {}
         for name,value in kw.items():
-            value = serialization.serialize(value)
+            value = serialization.serialize(value,compression=self.compression)
             json[name] = value
-        response = requests.post(self.url+'/set_driver_object',headers=self.headers,json=json)
+        response = self.session.post(self.url+'/set_driver_object',headers=self.headers,json=json)
         return response
 
     def get_driver_object(self,name):
         json = {'name':name}
-        response = requests.get(self.url+'/get_driver_object',headers=self.headers,json=json)
-        return serialization.deserialize(response.json()['obj'])
+        response = self.session.get(self.url+'/get_driver_object',headers=self._object_headers(),json=json,stream=True)
+        return self._read_object(response)
 
     def deposit_obj(self, obj, uid=None):
         '''
@@ -384,13 +565,23 @@ class Client:
         if not specified, a new uuid will be generated
 
         '''
-        json = {}
         if uid is None:
             uid = 'DB-' + str(uuid.uuid4())
+        if self.binary_arrays and self.supports_streamed_objects is not False:
+            headers = dict(self.headers)
+            headers['Content-Type'] = codec.MIMETYPE
+            payload = codec.encode(obj,compression=self.compression)
+            response = self.session.post(self.url + '/deposit_obj', headers=headers, params={'uuid':uid}, data=codec.iter_chunks(payload))
+            if response.status_code in (400,415):
+                # older server that only accepts JSON
+                self.supports_streamed_objects = False
+            else:
+                self.supports_streamed_objects = True
+                return response.content.decode('UTF-8')
+        json = {}
         json['uuid'] = uid
-        json['obj'] = serialization.serialize(obj)
-        # print(json)
-        response = requests.post(self.url + '/deposit_obj', headers=self.headers, json=json)
+        json['obj'] = serialization.serialize(obj,compression=self.compression)
+        response = self.session.post(self.url + '/deposit_obj', headers=self.headers, json=json)
         return response.content.decode('UTF-8')
 
     def retrieve_obj(self, uid,delete=True):
@@ -401,13 +592,13 @@ class Client:
 
         '''
         json = {'uuid':uid,'delete':delete}
-        response = requests.get(self.url + '/retrieve_obj', headers=self.headers, json=json)
+        response = self.session.get(self.url + '/retrieve_obj', headers=self._object_headers(), json=json, stream=True)
         if response.status_code == 404:
             raise KeyError('invalid uuid')
         elif response.status_code != 200:
             raise Exception(f'server-side error: {response.status_code}')
         else:
-            return serialization.deserialize(response.json()['obj'])
+            return self._read_object(response)
 
     def set_object(self,serialize=True,**kw):
         json = {}
@@ -417,7 +608,7 @@ class Client:
             
         for name,value in kw.items():
             if serialize:
-                value = serialization.serialize(value)
+                value = serialization.serialize(value,compression=self.compression)
             json[name] = value
         self.enqueue(**json)
         
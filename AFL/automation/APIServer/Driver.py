@@ -1,4 +1,5 @@
 from AFL.automation.shared.PersistentConfig import PersistentConfig
+from AFL.automation.shared.JournaledConfig import JournaledConfig
 from AFL.automation.shared import serialization
 import logging
 import inspect
@@ -48,6 +49,10 @@ class Driver(DriverWebAppsMixin):
     # Example: {'docs': '/path/to/docs', 'assets': pathlib.Path(__file__).parent / 'assets'}
     # Files will be served at /static/{subpath}/{filename}
     static_dirs = {}
+    # Storage backend for the driver config: 'json' rewrites the full history file
+    # on each change, 'journal' appends only the changes (see JournaledConfig) and
+    # migrates an existing json history on first use
+    config_backend = 'json'
 
     def __init__(self, name, defaults=None, overrides=None, useful_links=None, afl_home=None):
         self.app = None
@@ -56,9 +61,7 @@ class Driver(DriverWebAppsMixin):
         self.logger = logging.getLogger(name if name is not None else 'Driver')
         self.logger.setLevel(logging.INFO)
         self._tiled_client = None  # Cached Tiled client
-        self._combined_dataset_cache = {}
-        self._combined_dataset_cache_order = []
-        self._max_combined_dataset_cache = 3
+        self._tiled_dataset_cache = None  # TiledDatasetCache, created on first plot request
 
         if name is None:
             self.name = 'Driver'
@@ -78,11 +81,21 @@ class Driver(DriverWebAppsMixin):
         self.path.mkdir(exist_ok=True,parents=True)
         self.filepath = self.path / (name + '.config.json')
 
-        self.config = PersistentConfig(
-            path=self.filepath,
-            defaults= defaults,
-            overrides= overrides,
-            )
+        if self.config_backend == 'journal':
+            legacy_filepath = self.filepath
+            self.filepath = self.path / (name + '.config.jsonl')
+            self.config = JournaledConfig(
+                path=self.filepath,
+                defaults= defaults,
+                overrides= overrides,
+                legacy_path=legacy_filepath,
+                )
+        else:
+            self.config = PersistentConfig(
+                path=self.filepath,
+                defaults= defaults,
+                overrides= overrides,
+                )
         
         # collect inherited static directories
         self.static_dirs = self.gather_static_dirs()
@@ -398,9 +411,24 @@ class Driver(DriverWebAppsMixin):
         return super().tiled_get_plot_manifest(entry_ids, **kwargs)
 
     @unqueued()
-    def tiled_get_plot_variable(self, entry_ids, var_name, **kwargs):
-        """Return one variable from the cached combined plot dataset."""
-        return super().tiled_get_plot_variable(entry_ids, var_name, **kwargs)
+    def tiled_get_plot_variable(
+        self, entry_ids, var_name, slices=None, ranges=None, max_points=None, method='auto', **kwargs
+    ):
+        """Return one variable from the cached combined plot dataset, optionally windowed and downsampled."""
+        return super().tiled_get_plot_variable(
+            entry_ids,
+            var_name,
+            slices=slices,
+            ranges=ranges,
+            max_points=max_points,
+            method=method,
+            **kwargs,
+        )
+
+    @unqueued()
+    def tiled_cache_info(self, **kwargs):
+        """Return hit/miss and memory statistics of the Tiled caches."""
+        return super().tiled_cache_info(**kwargs)
 
     @unqueued()
     def tiled_get_metadata(self, entry_id, **kwargs):
@@ -3,14 +3,42 @@ import io
 import json
 import pathlib
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
 from flask import render_template
-from tiled.client import from_uri
-from tiled.queries import Contains, In
+
+from AFL.automation.APIServer.TiledDatasetCache import TiledDatasetCache
+from AFL.automation.APIServer.TiledEntryCache import TiledEntryCache
+from AFL.automation.shared import array_transport
+from AFL.automation.shared.downsample import downsample
+from AFL.automation.shared.timestamps import backfill_sortable_timestamps, parse_timestamp
+
+
+def from_uri(*args, **kwargs):
+    # tiled.client pulls in dask and pandas; import it when the first client is made rather than at server start
+    from tiled.client import from_uri as _from_uri
+    return _from_uri(*args, **kwargs)
 
 
 class DriverWebAppsMixin:
     TILED_RUN_DOCUMENTS_NODE = 'run_documents'
+    # entries fetched concurrently by tiled_concat_datasets; each fetch is two HTTP round-trips
+    TILED_FETCH_WORKERS = 8
+    # resolved entry IDs kept by _get_tiled_run_document_item, and for how many seconds
+    TILED_ENTRY_CACHE_SIZE = 1024
+    TILED_ENTRY_CACHE_TTL = 300.0
+    # index nested run_documents in a background thread on the first lookup that needs a walk
+    TILED_ENTRY_INDEX = False
+    # memory budget of the decoded entries and combined selections kept for plotting, and for how many seconds
+    TILED_DATASET_CACHE_BYTES = 512 * 2**20
+    TILED_DATASET_CACHE_TTL = 300.0
+    # run-metadata timestamps and the sortable fields QueueDaemon writes next to them (see shared.timestamps)
+    TILED_TEMPORAL_SORT_KEYS = {
+        'attrs.meta.started': 'attrs.meta.started_epoch',
+        'attrs.meta.ended': 'attrs.meta.ended_epoch',
+        'meta.started': 'meta.started_epoch',
+        'meta.ended': 'meta.ended_epoch',
+    }
 
     def tiled_browser(self, **kwargs):
         """Serve the Tiled database browser HTML interface."""
@@ -392,6 +420,8 @@ class DriverWebAppsMixin:
                 entry_id = str(write_result.metadata.get('id', ''))
         except Exception:
             entry_id = ''
+        if entry_id:
+            TiledEntryCache.notify_write(entry_id)
 
         return {
             'status': 'success',
@@ -467,10 +497,33 @@ class DriverWebAppsMixin:
             yield path, item
             yield from self._walk_tiled_descendants(item, path)
 
+    def _get_tiled_entry_cache(self):
+        """The TiledEntryCache of this driver, created on first use."""
+        cache = getattr(self, '_tiled_entry_cache', None)
+        if cache is None:
+            cache = TiledEntryCache(max_items=self.TILED_ENTRY_CACHE_SIZE, ttl=self.TILED_ENTRY_CACHE_TTL)
+            self._tiled_entry_cache = cache
+        return cache
+
     def _get_tiled_run_document_item(self, entry_id):
+        """Resolve an entry ID to its (path, item) under run_documents.
+
+        IDs may be direct children, slash-separated paths, or the key of a unique
+        nested entry. Resolutions are cached (see TiledEntryCache).
+        """
         normalized_id = self._normalize_run_document_entry_id(entry_id)
         if not normalized_id:
             raise KeyError(entry_id)
+        cache = self._get_tiled_entry_cache()
+        cached = cache.get(normalized_id)
+        if cached is not None:
+            return cached
+
+        path, item = self._resolve_tiled_run_document_item(normalized_id)
+        cache.put(normalized_id, path, item)
+        return path, item
+
+    def _resolve_tiled_run_document_item(self, normalized_id):
         container = self._get_tiled_run_documents_container(create=False)
         if container is None:
             raise KeyError(normalized_id)
@@ -487,6 +540,17 @@ class DriverWebAppsMixin:
         if normalized_id in container:
             return normalized_id, container[normalized_id]
 
+        cache = self._get_tiled_entry_cache()
+        indexed_paths = cache.lookup_index(normalized_id)
+        if indexed_paths is None:
+            if self.TILED_ENTRY_INDEX:
+                cache.start_index(lambda: self._walk_tiled_descendants(container))
+        elif len(indexed_paths) == 1 and '/' in indexed_paths[0]:
+            try:
+                return self._resolve_tiled_run_document_item(indexed_paths[0])
+            except KeyError:
+                pass  # stale index; fall back to walking
+
         matches = [
             (path, item)
             for path, item in self._walk_tiled_descendants(container)
@@ -550,36 +614,6 @@ class DriverWebAppsMixin:
                 current = current.setdefault(part, {})
             current[parts[-1]] = value
 
-        def _parse_datetime_value(value):
-            if value is None:
-                return None
-            text = str(value).strip()
-            if not text:
-                return None
-
-            # QueueDaemon-style: MM/DD/YY HH:MM:SS-ffffff [TZ][+-HHMM]
-            # Example: 12/07/25 14:30:45-123456 EST-0500
-            match = __import__('re').match(
-                r'^(\d{2})/(\d{2})/(\d{2})\s+(\d{2}):(\d{2}):(\d{2})(?:-(\d{1,6}))?(?:\s+[A-Za-z_]+)?(?:([+-]\d{4}))?\s*$',
-                text,
-            )
-            if match:
-                month, day, year, hour, minute, second = map(int, match.groups()[:6])
-                microseconds = match.group(7) or '0'
-                microsecond = int(microseconds.ljust(6, '0')[:6])
-                return datetime.datetime(2000 + year, month, day, hour, minute, second, microsecond)
-
-            # Display-style/legacy: YYYY-MM-DD HH:MM:SS
-            match = __import__('re').match(
-                r'^(\d{4})-(\d{2})-(\d{2})\s+(\d{2}):(\d{2}):(\d{2})',
-                text,
-            )
-            if match:
-                year, month, day, hour, minute, second = map(int, match.groups())
-                return datetime.datetime(year, month, day, hour, minute, second)
-
-            return None
-
         # Map UI fields to metadata paths for search/sort
         field_path_map = {
             'task_name': 'attrs.task_name',
@@ -635,6 +669,8 @@ class DriverWebAppsMixin:
 
             # Apply search filters
             if query_list:
+                from tiled.queries import Contains, In
+
                 field_values = defaultdict(list)
                 for query_item in query_list:
                     field = query_item.get('field', '')
@@ -661,14 +697,20 @@ class DriverWebAppsMixin:
                     sort_dir = 1 if direction == 'asc' else -1
                     sort_items.append((sort_key, sort_dir))
                 if sort_items:
-                    temporal_sort_fields = {'attrs.meta.started', 'attrs.meta.ended', 'meta.started', 'meta.ended'}
+                    temporal_sort_fields = set(self.TILED_TEMPORAL_SORT_KEYS)
                     requires_temporal_sort = any(sort_key in temporal_sort_fields for sort_key, _ in sort_items)
+                    if requires_temporal_sort and self._tiled_has_sortable_timestamps(results, sort_items):
+                        # sort on the epoch fields server-side, so only the requested page is fetched
+                        sort_items = [(self.TILED_TEMPORAL_SORT_KEYS.get(key, key), d) for key, d in sort_items]
+                        requires_temporal_sort = False
 
                     if not requires_temporal_sort:
                         results = results.sort(*sort_items)
                     else:
-                        # For temporal fields, sort in Python by parsed datetime to avoid
-                        # lexicographic ordering artifacts from string timestamps.
+                        # Some entries predate the sortable timestamp fields (see
+                        # tiled_backfill_sortable_timestamps): sort in Python by parsed
+                        # datetime to avoid lexicographic ordering artifacts from string
+                        # timestamps. This reads the metadata of every matching entry.
                         try:
                             items_for_sort = list(results.items())
                         except Exception:
@@ -684,7 +726,7 @@ class DriverWebAppsMixin:
                                 metadata_obj = dict(item_obj.metadata) if hasattr(item_obj, 'metadata') else {}
                                 value_obj = _get_nested(metadata_obj, sort_key)
                                 if is_temporal:
-                                    parsed = _parse_datetime_value(value_obj)
+                                    parsed = parse_timestamp(value_obj)
                                     if parsed is not None:
                                         return parsed
                                 return value_obj
@@ -781,6 +823,44 @@ class DriverWebAppsMixin:
                 'message': f'Error searching Tiled database: {error_msg}'
             }
 
+    def _tiled_has_sortable_timestamps(self, results, sort_items):
+        """True unless some entry in results has a temporal sort field but not its epoch field.
+
+        Entries without the timestamp at all (e.g. uploaded with tiled_upload_dataset) can't be
+        backfilled and don't prevent the server-side sort; they end up at one end of it.
+        """
+        from tiled.queries import KeyPresent
+
+        for sort_key, _ in sort_items:
+            epoch_key = self.TILED_TEMPORAL_SORT_KEYS.get(sort_key)
+            if epoch_key is None:
+                continue
+            with_timestamp = results.search(KeyPresent(sort_key))
+            if len(with_timestamp) != len(with_timestamp.search(KeyPresent(epoch_key))):
+                return False
+        return True
+
+    def tiled_backfill_sortable_timestamps(self, dry_run=False, **kwargs):
+        """Add sortable timestamp fields to run_documents entries recorded without them.
+
+        Once every entry has them, tiled_search sorts by start/end time server-side.
+
+        Args:
+            dry_run: only count the entries that would be updated
+
+        Returns:
+            dict with status, and 'checked', 'updated' and 'failed' counts/errors
+        """
+        if isinstance(dry_run, str):
+            dry_run = dry_run.lower() in ('1', 'true', 'yes')
+        try:
+            run_documents = self._get_tiled_run_documents_container(create=False)
+        except Exception as e:
+            return {'status': 'error', 'message': str(e)}
+        if run_documents is None:
+            return {'status': 'success', 'checked': 0, 'updated': 0, 'failed': {}}
+        return {'status': 'success', **backfill_sortable_timestamps(run_documents, dry_run=dry_run)}
+
     def tiled_get_data(self, entry_id, **kwargs):
         """Proxy endpoint to get xarray HTML representation from Tiled.
 
@@ -1001,10 +1081,30 @@ class DriverWebAppsMixin:
         except Exception as e:
             return {'status': 'error', 'message': f'Error building plot manifest: {str(e)}'}
 
-        return {'status': 'success', 'manifest': manifest}
+        return {'status': 'success', 'manifest': manifest, 'failed_entries': ds.attrs.get('failed_entries', {})}
+
+    def tiled_get_plot_variable(
+        self, entry_ids, var_name, slices=None, ranges=None, max_points=None, method='auto', **kwargs
+    ):
+        """Return one variable or coordinate from the cached combined plot dataset.
+
+        By default the whole variable is returned. To send only what a plot can show,
+        it can be windowed and then downsampled server-side (see shared.downsample).
+
+        Args:
+            entry_ids: JSON array (or list) of entry IDs
+            var_name: data variable or coordinate to return
+            slices: JSON object {dim: [start, stop] or [start, stop, step]} of positions to keep
+            ranges: JSON object {dim: [low, high]} of coordinate values to keep (inclusive)
+            max_points: maximum values per dimension, as an int or a JSON object {dim: int}
+            method: auto, lttb, minmax (1D), mean or stride
 
-    def tiled_get_plot_variable(self, entry_ids, var_name, **kwargs):
-        """Return one variable or coordinate from the cached combined plot dataset."""
+        Returns:
+            dict with status and 'variable' (name, dims, shape, kind, is_coord, data).
+            A windowed or downsampled variable also has 'source_shape', 'method' (None
+            if no downsampling was needed) and 'coords', the values of its dimension
+            coordinates that go with data.
+        """
         try:
             entry_ids_list = self._parse_entry_ids_param(entry_ids)
         except (json.JSONDecodeError, ValueError) as e:
@@ -1015,6 +1115,16 @@ class DriverWebAppsMixin:
         if not var_name:
             return {'status': 'error', 'message': 'var_name is required'}
 
+        try:
+            slices = self._parse_plot_object_param(slices, 'slices')
+            ranges = self._parse_plot_object_param(ranges, 'ranges')
+            if isinstance(max_points, str):
+                max_points = json.loads(max_points) if max_points.strip() else None
+            if max_points is not None and not isinstance(max_points, (int, dict)):
+                raise ValueError('max_points must be an integer or a JSON object')
+        except (json.JSONDecodeError, ValueError) as e:
+            return {'status': 'error', 'message': f'Invalid plot window: {str(e)}'}
+
         try:
             ds = self._get_or_create_combined_dataset(entry_ids_list)
         except Exception as e:
@@ -1030,20 +1140,68 @@ class DriverWebAppsMixin:
             else:
                 return {'status': 'error', 'message': f'Variable "{var_name}" not found in combined dataset'}
 
-            return {
-                'status': 'success',
-                'variable': {
-                    'name': var_name,
-                    'dims': list(getattr(data_array, 'dims', ())),
-                    'shape': [int(v) for v in getattr(data_array, 'shape', ())],
-                    'kind': getattr(getattr(data_array, 'dtype', None), 'kind', 'O'),
-                    'is_coord': is_coord,
-                    'data': self._safe_tolist(data_array.values),
-                }
+            reduced = bool(slices or ranges or max_points)
+            source_shape = [int(v) for v in getattr(data_array, 'shape', ())]
+            used_method = None
+            if reduced:
+                try:
+                    data_array = self._window_plot_variable(data_array, slices, ranges)
+                    if max_points:
+                        data_array, used_method = downsample(data_array, max_points, method=method or 'auto')
+                except (KeyError, TypeError, ValueError) as e:
+                    return {'status': 'error', 'message': f'Invalid plot window for "{var_name}": {str(e)}'}
+
+            # binary-capable clients receive arrays as-is, browsers get JSON lists
+            binary = array_transport.binary_requested()
+            variable = {
+                'name': var_name,
+                'dims': list(getattr(data_array, 'dims', ())),
+                'shape': [int(v) for v in getattr(data_array, 'shape', ())],
+                'kind': getattr(getattr(data_array, 'dtype', None), 'kind', 'O'),
+                'is_coord': is_coord,
+                'data': data_array.values if binary else self._safe_tolist(data_array.values),
             }
+            if reduced:
+                variable['source_shape'] = source_shape
+                variable['method'] = used_method
+                variable['coords'] = {
+                    dim: data_array.coords[dim].values if binary else self._safe_tolist(data_array.coords[dim].values)
+                    for dim in data_array.dims
+                    if dim in data_array.coords
+                }
+            return {'status': 'success', 'variable': variable}
         except Exception as e:
             return {'status': 'error', 'message': f'Error serializing variable "{var_name}": {str(e)}'}
 
+    def _parse_plot_object_param(self, value, name):
+        """Parse a {dim: [...]} plot-window parameter from a JSON string or dict."""
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return {}
+        parsed = json.loads(value) if isinstance(value, str) else value
+        if not isinstance(parsed, dict):
+            raise ValueError(f'{name} must be a JSON object of dimension -> bounds')
+        return parsed
+
+    def _window_plot_variable(self, data_array, slices, ranges):
+        """Select positions (slices) and coordinate ranges (ranges) of a plot variable."""
+        import numpy as np
+
+        for dim, bounds in slices.items():
+            if dim not in data_array.dims:
+                raise KeyError(f'no dimension "{dim}"')
+            data_array = data_array.isel({dim: slice(*bounds)})
+        for dim, (low, high) in ranges.items():
+            if dim not in data_array.coords:
+                raise KeyError(f'no coordinate "{dim}"')
+            values = data_array.coords[dim].values
+            keep = np.ones(values.shape, dtype=bool)
+            if low is not None:
+                keep &= values >= low
+            if high is not None:
+                keep &= values <= high
+            data_array = data_array.isel({dim: np.flatnonzero(keep)})
+        return data_array
+
     def tiled_get_full_json(self, entry_id, **kwargs):
         """Proxy endpoint to get JSON-serializable full data payload for one entry.
 
@@ -1296,6 +1454,38 @@ class DriverWebAppsMixin:
 
         return dataset, metadata
 
+    def _fetch_tiled_entries(self, entry_ids):
+        """Fetch several entries from Tiled concurrently.
+
+        Each entry is fetched with _fetch_single_tiled_entry on a bounded thread pool
+        (TILED_FETCH_WORKERS threads), so the metadata lookups and array reads of
+        different entries overlap instead of running one round-trip at a time.
+
+        Parameters
+        ----------
+        entry_ids : List[str]
+            Tiled entry IDs to fetch
+
+        Returns
+        -------
+        list of tuple
+            (dataset, metadata, error) for each entry, in the order of entry_ids. A
+            failed fetch does not abort the others: its dataset and metadata are None
+            and error is the exception message.
+        """
+        def fetch(entry_id):
+            try:
+                dataset, metadata = self._fetch_single_tiled_entry(entry_id)
+            except Exception as e:
+                return None, None, str(e)
+            return dataset, metadata, None
+
+        n_workers = max(1, min(int(self.TILED_FETCH_WORKERS), len(entry_ids)))
+        if n_workers == 1:
+            return [fetch(entry_id) for entry_id in entry_ids]
+        with ThreadPoolExecutor(max_workers=n_workers, thread_name_prefix='tiled-fetch') as pool:
+            return list(pool.map(fetch, entry_ids))
+
     def _detect_sample_dimension(self, dataset, allow_size_fallback=True):
         """Detect the sample dimension from a dataset.
         
@@ -1341,7 +1531,7 @@ class DriverWebAppsMixin:
             return dims[0] if dims else None
         return None
 
-    def tiled_concat_datasets(self, entry_ids, concat_dim='index', variable_prefix=''):
+    def tiled_concat_datasets(self, entry_ids, concat_dim='index', variable_prefix='', skip_failed=False):
         """Gather datasets from Tiled entries and concatenate them along a dimension.
 
         This method fetches multiple datasets from a Tiled server, extracts metadata
@@ -1360,6 +1550,10 @@ class DriverWebAppsMixin:
         variable_prefix : str, default=""
             Optional prefix to prepend to variable, coordinate, and dimension names
             (except the concat_dim itself)
+        skip_failed : bool, default=False
+            If True, entries that cannot be fetched are left out and listed in the
+            result's ``failed_entries`` attribute (entry_id -> error message) instead
+            of failing the whole call
 
         Returns
         -------
@@ -1379,32 +1573,47 @@ class DriverWebAppsMixin:
         ------
         ValueError
             If entry_ids is empty
-            If any entry_id is not found in Tiled
+            If any entry_id is not found in Tiled (all entries if skip_failed)
             If datasets cannot be fetched or concatenated
         """
-        import xarray as xr
-        import numpy as np
-
         if not entry_ids:
             raise ValueError("entry_ids list cannot be empty")
 
-        # Fetch all entry datasets and metadata
+        return self._combine_tiled_entries(
+            entry_ids,
+            self._fetch_tiled_entries(entry_ids),
+            concat_dim=concat_dim,
+            variable_prefix=variable_prefix,
+            skip_failed=skip_failed,
+        )
+
+    def _combine_tiled_entries(self, entry_ids, results, concat_dim='index', variable_prefix='', skip_failed=False):
+        """Combine fetched entries as described in tiled_concat_datasets.
+
+        results holds the (dataset, metadata, error) of each entry ID, as returned by
+        _fetch_tiled_entries. The entry datasets are not modified.
+        """
         datasets = []
         metadata_list = []
-        for entry_id in entry_ids:
-            try:
-                ds, metadata = self._fetch_single_tiled_entry(entry_id)
-                datasets.append(ds)
-                metadata_list.append(metadata)
-            except Exception as e:
-                raise ValueError(f"Failed to fetch entry '{entry_id}': {str(e)}")
+        failed_entries = {}
+        for entry_id, (ds, metadata, error) in zip(entry_ids, results):
+            if error is not None:
+                failed_entries[str(entry_id)] = error
+                continue
+            datasets.append(ds)
+            metadata_list.append(metadata)
+
+        if failed_entries and not skip_failed:
+            raise ValueError('; '.join(
+                f"Failed to fetch entry '{entry_id}': {error}" for entry_id, error in failed_entries.items()
+            ))
 
         if not datasets:
             raise ValueError("No datasets fetched")
 
         # SINGLE ENTRY CASE: Return dataset as-is with metadata added
         if len(datasets) == 1:
-            dataset = datasets[0]
+            dataset = datasets[0].copy()
             metadata = metadata_list[0]
             
             # Detect the sample dimension from the dataset
@@ -1457,10 +1666,51 @@ class DriverWebAppsMixin:
                         rename_dict[dim_name] = variable_prefix + dim_name
                 if rename_dict:
                     dataset = dataset.rename(rename_dict)
-            
+
+            if failed_entries:
+                dataset.attrs['failed_entries'] = failed_entries
             return dataset
 
         # MULTIPLE ENTRIES CASE: Concatenate along concat_dim
+        concatenated = self._concat_entry_datasets(datasets, metadata_list, concat_dim)
+
+        # Prefix names (data vars, coords, dims) but NOT the concat_dim itself
+        if variable_prefix:
+            rename_dict = {}
+
+            # Rename data variables
+            for var_name in list(concatenated.data_vars):
+                if not var_name.startswith(variable_prefix):
+                    rename_dict[var_name] = variable_prefix + var_name
+
+            # Rename coordinates (but not concat_dim)
+            for coord_name in list(concatenated.coords):
+                if coord_name == concat_dim:
+                    continue  # Don't rename the concat_dim coordinate
+                if coord_name not in concatenated.dims:  # Non-dimension coordinates
+                    if not coord_name.startswith(variable_prefix):
+                        rename_dict[coord_name] = variable_prefix + coord_name
+
+            # Rename dimensions but NOT concat_dim
+            for dim_name in list(concatenated.dims):
+                if dim_name == concat_dim:
+                    continue  # Don't rename the concat_dim
+                if not dim_name.startswith(variable_prefix):
+                    rename_dict[dim_name] = variable_prefix + dim_name
+
+            # Apply all renames
+            if rename_dict:
+                concatenated = concatenated.rename(rename_dict)
+
+        if failed_entries:
+            concatenated.attrs['failed_entries'] = failed_entries
+        return concatenated
+
+    def _concat_entry_datasets(self, datasets, metadata_list, concat_dim):
+        """Concatenate entry datasets along concat_dim with their sample coordinates and compositions."""
+        import xarray as xr
+        import numpy as np
+
         # Collect metadata values for each entry
         sample_names = [m['sample_name'] for m in metadata_list]
         sample_uuids = [m['sample_uuid'] for m in metadata_list]
@@ -1515,35 +1765,30 @@ class DriverWebAppsMixin:
         if compositions is not None:
             concatenated = concatenated.assign(composition=compositions)
 
-        # Prefix names (data vars, coords, dims) but NOT the concat_dim itself
-        if variable_prefix:
-            rename_dict = {}
-
-            # Rename data variables
-            for var_name in list(concatenated.data_vars):
-                if not var_name.startswith(variable_prefix):
-                    rename_dict[var_name] = variable_prefix + var_name
+        return concatenated
 
-            # Rename coordinates (but not concat_dim)
-            for coord_name in list(concatenated.coords):
-                if coord_name == concat_dim:
-                    continue  # Don't rename the concat_dim coordinate
-                if coord_name not in concatenated.dims:  # Non-dimension coordinates
-                    if not coord_name.startswith(variable_prefix):
-                        rename_dict[coord_name] = variable_prefix + coord_name
+    def _append_combined_dataset(self, combined, results, concat_dim='index'):
+        """Append fetched entries to a combination built by _concat_entry_datasets.
 
-            # Rename dimensions but NOT concat_dim
-            for dim_name in list(concatenated.dims):
-                if dim_name == concat_dim:
-                    continue  # Don't rename the concat_dim
-                if not dim_name.startswith(variable_prefix):
-                    rename_dict[dim_name] = variable_prefix + dim_name
+        The result is the same as concatenating all the entries at once, without
+        concatenating the ones already in combined again.
+        """
+        import xarray as xr
+        import numpy as np
 
-            # Apply all renames
-            if rename_dict:
-                concatenated = concatenated.rename(rename_dict)
+        datasets = [ds for ds, _, _ in results]
+        metadata_list = [metadata for _, metadata, _ in results]
+        tail = self._concat_entry_datasets(datasets, metadata_list, concat_dim)
+        if ('composition' in combined.data_vars) != ('composition' in tail.data_vars):
+            raise ValueError('compositions present in only one part')
 
-        return concatenated
+        appended = xr.concat([combined, tail], dim=concat_dim, coords='minimal', compat='override', join='outer')
+        if 'composition' in appended.data_vars:
+            if list(combined['components'].values) != list(tail['components'].values):
+                # entries without a component have 0 of it, as in _concat_entry_datasets
+                appended['composition'] = appended['composition'].fillna(0)
+            appended = appended.assign_coords({concat_dim: np.arange(appended.sizes[concat_dim])})
+        return appended
 
     def _parse_entry_ids_param(self, entry_ids):
         """Parse entry_ids parameter from JSON string or list."""
@@ -1555,57 +1800,86 @@ class DriverWebAppsMixin:
             raise ValueError('entry_ids must be a JSON array or list')
         return parsed
 
-    def _entry_ids_cache_key(self, entry_ids_list):
-        """Create a stable cache key from ordered entry IDs."""
-        return json.dumps(entry_ids_list, separators=(',', ':'))
-
-    def _cache_put(self, cache, order, key, value, max_items):
-        """Put value into bounded insertion-ordered cache."""
-        if key in cache:
-            cache[key] = value
-            if key in order:
-                order.remove(key)
-            order.append(key)
-            return
+    def _get_tiled_dataset_cache(self):
+        """The TiledDatasetCache of this driver, created on first use."""
+        cache = getattr(self, '_tiled_dataset_cache', None)
+        if cache is None:
+            cache = TiledDatasetCache(max_bytes=self.TILED_DATASET_CACHE_BYTES, ttl=self.TILED_DATASET_CACHE_TTL)
+            self._tiled_dataset_cache = cache
+        return cache
+
+    def _fetch_tiled_entries_cached(self, entry_ids):
+        """Like _fetch_tiled_entries, but only fetch the entries not in the dataset cache."""
+        cache = self._get_tiled_dataset_cache()
+        results = [None] * len(entry_ids)
+        missing = []
+        for i, entry_id in enumerate(entry_ids):
+            cached = cache.get_entry(entry_id)
+            if cached is None:
+                missing.append(i)
+            else:
+                results[i] = (*cached, None)
 
-        cache[key] = value
-        order.append(key)
-        while len(order) > max_items:
-            old_key = order.pop(0)
-            cache.pop(old_key, None)
-
-    def _ensure_combined_dataset_cache(self):
-        """Initialize combined-dataset cache state for bare mixin test doubles."""
-        if not hasattr(self, '_combined_dataset_cache') or self._combined_dataset_cache is None:
-            self._combined_dataset_cache = {}
-        if not hasattr(self, '_combined_dataset_cache_order') or self._combined_dataset_cache_order is None:
-            self._combined_dataset_cache_order = []
-        if not hasattr(self, '_max_combined_dataset_cache') or self._max_combined_dataset_cache is None:
-            self._max_combined_dataset_cache = 3
+        if missing:
+            fetched = self._fetch_tiled_entries([entry_ids[i] for i in missing])
+            for i, (dataset, metadata, error) in zip(missing, fetched):
+                results[i] = (dataset, metadata, error)
+                if error is None:
+                    cache.put_entry(entry_ids[i], dataset, metadata)
+        return results
 
     def _get_or_create_combined_dataset(self, entry_ids_list):
-        """Get combined dataset from cache or create and cache it."""
-        self._ensure_combined_dataset_cache()
-        key = self._entry_ids_cache_key(entry_ids_list)
-        cached = self._combined_dataset_cache.get(key)
-        if cached is not None:
-            return cached
+        """Get the combined dataset of a selection, building it from cached parts where possible.
 
-        combined_dataset = self.tiled_concat_datasets(
-            entry_ids=entry_ids_list,
-            concat_dim='index',
-            variable_prefix=''
-        )
-        self._cache_put(
-            self._combined_dataset_cache,
-            self._combined_dataset_cache_order,
-            key,
-            combined_dataset,
-            self._max_combined_dataset_cache
-        )
+        Entries already decoded for another selection are not fetched again, and a
+        selection that extends a cached one is built by appending the new entries to it.
+        """
+        cache = self._get_tiled_dataset_cache()
+        combined_dataset = cache.get_combined(entry_ids_list)
+        if combined_dataset is not None:
+            return combined_dataset
+
+        results = self._fetch_tiled_entries_cached(entry_ids_list)
+        combined_dataset = None
+        if len(entry_ids_list) > 2 and all(error is None for _, _, error in results):
+            prefix = cache.longest_cached_prefix(entry_ids_list)
+            if prefix is not None:
+                prefix_ids, prefix_dataset = prefix
+                try:
+                    combined_dataset = self._append_combined_dataset(prefix_dataset, results[len(prefix_ids):])
+                except Exception:
+                    combined_dataset = None  # e.g. mismatched variables; concatenate everything instead
+
+        if combined_dataset is None:
+            combined_dataset = self._combine_tiled_entries(
+                entry_ids_list,
+                results,
+                concat_dim='index',
+                variable_prefix='',
+                skip_failed=True,
+            )
+        if combined_dataset.attrs.get('failed_entries'):
+            # don't keep a partial dataset around; the failures may be transient
+            return combined_dataset
+        if len(entry_ids_list) > 1:
+            # a single entry is cheap to rebuild from its cached dataset
+            cache.put_combined(entry_ids_list, combined_dataset)
 
         return combined_dataset
 
+    def tiled_cache_info(self, **kwargs):
+        """Statistics of the Tiled caches used by the browser and plotting endpoints.
+
+        Returns:
+            dict with status, 'datasets' (TiledDatasetCache.info) and 'entries'
+            (TiledEntryCache.info)
+        """
+        return {
+            'status': 'success',
+            'datasets': self._get_tiled_dataset_cache().info(),
+            'entries': self._get_tiled_entry_cache().info(),
+        }
+
     def _sanitize_for_json(self, obj):
         """Recursively replace NaN/Inf with None for JSON compatibility."""
         import math
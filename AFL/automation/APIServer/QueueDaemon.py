@@ -10,9 +10,8 @@ import subprocess
 import json
 import pathlib
 import numpy as np
-import pandas as pd
-import xarray as xr
 from AFL.automation.shared.serialization import is_serialized
+from AFL.automation.shared.timestamps import QUEUE_TIME_FORMAT, sortable_fields
 from AFL.automation.APIServer.data.DataTrashcan import DataTrashcan
 
 class QueueDaemon(threading.Thread):
@@ -56,7 +55,7 @@ class QueueDaemon(threading.Thread):
     def terminate(self):
         self.app.logger.info('Terminating QueueDaemon thread')
         self.stop = True
-        self.task_queue.put(None)
+        self.task_queue.put(None,0)
         
     def check_if_paused(self):
         # pause queue but notify user of state every minute
@@ -106,8 +105,12 @@ class QueueDaemon(threading.Thread):
             start_time = datetime.datetime.now()
             masked_package = self.mask_serialized_objs(package)
             #masked_package['meta']['started'] = start_time.strftime('%H:%M:%S')
-            masked_package['meta']['started'] = start_time.strftime('%m/%d/%y %H:%M:%S-%f %Z%z')
+            masked_package['meta']['started'] = start_time.strftime(QUEUE_TIME_FORMAT)
+            # epoch/ISO companions let Tiled sort runs by time server-side
+            masked_package['meta'].update(sortable_fields('started', start_time))
             self.running_task = [masked_package]
+            # waiters are only woken once the task is visible as running, not when it leaves the queue
+            self.task_queue.mark_changed()
             
             self.check_if_paused()
 
@@ -136,15 +139,20 @@ class QueueDaemon(threading.Thread):
             self.data['status_after'] = self.driver.status()
             end_time = datetime.datetime.now()
             run_time = end_time - start_time
-            masked_package['meta']['ended'] = end_time.strftime('%m/%d/%y %H:%M:%S-%f %Z%z')
+            masked_package['meta']['ended'] = end_time.strftime(QUEUE_TIME_FORMAT)
+            masked_package['meta'].update(sortable_fields('ended', end_time))
             masked_package['meta']['run_time_seconds'] = run_time.seconds
             masked_package['meta']['run_time_minutes'] = run_time.seconds/60
             masked_package['meta']['exit_state'] = exit_state
+            # pandas and xarray are only imported by drivers that use them, and a
+            # return value can't be one of their types unless they have been imported
+            pd = sys.modules.get('pandas')
+            xr = sys.modules.get('xarray')
             if isinstance(return_val,np.ndarray):
                 masked_package['meta']['return_val'] = return_val.tolist()
-            elif isinstance(return_val,pd.Series):
+            elif pd is not None and isinstance(return_val,pd.Series):
                 masked_package['meta']['return_val'] = return_val.tolist()
-            elif isinstance(return_val,xr.Dataset):
+            elif xr is not None and isinstance(return_val,xr.Dataset):
                 masked_package['meta']['return_val'] = 'xarray.Dataset'
             else:
                 masked_package['meta']['return_val'] = return_val
@@ -156,22 +164,24 @@ class QueueDaemon(threading.Thread):
             # the following block names the return value a special name
             # so that DataTiled can store it as the main data element
 
-            if isinstance(return_val, xr.Dataset):
+            if xr is not None and isinstance(return_val, xr.Dataset):
                 self.data['main_dataset'] = return_val
             elif type(return_val) is np.ndarray:
                 self.data['main_array'] = return_val
-            elif type(return_val) is pd.DataFrame:
+            elif pd is not None and type(return_val) is pd.DataFrame:
                 self.data['main_dataframe'] = return_val
-            elif type(return_val) is pd.Series:
+            elif pd is not None and type(return_val) is pd.Series:
                 self.data['main_dataframe'] = return_val.to_frame()
 
             self.data.finalize()
             self.history.append(masked_package)#history for this server restart
 
-            self.task_queue.iteration_id = time.time()
-            # mark queue iteration as changed
+            # mark queue iteration as changed and wake clients waiting on this task
+            self.task_queue.mark_changed()
             
             self.busy = False
             time.sleep(0.1)
 
+        self.app.logger.info('Flushing pending data writes')
+        self.data.flush()
         self.app.logger.info('QueueDaemon runloop exiting')
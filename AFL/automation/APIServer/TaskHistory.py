@@ -0,0 +1,179 @@
+import collections
+import json
+import pathlib
+import threading
+import time
+
+# Return values whose JSON form is larger than this are summarized in history listings
+MAX_LISTED_RETURN_VAL_BYTES = 64 * 1024
+
+
+class TaskHistory:
+    '''
+    Bounded store of the tasks executed by a QueueDaemon.
+
+    The most recent ``max_entries`` tasks are held in an in-memory ring. When
+    ``spill_path`` is given, tasks evicted from the ring are appended to a JSON
+    Lines file there so that they can still be paged through or looked up by uuid;
+    otherwise they are dropped.
+
+    Every appended task is tagged with a monotonically increasing ``iteration``
+    which serves as the cursor for incremental fetches via ``since()``. Unless
+    ``first_iteration`` is given, iterations start at the creation time in
+    microseconds, so that a restarted server continues above the iterations of
+    the previous run and clients holding an old cursor see its entries as
+    evicted rather than mixing the two runs (microseconds keep iterations below
+    2**53, so browsers compare them exactly). Listings
+    summarize very large list/dict return values (see ``summarize``); ``find()``
+    always returns the full entry.
+
+    For backwards compatibility the store behaves like a read-only list of tasks
+    (len, indexing, iteration) that also supports ``append`` and ``clear``.
+    '''
+
+    def __init__(self, max_entries=1000, spill_path=None, max_listed_return_val_bytes=MAX_LISTED_RETURN_VAL_BYTES,
+                 first_iteration=None):
+        self.max_entries = max_entries
+        self.max_listed_return_val_bytes = max_listed_return_val_bytes
+        self.spill_path = pathlib.Path(spill_path) if spill_path is not None else None
+
+        self._lock = threading.RLock()
+        self._ring = collections.deque()
+        self._listed = collections.deque()  # summarized copies of the entries in _ring
+        self._uuid_index = {}  # str(uuid) -> iteration
+        self._spill_offsets = []  # byte offset of each spilled entry, oldest first
+        if first_iteration is None:
+            first_iteration = time.time_ns() // 1000
+        self._first_iteration = first_iteration  # iteration of the oldest retained entry
+        self._next_iteration = first_iteration
+
+        if self.spill_path is not None:
+            # history is local to this server restart, so start with an empty spill file
+            self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+            self.spill_path.write_text('')
+
+    def __len__(self):
+        with self._lock:
+            return self._next_iteration - self._first_iteration
+
+    def __iter__(self):
+        return iter(self.entries(self._first_iteration, len(self)))
+
+    def __getitem__(self, index):
+        with self._lock:
+            n_entries = len(self)
+            if isinstance(index, slice):
+                return [self[i] for i in range(*index.indices(n_entries))]
+            if index < 0:
+                index += n_entries
+            if not 0 <= index < n_entries:
+                raise IndexError('history index out of range')
+            return self._get(self._first_iteration + index)
+
+    @property
+    def first_iteration(self):
+        return self._first_iteration
+
+    @property
+    def last_iteration(self):
+        '''Iteration of the newest entry, or first_iteration-1 if empty'''
+        return self._next_iteration - 1
+
+    def append(self, task):
+        '''Add a finished task, tagging it with the next iteration. Returns the iteration.'''
+        with self._lock:
+            iteration = self._next_iteration
+            self._next_iteration += 1
+            task['iteration'] = iteration
+            self._ring.append(task)
+            self._listed.append(self.summarize(task))
+            self._uuid_index[str(task.get('uuid'))] = iteration
+            while len(self._ring) > self.max_entries:
+                self._evict()
+            return iteration
+
+    def _evict(self):
+        task = self._ring.popleft()
+        self._listed.popleft()
+        if self.spill_path is None:
+            self._uuid_index.pop(str(task.get('uuid')), None)
+            self._first_iteration = task['iteration'] + 1
+            return
+        with open(self.spill_path, 'a') as f:
+            offset = f.tell()
+            f.write(json.dumps(task, default=str) + '\n')
+        self._spill_offsets.append(offset)
+
+    def _first_ring_iteration(self):
+        return self._ring[0]['iteration'] if self._ring else self._next_iteration
+
+    def _get(self, iteration, listed=False):
+        '''Return the entry with this iteration from the ring or the spill file'''
+        ring_start = self._first_ring_iteration()
+        if iteration >= ring_start:
+            store = self._listed if listed else self._ring
+            return store[iteration - ring_start]
+        with open(self.spill_path, 'r') as f:
+            f.seek(self._spill_offsets[iteration - self._first_iteration])
+            task = json.loads(f.readline())
+        return self.summarize(task) if listed else task
+
+    def summarize(self, task):
+        '''Return a copy of task with oversized list/dict return values replaced by a short description'''
+        meta = task.get('meta', {})
+        return_val = meta.get('return_val', None)
+        if not isinstance(return_val, (list, tuple, dict)):
+            return task
+        try:
+            size = len(json.dumps(return_val, default=str))
+        except (TypeError, ValueError):
+            return task
+        if size <= self.max_listed_return_val_bytes:
+            return task
+        listed = dict(task)
+        listed['meta'] = dict(meta)
+        listed['meta']['return_val'] = (
+            f'<{type(return_val).__name__} of {len(return_val)} elements, {size} bytes; '
+            f'fetch /get_history?uuid={task.get("uuid")} for the full value>'
+        )
+        listed['meta']['return_val_truncated'] = True
+        return listed
+
+    def find(self, task_uuid):
+        '''Return the full entry for task_uuid, or None if it is not retained'''
+        with self._lock:
+            iteration = self._uuid_index.get(str(task_uuid), None)
+            if iteration is None:
+                return None
+            return self._get(iteration)
+
+    def entries(self, start, limit=None, listed=False):
+        '''Return up to limit entries starting at iteration start, oldest first'''
+        with self._lock:
+            start = max(start, self._first_iteration)
+            stop = self._next_iteration if limit is None else min(self._next_iteration, start + max(limit, 0))
+            return [self._get(i, listed=listed) for i in range(start, stop)]
+
+    def since(self, iteration, limit=None):
+        '''Return summarized entries newer than iteration, oldest first'''
+        return self.entries(iteration + 1, limit, listed=True)
+
+    def tail(self, n=None):
+        '''Return the newest n summarized entries (all retained entries if n is None)'''
+        with self._lock:
+            if n is None:
+                start = self._first_iteration
+            else:
+                start = self._next_iteration - max(n, 0)
+            return self.entries(start, listed=True)
+
+    def clear(self):
+        '''Drop all entries. Iterations keep counting up so that cursors stay valid.'''
+        with self._lock:
+            self._ring.clear()
+            self._listed.clear()
+            self._uuid_index.clear()
+            self._spill_offsets = []
+            self._first_iteration = self._next_iteration
+            if self.spill_path is not None:
+                self.spill_path.write_text('')
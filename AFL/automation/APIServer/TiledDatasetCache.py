@@ -0,0 +1,172 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+
+class TiledDatasetCache:
+    '''
+    LRU cache of decoded Tiled datasets for plotting, bounded by memory rather than item count.
+
+    Holds two kinds of item under one byte budget:
+
+    - entries: the (dataset, metadata) fetched for a single entry ID, shared by every selection
+      that contains it, so a new selection only fetches the entries not seen before;
+    - combinations: the dataset concatenated from an ordered list of entry IDs, so repeated
+      requests for the same selection (manifest, then each variable) skip the concat.
+
+    An item's size is its ``nbytes``. Items bigger than the whole budget are not kept, and the
+    least recently used items are dropped until the total fits ``max_bytes``.
+
+    ``TiledEntryCache.notify_write(path)`` drops the entry written at path and every combination
+    containing it from every cache of the process. Items also expire ``ttl`` seconds after they
+    were stored, which bounds how stale a dataset rewritten by another process can get.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Memory budget of all items together.
+
+    ttl : float or None
+        Seconds an item stays valid; None keeps items until evicted or invalidated.
+    '''
+
+    _instances = weakref.WeakSet()
+    _instances_lock = threading.Lock()
+
+    def __init__(self, max_bytes=512 * 2**20, ttl=300.0):
+        self.max_bytes = int(max_bytes)
+        self.ttl = ttl
+        self.nbytes = 0
+        self.evictions = 0
+        self._stats = {'entry': [0, 0], 'combined': [0, 0]}  # kind -> [hits, misses]
+        self._items = OrderedDict()  # (kind, key) -> (value, nbytes, stored_at), oldest access first
+        self._lock = threading.Lock()
+        with TiledDatasetCache._instances_lock:
+            TiledDatasetCache._instances.add(self)
+
+    @staticmethod
+    def _sizeof(dataset):
+        try:
+            return int(dataset.nbytes)
+        except Exception:
+            return 0
+
+    def _expired(self, cached):
+        return self.ttl is not None and time.monotonic() - cached[2] > self.ttl
+
+    def _get(self, kind, key):
+        with self._lock:
+            cached = self._items.get((kind, key))
+            if cached is not None and self._expired(cached):
+                del self._items[(kind, key)]
+                self.nbytes -= cached[1]
+                cached = None
+            if cached is None:
+                self._stats[kind][1] += 1
+                return None
+            self._items.move_to_end((kind, key))
+            self._stats[kind][0] += 1
+            return cached[0]
+
+    def _put(self, kind, key, value, nbytes):
+        with self._lock:
+            old = self._items.pop((kind, key), None)
+            if old is not None:
+                self.nbytes -= old[1]
+            if nbytes > self.max_bytes:
+                return
+            self._items[(kind, key)] = (value, nbytes, time.monotonic())
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted_bytes, _) = self._items.popitem(last=False)
+                self.nbytes -= evicted_bytes
+                self.evictions += 1
+
+    def get_entry(self, entry_id):
+        '''Return the cached (dataset, metadata) of entry_id, or None.'''
+        return self._get('entry', str(entry_id))
+
+    def put_entry(self, entry_id, dataset, metadata):
+        self._put('entry', str(entry_id), (dataset, metadata), self._sizeof(dataset))
+
+    def get_combined(self, entry_ids):
+        '''Return the cached combination of exactly these entry IDs (in this order), or None.'''
+        return self._get('combined', tuple(str(e) for e in entry_ids))
+
+    def put_combined(self, entry_ids, dataset):
+        self._put('combined', tuple(str(e) for e in entry_ids), dataset, self._sizeof(dataset))
+
+    def longest_cached_prefix(self, entry_ids):
+        '''
+        The longest cached combination whose entry IDs start entry_ids, as (prefix_ids, dataset).
+
+        Only strict prefixes are considered; returns None if there is none. Does not count as a
+        hit or miss, and does not refresh the combination's position in the LRU order.
+        '''
+        entry_ids = tuple(str(e) for e in entry_ids)
+        best = None
+        with self._lock:
+            for (kind, key), cached in self._items.items():
+                if kind != 'combined' or len(key) >= len(entry_ids) or entry_ids[:len(key)] != key:
+                    continue
+                if self._expired(cached):
+                    continue
+                value = cached[0]
+                if best is None or len(key) > len(best[0]):
+                    best = (key, value)
+        return best
+
+    @staticmethod
+    def _matches(entry_id, path):
+        # entry IDs are requested as a path under run_documents or as the key of a nested entry
+        entry_id = entry_id.strip('/')
+        return entry_id == path or entry_id.rsplit('/', 1)[-1] == path.rsplit('/', 1)[-1]
+
+    def invalidate(self, path=None):
+        '''Forget everything, or only the entry written at path and every combination containing it.'''
+        with self._lock:
+            if path is None:
+                self._items.clear()
+                self.nbytes = 0
+                return
+            path = str(path).strip('/')
+            for kind, key in list(self._items):
+                entry_ids = key if kind == 'combined' else (key,)
+                if any(self._matches(entry_id, path) for entry_id in entry_ids):
+                    _, nbytes, _ = self._items.pop((kind, key))
+                    self.nbytes -= nbytes
+
+    @classmethod
+    def notify_write(cls, path):
+        '''Record that the run document at path (relative to run_documents) was (re)written.'''
+        with cls._instances_lock:
+            instances = list(cls._instances)
+        for cache in instances:
+            cache.invalidate(path)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def info(self):
+        with self._lock:
+            counts = {'entry': 0, 'combined': 0}
+            for kind, _ in self._items:
+                counts[kind] += 1
+            return {
+                'bytes': self.nbytes,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'entries': counts['entry'],
+                'combined': counts['combined'],
+                'entry_hits': self._stats['entry'][0],
+                'entry_misses': self._stats['entry'][1],
+                'combined_hits': self._stats['combined'][0],
+                'combined_misses': self._stats['combined'][1],
+                'evictions': self.evictions,
+            }
@@ -0,0 +1,153 @@
+import threading
+import time
+import weakref
+from collections import OrderedDict, defaultdict
+
+from AFL.automation.APIServer.TiledDatasetCache import TiledDatasetCache
+
+
+class TiledEntryCache:
+    '''
+    Bounded LRU cache of resolved run-document entries, with an optional index of nested containers.
+
+    Maps an entry ID (as requested by the browser) to its path under run_documents and the Tiled
+    item found there, so that repeated requests for the same entry skip the lookups, and for nested
+    entries the walk over every descendant. Entries expire ``ttl`` seconds after they were resolved,
+    which bounds how stale the cached item metadata can get.
+
+    Writes to run_documents go through ``notify_write(path)`` (DataTiled and tiled_upload_dataset
+    call it), which drops the cached entries for that path in every cache of the process, adds
+    the path to their indexes, and drops the decoded datasets of that entry (TiledDatasetCache).
+
+    The index maps the last path segment of every node under run_documents to its full path(s).
+    It is built by walking the container once in a background thread (``start_index``); while it is
+    complete, a nested ID is resolved by a direct lookup of its path instead of a walk.
+
+    Parameters
+    ----------
+    max_items : int
+        Number of resolved entries kept.
+
+    ttl : float or None
+        Seconds a resolved entry stays valid; None keeps entries until evicted or invalidated.
+    '''
+
+    _instances = weakref.WeakSet()
+    _instances_lock = threading.Lock()
+
+    def __init__(self, max_items=1024, ttl=300.0):
+        self.max_items = int(max_items)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # entry_id -> (path, item, resolved_at), oldest access first
+        self._index = None  # leaf -> list of paths, once built
+        self._index_thread = None
+        self._lock = threading.Lock()
+        with TiledEntryCache._instances_lock:
+            TiledEntryCache._instances.add(self)
+
+    def get(self, entry_id):
+        '''Return the cached (path, item) for entry_id, or None.'''
+        with self._lock:
+            cached = self._entries.get(entry_id)
+            if cached is not None and self.ttl is not None and time.monotonic() - cached[2] > self.ttl:
+                del self._entries[entry_id]
+                cached = None
+            if cached is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            return cached[0], cached[1]
+
+    def put(self, entry_id, path, item):
+        with self._lock:
+            self._entries[entry_id] = (path, item, time.monotonic())
+            self._entries.move_to_end(entry_id)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, path=None):
+        '''Forget everything, or only the entries resolved to (or requested as) path.'''
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+                return
+            path = str(path).strip('/')
+            for entry_id, (resolved_path, _, _) in list(self._entries.items()):
+                if entry_id == path or resolved_path == path:
+                    del self._entries[entry_id]
+
+    @classmethod
+    def notify_write(cls, path):
+        '''Record that the run document at path (relative to run_documents) was (re)written.'''
+        path = str(path).strip('/')
+        with cls._instances_lock:
+            instances = list(cls._instances)
+        for cache in instances:
+            cache.invalidate(path)
+            cache._add_to_index(path)
+        TiledDatasetCache.notify_write(path)
+
+    def lookup_index(self, leaf):
+        '''Paths whose last segment is leaf, or None if the index isn't built.'''
+        with self._lock:
+            if self._index is None:
+                return None
+            return list(self._index.get(leaf, ()))
+
+    def _add_to_index(self, path):
+        with self._lock:
+            if self._index is None:
+                return
+            paths = self._index[path.rsplit('/', 1)[-1]]
+            if path not in paths:
+                paths.append(path)
+
+    def start_index(self, walk):
+        '''
+        Build the index in a daemon thread unless it is built or being built.
+
+        walk() must yield the (path, item) of every node under run_documents.
+        '''
+        with self._lock:
+            if self._index is not None or (self._index_thread is not None and self._index_thread.is_alive()):
+                return
+            self._index_thread = threading.Thread(
+                target=self._build_index, args=(walk,), name='tiled-entry-index', daemon=True
+            )
+            self._index_thread.start()
+
+    def _build_index(self, walk):
+        index = defaultdict(list)
+        try:
+            for path, _ in walk():
+                index[path.rsplit('/', 1)[-1]].append(path)
+        except Exception:
+            return  # leave the index unbuilt; lookups keep walking
+        with self._lock:
+            self._index = index
+
+    def wait_for_index(self, timeout=None):
+        '''Wait for a background index build; returns True if the index is built.'''
+        thread = self._index_thread
+        if thread is not None:
+            thread.join(timeout)
+        with self._lock:
+            return self._index is not None
+
+    def drop_index(self):
+        with self._lock:
+            self._index = None
+
+    def info(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'max_items': self.max_items,
+                'ttl': self.ttl,
+                'indexed_paths': None if self._index is None else sum(len(p) for p in self._index.values()),
+            }
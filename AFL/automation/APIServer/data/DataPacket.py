@@ -1,12 +1,35 @@
 import copy
+import sys
 from collections.abc import MutableMapping
+from types import MappingProxyType
 
 import numpy as np
-import pandas as pd
 
 # Maximum number of elements in a list/array before it gets condensed to a summary string in metadata
 METADATA_ARRAY_LENGTH_CUTOFF = 25
 
+# Large data payloads that are passed by reference rather than deep-copied by _dict()/snapshot()
+PAYLOAD_TYPES = {
+    'numpy': ('ndarray',),
+    'xarray': ('Dataset', 'DataArray'),
+    'pandas': ('DataFrame', 'Series'),
+}
+
+
+def is_payload(value):
+    '''
+    True if value is one of the PAYLOAD_TYPES.
+
+    pandas and xarray are slow to import and are not needed to start a server, so their types are only
+    looked up once something else has imported them; a value cannot be an instance of a type whose
+    module was never loaded.
+    '''
+    for module_name, type_names in PAYLOAD_TYPES.items():
+        module = sys.modules.get(module_name)
+        if module is not None and isinstance(value, tuple(getattr(module, name) for name in type_names)):
+            return True
+    return False
+
 
 class DataPacket(MutableMapping):
     '''
@@ -64,6 +87,9 @@ class DataPacket(MutableMapping):
         else:
             self._transient_dict.__delitem__(key)
 
+    def __contains__(self, key):
+        return key in self._system_dict or key in self._sample_dict or key in self._transient_dict
+
     def __len__(self):
         return len(self._system_dict) + len(self._sample_dict) + len(self._transient_dict)
 
@@ -77,48 +103,65 @@ class DataPacket(MutableMapping):
         returns a single dictionary that contains all values stored in data.
         
         N.B.: this dict is a deepcopy of the internal structures, so it cannot be written to - or at least, if it is, those writes will be lost.
+
+        Top-level array payloads (see PAYLOAD_TYPES) are not copied; the returned dict holds references to them.
         
         '''
-        retval = copy.deepcopy(self._transient_dict)
-        retval.update(self._sample_dict)
-        retval.update(self._system_dict)
+        memo = {}
+        retval = {}
+        for store in (self._transient_dict, self._sample_dict, self._system_dict):
+            for key, value in store.items():
+                if is_payload(value):
+                    retval[key] = value
+                else:
+                    retval[key] = copy.deepcopy(value, memo)
         return retval
 
+    def snapshot(self):
+        '''
+        Returns a read-only view of all values stored in data at the time of the call.
+
+        Later writes to (or resets of) this packet do not show up in the snapshot, but array payloads are shared
+        with the packet by reference, so they should not be modified in place after being stored.
+        '''
+        return MappingProxyType(self._dict())
+
     def _core_sanitize(self, to_sanitize):
         '''
         Inner worker function to make sure that all values in a dictionary are JSON-serializable.
         '''
-        output_dict = copy.deepcopy(to_sanitize)
+        # every branch below builds a new value, so the input never needs to be copied
+        output_dict = {}
 
         #print("DataPacket._core_sanitize start:")
-        for key in to_sanitize.keys():
+        for key, value in to_sanitize.items():
             key = str(key)
             #print("key",key,'type(key)',type(key))
             
-            if isinstance(to_sanitize[key], (list, tuple)):
+            if isinstance(value, (list, tuple)):
                 # print(f'Sanitized list/tuple {key}')
-                if len(to_sanitize[key]) > METADATA_ARRAY_LENGTH_CUTOFF:
-                    output_dict[key] = f"<{type(to_sanitize[key]).__name__} of {len(to_sanitize[key])} elements>"
+                if len(value) > METADATA_ARRAY_LENGTH_CUTOFF:
+                    output_dict[key] = f"<{type(value).__name__} of {len(value)} elements>"
                 else:
-                    output_dict[key] = list(to_sanitize[key])
-            elif isinstance(to_sanitize[key], (int, float, str, bool)):
+                    output_dict[key] = list(value)
+            elif isinstance(value, (int, float, str, bool)):
                 # print(f'No need to sanitize primitive {key}')
-                pass
-            elif isinstance(to_sanitize[key], np.ndarray):
+                output_dict[key] = value
+            elif isinstance(value, np.ndarray):
                 # print(f'Sanitized ndarray {key}')
-                if to_sanitize[key].size > METADATA_ARRAY_LENGTH_CUTOFF:
-                    output_dict[key] = f"<ndarray of shape {to_sanitize[key].shape}, dtype {to_sanitize[key].dtype}>"
+                if value.size > METADATA_ARRAY_LENGTH_CUTOFF:
+                    output_dict[key] = f"<ndarray of shape {value.shape}, dtype {value.dtype}>"
                 else:
-                    output_dict[key] = to_sanitize[key].tolist()
-            elif isinstance(to_sanitize[key], pd.DataFrame):
+                    output_dict[key] = value.tolist()
+            elif 'pandas' in sys.modules and isinstance(value, sys.modules['pandas'].DataFrame):
                 # print(f'Sanitized dataframe {key}')
-                output_dict[key] = to_sanitize[key].to_json()
-            elif isinstance(to_sanitize[key], dict):
+                output_dict[key] = value.to_json()
+            elif isinstance(value, dict):
                 # print(f'Sanitized dict {key}')
-                output_dict[key] = self._core_sanitize(to_sanitize[key])
+                output_dict[key] = self._core_sanitize(value)
             else:
                 # print(f'Sanitized fallback to string {key}')
-                output_dict[key] = str(to_sanitize[key])
+                output_dict[key] = str(value)
 
         return output_dict
 
@@ -154,6 +197,14 @@ class DataPacket(MutableMapping):
         self.transmit()
         self.reset()
 
+    def flush(self, timeout=None):
+        '''
+        Blocks until all previously finalized data has been delivered to the data store.
+
+        Synchronous implementations deliver data inside finalize, so there is nothing to wait for.
+        '''
+        return True
+
     def reset_sample(self):
         self._sample_dict = {}
 
@@ -1,21 +1,36 @@
 from .DataPacket import DataPacket
+from .TiledWriteQueue import TiledWriteQueue
+from AFL.automation.APIServer.TiledEntryCache import TiledEntryCache
 import datetime
 import json
 import os
-import tiled.client
-from tiled.client.xarray import write_xarray_dataset
 import numpy as np
-import xarray as xr
-import copy
 import uuid
 
+# tiled (with dask and pandas) and xarray take seconds to import, so they are imported
+# when a DataTiled is created rather than whenever the data package is loaded
+
+
+def write_xarray_dataset(*args, **kwargs):
+    from tiled.client.xarray import write_xarray_dataset as _write_xarray_dataset
+    return _write_xarray_dataset(*args, **kwargs)
+
+
 class DataTiled(DataPacket):
     '''
       A DataPacket implementation that serializes its data to Tiled
       with backup to JSON, named according to the current time.
+
+      If async_writes is True, finalize() snapshots the packet and hands it
+      to a bounded TiledWriteQueue so that the Tiled round-trip does not
+      block the next queued task. Writes for the same sample are delivered
+      in order, failed writes are retried and then spooled to backup_path.
     '''
 
-    def __init__(self,server,api_key,backup_path):
+    def __init__(self,server,api_key,backup_path,async_writes=False,write_workers=1,
+                 max_pending=32,backpressure='block',put_timeout=None,max_retries=3,retry_backoff=1.0):
+        import tiled.client
+
         self.backup_path = backup_path
         self.tiled_client = tiled.client.from_uri(
             server,
@@ -26,6 +41,20 @@ class DataTiled(DataPacket):
         
         self.arrays = {}
 
+        if async_writes:
+            self.write_queue = TiledWriteQueue(
+                write_fn=self._write_job,
+                spool_fn=self._spool_job,
+                workers=write_workers,
+                max_pending=max_pending,
+                backpressure=backpressure,
+                put_timeout=put_timeout,
+                max_retries=max_retries,
+                retry_backoff=retry_backoff,
+            )
+        else:
+            self.write_queue = None
+
     def _get_or_create_container(self, name):
         try:
             return self.tiled_client[name]
@@ -37,6 +66,24 @@ class DataTiled(DataPacket):
     def finalize(self):
         self.transmit()
         self.reset()
+
+    def flush(self,timeout=None):
+        '''Wait for all background writes to complete. Returns False on timeout.'''
+        if self.write_queue is None:
+            return True
+        return self.write_queue.flush(timeout=timeout)
+
+    def close(self,timeout=None):
+        '''Drain and stop the background writer, if any.'''
+        if self.write_queue is None:
+            return True
+        return self.write_queue.close(timeout=timeout)
+
+    def writer_status(self):
+        '''Return queue-depth/latency counters of the background writer, or None if writes are synchronous.'''
+        if self.write_queue is None:
+            return None
+        return self.write_queue.status()
         
     def add_array(self,array_name,array):
         self.arrays[array_name] = array
@@ -55,12 +102,12 @@ class DataTiled(DataPacket):
                 del (self._transient_dict[name])
         
     def transmit(self):
-        if 'main_dataset' in self._dict().keys():
+        if 'main_dataset' in self:
             # main_dataset is handled directly in _transmit, no need to move to arrays dict
             self._transmit()
             return
         
-        if 'main_array' in self._dict().keys():
+        if 'main_array' in self:
             self.arrays['main_array'] = self._transient_dict['main_array']
             del(self._transient_dict['main_array'])
             
@@ -71,8 +118,93 @@ class DataTiled(DataPacket):
             self.arrays = {}
         else:
             self._transmit()
-        
-            
+
+    def _snapshot_job(self):
+        '''
+            Removes the main data element from this container and returns a
+            detached write job holding it along with sanitized metadata.
+
+            The metadata is taken from a single snapshot of this container, so it
+            can be reset or mutated while the job is written in the background.
+            The main data element is passed by reference and is not copied.
+        '''
+        main_data_keys = ('main_dataset','main_array','array_name','main_dataframe')
+        snapshot = self.snapshot()
+        for name in main_data_keys:
+            self._transient_dict.pop(name, None)
+
+        job = {'key': str(snapshot.get('uuid', uuid.uuid4()))}
+        if 'main_dataset' in snapshot:
+            job['kind'] = 'dataset'
+            # shallow copy so that merging metadata into attrs leaves the caller's dataset untouched
+            job['data'] = snapshot['main_dataset'].copy(deep=False)
+        elif 'main_array' in snapshot:
+            job['kind'] = 'array'
+            job['data'] = np.asarray(snapshot['main_array'])
+            job['array_name'] = snapshot.get('array_name', 'main_array')
+        elif 'main_dataframe' in snapshot:
+            job['kind'] = 'dataframe'
+            job['data'] = snapshot['main_dataframe']
+        else:
+            job['kind'] = 'empty'
+            job['data'] = [np.nan]
+        job['metadata'] = self._core_sanitize({k:v for k,v in snapshot.items() if k not in main_data_keys})
+        return job
+
+    def _write_job(self,job):
+        '''
+            Writes a single job produced by _snapshot_job to Tiled. Raises on failure.
+        '''
+        run_document_container = self._get_or_create_container('run_documents')
+        metadata = job['metadata']
+        if job['kind'] in ('dataset','array'):
+            if job['kind'] == 'dataset':
+                dataset = job['data']
+            else:
+                import xarray as xr
+
+                # Convert numpy array to xarray Dataset
+                # Create dimension names based on array shape
+                dims = [f'dim_{i}' for i in range(job['data'].ndim)]
+                dataset = xr.Dataset({job['array_name']: (dims, job['data'])})
+            # Merge DataPacket metadata into dataset.attrs so it becomes searchable
+            # write_xarray_dataset stores dataset.attrs in metadata['attrs']
+            if not hasattr(dataset, 'attrs'):
+                dataset.attrs = {}
+            dataset.attrs.update(metadata)
+            # Write using native Tiled xarray support
+            write_xarray_dataset(run_document_container, dataset, key=job['key'])
+        elif job['kind'] == 'dataframe':
+            run_document_container.write_dataframe(job['data'], key=job['key'], metadata=metadata)
+        else:
+            run_document_container.write_array(job['data'], key=job['key'], metadata=metadata)
+        TiledEntryCache.notify_write(job['key'])
+
+    def _spool_job(self,job,error=None):
+        '''
+            Serializes a job that could not be written to Tiled to JSON in the
+            backup path, named according to the current time. The main data is
+            stored under 'main_data' next to the metadata.
+        '''
+        print(f'Exception while transmitting to Tiled! {error}. Saving data in backup store.')
+        metadata = dict(job['metadata'])
+        try:
+            if job['kind'] == 'dataset':
+                metadata['main_data'] = {'type': 'xarray.Dataset', 'variables': list(job['data'].data_vars.keys())}
+            elif job['kind'] == 'array':
+                metadata['main_data'] = job['data'].tolist()
+            elif job['kind'] == 'dataframe':
+                metadata['main_data'] = job['data'].to_json()
+        except Exception:
+            metadata['main_data'] = str(job['data'])
+        filename = str(datetime.datetime.now()).replace(' ','-')
+        try:
+            os.makedirs(self.backup_path, exist_ok=True)
+            with open(os.path.join(self.backup_path, f'{filename}.json'),'w') as f:
+                json.dump(metadata,f)
+        except Exception as backup_error:
+            print(f'Failed to write backup JSON to {self.backup_path}: {backup_error}')
+
     def _transmit(self):
         '''
             Transmits the data inside this container to Tiled.
@@ -80,81 +212,16 @@ class DataTiled(DataPacket):
             If a tiled connection fails or is not possible, serializes to JSON,
             named according to the current time.
 
+            With async_writes enabled, the job is queued for the background
+            writer instead and this method returns immediately.
+
         '''
-        
+        job = self._snapshot_job()
+        if self.write_queue is not None:
+            self.write_queue.submit(job, order_key=job['metadata'].get('sample_uuid', ''))
+            return
+
         try:
-            entry_uuid = str(self._dict().get('uuid', uuid.uuid4()))
-            run_document_container = self._get_or_create_container('run_documents')
-            if 'main_dataset' in self._dict().keys():
-                main_data = copy.deepcopy(self._dict()['main_dataset'])
-                del(self._transient_dict['main_dataset'])
-                # Sanitize internal dicts first
-                self._sanitize()
-                # Get sanitized metadata from DataPacket
-                metadata = self._dict()
-                # Merge DataPacket metadata into dataset.attrs so it becomes searchable
-                # write_xarray_dataset stores dataset.attrs in metadata['attrs']
-                if not hasattr(main_data, 'attrs'):
-                    main_data.attrs = {}
-                # Update dataset attrs with DataPacket metadata
-                main_data.attrs.update(metadata)
-                # Write using native Tiled xarray support
-                write_xarray_dataset(run_document_container, main_data, key=entry_uuid)
-            elif 'main_array' in self._dict().keys():
-                main_data = copy.deepcopy(self._dict()['main_array'])
-                array_name = self._transient_dict.get('array_name', 'main_array')
-                del(self._transient_dict['main_array'])
-                if 'array_name' in self._transient_dict:
-                    del(self._transient_dict['array_name'])
-                # Convert numpy array to xarray Dataset
-                # Create dimension names based on array shape
-                dims = [f'dim_{i}' for i in range(main_data.ndim)]
-                dataset = xr.Dataset({array_name: (dims, main_data)})
-                # Sanitize internal dicts first
-                self._sanitize()
-                # Get sanitized metadata from DataPacket
-                metadata = self._dict()
-                # Merge DataPacket metadata into dataset.attrs so it becomes searchable
-                # write_xarray_dataset stores dataset.attrs in metadata['attrs']
-                if not hasattr(dataset, 'attrs'):
-                    dataset.attrs = {}
-                # Update dataset attrs with DataPacket metadata
-                dataset.attrs.update(metadata)
-                # Write using native Tiled xarray support
-                write_xarray_dataset(run_document_container, dataset, key=entry_uuid)
-            elif 'main_dataframe' in self._dict().keys():
-                main_data = copy.deepcopy(self._dict()['main_dataframe'])
-                del(self._transient_dict['main_dataframe'])
-                fxn = run_document_container.write_dataframe
-                self._sanitize()
-                fxn(main_data, key=entry_uuid, metadata=self._dict())
-            else:
-                main_data = [np.nan]
-                fxn = run_document_container.write_array
-                self._sanitize()
-                fxn(main_data, key=entry_uuid, metadata=self._dict())
+            self._write_job(job)
         except Exception as e:
-            print(f'Exception while transmitting to Tiled! {e}. Saving data in backup store.')
-            if 'main_data' not in locals():
-                if 'main_dataset' in self._dict().keys():
-                    # For datasets, try to serialize key info
-                    try:
-                        dataset = self._dict()['main_dataset']
-                        self['main_data'] = {'type': 'xarray.Dataset', 'variables': list(dataset.data_vars.keys())}
-                    except:
-                        self['main_data'] = 'xarray.Dataset'
-                elif 'main_array' in self._dict().keys():
-                    main_data = self._dict()['main_array']
-                    if isinstance(main_data, np.ndarray):
-                        self['main_data'] = main_data.tolist()
-                    else:
-                        self['main_data'] = str(main_data)
-            self._sanitize()
-            
-            filename = str(datetime.datetime.now()).replace(' ','-')
-            try:
-                os.makedirs(self.backup_path, exist_ok=True)
-                with open(os.path.join(self.backup_path, f'{filename}.json'),'w') as f:
-                    json.dump(self._dict(),f)
-            except Exception as backup_error:
-                print(f'Failed to write backup JSON to {self.backup_path}: {backup_error}')
+            self._spool_job(job, e)
@@ -0,0 +1,205 @@
+import queue
+import threading
+import time
+import zlib
+
+
+class TiledWriteQueue:
+    '''
+    A bounded, write-behind queue that hands finalized data packets to background worker threads.
+
+    Jobs are routed to workers by an ordering key (e.g., the sample uuid) so that all writes for a
+    given sample are delivered in the order they were submitted. Each job is attempted up to
+    ``max_retries + 1`` times with exponential backoff; jobs that still fail are handed to
+    ``spool_fn`` so they can be written to a local backup store.
+
+    Parameters
+    ----------
+    write_fn : callable
+        Called as ``write_fn(job)`` from a worker thread. Should raise on failure.
+
+    spool_fn : callable
+        Called as ``spool_fn(job, error)`` when a job cannot be written (retries exhausted or
+        queue full with ``backpressure='spool'``).
+
+    workers : int
+        Number of worker threads.
+
+    max_pending : int
+        Maximum number of jobs waiting across all workers before back-pressure applies.
+
+    backpressure : {'block', 'spool'}
+        What to do when the queue is full. 'block' waits for space (up to ``put_timeout`` seconds,
+        then spools), 'spool' immediately writes the job to the backup store.
+
+    put_timeout : float or None
+        Maximum time to wait for space when ``backpressure='block'``. None waits forever.
+
+    max_retries : int
+        Number of times a failed write is retried before the job is spooled.
+
+    retry_backoff : float
+        Delay in seconds before the first retry; doubled after each subsequent failure.
+    '''
+
+    BACKPRESSURE_POLICIES = ('block', 'spool')
+
+    def __init__(self, write_fn, spool_fn, workers=1, max_pending=32, backpressure='block',
+                 put_timeout=None, max_retries=3, retry_backoff=1.0, name='TiledWriter'):
+        if backpressure not in self.BACKPRESSURE_POLICIES:
+            raise ValueError(f'backpressure must be one of {self.BACKPRESSURE_POLICIES}, not {backpressure!r}')
+        if workers < 1:
+            raise ValueError('TiledWriteQueue needs at least one worker')
+
+        self.write_fn = write_fn
+        self.spool_fn = spool_fn
+        self.max_pending = max_pending
+        self.backpressure = backpressure
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        # capacity is shared by all workers, so track it with a single semaphore
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+        # _idle is notified whenever _pending drops to zero so flush() can wake up
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+
+        self.counters = {
+            'submitted': 0,
+            'written': 0,
+            'retried': 0,
+            'failed': 0,
+            'spooled': 0,
+        }
+        self._latency_last = 0.0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+        self._queues = [queue.Queue() for _ in range(workers)]
+        self._threads = []
+        for i, q in enumerate(self._queues):
+            thread = threading.Thread(target=self._worker, args=(q,), name=f'{name}-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self._closed = False
+
+    def _route(self, order_key):
+        '''Pick a worker for this ordering key; crc32 is stable across runs unlike hash()'''
+        return self._queues[zlib.crc32(str(order_key).encode()) % len(self._queues)]
+
+    def submit(self, job, order_key=''):
+        '''
+        Queue a job for background writing.
+
+        Returns True if the job was queued, False if it was spooled due to back-pressure.
+        '''
+        if self._closed:
+            raise RuntimeError('Cannot submit to a closed TiledWriteQueue')
+
+        with self._lock:
+            self.counters['submitted'] += 1
+
+        if self.backpressure == 'spool':
+            acquired = self._slots.acquire(blocking=False)
+        else:
+            acquired = self._slots.acquire(timeout=-1 if self.put_timeout is None else self.put_timeout)
+
+        if not acquired:
+            self._spool(job, RuntimeError(f'write queue full ({self.max_pending} pending)'))
+            return False
+
+        with self._lock:
+            self._pending += 1
+        self._route(order_key).put((time.monotonic(), job))
+        return True
+
+    def _spool(self, job, error):
+        try:
+            self.spool_fn(job, error)
+        finally:
+            with self._lock:
+                self.counters['spooled'] += 1
+
+    def _worker(self, q):
+        while True:
+            item = q.get()
+            if item is None:
+                q.task_done()
+                break
+
+            submitted, job = item
+            try:
+                self._write_with_retry(job)
+            finally:
+                latency = time.monotonic() - submitted
+                with self._lock:
+                    self._latency_last = latency
+                    self._latency_total += latency
+                    self._latency_max = max(self._latency_max, latency)
+                    self._pending -= 1
+                    if self._pending == 0:
+                        self._idle.notify_all()
+                self._slots.release()
+                q.task_done()
+
+    def _write_with_retry(self, job):
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.write_fn(job)
+            except Exception as error:
+                if attempt < self.max_retries:
+                    with self._lock:
+                        self.counters['retried'] += 1
+                    time.sleep(delay)
+                    delay *= 2
+                    continue
+                with self._lock:
+                    self.counters['failed'] += 1
+                try:
+                    self._spool(job, error)
+                except Exception as spool_error:
+                    print(f'Failed to spool data after write failure: {spool_error}')
+                return
+            with self._lock:
+                self.counters['written'] += 1
+            return
+
+    def depth(self):
+        '''Number of jobs queued or currently being written'''
+        return self._pending
+
+    def flush(self, timeout=None):
+        '''
+        Block until every submitted job has been written or spooled.
+
+        Returns True if the queue drained, False if the timeout expired first.
+        '''
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def close(self, timeout=None):
+        '''Drain the queue and stop the worker threads'''
+        drained = self.flush(timeout=timeout)
+        self._closed = True
+        for q in self._queues:
+            q.put(None)
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        return drained
+
+    def status(self):
+        '''Return a snapshot of queue depth, counters, and latency (seconds)'''
+        with self._lock:
+            status = dict(self.counters)
+            status['depth'] = self._pending
+            status['max_pending'] = self.max_pending
+            status['workers'] = len(self._queues)
+            status['latency_last'] = self._latency_last
+            completed = self.counters['written'] + self.counters['failed']
+            status['latency_mean'] = self._latency_total / completed if completed else 0.0
+            status['latency_max'] = self._latency_max
+        return status
@@ -2,10 +2,12 @@ from .DataPacket import DataPacket
 from .DataJSON import DataJSON
 from .DataTiled import DataTiled
 from .DataTrashcan import DataTrashcan
+from .TiledWriteQueue import TiledWriteQueue
 
 __all__ = [
     'DataPacket',
     'DataJSON',
     'DataTiled',
     'DataTrashcan',
+    'TiledWriteQueue',
 ]
@@ -59,11 +59,15 @@ class Server {
                     $.ajax({
                         type: "GET",
                         dataType: "json",
-                        url: self.address + 'get_queue?with_iteration=1',
+                        url: self.address + 'get_queue?with_iteration=1&history_limit=0',
                         success: function(result) {
-                            self.queueIterationId = result.shift();
-                            self.cachedQueue = result;
-                            success_func(result);
+                            var queueIterationId = result.shift();
+                            self.fetchNewHistory(function(history) {
+                                self.queueIterationId = queueIterationId;
+                                result[0] = history;
+                                self.cachedQueue = result;
+                                success_func(result);
+                            });
                         }
                     });
                 } else if (self.cachedQueue) {
@@ -74,6 +78,43 @@ class Server {
     }
 
 
+    /**
+     * Extends the server's cached history with entries newer than the last one seen
+     * and runs callback with the full cached history
+     * @param {Function} callback
+     */
+    fetchNewHistory(callback) {
+        const self = this;
+        if (!self.cachedHistory) {
+            self.cachedHistory = [];
+        }
+        var since = self.cachedHistory.length ? self.cachedHistory[self.cachedHistory.length - 1].iteration : 0;
+        $.ajax({
+            type: "GET",
+            dataType: "json",
+            url: self.address + 'get_history',
+            data: {since: since, limit: 500},
+            success: function(page) {
+                if (since > page.last_iteration) {
+                    // server restarted; start over
+                    self.cachedHistory = [];
+                    self.fetchNewHistory(callback);
+                    return;
+                }
+                self.cachedHistory = self.cachedHistory.filter(function(task) {
+                    return task.iteration >= page.first_iteration;
+                }).concat(page.entries);
+                var newest = self.cachedHistory.length ? self.cachedHistory[self.cachedHistory.length - 1].iteration : 0;
+                if (page.entries.length && newest < page.last_iteration) {
+                    self.fetchNewHistory(callback);
+                } else {
+                    callback(self.cachedHistory);
+                }
+            }
+        });
+    }
+
+
     /**
      * Runs a GET ajax call for the server's queued commands which runs success_func on success
      * @param {Function} success_func 
@@ -125,17 +125,13 @@ async function pollForResult(token, uuid, timeoutMs, onTick) {
         if (onTick) {
             await onTick();
         }
-        var resp = await fetch('/get_queue', {
+        var resp = await fetch('/get_history?uuid=' + encodeURIComponent(uuid), {
             headers: {'Authorization': 'Bearer ' + token}
         });
-        if (!resp.ok) throw new Error('queue fetch failed');
-        var q = await resp.json();
-        var history = (q[0] || []);
-        for (var i = 0; i < history.length; i++) {
-            if (history[i].uuid === uuid) {
-                return history[i].meta ? history[i].meta.return_val : null;
-            }
-        }
+        if (resp.status === 404) continue; // not finished yet
+        if (!resp.ok) throw new Error('history fetch failed');
+        var task = await resp.json();
+        return task.meta ? task.meta.return_val : null;
     }
     throw new Error('timeout waiting for balance result');
 }
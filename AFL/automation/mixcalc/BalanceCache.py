@@ -0,0 +1,156 @@
+import hashlib
+import os
+import pathlib
+import threading
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from scipy.optimize import Bounds
+
+from AFL.automation.shared import array_transport
+
+# bump when the cached payload or the candidate search changes meaning
+CACHE_VERSION = 1
+SUFFIX = '.afla'
+
+
+class BalanceCache:
+    """On-disk store of candidate-search results for mass balancing
+
+    Each entry holds the (best_candidate, any_success) result of
+    _best_balance_candidate for one target against one stock system. Entries
+    are keyed by a hash of everything the result depends on: the stocks' mass
+    fraction matrix and transfer bounds (i.e., the stock set and minimum
+    volume), the target masses, the tolerance and the solve budget. Changing
+    the stocks therefore changes every key, so stale entries are never read;
+    they simply age out.
+
+    Entries are files of ``directory`` encoded with array_transport, written
+    atomically so that several processes can share a directory. Once the files
+    exceed ``max_bytes`` the least recently used (by mtime, which reads refresh)
+    are deleted. Each process tallies what it writes and re-scans the directory
+    when its tally goes over budget or it has written max_bytes // 16 since the
+    last scan, so entries written by other processes are counted too; a shared
+    directory can therefore exceed max_bytes by about that much per process.
+
+    Parameters
+    ----------
+    directory : str or pathlib.Path
+        Where entries are stored; created if missing.
+    max_bytes : int
+        Size bound for all entries together.
+    """
+
+    def __init__(self, directory, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = pathlib.Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._sizes = {}  # key -> file size, oldest access first
+        self._total_bytes = 0
+        self._unscanned_bytes = 0  # written by this process since the last scan
+        self._scan()
+
+    def _scan(self) -> None:
+        """Re-read the sizes and access order of every entry in the directory"""
+        # mtimes are only as fine as the filesystem clock; ties keep this process's order
+        rank = {key: i for i, key in enumerate(self._sizes)}
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(SUFFIX):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # deleted by another process meanwhile
+                key = entry.name[:-len(SUFFIX)]
+                entries.append((stat.st_mtime_ns, rank.get(key, -1), key, stat.st_size))
+        self._sizes = {key: size for _, _, key, size in sorted(entries)}
+        self._total_bytes = sum(self._sizes.values())
+        self._unscanned_bytes = 0
+
+    @staticmethod
+    def key(
+        mass_fraction_matrix: np.ndarray,
+        bounds: Bounds,
+        target_masses: np.ndarray,
+        tol: float,
+        max_solves: int,
+    ) -> str:
+        """Canonical hash of the inputs of one candidate search"""
+        digest = hashlib.sha256()
+        digest.update(f'v{CACHE_VERSION}:{float(tol)!r}:{int(max_solves)}:'.encode('ascii'))
+        for array in (mass_fraction_matrix, bounds.lb, bounds.ub, target_masses):
+            array = np.ascontiguousarray(array, dtype='<f8')
+            digest.update(str(array.shape).encode('ascii'))
+            digest.update(array.tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> pathlib.Path:
+        return self.directory / (key + SUFFIX)
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, Any], bool]]:
+        """Return the cached (best_candidate, any_success) or None"""
+        try:
+            with open(self._path(key), 'rb') as f:
+                payload = array_transport.decode(f.read())
+            os.utime(self._path(key))
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        candidate = {name: np.array(value) for name, value in payload['candidate'].items()}
+        candidate['success'] = bool(candidate['success'])
+        with self._lock:
+            self.hits += 1
+            if key in self._sizes:
+                self._sizes[key] = self._sizes.pop(key)
+        return candidate, bool(payload['any_success'])
+
+    def put(self, key: str, candidate: Dict[str, Any], any_success: bool) -> None:
+        payload = array_transport.encode({
+            'candidate': {name: np.asarray(value) for name, value in candidate.items()},
+            'any_success': bool(any_success),
+        })
+        path = self._path(key)
+        tmp_path = path.with_name(f'{path.name}.{uuid.uuid4().hex}.tmp')
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        with self._lock:
+            self._total_bytes += len(payload) - self._sizes.pop(key, 0)
+            self._sizes[key] = len(payload)
+            self._unscanned_bytes += len(payload)
+            if self._total_bytes > self.max_bytes or self._unscanned_bytes > self.max_bytes // 16:
+                self._scan()
+            while self._total_bytes > self.max_bytes and self._sizes:
+                old_key = next(iter(self._sizes))
+                self._total_bytes -= self._sizes.pop(old_key)
+                self._path(old_key).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scan()
+            for key in list(self._sizes):
+                self._path(key).unlink(missing_ok=True)
+            self._sizes.clear()
+            self._total_bytes = 0
+
+    def info(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._sizes),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'directory': str(self.directory),
+            }
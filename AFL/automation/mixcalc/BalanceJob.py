@@ -0,0 +1,112 @@
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional
+
+# states after which a job publishes no more events
+FINISHED_STATES = ('done', 'cancelled', 'error')
+
+
+class BalanceJob:
+    """A balance running in a background thread, with its progress events and partial results
+
+    The thread running the balance calls ``publish`` for each progress event and
+    ``finish`` once; any number of readers can follow the job with
+    ``events_since`` (long-poll) or ``iter_events`` (streaming). Events are
+    JSON-friendly dicts numbered by ``seq``. Results of finished targets are kept
+    in ``results`` by target index as soon as they are published, so readers can
+    render them before the sweep completes.
+
+    Cancellation is cooperative: ``cancel`` sets ``cancel_event``, which the
+    balance checks between targets.
+    """
+
+    def __init__(self, job_id: Optional[str] = None):
+        self.job_id = job_id if job_id is not None else str(uuid.uuid4())
+        self.state = 'pending'
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.completed = 0
+        self.total = 0
+        self.events: List[Dict[str, Any]] = []
+        self.results: Dict[int, Dict[str, Any]] = {}
+        self.cancel_event = threading.Event()
+        self.thread = None
+        self._condition = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.state in FINISHED_STATES
+
+    def start(self, target, *args, **kwargs) -> 'BalanceJob':
+        """Run target(self, *args, **kwargs) in a daemon thread"""
+        self.state = 'running'
+        self.thread = threading.Thread(
+            target=target, args=(self, *args), kwargs=kwargs, name=f'balance-job-{self.job_id}', daemon=True
+        )
+        self.thread.start()
+        return self
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        with self._condition:
+            event = dict(event, seq=len(self.events), job_id=self.job_id)
+            self.events.append(event)
+            if event.get('total') is not None:
+                self.total = int(event['total'])
+            if event.get('completed') is not None:
+                self.completed = int(event['completed'])
+            if event.get('result') is not None and event.get('target_idx') is not None:
+                self.results[int(event['target_idx'])] = event['result']
+            self._condition.notify_all()
+
+    def finish(self, state: str, error: Optional[str] = None) -> None:
+        if state not in FINISHED_STATES:
+            raise ValueError(f'{state!r} is not a finished state; use one of {FINISHED_STATES}')
+        with self._condition:
+            self.finished = time.time()
+            self.error = error
+            self.state = state
+            self.publish({'stage': state, 'error': error})
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+    def events_since(self, since: int = 0, timeout: float = 0.0) -> List[Dict[str, Any]]:
+        """Events numbered since or later, waiting up to timeout seconds for one to arrive"""
+        since = max(0, int(since))
+        with self._condition:
+            self._condition.wait_for(lambda: len(self.events) > since or self.done, timeout=max(0.0, float(timeout)))
+            return self.events[since:]
+
+    def iter_events(self, since: int = 0, heartbeat: float = 15.0) -> Iterator[Dict[str, Any]]:
+        """Yield events as they are published until the job has finished
+
+        A {'stage': 'heartbeat'} event is yielded whenever nothing happened for
+        heartbeat seconds so that idle streams are not dropped by proxies.
+        """
+        since = max(0, int(since))
+        while True:
+            events = self.events_since(since, timeout=heartbeat)
+            if not events:
+                if self.done:
+                    return
+                yield {'stage': 'heartbeat', 'job_id': self.job_id, 'seq': since}
+                continue
+            yield from events
+            since += len(events)
+            if self.done and since >= len(self.events):
+                return
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'state': self.state,
+            'error': self.error,
+            'completed': self.completed,
+            'total': self.total,
+            'fraction': (float(self.completed) / float(self.total)) if self.total else (1.0 if self.done else 0.0),
+            'created': self.created,
+            'finished': self.finished,
+            'n_events': len(self.events),
+        }
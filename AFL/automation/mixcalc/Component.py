@@ -5,9 +5,15 @@ import copy
 from pyparsing import ParseException
 from typing import Optional, Dict, Iterator, Tuple, Union
 
-from AFL.automation.shared.units import units, AVOGADROS_NUMBER, enforce_units, to_quantity  # type: ignore
+from AFL.automation.shared.units import units, AVOGADROS_NUMBER, DEFAULT_UNITS, enforce_units, to_quantity  # type: ignore
 from AFL.automation.shared.warnings import MixWarning
 
+# enforce_units stores masses and densities in DEFAULT_UNITS, so converting them to the
+# canonical units of the array core (g and g/ml) is a multiplication by these factors
+MASS_TO_G = units(DEFAULT_UNITS['mass']).to('g').magnitude
+DENSITY_TO_G_ML = units(DEFAULT_UNITS['density']).to('g/ml').magnitude
+_MASS_UNIT = units.Unit(DEFAULT_UNITS['mass'])
+
 
 class Component:
     """ Component of a mixture
@@ -37,18 +43,14 @@ class Component:
                  uid: Optional[str] = None, solute: bool = False) -> None:
         self.name: str = name
 
-        self._mass: Optional[units.Quantity] = enforce_units(mass, 'mass')
+        self.mass = mass
         self._volume: Optional[units.Quantity] = enforce_units(volume, 'volume')
-        self._density: Optional[units.Quantity] = enforce_units(density, 'density')
+        self.density = density
         self._sld: Optional[units.Quantity] = to_quantity(sld) if sld is not None else None  # Convert string to Quantity if needed
 
         self.solute = solute
         if not self.solute and not self.has_density:
-            warnings.warn(
-                ( f'Component "{name}" initialized with solute=False and no density specification.\n' 
-                  f'Assuming this is in error and setting solute=True. You can fix this by adding "{name}"\n'
-                  f'to the solutes argument to Solution() or by passing solute=True to Component()\n' )
-                , MixWarning, stacklevel=2)
+            self.warn_assumed_solute(name, stacklevel=2)
             self.solute = True
 
         if formula is None:
@@ -57,6 +59,15 @@ class Component:
             self.formula = formula
         self.uid = uid
 
+    @staticmethod
+    def warn_assumed_solute(name: str, stacklevel: int = 1) -> None:
+        """Warn that a component without density is treated as a solute; stacklevel counts from the caller"""
+        warnings.warn(
+            ( f'Component "{name}" initialized with solute=False and no density specification.\n' 
+              f'Assuming this is in error and setting solute=True. You can fix this by adding "{name}"\n'
+              f'to the solutes argument to Solution() or by passing solute=True to Component()\n' )
+            , MixWarning, stacklevel=stacklevel + 1)
+
     def emit(self) -> Dict[str, Union[str, units.Quantity]]:
         return {
             'name': self.name,
@@ -84,7 +95,8 @@ class Component:
         return id(self)
 
     def copy(self) -> 'Component':
-        return copy.deepcopy(self)
+        # quantities are replaced rather than mutated by the setters, so copies can share them
+        return copy.copy(self)
 
     def __iter__(self) -> Iterator[Tuple[str, 'Component']]:
         """Dummy iterator to mimic behavior of Mixture."""
@@ -99,6 +111,12 @@ class Component:
     def mass(self, value: units.Quantity) -> None:
         value = enforce_units(value, 'mass')
         self._mass = value
+        self.mass_g: Optional[float] = None if value is None else float(value.magnitude) * MASS_TO_G
+
+    def set_mass_g(self, value: float) -> None:
+        """Set the mass from a float in grams without parsing units"""
+        self._mass = units.Quantity(value / MASS_TO_G, _MASS_UNIT)
+        self.mass_g = float(value)
 
     def set_mass(self, value: units.Quantity) -> 'Component':
         """Setter for inline mass changes"""
@@ -139,6 +157,7 @@ class Component:
     def density(self, value: units.Quantity) -> None:
         value = enforce_units(value, 'density')
         self._density = value
+        self.density_g_ml: Optional[float] = None if value is None else float(value.magnitude) * DENSITY_TO_G_ML
 
     @property
     def formula(self) -> Optional[periodictable.formula]:
@@ -154,6 +173,13 @@ class Component:
             except (ValueError, ParseException):
                 self._formula = None
 
+    @property
+    def molar_mass_g_mol(self) -> Optional[float]:
+        if self.has_formula:
+            return self.formula.molecular_mass * AVOGADROS_NUMBER.magnitude  # type: ignore
+        else:
+            return None
+
     @property
     def moles(self) -> Optional[units.Quantity]:
         if self.has_formula:
@@ -210,9 +236,9 @@ class Component:
         if not (self.name == other.name):
             raise ValueError(f'Can only add components of the same name. Not {self.name} and {other.name}')
 
-        if not (self.density == other.density):
+        if not (self.density_g_ml == other.density_g_ml):
             raise ValueError(f'Density mismatch in component.__add__: {self.density} and {other.density}')
 
         component = self.copy()
-        component.mass = enforce_units(component._mass + other._mass, 'mass')  # type: ignore
+        component.set_mass_g(self.mass_g + other.mass_g)  # type: ignore
         return component
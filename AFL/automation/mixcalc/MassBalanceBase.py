@@ -1,6 +1,12 @@
+import heapq
 import itertools
 import math
+import multiprocessing
+import os
+import threading
 import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from typing import List, Optional, Dict, Set, Callable, Any, Iterator
 
 import numpy as np
@@ -8,29 +14,39 @@ from scipy.optimize import lsq_linear, Bounds
 
 from AFL.automation.mixcalc.PipetteAction import PipetteAction
 from AFL.automation.mixcalc.Solution import Solution
+from AFL.automation.mixcalc.SolutionArray import SolutionArray
 from AFL.automation.mixcalc.BalanceDiagnosis import BalanceDiagnosis, FailureCode, FailureDetail
+from AFL.automation.shared.units import units, enforce_units
 
 ZERO_MASS_TOL_G = 1e-12
 
 
+class BalanceCancelled(Exception):
+    """Raised by MassBalanceBase.balance when its cancel_event is set"""
+
+
 # --- Shared utility functions ---
 def _extract_masses(solution: Solution, components: List[str], array: np.ndarray, unit: str = 'g') -> None:
     if array is None:
         array = np.zeros(len(components))
-    for i, component in enumerate(components):
-        if solution.contains(component):
-            array[i] = solution[component].mass.to(unit).magnitude
-        else:
-            array[i] = 0
+    _extract_mass_matrix([solution], components, array[None, :], unit)
+
+
+def _extract_mass_matrix(solutions: List[Solution], components: List[str], matrix: np.ndarray, unit: str = 'g') -> None:
+    """Fill matrix[i, j] with the mass of components[j] in solutions[i], reading the components' float masses"""
+    column = {name: j for j, name in enumerate(components)}
+    factor = 1.0 if unit == 'g' else units.Quantity(1.0, 'g').to(unit).magnitude
+    matrix[:] = 0
+    for i, solution in enumerate(solutions):
+        for name, component in solution:
+            j = column.get(name, None)
+            if j is not None:
+                matrix[i, j] = component.mass_g * factor
 
 
 def _extract_mass_fractions(stocks: List[Solution], components: List[str], matrix: np.ndarray) -> None:
-    for i, component in enumerate(components):
-        for j, stock in enumerate(stocks):
-            if stock.contains(component):
-                matrix[i, j] = stock.mass_fraction[component].to('').magnitude
-            else:
-                matrix[i, j] = 0
+    _extract_mass_matrix(stocks, components, matrix.T)
+    matrix /= np.array([stock.mass_g for stock in stocks])[None, :]
 
 
 def _zero_target_mask(target_masses: np.ndarray, zero_mass_tol: float = ZERO_MASS_TOL_G) -> np.ndarray:
@@ -70,23 +86,19 @@ def _is_balance_success(
 
 
 def _make_balanced_target(mass_transfers, target):
-    balanced_target = Solution(name="")
-    balanced_target.protocol = []
-    for stock, mass in mass_transfers.items():
-        measured = stock.measure_out(mass)
-        balanced_target = balanced_target + measured
-        balanced_target.protocol.append(
-            PipetteAction(
-                source=stock.location,
-                dest=target.location,
-                volume=measured.volume.to('ul').magnitude,
-            )
-        )
-    balanced_target.name = target.name + "-balanced"
+    stocks = list(mass_transfers)
+    transfers_g = np.array([enforce_units(mass, 'mass').to('g').magnitude for mass in mass_transfers.values()])
+    stock_array = SolutionArray.from_solutions(stocks)
+
+    balanced_target = stock_array.mix(transfers_g).to_solution(name=target.name + "-balanced")
+    balanced_target.protocol = [
+        PipetteAction(source=stock.location, dest=target.location, volume=volume_ml * 1000.0)
+        for stock, volume_ml in zip(stocks, stock_array.transfer_volumes(transfers_g))
+    ]
     for name, component in target:
         if not balanced_target.contains(name):
             balanced_target.components[name] = component.copy()
-            balanced_target[name].mass = '0.0 g'
+            balanced_target[name].set_mass_g(0.0)
     return balanced_target
 
 
@@ -327,17 +339,11 @@ def _diagnose(
     return BalanceDiagnosis(success=False, details=details, component_errors=component_errors)
 
 
-def _iter_balance_candidates(
-    mass_fraction_matrix: np.ndarray,
-    target_masses: np.ndarray,
-    bounds: Bounds,
-    stocks: List[Solution],
-    near_bound_tol: float = 0.1,
-) -> Iterator[np.ndarray]:
-    result = lsq_linear(mass_fraction_matrix, target_masses, bounds=bounds)
-    base_mass_transfer = np.array(result.x, dtype=float)
-    yield base_mass_transfer
+# Maximum number of lsq_linear solves spent on the candidate search for one target
+DEFAULT_MAX_BALANCE_SOLVES = 128
 
+
+def _near_bound_indices(result, bounds: Bounds, near_bound_tol: float) -> List[int]:
     # Identify stocks that the solver pushed to or near their lower bound.
     # These are candidates for exclusion (zeroing out) since the solver
     # wanted to use less than or close to the minimum transfer volume.
@@ -345,35 +351,62 @@ def _iter_balance_candidates(
     # a stock slightly above its lower bound (e.g., to reduce H2O residual
     # from a mostly-water stock) even when the target calls for none of
     # that stock's solute.  A relative tolerance catches these cases.
-    candidate_indices = [
-        i for i in range(len(stocks))
+    return [
+        i for i in range(len(result.x))
         if result.active_mask[i] == -1
         or (bounds.lb[i] > 0 and result.x[i] <= bounds.lb[i] * (1 + near_bound_tol))
     ]
 
-    # Try all subsets of candidate stocks and re-solve each
-    # reduced problem so the remaining stocks are properly re-optimized.
-    for r in range(1, len(candidate_indices) + 1):
-        for combination in itertools.combinations(candidate_indices, r):
-            exclude = set(combination)
-            keep_indices = [i for i in range(len(stocks)) if i not in exclude]
-            if not keep_indices:
-                continue
 
-            reduced_matrix = mass_fraction_matrix[:, keep_indices]
-            reduced_bounds = Bounds(
-                lb=[bounds.lb[i] for i in keep_indices],
-                ub=[bounds.ub[i] for i in keep_indices],
-                keep_feasible=False,
-            )
+def _solve_excluding(
+    mass_fraction_matrix: np.ndarray,
+    target_masses: np.ndarray,
+    bounds: Bounds,
+    exclude,
+) -> Optional[np.ndarray]:
+    """Re-solve with the stocks in exclude fixed at zero; None if no stocks remain"""
+    n_stocks = mass_fraction_matrix.shape[1]
+    keep_indices = [i for i in range(n_stocks) if i not in exclude]
+    if not keep_indices:
+        return None
+
+    reduced_matrix = mass_fraction_matrix[:, keep_indices]
+    reduced_bounds = Bounds(
+        lb=[bounds.lb[i] for i in keep_indices],
+        ub=[bounds.ub[i] for i in keep_indices],
+        keep_feasible=False,
+    )
+
+    reduced_result = lsq_linear(reduced_matrix, target_masses, bounds=reduced_bounds)
+
+    adjusted_transfer = np.zeros(n_stocks, dtype=float)
+    adjusted_transfer[keep_indices] = reduced_result.x
+    return adjusted_transfer
 
-            reduced_result = lsq_linear(reduced_matrix, target_masses, bounds=reduced_bounds)
 
-            adjusted_transfer = np.zeros(len(stocks), dtype=float)
-            for reduced_idx, stock_idx in enumerate(keep_indices):
-                adjusted_transfer[stock_idx] = float(reduced_result.x[reduced_idx])
+def _iter_balance_candidates(
+    mass_fraction_matrix: np.ndarray,
+    target_masses: np.ndarray,
+    bounds: Bounds,
+    stocks: Optional[List[Solution]] = None,
+    near_bound_tol: float = 0.1,
+) -> Iterator[np.ndarray]:
+    """Yield the unconstrained solution and then every subset of near-bound stocks excluded.
+
+    This takes 2^k solves for k near-bound stocks; _best_balance_candidate only
+    uses it while that fits in its solve budget.
+    """
+    result = lsq_linear(mass_fraction_matrix, target_masses, bounds=bounds)
+    yield np.array(result.x, dtype=float)
 
-            yield adjusted_transfer
+    # Try all subsets of candidate stocks and re-solve each
+    # reduced problem so the remaining stocks are properly re-optimized.
+    candidate_indices = _near_bound_indices(result, bounds, near_bound_tol)
+    for r in range(1, len(candidate_indices) + 1):
+        for combination in itertools.combinations(candidate_indices, r):
+            transfers = _solve_excluding(mass_fraction_matrix, target_masses, bounds, set(combination))
+            if transfers is not None:
+                yield transfers
 
 
 def _balance(
@@ -386,6 +419,271 @@ def _balance(
     return list(_iter_balance_candidates(mass_fraction_matrix, target_masses, bounds, stocks, near_bound_tol))
 
 
+def _score_candidate(
+    mass_fraction_matrix: np.ndarray,
+    target_masses: np.ndarray,
+    transfers: np.ndarray,
+    tol: float,
+) -> Dict[str, Any]:
+    balanced_masses = mass_fraction_matrix @ transfers
+    differences = _compute_differences(
+        target_masses=target_masses,
+        balanced_masses=balanced_masses,
+        total_target_mass=float(np.sum(target_masses)),
+    )
+    return {
+        'balanced_masses': balanced_masses,
+        'difference': differences,
+        'transfers': transfers,
+        'success': _is_balance_success(
+            target_masses=target_masses,
+            balanced_masses=balanced_masses,
+            differences=differences,
+            tol=tol,
+        ),
+    }
+
+
+class _CandidateSearch:
+    """Search for the best set of stocks to use for one target within a solve budget.
+
+    Every candidate is scored like the exhaustive search scores them (sum of the
+    relative component errors) and the best one is kept.
+    """
+
+    def __init__(
+        self,
+        mass_fraction_matrix: np.ndarray,
+        target_masses: np.ndarray,
+        bounds: Bounds,
+        tol: float,
+        max_solves: int,
+    ):
+        self.mass_fraction_matrix = mass_fraction_matrix
+        self.target_masses = target_masses
+        self.bounds = bounds
+        self.tol = tol
+        self.max_solves = max_solves
+        self.best_candidate = None
+        self.best_score = None
+        self.any_success = False
+        self.n_solves = 0
+
+    @property
+    def done(self) -> bool:
+        return self.best_score == 0.0 or self.n_solves >= self.max_solves
+
+    def consider(self, transfers: np.ndarray) -> None:
+        candidate = _score_candidate(self.mass_fraction_matrix, self.target_masses, transfers, self.tol)
+        score = float(np.sum(np.abs(candidate['difference'])))
+        if self.best_candidate is None or score < self.best_score:
+            self.best_candidate = candidate
+            self.best_score = score
+        if candidate['success']:
+            self.any_success = True
+
+    def solve_excluding(self, exclude) -> None:
+        if len(exclude) >= self.mass_fraction_matrix.shape[1]:
+            return
+        self.n_solves += 1
+        self.consider(_solve_excluding(self.mass_fraction_matrix, self.target_masses, self.bounds, exclude))
+
+    def exhaustive(self, candidate_indices: List[int]) -> None:
+        """Try every subset of candidate_indices excluded, smallest subsets first"""
+        for r in range(1, len(candidate_indices) + 1):
+            for combination in itertools.combinations(candidate_indices, r):
+                if self.done:
+                    return
+                self.solve_excluding(set(combination))
+
+    def _solve_node(self, weights: np.ndarray, off: frozenset, on: frozenset):
+        """Solve the relaxation of a branch-and-bound node.
+
+        Stocks in off are excluded and stocks in on must be at least their lower
+        bound; all others may take any non-negative amount. Returns the transfers
+        and the weighted squared residual, a lower bound for every completion of
+        the node.
+        """
+        n_stocks = self.mass_fraction_matrix.shape[1]
+        keep_indices = [i for i in range(n_stocks) if i not in off]
+        self.n_solves += 1
+        result = lsq_linear(
+            self.mass_fraction_matrix[:, keep_indices] * weights[:, None],
+            self.target_masses * weights,
+            bounds=Bounds(
+                lb=[self.bounds.lb[i] if i in on else 0.0 for i in keep_indices],
+                ub=[self.bounds.ub[i] for i in keep_indices],
+                keep_feasible=False,
+            ),
+        )
+        transfers = np.zeros(n_stocks, dtype=float)
+        transfers[keep_indices] = result.x
+        return transfers, float(np.sum(result.fun ** 2))
+
+    def branch_and_bound(self) -> None:
+        """Search the semi-continuous problem where each stock is either unused or above its minimum.
+
+        Nodes are expanded best-first by their relaxation's residual, with rows
+        weighted by 1/target so the residual tracks relative rather than absolute
+        errors, and nodes that cannot beat the best leaf found so far are pruned.
+        A node is branched on the stock whose relaxed transfer is furthest into
+        the forbidden range between zero and the minimum. Leaves are considered
+        both as solved and re-solved unweighted with the same stocks excluded.
+        """
+        n_stocks = self.mass_fraction_matrix.shape[1]
+        total_target_mass = float(np.sum(self.target_masses))
+        if total_target_mass > ZERO_MASS_TOL_G:
+            weights = 1.0 / np.maximum(np.abs(self.target_masses), 1e-3 * total_target_mass)
+        else:
+            weights = np.ones_like(self.target_masses)
+
+        best_leaf_residual = np.inf
+        counter = itertools.count()  # tie-breaker so heap entries never compare sets
+        transfers, residual = self._solve_node(weights, frozenset(), frozenset())
+        heap = [(residual, next(counter), frozenset(), frozenset(), transfers)]
+        while heap and not self.done:
+            residual, _, off, on, transfers = heapq.heappop(heap)
+            if residual >= best_leaf_residual:
+                continue
+
+            free = [i for i in range(n_stocks) if i not in off and i not in on]
+            violations = [i for i in free if ZERO_MASS_TOL_G < transfers[i] < self.bounds.lb[i]]
+            if not violations:
+                self.consider(transfers)
+                unused = {i for i in free if transfers[i] <= ZERO_MASS_TOL_G}
+                self.solve_excluding(off | unused)
+                best_leaf_residual = min(best_leaf_residual, residual)
+                continue
+
+            branch_idx = max(violations, key=lambda i: transfers[i] / self.bounds.lb[i])
+            for child_off, child_on in ((off | {branch_idx}, on), (off, on | {branch_idx})):
+                if self.done or len(child_off) >= n_stocks:
+                    continue
+                child_transfers, child_residual = self._solve_node(weights, child_off, child_on)
+                if child_residual < best_leaf_residual:
+                    heapq.heappush(heap, (child_residual, next(counter), child_off, child_on, child_transfers))
+
+
+def _best_balance_candidate(
+    mass_fraction_matrix: np.ndarray,
+    target_masses: np.ndarray,
+    bounds: Bounds,
+    tol: float,
+    max_solves: int = DEFAULT_MAX_BALANCE_SOLVES,
+    near_bound_tol: float = 0.1,
+):
+    """Search the balance candidates for one target and return (best_candidate, any_success).
+
+    Stocks the bounded solve leaves at (or near) their minimum transfer are
+    candidates for exclusion. While trying every subset of them fits in
+    max_solves they are enumerated exactly as _iter_balance_candidates does;
+    beyond that a branch-and-bound search is used so that a target never costs
+    more than max_solves least-squares solves.
+    """
+    search = _CandidateSearch(mass_fraction_matrix, target_masses, bounds, tol, max_solves)
+    result = lsq_linear(mass_fraction_matrix, target_masses, bounds=bounds)
+    search.n_solves += 1
+    search.consider(np.array(result.x, dtype=float))
+
+    candidate_indices = _near_bound_indices(result, bounds, near_bound_tol)
+    if len(candidate_indices) < 63 and 2 ** len(candidate_indices) <= max_solves:
+        search.exhaustive(candidate_indices)
+    else:
+        search.branch_and_bound()
+
+    return search.best_candidate, search.any_success
+
+
+def _balance_chunk(
+    mass_fraction_matrix: np.ndarray,
+    lb: np.ndarray,
+    ub: np.ndarray,
+    tol: float,
+    max_solves: int,
+    target_indices: List[int],
+    target_mass_rows: np.ndarray,
+):
+    bounds = Bounds(lb=lb, ub=ub, keep_feasible=False)
+    return [
+        (target_idx, *_best_balance_candidate(mass_fraction_matrix, target_masses, bounds, tol, max_solves))
+        for target_idx, target_masses in zip(target_indices, target_mass_rows)
+    ]
+
+
+# Worker processes are expensive to start, so one pool is kept for the life of the process
+_balance_pool: Optional[ProcessPoolExecutor] = None
+_balance_pool_workers = 0
+_balance_pool_lock = threading.Lock()
+
+
+def _get_balance_pool(n_workers: int) -> ProcessPoolExecutor:
+    global _balance_pool, _balance_pool_workers
+    with _balance_pool_lock:
+        if _balance_pool is None or _balance_pool_workers != n_workers:
+            if _balance_pool is not None:
+                _balance_pool.shutdown(wait=False)
+            # spawn rather than fork: balances run inside the threaded APIServer
+            _balance_pool = ProcessPoolExecutor(
+                max_workers=n_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+            _balance_pool_workers = n_workers
+        return _balance_pool
+
+
+def _discard_balance_pool(pool: ProcessPoolExecutor) -> None:
+    global _balance_pool
+    with _balance_pool_lock:
+        if _balance_pool is pool:
+            _balance_pool = None
+    pool.shutdown(wait=False)
+
+
+def _iter_parallel_balance(
+    mass_fraction_matrix: np.ndarray,
+    bounds: Bounds,
+    target_mass_matrix: np.ndarray,
+    tol: float,
+    n_workers: int,
+    chunk_size: Optional[int] = None,
+    max_solves: int = DEFAULT_MAX_BALANCE_SOLVES,
+):
+    """Solve every row of target_mass_matrix in a process pool.
+
+    Yields (target_idx, best_candidate, any_success) as chunks of targets finish,
+    so results arrive out of order.
+    """
+    n_targets = len(target_mass_matrix)
+    if chunk_size is None or chunk_size < 1:
+        chunk_size = max(1, math.ceil(n_targets / (4 * n_workers)))
+    lb = np.asarray(bounds.lb, dtype=float)
+    ub = np.asarray(bounds.ub, dtype=float)
+
+    pool = _get_balance_pool(n_workers)
+    futures = [
+        pool.submit(
+            _balance_chunk,
+            mass_fraction_matrix,
+            lb,
+            ub,
+            tol,
+            max_solves,
+            list(range(start, min(start + chunk_size, n_targets))),
+            target_mass_matrix[start:start + chunk_size],
+        )
+        for start in range(0, n_targets, chunk_size)
+    ]
+    try:
+        for future in as_completed(futures):
+            yield from future.result()
+    except BrokenProcessPool:
+        _discard_balance_pool(pool)
+        raise
+    finally:
+        for future in futures:
+            future.cancel()
+
+
 def _compute_differences(
     target_masses: np.ndarray,
     balanced_masses: np.ndarray,
@@ -427,6 +725,8 @@ class MassBalanceBase:
     def __init__(self):
         self.balanced = []
         self.bounds = None
+        # optional BalanceCache memoizing candidate searches across calls and processes
+        self.balance_cache = None
 
     @property
     def components(self) -> Set[str]:
@@ -468,45 +768,46 @@ class MassBalanceBase:
         Returns a json serializable structure that has all of the balanced targets
         that can be reconstituted by the user back into solution objects.
         """
-        report = []
-        for item in self.balanced:
-            entry = {}
-            if item['target']:
-                entry['target'] = {
-                    'name': item['target'].name,
-                    'masses': {name: f"{c.mass.to('mg').magnitude} mg" for name, c in item['target']}
-                }
-
-            if item['balanced_target']:
-                entry['balanced_target'] = {
-                    'name': item['balanced_target'].name,
-                    'masses': {name: f"{c.mass.to('mg').magnitude} mg" for name, c in item['balanced_target']}
-                }
-            else:
-                entry['balanced_target'] = None
+        return [self._report_entry(item) for item in self.balanced]
+
+    def _report_entry(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """The balance_report entry for one item of self.balanced"""
+        entry = {}
+        if item['target']:
+            entry['target'] = {
+                'name': item['target'].name,
+                'masses': {name: f"{c.mass.to('mg').magnitude} mg" for name, c in item['target']}
+            }
+
+        if item['balanced_target']:
+            entry['balanced_target'] = {
+                'name': item['balanced_target'].name,
+                'masses': {name: f"{c.mass.to('mg').magnitude} mg" for name, c in item['balanced_target']}
+            }
+        else:
+            entry['balanced_target'] = None
 
-            if item['transfers']:
-                entry['transfers'] = {stock.name: mass for stock, mass in item['transfers'].items()}
-            else:
-                entry['transfers'] = None
+        if item['transfers']:
+            entry['transfers'] = {stock.name: mass for stock, mass in item['transfers'].items()}
+        else:
+            entry['transfers'] = None
 
-            if item.get('difference') is not None:
-                entry['difference'] = item['difference'].tolist()
-            else:
-                entry['difference'] = None
+        if item.get('difference') is not None:
+            entry['difference'] = item['difference'].tolist()
+        else:
+            entry['difference'] = None
 
-            if item.get('success') is not None:
-                entry['success'] = item['success']
-            else:
-                entry['success'] = None
+        if item.get('success') is not None:
+            entry['success'] = item['success']
+        else:
+            entry['success'] = None
 
-            entry['diagnosis'] = (
-                item['diagnosis'].to_dict() if item.get('diagnosis') is not None else None
-            )
-            entry['procedure_plan'] = item.get('procedure_plan')
+        entry['diagnosis'] = (
+            item['diagnosis'].to_dict() if item.get('diagnosis') is not None else None
+        )
+        entry['procedure_plan'] = item.get('procedure_plan')
 
-            report.append(entry)
-        return report
+        return entry
 
     def failure_summary(self) -> str:
         """Return a human-readable summary of all failed balance entries.
@@ -670,6 +971,84 @@ class MassBalanceBase:
             'stages': stages,
         }
 
+    def _stock_system(self, stocks: List[Solution], components: List[str], minimum_transfer_volume) -> Dict[str, Any]:
+        """Bounds and mass fraction matrix of stocks, which are identical for every target"""
+        bounds = self._bounds_for_stocks(stocks, minimum_transfer_volume)
+        mfm = np.zeros((len(components), len(stocks)))
+        _extract_mass_fractions(stocks, components, mfm)
+        max_stock_fractions = np.max(mfm, axis=1) if len(stocks) > 0 else np.zeros(len(components))
+        return {
+            'bounds': bounds,
+            'mass_fraction_matrix': mfm,
+            'max_stock_fractions': max_stock_fractions,
+            'missing_component_mask': max_stock_fractions == 0.0,
+        }
+
+    def _best_candidate(
+        self,
+        mass_fraction_matrix: np.ndarray,
+        target_masses: np.ndarray,
+        bounds: Bounds,
+        tol: float,
+        max_solves: int,
+    ):
+        """_best_balance_candidate, memoized in self.balance_cache if one is set"""
+        if self.balance_cache is None:
+            return _best_balance_candidate(mass_fraction_matrix, target_masses, bounds, tol, max_solves)
+        key = self.balance_cache.key(mass_fraction_matrix, bounds, target_masses, tol, max_solves)
+        cached = self.balance_cache.get(key)
+        if cached is not None:
+            return cached
+        best_candidate, any_success = _best_balance_candidate(mass_fraction_matrix, target_masses, bounds, tol, max_solves)
+        self.balance_cache.put(key, best_candidate, any_success)
+        return best_candidate, any_success
+
+    def _iter_first_rounds(
+        self,
+        stock_system: Dict[str, Any],
+        target_mass_matrix: np.ndarray,
+        tol: float,
+        n_workers: int,
+        chunk_size: Optional[int],
+        max_solves: int,
+    ):
+        """Yield (target_idx, (best_candidate, any_success)) against the initial stocks.
+
+        Cached results are yielded first; the remaining targets are searched in
+        the process pool and their results added to the cache.
+        """
+        mfm = stock_system['mass_fraction_matrix']
+        bounds = stock_system['bounds']
+        pending = list(range(target_mass_matrix.shape[0]))
+        keys = {}
+        if self.balance_cache is not None:
+            misses = []
+            for target_idx in pending:
+                key = self.balance_cache.key(mfm, bounds, target_mass_matrix[target_idx], tol, max_solves)
+                cached = self.balance_cache.get(key)
+                if cached is None:
+                    keys[target_idx] = key
+                    misses.append(target_idx)
+                else:
+                    yield target_idx, cached
+            pending = misses
+        if not pending:
+            return
+
+        for i, best_candidate, any_success in _iter_parallel_balance(
+            mfm,
+            bounds,
+            target_mass_matrix[pending],
+            tol,
+            n_workers=n_workers,
+            chunk_size=chunk_size,
+            max_solves=max_solves,
+        ):
+            target_idx = pending[i]
+            if target_idx in keys:
+                self.balance_cache.put(keys[target_idx], best_candidate, any_success)
+            yield target_idx, (best_candidate, any_success)
+
     def _solve_single_target(
         self,
         target: Solution,
@@ -680,51 +1059,33 @@ class MassBalanceBase:
         multistep_max_steps: int,
         multistep_diluent_policy: str,
         minimum_transfer_volume,
+        stock_system: Optional[Dict[str, Any]] = None,
+        first_round=None,
+        max_solves: int = DEFAULT_MAX_BALANCE_SOLVES,
     ) -> Dict[str, Any]:
+        """Balance one target, adding virtual dilution stocks if enabled and needed.
+
+        stock_system is the precomputed result of _stock_system for self.stocks and
+        first_round an already computed (best_candidate, any_success) for them.
+        """
         planning_stocks = list(self.stocks)
         max_rounds = int(multistep_max_steps) if enable_multistep_dilution else 0
         rounds_completed = 0
 
         while True:
-            bounds = self._bounds_for_stocks(planning_stocks, minimum_transfer_volume)
-            mfm = np.zeros((len(components), len(planning_stocks)))
-            _extract_mass_fractions(planning_stocks, components, mfm)
-            max_stock_fractions = np.max(mfm, axis=1) if len(planning_stocks) > 0 else np.zeros(len(components))
-            missing_component_mask = max_stock_fractions == 0.0
-
-            best_candidate = None
-            best_score = None
-            any_success = False
-            total_target_mass = float(np.sum(target_masses))
-            for transfers in _iter_balance_candidates(mfm, target_masses, bounds, planning_stocks):
-                balanced_masses = mfm @ transfers
-                differences = _compute_differences(
-                    target_masses=target_masses,
-                    balanced_masses=balanced_masses,
-                    total_target_mass=total_target_mass,
-                )
-                score = float(np.sum(np.abs(differences)))
-                success = _is_balance_success(
-                    target_masses=target_masses,
-                    balanced_masses=balanced_masses,
-                    differences=differences,
-                    tol=tol,
-                )
-                if best_candidate is None or score < best_score:
-                    best_candidate = {
-                        'balanced_masses': balanced_masses,
-                        'difference': differences,
-                        'transfers': transfers,
-                        'success': success,
-                    }
-                    best_score = score
-                if success:
-                    any_success = True
-                if best_score == 0.0:
-                    break
-
-            if best_candidate is None:
-                raise RuntimeError("Mass balance produced no candidates; this should not happen.")
+            if rounds_completed == 0 and stock_system is not None:
+                system = stock_system
+            else:
+                system = self._stock_system(planning_stocks, components, minimum_transfer_volume)
+            bounds = system['bounds']
+            mfm = system['mass_fraction_matrix']
+            max_stock_fractions = system['max_stock_fractions']
+            missing_component_mask = system['missing_component_mask']
+
+            if rounds_completed == 0 and first_round is not None:
+                best_candidate, any_success = first_round
+            else:
+                best_candidate, any_success = self._best_candidate(mfm, target_masses, bounds, tol, max_solves)
 
             if any_success or (not enable_multistep_dilution) or rounds_completed >= max_rounds:
                 diagnosis = _diagnose(
@@ -811,6 +1172,39 @@ class MassBalanceBase:
             planning_stocks.extend(new_virtual_stocks)
             rounds_completed += 1
 
+    def _balanced_entry(self, target: Solution, solved: Dict[str, Any], enable_multistep_dilution: bool) -> Dict[str, Any]:
+        best_candidate = solved['candidate']
+        planning_stocks = solved['stocks']
+        procedure_plan = self._build_procedure_plan(
+            target=target,
+            stocks=planning_stocks,
+            transfers=best_candidate['transfers'],
+            enabled=enable_multistep_dilution,
+        )
+
+        if not solved['any_success']:
+            warnings.warn(f'No suitable mass balance found for {target.name}\n')
+            return {
+                'target': target,
+                'balanced_target': None,
+                'transfers': None,
+                'difference': None,
+                'success': False,
+                'diagnosis': solved['diagnosis'],
+                'procedure_plan': procedure_plan,
+            }
+
+        transfers_dict = _make_transfer_dict(planning_stocks, best_candidate['transfers'])
+        return {
+            'target': target,
+            'balanced_target': _make_balanced_target(transfers_dict, target),
+            'transfers': transfers_dict,
+            'difference': best_candidate['difference'],
+            'success': best_candidate['success'],
+            'diagnosis': solved['diagnosis'],
+            'procedure_plan': procedure_plan,
+        }
+
     def balance(
         self,
         tol=0.05,
@@ -819,103 +1213,120 @@ class MassBalanceBase:
         enable_multistep_dilution: bool = False,
         multistep_max_steps: int = 2,
         multistep_diluent_policy: str = 'primary_solvent',
+        n_workers: int = 1,
+        chunk_size: Optional[int] = None,
+        max_solves: int = DEFAULT_MAX_BALANCE_SOLVES,
+        cancel_event: Optional[threading.Event] = None,
     ):
+        """Balance every target against the stocks.
+
+        With n_workers > 1 (or n_workers=0 for one per CPU) the candidate search is
+        spread over a process pool in chunks of chunk_size targets; results are
+        still stored in target order and reported to progress_callback as each
+        target completes. Multistep dilution rounds run in this process.
+
+        max_solves bounds the number of least-squares solves spent searching for
+        each target's best set of stocks (see _best_balance_candidate).
+
+        If self.balance_cache is set, candidate searches already done for the
+        same stocks, bounds, target and settings are read from it instead of
+        being repeated.
+
+        The 'target_end' progress event carries the finished target's balanced
+        entry as ``entry`` so callers can show results before the sweep is done.
+        Setting cancel_event stops the sweep before the next target: outstanding
+        worker chunks are cancelled, self.balanced is left empty and
+        BalanceCancelled is raised.
+        """
         if any([stock.location is None for stock in self.stocks]):
             raise ValueError("Some stocks don't have a location specified. This should be specified when the stocks are instantiated")
         self._set_bounds()
         components = list(self.components)
+        n_targets = len(self.targets)
 
-        target_mass_matrix = np.zeros((len(self.targets), len(components)))
-        for idx, target in enumerate(self.targets):
-            _extract_masses(target, components, array=target_mass_matrix[idx])
+        target_mass_matrix = np.zeros((n_targets, len(components)))
+        _extract_mass_matrix(list(self.targets), components, target_mass_matrix)
 
         minimum_transfer_volume = self._minimum_transfer_volume()
         if minimum_transfer_volume is None:
             enable_multistep_dilution = False
+        enable_multistep_dilution = bool(enable_multistep_dilution)
+
+        stock_system = self._stock_system(list(self.stocks), components, minimum_transfer_volume)
+
+        if not n_workers:
+            n_workers = os.cpu_count() or 1
 
         if progress_callback is not None:
             progress_callback(
                 stage='start',
                 completed=0,
-                total=len(self.targets),
+                total=n_targets,
                 target_idx=None,
                 target_name=None,
             )
 
-        self.balanced = []
-        for target_idx, target in enumerate(self.targets):
-            if progress_callback is not None:
-                progress_callback(
-                    stage='target_start',
-                    completed=target_idx,
-                    total=len(self.targets),
-                    target_idx=target_idx,
-                    target_name=target.name,
-                )
-            target_masses = target_mass_matrix[target_idx]
-            solved = self._solve_single_target(
-                target=target,
-                target_masses=target_masses,
-                components=components,
-                tol=tol,
-                enable_multistep_dilution=bool(enable_multistep_dilution),
-                multistep_max_steps=int(multistep_max_steps),
-                multistep_diluent_policy=str(multistep_diluent_policy),
-                minimum_transfer_volume=minimum_transfer_volume,
+        if n_workers > 1 and n_targets > 1:
+            first_rounds = self._iter_first_rounds(
+                stock_system,
+                target_mass_matrix,
+                tol,
+                n_workers=int(n_workers),
+                chunk_size=chunk_size,
+                max_solves=max_solves,
             )
-            best_candidate = solved['candidate']
-            any_success = solved['any_success']
-            diagnosis = solved['diagnosis']
-            planning_stocks = solved['stocks']
-
-            if not any_success:
-                warnings.warn(f'No suitable mass balance found for {target.name}\n')
-                self.balanced.append({
-                    'target': target,
-                    'balanced_target': None,
-                    'transfers': None,
-                    'difference': None,
-                    'success': False,
-                    'diagnosis': diagnosis,
-                    'procedure_plan': self._build_procedure_plan(
-                        target=target,
-                        stocks=planning_stocks,
-                        transfers=best_candidate['transfers'],
-                        enabled=bool(enable_multistep_dilution),
-                    ),
-                })
-            else:
-                transfers_dict = _make_transfer_dict(planning_stocks, best_candidate['transfers'])
-                balanced_target = _make_balanced_target(transfers_dict, target)
-                self.balanced.append({
-                    'target': target,
-                    'balanced_target': balanced_target,
-                    'transfers': transfers_dict,
-                    'difference': best_candidate['difference'],
-                    'success': best_candidate['success'],
-                    'diagnosis': diagnosis,
-                    'procedure_plan': self._build_procedure_plan(
-                        target=target,
-                        stocks=planning_stocks,
-                        transfers=best_candidate['transfers'],
-                        enabled=bool(enable_multistep_dilution),
-                    ),
-                })
-            if progress_callback is not None:
-                progress_callback(
-                    stage='target_end',
-                    completed=target_idx + 1,
-                    total=len(self.targets),
-                    target_idx=target_idx,
-                    target_name=target.name,
-                    success=bool(any_success),
+        else:
+            first_rounds = ((target_idx, None) for target_idx in range(n_targets))
+
+        self.balanced = []
+        balanced = [None] * n_targets
+        try:
+            for completed, (target_idx, first_round) in enumerate(first_rounds):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise BalanceCancelled(f'Balance cancelled after {completed} of {n_targets} targets')
+                target = self.targets[target_idx]
+                if progress_callback is not None:
+                    progress_callback(
+                        stage='target_start',
+                        completed=completed,
+                        total=n_targets,
+                        target_idx=target_idx,
+                        target_name=target.name,
+                    )
+                solved = self._solve_single_target(
+                    target=target,
+                    target_masses=target_mass_matrix[target_idx],
+                    components=components,
+                    tol=tol,
+                    enable_multistep_dilution=enable_multistep_dilution,
+                    multistep_max_steps=int(multistep_max_steps),
+                    multistep_diluent_policy=str(multistep_diluent_policy),
+                    minimum_transfer_volume=minimum_transfer_volume,
+                    stock_system=stock_system,
+                    first_round=first_round,
+                    max_solves=max_solves,
                 )
+                balanced[target_idx] = self._balanced_entry(target, solved, enable_multistep_dilution)
+                if progress_callback is not None:
+                    progress_callback(
+                        stage='target_end',
+                        completed=completed + 1,
+                        total=n_targets,
+                        target_idx=target_idx,
+                        target_name=target.name,
+                        success=bool(solved['any_success']),
+                        entry=balanced[target_idx],
+                    )
+        finally:
+            # stops outstanding worker chunks if the loop ended early
+            first_rounds.close()
+        self.balanced = balanced
 
         if progress_callback is not None:
             progress_callback(
                 stage='done',
-                completed=len(self.targets),
-                total=len(self.targets),
+                completed=n_targets,
+                total=n_targets,
                 target_idx=None,
                 target_name=None,
             )
@@ -1,6 +1,7 @@
 import contextlib
 import io
 import sys
+import threading
 import time
 import warnings
 from typing import List, Dict
@@ -12,10 +13,13 @@ import hashlib
 import numpy as np
 from scipy.optimize import Bounds
 
-from AFL.automation.mixcalc.MassBalanceBase import MassBalanceBase
+from AFL.automation.mixcalc.MassBalanceBase import MassBalanceBase, BalanceCancelled
+from AFL.automation.mixcalc.BalanceCache import BalanceCache
+from AFL.automation.mixcalc.BalanceJob import BalanceJob
 from AFL.automation.mixcalc.MassBalanceWebAppMixin import MassBalanceWebAppMixin
 from AFL.automation.APIServer.Driver import Driver
 from AFL.automation.mixcalc.Solution import Solution
+from AFL.automation.mixcalc.SolutionArray import SolutionArray
 from AFL.automation.mixcalc.MixDB import MixDB
 from AFL.automation.shared.units import enforce_units
 
@@ -225,6 +229,15 @@ class MassBalanceDriver(MassBalanceBase, MassBalanceWebAppMixin, Driver):
         'enable_multistep_dilution': False,
         'multistep_max_steps': 2,
         'multistep_diluent_policy': 'primary_solvent',
+        # 'serial' or 'parallel'; parallel spreads targets over balance_workers processes (0 = one per CPU)
+        'balance_mode': 'serial',
+        'balance_workers': 0,
+        'balance_chunk_size': 0,
+        # least-squares solves allowed when searching for the stocks to use for one target
+        'balance_max_solves': 128,
+        # memoize candidate searches on disk (AFL home) across balance calls and restarts
+        'balance_cache': True,
+        'balance_cache_max_mb': 64,
         'sweep_config': {},
         'stock_history': [],
         'orchestrator_uri': '',
@@ -269,6 +282,9 @@ class MassBalanceDriver(MassBalanceBase, MassBalanceWebAppMixin, Driver):
             'message': 'idle',
         }
         self._balance_started_ts = None
+        # one balance at a time; background jobs and queued calls share self.stocks/targets/balanced
+        self._balance_lock = threading.RLock()
+        self._balance_jobs = {}  # job_id -> BalanceJob, oldest first
         try:
             self.mixdb = MixDB.get_db()
         except ValueError:
@@ -363,13 +379,18 @@ class MassBalanceDriver(MassBalanceBase, MassBalanceWebAppMixin, Driver):
             return solution, None
         return solution, diag
 
-    def process_targets(self):
-        targets_config = self.config['targets']
+    @staticmethod
+    def _config_signature(config_value):
+        """Stable hash of a JSON-like config value, used to skip re-parsing unchanged solutions"""
         try:
-            signature_payload = json.dumps(targets_config, sort_keys=True, default=str, separators=(',', ':'))
+            signature_payload = json.dumps(config_value, sort_keys=True, default=str, separators=(',', ':'))
         except Exception:
-            signature_payload = str(targets_config)
-        signature = hashlib.sha1(signature_payload.encode('utf-8')).hexdigest()
+            signature_payload = str(config_value)
+        return hashlib.sha1(signature_payload.encode('utf-8')).hexdigest()
+
+    def process_targets(self):
+        targets_config = self.config['targets']
+        signature = self._config_signature(targets_config)
         if self._targets_signature == signature and len(self.targets) == len(targets_config):
             return
         new_targets = []
@@ -821,14 +842,10 @@ class MassBalanceDriver(MassBalanceBase, MassBalanceWebAppMixin, Driver):
             'max_component_error': max_component_error,
         }
 
-    def balance_report(self):
-        report = super().balance_report()
-        for idx, entry in enumerate(report):
-            raw_entry = self.balanced[idx] if idx < len(self.balanced) else None
-            if raw_entry is None:
-                continue
-            entry.update(self._balance_status_metadata(raw_entry))
-        return report
+    def _report_entry(self, item):
+        entry = super()._report_entry(item)
+        entry.update(self._balance_status_metadata(item))
+        return entry
 
     def _collect_balanced_targets(self):
         if not self.balanced:
@@ -853,9 +870,32 @@ class MassBalanceDriver(MassBalanceBase, MassBalanceWebAppMixin, Driver):
             keep_feasible=False
         )
 
-    def balance(self, return_report=False, enable_multistep_dilution=None):
+    def _update_balance_cache(self):
+        """Create, resize or drop self.balance_cache according to the config"""
+        if not self.config.get('balance_cache', True):
+            self.balance_cache = None
+            return
+        max_bytes = int(float(self.config.get('balance_cache_max_mb', 64)) * 1024 * 1024)
+        if self.balance_cache is None:
+            self.balance_cache = BalanceCache(self.path / 'balance_cache', max_bytes=max_bytes)
+        else:
+            self.balance_cache.max_bytes = max_bytes
+
+    def balance(self, return_report=False, enable_multistep_dilution=None, progress_callback=None, cancel_event=None):
+        """Balance the configured targets against the configured stocks
+
+        progress_callback receives every progress event of MassBalanceBase.balance
+        and cancel_event cancels the balance cooperatively (see start_balance_job).
+        """
+        with self._balance_lock:
+            if cancel_event is not None and cancel_event.is_set():
+                raise BalanceCancelled('Balance cancelled before it started')
+            return self._balance(return_report, enable_multistep_dilution, progress_callback, cancel_event)
+
+    def _balance(self, return_report, enable_multistep_dilution, progress_callback, cancel_event):
         self.process_stocks()
         self.process_targets()
+        self._update_balance_cache()
         total = len(self.targets)
         self._balance_started_ts = time.time()
         self._balance_progress = {
@@ -889,10 +929,24 @@ class MassBalanceDriver(MassBalanceBase, MassBalanceWebAppMixin, Driver):
                 'current_target_idx': int(target_idx) if target_idx is not None else None,
                 'message': msg,
             }
+            if progress_callback is not None:
+                progress_callback(
+                    stage=stage,
+                    completed=completed,
+                    total=total,
+                    target_idx=target_idx,
+                    target_name=target_name,
+                    **kwargs,
+                )
 
         if enable_multistep_dilution is None:
             enable_multistep_dilution = bool(self.config.get('enable_multistep_dilution', False))
 
+        if self.config.get('balance_mode', 'serial') == 'parallel':
+            n_workers = int(self.config.get('balance_workers', 0))
+        else:
+            n_workers = 1
+
         try:
             result = super().balance(
                 tol=self.config['tol'],
@@ -901,6 +955,10 @@ class MassBalanceDriver(MassBalanceBase, MassBalanceWebAppMixin, Driver):
                 multistep_max_steps=int(self.config.get('multistep_max_steps', 2)),
                 multistep_diluent_policy=str(self.config.get('multistep_diluent_policy', 'primary_solvent')),
                 progress_callback=_progress_cb,
+                n_workers=n_workers,
+                chunk_size=int(self.config.get('balance_chunk_size', 0)) or None,
+                max_solves=int(self.config.get('balance_max_solves', 128)),
+                cancel_event=cancel_event,
             )
             try:
                 self.config['balanced_targets_cache'] = self._collect_balanced_targets()
@@ -922,14 +980,125 @@ class MassBalanceDriver(MassBalanceBase, MassBalanceWebAppMixin, Driver):
                 'elapsed_s': float(elapsed),
                 'current_target': self._balance_progress.get('current_target'),
                 'current_target_idx': self._balance_progress.get('current_target_idx'),
-                'message': 'done',
+                'message': 'cancelled' if cancel_event is not None and cancel_event.is_set() else 'done',
             }
             self._balance_started_ts = None
 
+    # how many finished background balance jobs to keep for get_balance_job
+    max_balance_jobs = 8
+
+    def _run_balance_job(self, job, enable_multistep_dilution):
+        def _publish(stage=None, entry=None, **kwargs):
+            if stage == 'done':
+                return  # job.finish publishes the final event
+            event = {'stage': stage}
+            for key in ('completed', 'total', 'target_idx', 'target_name', 'success'):
+                if key in kwargs:
+                    event[key] = kwargs[key]
+            if entry is not None:
+                event['result'] = self._report_entry(entry)
+            job.publish(event)
+
+        try:
+            self.balance(
+                enable_multistep_dilution=enable_multistep_dilution,
+                progress_callback=_publish,
+                cancel_event=job.cancel_event,
+            )
+        except BalanceCancelled:
+            job.finish('cancelled')
+        except Exception as e:
+            self.logger.exception(f'Balance job {job.job_id} failed')
+            job.finish('error', error=str(e))
+        else:
+            job.finish('done')
+
+    def _get_balance_job(self, job_id=None):
+        if job_id is None:
+            if not self._balance_jobs:
+                raise KeyError('No balance jobs have been started')
+            return list(self._balance_jobs.values())[-1]
+        try:
+            return self._balance_jobs[job_id]
+        except KeyError:
+            raise KeyError(f'No balance job with id {job_id}') from None
+
+    @Driver.unqueued()
+    def start_balance_job(self, enable_multistep_dilution=None):
+        """Start balancing the configured targets in the background and return the job summary
+
+        Any running job is cancelled first, so the new job starts as soon as the
+        old one reaches its next target. Follow the job with get_balance_job
+        (long-poll) or stream_balance_job and stop it with cancel_balance_job.
+        """
+        if isinstance(enable_multistep_dilution, str):
+            enable_multistep_dilution = enable_multistep_dilution.strip().lower() in ('1', 'true', 'yes', 'on')
+        for running in list(self._balance_jobs.values()):
+            running.cancel()
+
+        finished = [job_id for job_id, job in self._balance_jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_balance_jobs + 1)]:
+            del self._balance_jobs[job_id]
+
+        job = BalanceJob()
+        self._balance_jobs[job.job_id] = job
+        job.start(self._run_balance_job, enable_multistep_dilution)
+        return job.summary()
+
+    @Driver.unqueued(long_poll='timeout')
+    def get_balance_job(self, job_id=None, since=0, timeout=0):
+        """Summary and progress events of a balance job (default: the latest)
+
+        Events numbered ``since`` or later are returned. With timeout > 0 the
+        request is held open until a new event arrives or timeout seconds (at
+        most 60) pass; if the server already holds its max_held_requests open,
+        it answers at once instead. 'target_end' events carry the finished
+        target's balance_report entry as ``result``.
+        """
+        job = self._get_balance_job(job_id)
+        events = job.events_since(int(since), timeout=min(float(timeout), 60.0))
+        return {**job.summary(), 'events': events}
+
+    @Driver.unqueued()
+    def get_balance_job_results(self, job_id=None):
+        """balance_report entries of the targets a balance job has finished so far, by target index"""
+        job = self._get_balance_job(job_id)
+        results = dict(job.results)
+        return {**job.summary(), 'results': {str(idx): results[idx] for idx in sorted(results)}}
+
+    @Driver.unqueued()
+    def cancel_balance_job(self, job_id=None):
+        job = self._get_balance_job(job_id)
+        job.cancel()
+        return job.summary()
+
+    @Driver.unqueued(render_hint='ndjson')
+    def stream_balance_job(self, job_id=None, since=0, **kwargs):
+        """Stream the progress events of a balance job as newline-delimited JSON until it finishes
+
+        The stream holds a server worker thread until the job is done, so it counts
+        toward the server's max_held_requests; over that cap it is refused with 503.
+        """
+        return self._get_balance_job(job_id).iter_events(int(since))
+
     @Driver.unqueued()
     def get_balance_progress(self):
         return dict(self._balance_progress)
 
+    @Driver.unqueued()
+    def get_balance_cache_info(self):
+        self._update_balance_cache()
+        if self.balance_cache is None:
+            return {'enabled': False}
+        return {'enabled': True, **self.balance_cache.info()}
+
+    @Driver.unqueued()
+    def clear_balance_cache(self):
+        self._update_balance_cache()
+        if self.balance_cache is not None:
+            self.balance_cache.clear()
+        return self.get_balance_cache_info()
+
     @Driver.unqueued()
     def get_balance_settings(self):
         return {
@@ -938,6 +1107,8 @@ class MassBalanceDriver(MassBalanceBase, MassBalanceWebAppMixin, Driver):
             'enable_multistep_dilution': bool(self.config.get('enable_multistep_dilution', False)),
             'multistep_max_steps': int(self.config.get('multistep_max_steps', 2)),
             'multistep_diluent_policy': str(self.config.get('multistep_diluent_policy', 'primary_solvent')),
+            'balance_mode': str(self.config.get('balance_mode', 'serial')),
+            'balance_workers': int(self.config.get('balance_workers', 0)),
         }
 
     def get_sample_composition(self, composition_format='masses'):
@@ -974,6 +1145,7 @@ class MassBalanceDriver(MassBalanceBase, MassBalanceWebAppMixin, Driver):
             raise ValueError("Last balance attempt failed — no balanced target available.")
 
         sample_composition = {}
+        solution_array = balanced_target.to_array()
 
         if isinstance(composition_format, str):
             if composition_format not in valid_formats:
@@ -983,7 +1155,7 @@ class MassBalanceDriver(MassBalanceBase, MassBalanceWebAppMixin, Driver):
                 )
             for component in balanced_target.components.keys():
                 sample_composition[component] = self._get_component_value(
-                    balanced_target, component, composition_format
+                    solution_array, component, composition_format
                 )
         elif isinstance(composition_format, dict):
             missing_components = [
@@ -1004,7 +1176,7 @@ class MassBalanceDriver(MassBalanceBase, MassBalanceWebAppMixin, Driver):
                         f"Must be one of: {', '.join(valid_formats)}"
                     )
                 sample_composition[component] = self._get_component_value(
-                    balanced_target, component, format_type
+                    solution_array, component, format_type
                 )
         else:
             raise ValueError(
@@ -1019,8 +1191,9 @@ class MassBalanceDriver(MassBalanceBase, MassBalanceWebAppMixin, Driver):
 
         Parameters
         ----------
-        solution : Solution
-            Solution object containing the component.
+        solution : Solution or SolutionArray
+            Solution object containing the component, or a one-row
+            SolutionArray of it (cheaper when extracting many components).
         component : str
             Component name.
         format_type : str
@@ -1034,29 +1207,33 @@ class MassBalanceDriver(MassBalanceBase, MassBalanceWebAppMixin, Driver):
             canonical units: mg for masses, mg/ml for concentration,
             mM for molarity).
         """
+        if not isinstance(solution, SolutionArray):
+            solution = solution.to_array()
+        j = solution.index(component)
+
         if format_type == 'masses':
-            return solution[component].mass.to('mg').magnitude
+            return float(solution.masses[0, j] * 1000.0)
 
         elif format_type == 'mass_fraction':
-            return solution.mass_fraction[component].magnitude
+            return float(solution.mass_fraction[0, j])
 
         elif format_type == 'volume_fraction':
-            if solution[component].volume is None:
+            if not solution.solvent_mask[j]:
                 raise ValueError(
                     f"Component {component} has no volume, cannot calculate volume_fraction. "
                     f"Only solvents support volume_fraction."
                 )
-            return solution.volume_fraction[component].magnitude
+            return float(solution.volume_fraction[0, j])
 
         elif format_type == 'concentration':
-            return solution.concentration[component].to('mg/ml').magnitude
+            return float(solution.concentration[0, j] * 1000.0)
 
         elif format_type == 'molarity':
-            if not hasattr(solution[component], 'formula') or solution[component].formula is None:
+            if np.isnan(solution.molar_masses[j]):
                 raise ValueError(
                     f"Component {component} has no formula, cannot calculate molarity"
                 )
-            return solution.molarity[component].to('mM').magnitude
+            return float(solution.molarity[0, j] * 1000.0)
 
         else:
             raise ValueError(
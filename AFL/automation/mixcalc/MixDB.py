@@ -1,15 +1,18 @@
 import uuid
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from typing import Optional, Dict
 import pathlib
 import json
 import os
 import datetime
+import threading
 
 import pandas as pd  # type: ignore
 import numpy as np
 import tiled.client
 
+from AFL.automation.mixcalc.Component import Component
 from AFL.automation.shared.PersistentConfig import PersistentConfig
 from AFL.automation.shared.exceptions import NotFoundError
 from AFL.automation.shared.units import units, has_units
@@ -17,7 +20,13 @@ from AFL.automation.shared.units import units, has_units
 # Global variable to store the last instantiated MixDB instance
 _MIXDB = None
 
+# Database fields that are passed on to Component(); others (e.g., control/query keys) are ignored
+COMPONENT_INIT_KEYS = frozenset({'name', 'mass', 'volume', 'density', 'formula', 'sld', 'uid', 'solute'})
+
 class MixDB:
+    # number of Component prototypes kept by new_component
+    component_cache_size = 256
+
     def __init__(self,db_spec: Optional[str | pathlib.Path | pd.DataFrame]=None):
         self.default_local_spec = _resolve_afl_home() / 'component.config.json'
         if db_spec is None:
@@ -28,6 +37,10 @@ class MixDB:
             self.engine = _get_default_engine_with_tiled_fallback(db_spec)
         else:
             self.engine = _get_engine(db_spec)
+        self._prototypes = OrderedDict()
+        self._prototypes_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
         self.set_db()
 
     def set_db(self):
@@ -98,16 +111,68 @@ class MixDB:
             raise ValueError('No DB set! Instantiate a MixDB object!')
         return _MIXDB
 
+    def new_component(self, name: str, solute: bool = False) -> Component:
+        """Return a new Component built from the database entry called name
+
+        Constructing a Component parses its units and formula, so a prototype is
+        kept per (name, solute) in an LRU of ``component_cache_size`` entries and
+        each call returns a copy of it. The prototypes are dropped whenever a
+        component is added, updated or removed through this MixDB.
+
+        Raises
+        ------
+        NotFoundError
+            If no component called name is in the database.
+        """
+        key = (name, bool(solute))
+        with self._prototypes_lock:
+            prototype = self._prototypes.get(key, None)
+            if prototype is not None:
+                self._prototypes.move_to_end(key)
+                self.cache_hits += 1
+        if prototype is not None:
+            if not solute and prototype.solute:
+                # the prototype was built with solute=True; warn as constructing it again would
+                Component.warn_assumed_solute(name, stacklevel=1)
+            return prototype.copy()
+
+        component_data = self.get_component(name)
+        component_data = {k: v for k, v in component_data.items() if k in COMPONENT_INIT_KEYS}
+        component_data['solute'] = bool(solute)
+        prototype = Component(**component_data)
+        with self._prototypes_lock:
+            self.cache_misses += 1
+            self._prototypes[key] = prototype
+            while len(self._prototypes) > self.component_cache_size:
+                self._prototypes.popitem(last=False)
+        return prototype.copy()
+
+    def cache_info(self) -> Dict:
+        """Hit/miss counters and size of the Component prototype cache"""
+        with self._prototypes_lock:
+            return {
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'size': len(self._prototypes),
+                'maxsize': self.component_cache_size,
+            }
+
+    def clear_cache(self) -> None:
+        with self._prototypes_lock:
+            self._prototypes.clear()
+
     def add_component(self, component_dict: Dict) -> str:
         if 'uid' not in component_dict:
             component_dict['uid'] = str(uuid.uuid4())
         # Serialize Quantity objects to strings before storing
         serialized_dict = self._serialize_component(component_dict)
         self.engine.add_component(serialized_dict)
+        self.clear_cache()
         return serialized_dict['uid']
 
     def remove_component(self, name=None, uid=None):
         self.engine.remove_component(name=name, uid=uid)
+        self.clear_cache()
 
     def list_components(self):
         components = self.engine.list_components()
@@ -120,6 +185,7 @@ class MixDB:
         # Serialize Quantity objects to strings before storing
         serialized_dict = self._serialize_component(component_dict)
         self.engine.update_component(serialized_dict)
+        self.clear_cache()
         return serialized_dict['uid']
 
     def get_component(self,name=None,uid=None,interactive=False):
@@ -219,6 +285,28 @@ class Pandas_DBEngine(DBEngine):
     def __init__(self,dataframe:pd.DataFrame):
         self.dataframe = dataframe
 
+    @property
+    def dataframe(self) -> pd.DataFrame:
+        return self._dataframe
+
+    @dataframe.setter
+    def dataframe(self, dataframe: pd.DataFrame) -> None:
+        self._dataframe = dataframe
+        self._index = None
+
+    def _ensure_index(self) -> Dict:
+        """Build the name and uid lookup tables from the dataframe rows (later rows win)"""
+        if self._index is None:
+            by_name, by_uid = {}, {}
+            records = self._dataframe.to_dict('records') if len(self._dataframe) else []
+            for record in records:
+                if 'name' in record:
+                    by_name[record['name']] = record
+                if 'uid' in record:
+                    by_uid[record['uid']] = record
+            self._index = {'name': by_name, 'uid': by_uid}
+        return self._index
+
     @staticmethod
     def read_csv(db_spec):
         dataframe = pd.read_csv(db_spec,sep=',').T
@@ -249,6 +337,7 @@ class Pandas_DBEngine(DBEngine):
         idx = self.dataframe.index[self.dataframe['uid'] == uid]
         for key, val in component_dict.items():
             self.dataframe.loc[idx, key] = val
+        self._index = None
         return uid
 
     def remove_component(self,name=None,uid=None):
@@ -263,14 +352,13 @@ class Pandas_DBEngine(DBEngine):
         return self.dataframe.fillna('').to_dict('records')
 
     def get_component(self, name=None, uid=None) -> Dict:
+        index = self._ensure_index()
         try:
             if name is not None:
-                component_dict = self.dataframe.set_index('name').loc[name].to_dict()
-                component_dict['name'] = name
+                component_dict = dict(index['name'][name])
             else:
-                component_dict = self.dataframe.set_index('uid').loc[uid].to_dict()
-                component_dict['uid'] = uid
-        except KeyError:
+                component_dict = dict(index['uid'][uid])
+        except (KeyError, TypeError):
             raise NotFoundError(f"Component not found: name={name}, uid={uid}")
         return component_dict
 
@@ -278,10 +366,29 @@ class Pandas_DBEngine(DBEngine):
 class PersistentConfig_DBEngine(DBEngine):
     def __init__(self, config_path: str):
         self.config = PersistentConfig(config_path)
+        self._name_index = None
+        self._name_index_key = None
+
+    def _uid_for_name(self, name) -> Optional[str]:
+        """Look up the uid of the last component called name
+
+        The name -> uid table is rebuilt after changes made through this engine
+        and whenever the underlying dict is replaced (e.g., by a revert) or
+        changes size.
+        """
+        entries = self.config.config
+        key = (id(entries), len(entries))
+        if self._name_index is None or self._name_index_key != key:
+            self._name_index = {
+                comp['name']: uid for uid, comp in entries.items() if isinstance(comp, dict) and 'name' in comp
+            }
+            self._name_index_key = key
+        return self._name_index.get(name, None)
 
     def add_component(self, component_dict: Dict) -> str:
         uid = component_dict.get('uid', str(uuid.uuid4()))
         self.config[uid] = component_dict
+        self._name_index = None
         return uid
 
     def update_component(self, component_dict: Dict) -> str:
@@ -289,6 +396,7 @@ class PersistentConfig_DBEngine(DBEngine):
         if uid not in self.config.config:
             raise NotFoundError(f"Component not found: uid={uid}")
         self.config[uid] = component_dict
+        self._name_index = None
         return uid
 
     def remove_component(self,name=None,uid=None):
@@ -297,10 +405,11 @@ class PersistentConfig_DBEngine(DBEngine):
         if uid is not None:
             del self.config[uid]
         else:
-            keys = [k for k,v in self.config.config.items() if v['name']==name]
-            if not keys:
+            uid = self._uid_for_name(name)
+            if uid is None:
                 raise NotFoundError(f"Component not found: name={name}")
-            del self.config[keys[-1]]
+            del self.config[uid]
+        self._name_index = None
 
     def list_components(self):
         return list(self.config.config.values())
@@ -312,11 +421,10 @@ class PersistentConfig_DBEngine(DBEngine):
         if uid is not None:
             component_dict = self.config[uid]
         else:
-            all_components = self.config.config.values()
-            component_list = [comp for comp in all_components if comp['name'] == name]
-            if not(component_list):
+            uid = self._uid_for_name(name)
+            if uid is None:
                 raise NotFoundError(f"Component not found: name={name}, uid={uid}")
-            component_dict = component_list[-1]
+            component_dict = self.config[uid]
 
         return component_dict
 
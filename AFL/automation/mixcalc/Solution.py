@@ -6,14 +6,16 @@ from typing import Optional, Dict, List
 import numpy as np
 import pint
 
-from AFL.automation.mixcalc.Component import Component
+from AFL.automation.mixcalc.Component import Component, MASS_TO_G
 from AFL.automation.mixcalc.Context import Context
-from AFL.automation.mixcalc.MixDB import MixDB
+from AFL.automation.mixcalc.MixDB import MixDB, COMPONENT_INIT_KEYS
+from AFL.automation.mixcalc.SolutionArray import SolutionArray, to_quantity
 from AFL.automation.shared.exceptions import EmptyException, NotFoundError
 from AFL.automation.shared.units import (
     units,
     enforce_units,
     has_units,
+    isclose,
     is_volume,
     is_mass,
     AVOGADROS_NUMBER,
@@ -32,7 +34,7 @@ Potential Reasons:
 
 class Solution(Context):
     _stack_name = "stocks"
-    _component_init_keys = {'name', 'mass', 'volume', 'density', 'formula', 'sld', 'uid', 'solute'}
+    _component_init_keys = COMPONENT_INIT_KEYS
 
     def __init__(
         self,
@@ -295,43 +297,43 @@ class Solution(Context):
         msg = ""
         for name, mass in masses.items():
             mass = enforce_units(mass, "mass")
-            if not np.isclose(self.components[name].mass, mass):
+            if not isclose(self.components[name].mass, mass):
                 msg += f"Mass of {name} was specified to be {mass} but is now to {self[name].mass}.\n"
 
         for name, volume in volumes.items():
             volume = enforce_units(volume, "volume")
-            if not np.isclose(self.components[name].volume, volume):
+            if not isclose(self.components[name].volume, volume):
                 msg += f"Volume of {name} was specified to be {volume} but is now {self[name].volume}.\n"
 
         for name, concentration in concentrations.items():
             concentration = enforce_units(concentration, "concentration")
-            if not np.isclose(self.concentration[name], concentration):
+            if not isclose(self.concentration[name], concentration):
                 msg += f"Concentration of {name} was specified to be {concentration} but is now {self.concentration[name]}.\n"
 
         for name, mass_fraction in mass_fractions.items():
-            if not np.isclose(self.mass_fraction[name], mass_fraction):
+            if not isclose(self.mass_fraction[name], mass_fraction):
                 msg += f"Mass fraction of {name} was specified to be {mass_fraction} but is now {self.mass_fraction[name]}.\n"
 
         for name, volume_fraction in volume_fractions.items():
-            if not np.isclose(self.volume_fraction[name], volume_fraction):
+            if not isclose(self.volume_fraction[name], volume_fraction):
                 msg += f"Volume fraction of {name} was specified to be {volume_fraction} but is now {self.volume_fraction[name]}.\n"
 
         for name, molarity in molarities.items():
             molarity = enforce_units(molarity, "molarity")
-            if not np.isclose(self.molarity[name], molarity):
+            if not isclose(self.molarity[name], molarity):
                 msg += f"Molarity of {name} was specified to be {molarity} but is now {self.molarity[name]}.\n"
 
         for name, molality_value in molalities.items():
             molality_value = enforce_units(molality_value, "molality")
-            if not np.isclose(self.molality[name], molality_value):
+            if not isclose(self.molality[name], molality_value):
                 msg += f"Molality of {name} was specified to be {molality_value} but is now {self.molality[name]}.\n"
 
         if total_mass is not None:
-            if not np.isclose(self.mass, enforce_units(total_mass, "mass")):
+            if not isclose(self.mass, enforce_units(total_mass, "mass")):
                 msg += f"Total mass was specified to be {total_mass} but is now {self.mass}.\n"
 
         if total_volume is not None:
-            if not np.isclose(self.volume, enforce_units(total_volume, "volume")):
+            if not isclose(self.volume, enforce_units(total_volume, "volume")):
                 msg += f"Total volume was specified to be {total_volume} but is now {self.volume}.\n"
 
         if msg:
@@ -472,14 +474,7 @@ class Solution(Context):
             else:
                 solute = False
 
-            try:
-                component_data = mixdb.get_component(name)
-                # Ignore unexpected DB fields so control/query keys do not break
-                # Component initialization.
-                component_data = {k: v for k, v in component_data.items() if k in self._component_init_keys}
-                self.components[name] = Component(solute=solute, **component_data)
-            except NotFoundError:
-                raise
+            self.components[name] = mixdb.new_component(name, solute=solute)
 
     def set_properties_from_dict(self, properties=None, inplace=False):
         if properties is not None:
@@ -561,13 +556,29 @@ class Solution(Context):
     def all_components_have_mass(self):
         return all([component.has_mass for name, component in self])
 
+    @property
+    def mass_g(self) -> float:
+        """Total mass of mixture in grams"""
+        return sum(component.mass_g for component in self.components.values() if component.mass_g is not None)
+
+    @property
+    def volume_ml(self) -> float:
+        """Total volume of mixture in ml. Only solvents are included in volume calculation"""
+        return sum(component.mass_g / component.density_g_ml for name, component in self.solvents)
+
+    def _scale_masses(self, factor: float):
+        for component in self.components.values():
+            if component.mass_g is not None:
+                component.set_mass_g(component.mass_g * factor)
+
+    def to_array(self) -> SolutionArray:
+        """Return the composition of this solution as a one-row SolutionArray"""
+        return SolutionArray.from_solutions([self])
+
     @property
     def mass(self) -> pint.Quantity:
         """Total mass of mixture."""
-        masses = [component.mass for name, component in self if component.has_mass]
-        if len(masses) == 0:
-            return 0 * units("mg")
-        return sum(masses)
+        return to_quantity(self.mass_g, "mass")
 
     @mass.setter
     def mass(self, value: str | pint.Quantity):
@@ -577,10 +588,7 @@ class Solution(Context):
         #     f"solution has: { {k:v.mass for k,v in self.components.items()} }"
         # )
         value = enforce_units(value, "mass")
-        scale_factor = value / self.mass
-        for name, component in self:
-            if component.has_mass:
-                component.mass = enforce_units((component.mass * scale_factor), "mass")
+        self._scale_masses(value.magnitude * MASS_TO_G / self.mass_g)
 
     def set_mass(self, value: str | pint.Quantity):
         """Setter for inline mass changes"""
@@ -592,11 +600,7 @@ class Solution(Context):
     @property
     def volume(self) -> pint.Quantity:
         """Total volume of mixture. Only solvents are included in volume calculation"""
-        volumes = [component.volume for name, component in self.solvents]
-        if len(volumes) == 0:
-            return 0 * units("ml")
-        else:
-            return sum(volumes)
+        return to_quantity(self.volume_ml, "volume")
 
     @volume.setter
     def volume(self, value: str | pint.Quantity):
@@ -606,22 +610,8 @@ class Solution(Context):
 
         total_volume = enforce_units(value, "volume")
 
-        w = self.mass_fraction
-
-        # grab the density of the first solvent
-        rho_1 = self.solvents[0][1].density
-
-        denominator = [1.0]
-        # skip the first solvent
-        for name, component in self.solvents[1:]:
-            rho_2 = component.density
-            denominator.append(-w[name] * (1 - rho_1 / rho_2))
-
-        for name, component in self.solutes:
-            denominator.append(-w[name])
-
-        total_mass = enforce_units(total_volume * rho_1 / sum(denominator), "mass")
-        self.mass = total_mass
+        # only solvents have volume, so at fixed composition the volume scales with the mass
+        self._scale_masses(total_volume.to("ml").magnitude / self.volume_ml)
 
     def set_volume(self, value: str | pint.Quantity):
         """Setter for inline volume changes"""
@@ -645,19 +635,18 @@ class Solution(Context):
 
     @property
     def solvent_density(self):
-        m = self.solvent_mass
-        v = self.solvent_volume
-        return enforce_units(m / v, "density")
+        return to_quantity(self._solvent_mass_g() / self.volume_ml, "density")
 
     @property
     def solvent_volume(self):
-        return sum(
-            [component.mass / component.density for name, component in self.solvents]
-        )
+        return self.volume
+
+    def _solvent_mass_g(self) -> float:
+        return sum(component.mass_g for name, component in self.solvents)
 
     @property
     def solvent_mass(self):
-        return sum([component.mass for name, component in self.solvents])
+        return to_quantity(self._solvent_mass_g(), "mass")
 
     @property
     def mass_fraction(self):
@@ -668,11 +657,8 @@ class Solution(Context):
         mass_fraction: dict
         Component mass fractions
         """
-        total_mass = self.mass
-        mass_fraction = {}
-        for name, component in self:
-            mass_fraction[name] = component.mass / total_mass
-        return {name: component.mass / total_mass for name, component in self}
+        total_mass = self.mass_g
+        return {name: to_quantity(component.mass_g / total_mass, "mass_fraction") for name, component in self}
 
     @mass_fraction.setter
     def mass_fraction(self, target_mass_fractions):
@@ -705,9 +691,10 @@ class Solution(Context):
         solvent_fraction: dict
         Component mass fractions
         """
-        total_volume = self.volume
+        total_volume = self.volume_ml
         return {
-            name: component.volume / total_volume for name, component in self.solvents
+            name: to_quantity(component.mass_g / component.density_g_ml / total_volume, "volume_fraction")
+            for name, component in self.solvents
         }
 
     @volume_fraction.setter
@@ -734,8 +721,8 @@ class Solution(Context):
 
     @property
     def concentration(self):
-        total_volume = self.volume
-        return {name: component.mass / total_volume for name, component in self}
+        total_volume = self.volume_ml
+        return {name: to_quantity(component.mass_g / total_volume, "concentration") for name, component in self}
 
     @concentration.setter
     def concentration(self, concentration_dict):
@@ -748,11 +735,11 @@ class Solution(Context):
 
     @property
     def molarity(self):
-        total_volume = self.volume
+        total_volume_l = self.volume_ml / 1000.0
         result = {}
         for name, component in self:
             if component.has_formula:
-                result[name] = enforce_units(component.moles / total_volume, "molarity")
+                result[name] = to_quantity(component.mass_g / component.molar_mass_g_mol / total_volume_l, "molarity")
         return result
 
     @molarity.setter
@@ -783,11 +770,11 @@ class Solution(Context):
         molality: dict
             Component molalities for components with chemical formulas defined
         """
-        solvent_mass_kg = self.solvent_mass.to('kg')
+        solvent_mass_kg = self._solvent_mass_g() / 1000.0
         result = {}
         for name, component in self:
             if component.has_formula:
-                result[name] = enforce_units(component.moles / solvent_mass_kg, "molality")
+                result[name] = to_quantity(component.mass_g / component.molar_mass_g_mol / solvent_mass_kg, "molality")
         return result
 
     @molality.setter
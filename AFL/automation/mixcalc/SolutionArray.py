@@ -0,0 +1,274 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from AFL.automation.mixcalc.Component import Component
+from AFL.automation.shared.units import units
+
+# Canonical units of the array core. Values are converted to pint quantities in
+# these units only when they leave SolutionArray (see quantities()).
+CANONICAL_UNITS = {
+    'mass': 'g',
+    'volume': 'ml',
+    'density': 'g/ml',
+    'concentration': 'g/ml',
+    'molarity': 'mol/l',
+    'molality': 'mol/kg',
+    'mass_fraction': 'dimensionless',
+    'volume_fraction': 'dimensionless',
+}
+
+# Units the Solution API has always returned for each property
+SOLUTION_UNITS = {
+    'mass': 'mg',
+    'volume': 'ml',
+    'density': 'g/ml',
+    'concentration': 'mg/ml',
+    'molarity': 'millimolar',
+    'molality': 'mol/kg',
+    'mass_fraction': 'dimensionless',
+    'volume_fraction': 'dimensionless',
+}
+
+_UNIT_OBJECTS = {prop: units.Unit(unit) for prop, unit in SOLUTION_UNITS.items()}
+_FROM_CANONICAL = {
+    prop: units.Quantity(1.0, CANONICAL_UNITS[prop]).to(unit).magnitude for prop, unit in SOLUTION_UNITS.items()
+}
+
+
+def to_quantity(value: float, prop: str) -> units.Quantity:
+    """Convert a float in canonical units to a quantity in the unit Solution returns for prop"""
+    return units.Quantity(value * _FROM_CANONICAL[prop], _UNIT_OBJECTS[prop])
+
+
+class SolutionArray:
+    """Compositions of one or more solutions stored as NumPy arrays in canonical units
+
+    Row i of ``masses`` holds the component masses (g) of solution i and column j
+    corresponds to ``components[j]``. Per-component properties (density in g/ml,
+    molar mass in g/mol, solvent mask) are shared by every row. Solutes have no
+    density and do not contribute to the volume, exactly as in Solution.
+
+    All properties are computed for every row at once, so a batch of solutions
+    (e.g., the balanced targets of a sweep) costs one set of array operations
+    rather than one pint operation per component per solution. Use
+    ``from_solutions`` to build an array and ``to_solution``/``quantities`` to
+    convert back at the API boundary.
+
+    Parameters
+    ----------
+    components : list of Component
+        Template component for each column; supplies name, density, formula and solute flag.
+    masses : np.ndarray
+        Component masses in grams, shape (n_solutions, n_components).
+    names : list of str, optional
+        Name of each solution.
+    """
+
+    def __init__(self, components: List[Component], masses: np.ndarray, names: Optional[List[str]] = None):
+        self.components = list(components)
+        self.masses = np.atleast_2d(np.asarray(masses, dtype=float))
+        if self.masses.shape[1] != len(self.components):
+            raise ValueError(
+                f'masses has {self.masses.shape[1]} columns but {len(self.components)} components were given'
+            )
+        if names is None:
+            names = [''] * self.masses.shape[0]
+        self.names = list(names)
+
+        self.component_names = [component.name for component in self.components]
+        self.solvent_mask = np.array(
+            [(not component.solute) and component.density_g_ml is not None for component in self.components],
+            dtype=bool,
+        )
+        self.densities = np.array(
+            [np.nan if component.density_g_ml is None else component.density_g_ml for component in self.components],
+            dtype=float,
+        )
+        self.molar_masses = np.array(
+            [np.nan if component.molar_mass_g_mol is None else component.molar_mass_g_mol
+             for component in self.components],
+            dtype=float,
+        )
+
+    @classmethod
+    def from_solutions(cls, solutions: Sequence, components: Optional[List[str]] = None) -> 'SolutionArray':
+        """Build an array from Solution objects
+
+        Columns follow ``components`` if given, otherwise every component of the
+        solutions in order of first appearance. Components missing from a
+        solution (or without a mass) have zero mass in its row.
+
+        Raises
+        ------
+        ValueError
+            If the same component has different densities in different solutions.
+        """
+        templates: Dict[str, Component] = {}
+        for solution in solutions:
+            for name, component in solution:
+                template = templates.get(name, None)
+                if template is None:
+                    templates[name] = component
+                elif template.density_g_ml != component.density_g_ml:
+                    raise ValueError(
+                        f'Density mismatch for component {name}: {template.density} and {component.density}'
+                    )
+        if components is None:
+            components = list(templates)
+        else:
+            missing = [name for name in components if name not in templates]
+            if missing:
+                raise KeyError(f'Components {missing} are not in any of the solutions')
+
+        column = {name: j for j, name in enumerate(components)}
+        masses = np.zeros((len(solutions), len(components)))
+        for i, solution in enumerate(solutions):
+            for name, component in solution:
+                j = column.get(name, None)
+                if j is not None and component.mass_g is not None:
+                    masses[i, j] = component.mass_g
+        return cls(
+            [templates[name] for name in components],
+            masses,
+            names=[solution.name for solution in solutions],
+        )
+
+    def __len__(self) -> int:
+        return self.masses.shape[0]
+
+    def __getitem__(self, index) -> 'SolutionArray':
+        rows = np.arange(len(self))[index]
+        rows = np.atleast_1d(rows)
+        return SolutionArray(self.components, self.masses[rows], names=[self.names[i] for i in rows])
+
+    def index(self, component: str) -> int:
+        return self.component_names.index(component)
+
+    @property
+    def mass(self) -> np.ndarray:
+        """Total mass of each solution (g)"""
+        return self.masses.sum(axis=1)
+
+    @property
+    def component_volumes(self) -> np.ndarray:
+        """Volume of each solvent (ml); solutes are zero"""
+        volumes = np.zeros_like(self.masses)
+        volumes[:, self.solvent_mask] = self.masses[:, self.solvent_mask] / self.densities[self.solvent_mask]
+        return volumes
+
+    @property
+    def volume(self) -> np.ndarray:
+        """Total volume of each solution (ml). Only solvents contribute."""
+        return self.component_volumes.sum(axis=1)
+
+    @property
+    def solvent_mass(self) -> np.ndarray:
+        """Total solvent mass of each solution (g)"""
+        return self.masses[:, self.solvent_mask].sum(axis=1)
+
+    @property
+    def mass_fraction(self) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.masses / self.mass[:, None]
+
+    @property
+    def volume_fraction(self) -> np.ndarray:
+        """Volume fraction of each solvent; solute columns are nan"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fractions = self.component_volumes / self.volume[:, None]
+        fractions[:, ~self.solvent_mask] = np.nan
+        return fractions
+
+    @property
+    def concentration(self) -> np.ndarray:
+        """Mass of each component per volume of solution (g/ml)"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.masses / self.volume[:, None]
+
+    @property
+    def moles(self) -> np.ndarray:
+        """Moles of each component; nan for components without a formula"""
+        return self.masses / self.molar_masses
+
+    @property
+    def molarity(self) -> np.ndarray:
+        """Moles per liter of solution (mol/l); nan for components without a formula"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.moles / (self.volume[:, None] / 1000.0)
+
+    @property
+    def molality(self) -> np.ndarray:
+        """Moles per kilogram of solvent (mol/kg); nan for components without a formula"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.moles / (self.solvent_mass[:, None] / 1000.0)
+
+    def scaled(self, factors) -> 'SolutionArray':
+        """Return a copy with every row's masses multiplied by factors (scalar or one per row)"""
+        factors = np.broadcast_to(np.asarray(factors, dtype=float), (len(self),))
+        return SolutionArray(self.components, self.masses * factors[:, None], names=self.names)
+
+    def with_mass(self, mass_g) -> 'SolutionArray':
+        """Return a copy rescaled to total masses mass_g (g) with unchanged composition"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.scaled(np.asarray(mass_g, dtype=float) / self.mass)
+
+    def with_volume(self, volume_ml) -> 'SolutionArray':
+        """Return a copy rescaled to total volumes volume_ml (ml) with unchanged composition"""
+        if not np.any(self.solvent_mask):
+            raise ValueError("Cannot set Solution volume without any Solvents")
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.scaled(np.asarray(volume_ml, dtype=float) / self.volume)
+
+    def transfer_volumes(self, transfers: np.ndarray) -> np.ndarray:
+        """Volumes (ml) of the mass transfers (g) from each solution; transfers has one column per row of self"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.asarray(transfers, dtype=float) * (self.volume / self.mass)
+
+    def mix(self, transfers: np.ndarray, names: Optional[List[str]] = None) -> 'SolutionArray':
+        """Mix the solutions by mass
+
+        Parameters
+        ----------
+        transfers : np.ndarray
+            Mass (g) taken from each solution, shape (n_mixtures, len(self)) or (len(self),).
+
+        Returns
+        -------
+        SolutionArray
+            One row per mixture with the same components as self.
+        """
+        transfers = np.atleast_2d(np.asarray(transfers, dtype=float))
+        mass_fraction = np.nan_to_num(self.mass_fraction)
+        return SolutionArray(self.components, transfers @ mass_fraction, names=names)
+
+    def quantities(self, prop: str, index: int = 0) -> Dict[str, units.Quantity]:
+        """Return a property of one row as {component: quantity} in the units Solution uses
+
+        prop is one of 'masses', 'mass_fraction', 'volume_fraction',
+        'concentration', 'molarity' or 'molality'. Components for which the
+        property is undefined (nan) are left out.
+        """
+        if prop == 'masses':
+            values, unit = self.masses[index], 'mass'
+        else:
+            values, unit = getattr(self, prop)[index], prop
+        return {
+            name: to_quantity(value, unit)
+            for name, value in zip(self.component_names, values)
+            if not np.isnan(value)
+        }
+
+    def to_solution(self, index: int = 0, name: Optional[str] = None):
+        """Build a Solution from one row; every column becomes a component"""
+        from AFL.automation.mixcalc.Solution import Solution
+
+        solution = Solution(name=self.names[index] if name is None else name)
+        for component, mass_g in zip(self.components, self.masses[index]):
+            component = component.copy()
+            component.set_mass_g(float(mass_g))
+            solution.components[component.name] = component
+        return solution
+
+    def to_solutions(self) -> list:
+        return [self.to_solution(i) for i in range(len(self))]
@@ -1,18 +1,21 @@
+from AFL.automation.mixcalc.BalanceCache import BalanceCache
+from AFL.automation.mixcalc.BalanceJob import BalanceJob
 from AFL.automation.mixcalc.BalanceDiagnosis import BalanceDiagnosis, FailureCode, FailureDetail
 from AFL.automation.mixcalc.Component import Component
 from AFL.automation.mixcalc.Context import Context, NoContextException
 from AFL.automation.mixcalc.MassBalance import MassBalance
-from AFL.automation.mixcalc.MassBalanceBase import MassBalanceBase
+from AFL.automation.mixcalc.MassBalanceBase import BalanceCancelled, MassBalanceBase
 from AFL.automation.mixcalc.MassBalanceDriver import MassBalanceDriver
 from AFL.automation.mixcalc.MassBalanceWebAppMixin import MassBalanceWebAppMixin
 from AFL.automation.mixcalc.MixDB import MixDB
 from AFL.automation.mixcalc.PipetteAction import PipetteAction
 from AFL.automation.mixcalc.Solution import Solution
+from AFL.automation.mixcalc.SolutionArray import SolutionArray
 from AFL.automation.mixcalc.TargetSolution import TargetSolution
 
 __all__ = [
-    'BalanceDiagnosis', 'FailureCode', 'FailureDetail',
+    'BalanceCache', 'BalanceCancelled', 'BalanceDiagnosis', 'BalanceJob', 'FailureCode', 'FailureDetail',
     'Component', 'Context', 'NoContextException',
     'MassBalance', 'MassBalanceBase', 'MassBalanceDriver', 'MassBalanceWebAppMixin',
-    'MixDB', 'PipetteAction', 'Solution', 'TargetSolution',
+    'MixDB', 'PipetteAction', 'Solution', 'SolutionArray', 'TargetSolution',
 ]
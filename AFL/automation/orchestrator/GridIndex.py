@@ -0,0 +1,153 @@
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy.spatial import cKDTree
+from scipy.spatial.distance import cdist
+
+
+class GridIndex:
+    """
+    Nearest-neighbour lookup over the compositions of a pre-prepared sample grid.
+
+    The compositions are put in a KD-tree once, so finding the grid sample closest to
+    a requested composition costs O(log n) instead of a pass over the whole grid.
+    Measured samples are removed by marking them (tombstones) rather than by copying
+    the grid; the tree is rebuilt over the remaining samples once most of it is dead.
+    Indices always refer to positions in the original grid.
+
+    Parameters
+    ----------
+    coordinates : array-like, shape (n_samples, n_components)
+        Composition of each grid sample.
+
+    components : list of str
+        Component names, in the column order of coordinates.
+
+    scale : None, 'range', dict or sequence
+        Per-component divisor applied before distances are computed. None compares raw
+        coordinates, 'range' divides each component by its spread over the grid (so
+        that components with large values don't dominate), a dict or sequence gives the
+        divisor of each component explicitly (components missing from a dict use 1).
+    """
+
+    # rebuild the tree over the live samples once this fraction of it has been removed
+    REBUILD_FRACTION = 0.5
+
+    def __init__(
+            self,
+            coordinates,
+            components: Sequence[str],
+            scale: Union[None, str, Dict[str, float], Sequence[float]] = None,
+    ):
+        self.components = list(components)
+        coordinates = np.asarray(coordinates, dtype=float)
+        if coordinates.ndim != 2 or coordinates.shape[1] != len(self.components):
+            raise ValueError(
+                f"coordinates must have shape (n_samples, {len(self.components)}), not {coordinates.shape}"
+            )
+        self.scale = self._resolve_scale(coordinates, scale)
+        self._points = coordinates / self.scale
+        self._alive = np.ones(len(coordinates), dtype=bool)
+        self._build()
+
+    def _resolve_scale(self, coordinates, scale) -> np.ndarray:
+        if scale is None:
+            resolved = np.ones(len(self.components))
+        elif isinstance(scale, str):
+            if scale != 'range':
+                raise ValueError(f"scale must be None, 'range', a dict or a sequence, not {scale!r}")
+            resolved = np.ptp(coordinates, axis=0) if len(coordinates) else np.ones(len(self.components))
+        elif isinstance(scale, dict):
+            resolved = np.array([float(scale.get(name, 1.0)) for name in self.components])
+        else:
+            resolved = np.asarray(scale, dtype=float)
+            if resolved.shape != (len(self.components),):
+                raise ValueError(f"scale must have one entry per component ({len(self.components)})")
+        resolved = np.where(np.isfinite(resolved) & (resolved > 0), resolved, 1.0)
+        return resolved
+
+    def _build(self):
+        self._tree_indices = np.flatnonzero(self._alive)
+        self._tree = cKDTree(self._points[self._tree_indices])
+        self._dead_in_tree = 0
+
+    def __len__(self) -> int:
+        return int(self._alive.sum())
+
+    @property
+    def available(self) -> np.ndarray:
+        """Indices of the samples that have not been removed"""
+        return np.flatnonzero(self._alive)
+
+    def nearest(
+            self,
+            points,
+            k: int = 1,
+            components: Optional[Sequence[str]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k closest available grid samples to each point.
+
+        Parameters
+        ----------
+        points : array-like, shape (n_components,) or (n_points, n_components)
+            Unscaled compositions.
+        k : int
+            Number of neighbours per point.
+        components : list of str, optional
+            Components given in points, if only some of the grid's components are; the
+            distance is then measured over those alone. Such queries can't use the tree
+            and scan the available samples instead.
+
+        Returns
+        -------
+        distances, indices : np.ndarray, shape (n_points, k)
+            Distances in scaled units and grid indices, closest first. Rows are padded
+            with inf / -1 when fewer than k samples are available.
+        """
+        partial = components is not None and list(components) != self.components
+        columns = [self.components.index(name) for name in components] if partial else slice(None)
+        points = np.atleast_2d(np.asarray(points, dtype=float)) / self.scale[columns]
+        n_alive = len(self)
+        distances = np.full((len(points), k), np.inf)
+        indices = np.full((len(points), k), -1, dtype=int)
+        if n_alive == 0 or k < 1:
+            return distances, indices
+
+        want = min(k, n_alive)
+        if partial:
+            available = self.available
+            dist = cdist(points, self._points[available][:, columns])
+            order = np.argsort(dist, axis=1, kind='stable')[:, :want]
+            distances[:, :want] = np.take_along_axis(dist, order, axis=1)
+            indices[:, :want] = available[order]
+            return distances, indices
+
+        n_tree = len(self._tree_indices)
+        # ask for enough extra neighbours to skip removed samples; widen until every row is served
+        n_query = min(n_tree, 2 * want if self._dead_in_tree else want)
+        pending = np.arange(len(points))
+        while len(pending):
+            dist, pos = self._tree.query(points[pending], k=n_query)
+            dist = dist.reshape(len(pending), n_query)
+            grid_idx = self._tree_indices[pos.reshape(len(pending), n_query)]
+            alive = self._alive[grid_idx]
+            served = alive.sum(axis=1) >= want
+            if n_query == n_tree:
+                served[:] = True
+            for row in np.flatnonzero(served):
+                keep = np.flatnonzero(alive[row])[:want]
+                distances[pending[row], :len(keep)] = dist[row, keep]
+                indices[pending[row], :len(keep)] = grid_idx[row, keep]
+            pending = pending[~served]
+            n_query = min(n_tree, 2 * n_query)
+        return distances, indices
+
+    def remove(self, indices: Union[int, Sequence[int]]) -> None:
+        """Mark grid samples as used; later queries skip them"""
+        indices = np.atleast_1d(np.asarray(indices, dtype=int))
+        newly_dead = indices[self._alive[indices]]
+        self._alive[newly_dead] = False
+        self._dead_in_tree += len(np.unique(newly_dead))
+        if self._dead_in_tree > self.REBUILD_FRACTION * len(self._tree_indices):
+            self._build()
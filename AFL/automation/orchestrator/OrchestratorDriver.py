@@ -16,6 +16,7 @@ import numpy as np
 import requests  # type: ignore
 import xarray as xr 
 from scipy.spatial.distance import cdist
+from tiled.queries import Eq  # type: ignore
 
 from AFL.automation.APIServer.Client import Client  # type: ignore
 from AFL.automation.APIServer.Driver import Driver  # type: ignore
@@ -112,6 +113,32 @@ class OrchestratorDriver(Driver):
     defaults['empty_prefix'] = 'MT-'
     defaults['composition_format'] = 'masses'
     defaults['next_samples_variable'] = 'next_samples'
+
+    # (sample_uuid key, task_name key) for server-side run_documents queries; datasets
+    # keep DataPacket metadata under attrs, arrays and dataframes at the top level
+    RUN_DOCUMENT_QUERY_KEYS = (
+        ('attrs.sample_uuid', 'attrs.task_name'),
+        ('sample_uuid', 'task_name'),
+    )
+    # newest matches fetched per query
+    RUN_DOCUMENT_QUERY_LIMIT = 50
+    RUN_DOCUMENT_SAMPLE_UUID_PATHS = (
+        'sample_uuid',
+        'attrs.sample_uuid',
+        'attr.sample_uuid',
+        'metadata.sample_uuid',
+        'metadata.attrs.sample_uuid',
+        'metadata.attr.sample_uuid',
+    )
+    RUN_DOCUMENT_TASK_NAME_PATHS = (
+        'task_name',
+        'attrs.task_name',
+        'attr.task_name',
+        'metadata.task_name',
+        'metadata.attrs.task_name',
+        'metadata.attr.task_name',
+    )
+
     def __init__(
             self,
             camera_urls: Optional[List[str]] = None,
@@ -147,6 +174,9 @@ class OrchestratorDriver(Driver):
         self.catch_protocol = None
         self.AL_status_str = ''
 
+        # local sample_uuid -> run_documents entries index, used when Tiled queries are unavailable
+        self._run_document_index = self._empty_run_document_index(None)
+
     def validate_config(self):
         required_keys = [
             'client',
@@ -565,6 +595,101 @@ class OrchestratorDriver(Driver):
             yield entry_id, entry
             yield from self._iter_run_document_entries(entry, prefix=entry_id)
 
+    @staticmethod
+    def _empty_run_document_index(client: Any) -> Dict[str, Any]:
+        return {'client': client, 'n_indexed': 0, 'by_sample_uuid': {}}
+
+    def _query_run_document_entries(
+        self,
+        run_documents: Any,
+        *,
+        sample_uuid: str,
+        task_name: Optional[str] = None,
+    ) -> Optional[List[Tuple[str, Any]]]:
+        """Find matching run_documents entries with server-side Tiled queries.
+
+        Each layout in RUN_DOCUMENT_QUERY_KEYS is queried for the newest
+        RUN_DOCUMENT_QUERY_LIMIT matches, so the cost does not depend on the size of
+        run_documents. Returns None if the container cannot be queried.
+        """
+        if not hasattr(run_documents, 'search'):
+            return None
+
+        matches: Dict[str, Any] = {}
+        for sample_uuid_key, task_name_key in self.RUN_DOCUMENT_QUERY_KEYS:
+            try:
+                results = run_documents.search(Eq(sample_uuid_key, sample_uuid))
+                if task_name is not None:
+                    results = results.search(Eq(task_name_key, task_name))
+                results = results.sort(('', -1))  # newest first
+                page = list(itertools.islice(results.items(), self.RUN_DOCUMENT_QUERY_LIMIT))
+            except MissingTiledConfigurationError:
+                raise
+            except Exception as e:
+                self.log_warning(f"Tiled query on run_documents failed, using local index instead: {e}")
+                return None
+
+            # keep the oldest-first order of a full scan
+            for entry_id, entry in reversed(page):
+                matches.setdefault(str(entry_id), entry)
+
+        return list(matches.items())
+
+    def _sample_uuids_in_metadata(self, metadata: Dict[str, Any]) -> set:
+        values = [self._get_nested_metadata_value(metadata, path) for path in self.RUN_DOCUMENT_SAMPLE_UUID_PATHS]
+        values.extend(self._iter_metadata_field_values(metadata, 'sample_uuid'))
+
+        sample_uuids = set()
+        for value in values:
+            value = self._normalize_metadata_value(value)
+            if isinstance(value, (str, int)):
+                sample_uuids.add(value)
+        return sample_uuids
+
+    def _update_run_document_index(self, client: Any, run_documents: Any) -> Dict[str, Any]:
+        """Bring the local sample_uuid index of run_documents up to date.
+
+        Only top-level entries added since the previous update are visited; nested
+        containers are indexed when their parent is first seen. The index is rebuilt
+        when the Tiled client changes or entries were removed.
+        """
+        index = self._run_document_index
+        try:
+            n_entries: Optional[int] = len(run_documents)
+        except MissingTiledConfigurationError:
+            raise
+        except Exception:
+            n_entries = None
+
+        if index['client'] is not client or (n_entries is not None and n_entries < index['n_indexed']):
+            index = self._run_document_index = self._empty_run_document_index(client)
+        if n_entries is not None and n_entries == index['n_indexed']:
+            return index
+
+        try:
+            items = run_documents.items()
+            try:
+                new_items = list(items[index['n_indexed']:])
+            except TypeError:
+                new_items = list(itertools.islice(items, index['n_indexed'], None))
+        except MissingTiledConfigurationError:
+            raise
+        except Exception:
+            return index
+
+        for key, entry in new_items:
+            entry_id = str(key)
+            entries = itertools.chain(
+                [(entry_id, entry)],
+                self._iter_run_document_entries(entry, prefix=entry_id),
+            )
+            for nested_id, nested_entry in entries:
+                metadata = dict(getattr(nested_entry, 'metadata', {}) or {})
+                for value in self._sample_uuids_in_metadata(metadata):
+                    index['by_sample_uuid'].setdefault(value, []).append((nested_id, nested_entry))
+        index['n_indexed'] += len(new_items)
+        return index
+
     def _find_run_document_entries(
         self,
         *,
@@ -581,50 +706,31 @@ class OrchestratorDriver(Driver):
             self.log_warning("No run_documents container found in Tiled")
             return []
 
-        sample_uuid_paths = (
-            'sample_uuid',
-            'attrs.sample_uuid',
-            'attr.sample_uuid',
-            'metadata.sample_uuid',
-            'metadata.attrs.sample_uuid',
-            'metadata.attr.sample_uuid',
-        )
-        task_name_paths = (
-            'task_name',
-            'attrs.task_name',
-            'attr.task_name',
-            'metadata.task_name',
-            'metadata.attrs.task_name',
-            'metadata.attr.task_name',
+        matches = self._query_run_document_entries(
+            run_documents,
+            sample_uuid=sample_uuid,
+            task_name=task_name,
         )
-
-        matches: List[Tuple[str, Any]] = []
-        for entry_id, entry in self._iter_run_document_entries(run_documents):
+        if matches:
+            return matches
+        # the queries only cover direct children in the RUN_DOCUMENT_QUERY_KEYS layouts;
+        # nested containers and other metadata layouts are only found by the local index
+
+        index = self._update_run_document_index(client, run_documents)
+        candidates = index['by_sample_uuid'].get(self._normalize_metadata_value(sample_uuid), [])
+        if task_name is None:
+            return list(candidates)
+
+        matches = []
+        for entry_id, entry in candidates:
             metadata = dict(getattr(entry, 'metadata', {}) or {})
-            if not metadata:
-                continue
-
-            sample_matches = self._metadata_matches(
+            if self._metadata_matches(
                 metadata,
-                sample_uuid,
-                field_name='sample_uuid',
-                paths=sample_uuid_paths,
-            )
-            if not sample_matches:
-                continue
-
-            if task_name is not None:
-                task_matches = self._metadata_matches(
-                    metadata,
-                    task_name,
-                    field_name='task_name',
-                    paths=task_name_paths,
-                )
-                if not task_matches:
-                    continue
-
-            matches.append((entry_id, entry))
-
+                task_name,
+                field_name='task_name',
+                paths=self.RUN_DOCUMENT_TASK_NAME_PATHS,
+            ):
+                matches.append((entry_id, entry))
         return matches
 
     def _iter_predict_entries_for_sample(self, sample_uuid: str) -> List[Tuple[str, Any]]:
@@ -1,4 +1,5 @@
 import itertools
+import json
 import datetime
 import pathlib
 import shutil
@@ -24,6 +25,7 @@ from AFL.automation.APIServer.Driver import Driver  # type: ignore
 from AFL.automation.mixcalc.Solution import Solution  # type: ignore
 from AFL.automation.shared.units import units  # type: ignore
 from AFL.automation.orchestrator.OrchestratorDriver import OrchestratorDriver  # type: ignore
+from AFL.automation.orchestrator.GridIndex import GridIndex  # type: ignore
 
 
 class OrchestratorGridDriver(OrchestratorDriver):
@@ -48,6 +50,11 @@ class OrchestratorGridDriver(OrchestratorDriver):
         
     grid_blank_sample: dict or None
         Dictionary defining blank sample kwargs for measurement
+
+    grid_component_scale: None, 'range' or dict
+        Per-component scaling used when matching compositions to grid samples. None
+        compares raw values, 'range' divides each component by its spread over the grid,
+        a dict maps component names to divisors
         
     Instrument config additions for grid:
         select_sample_base_kw: dict
@@ -64,6 +71,7 @@ class OrchestratorGridDriver(OrchestratorDriver):
     defaults['grid_entry_id'] = None
     defaults['grid_blank_interval'] = None
     defaults['grid_blank_sample'] = None
+    defaults['grid_component_scale'] = None
 
     def __init__(
             self,
@@ -93,6 +101,7 @@ class OrchestratorGridDriver(OrchestratorDriver):
         self.name = 'OrchestratorGridDriver'
         self.grid_sample_count = 0
         self.grid_data = None
+        self.grid_index = None
         self.stop_grid = False
 
     def validate_config_grid(self):
@@ -135,6 +144,10 @@ class OrchestratorGridDriver(OrchestratorDriver):
             
         if self.config['grid_blank_sample'] is not None and not isinstance(self.config['grid_blank_sample'], dict):
             raise TypeError("self.config['grid_blank_sample'] must be a dictionary")
+
+        scale = self.config['grid_component_scale']
+        if scale is not None and scale != 'range' and not isinstance(scale, dict):
+            raise TypeError("self.config['grid_component_scale'] must be None, 'range' or a dictionary")
             
         print("Grid configuration validation passed successfully.")
 
@@ -188,7 +201,8 @@ class OrchestratorGridDriver(OrchestratorDriver):
     def reset_grid(self):
         """Reload the grid from tiled entry_id or file and reset grid_sample_count.
         
-        Prioritizes grid_entry_id (tiled) over grid_file (local path).
+        Prioritizes grid_entry_id (tiled) over grid_file (local path). All grid samples
+        become available again and the nearest-sample index is rebuilt.
         """
         if self.config.get('grid_entry_id'):
             # Load from tiled
@@ -236,6 +250,79 @@ class OrchestratorGridDriver(OrchestratorDriver):
                 self.app.logger.info("No grid configured (no grid_entry_id or grid_file)")
             else:
                 print("No grid configured (no grid_entry_id or grid_file)")
+        self._build_grid_index()
+
+    def _build_grid_index(self):
+        """Index the compositions of grid_data for nearest-sample lookups."""
+        if self.grid_data is None:
+            self.grid_index = None
+            return
+        coordinates = self.grid_data[self.config['components']].to_array('component').transpose(..., 'component')
+        self.grid_index = GridIndex(
+            coordinates.values,
+            self.config['components'],
+            scale=self.config['grid_component_scale'],
+        )
+
+    def _nearest_grid_indices(self, samples: List[Dict], k: int = 1):
+        """Grid indices (and distances) of the k available samples closest to each composition.
+
+        Only the configured components present in the samples are compared, so samples
+        that specify a subset of the components (e.g. the AL_components) are matched on
+        that subset.
+        """
+        if self.grid_index is None:
+            self._build_grid_index()
+        components = [c for c in self.config['components'] if c in samples[0]]
+        if not components:
+            raise ValueError(f"Samples contain none of the grid components {self.config['components']}")
+        points = [[float(sample[c]) for c in components] for sample in samples]
+        return self.grid_index.nearest(points, k=k, components=components)
+
+    @Driver.unqueued()
+    def nearest_grid_samples(self, samples, k: int = 1, **kwargs):
+        """Find the k available grid samples closest to each requested composition.
+
+        Parameters
+        ----------
+        samples : dict or list of dict
+            Compositions (component name -> value), or a JSON string of them
+        k : int
+            Number of grid samples to return per composition
+
+        Returns
+        -------
+        list of list of dict
+            For each composition, up to k grid samples (all grid variables, plus
+            'grid_index' and 'distance'), closest first
+        """
+        if self.grid_data is None:
+            self.reset_grid()
+        if self.grid_data is None:
+            raise ValueError("No grid data available. Set grid_entry_id or grid_file in config.")
+        if isinstance(samples, str):
+            samples = json.loads(samples)
+        if isinstance(samples, dict):
+            samples = [samples]
+
+        distances, indices = self._nearest_grid_indices(samples, k=int(k))
+        found = indices[indices >= 0]
+        grid_samples = self.grid_data.isel(sample=found).reset_coords()
+        columns = {name: grid_samples[name].values.tolist() for name in grid_samples.data_vars}
+        records = iter([{name: values[i] for name, values in columns.items()} for i in range(len(found))])
+
+        result = []
+        for row_distances, row_indices in zip(distances, indices):
+            matches = []
+            for distance, grid_index in zip(row_distances, row_indices):
+                if grid_index < 0:
+                    break
+                match = next(records)
+                match['grid_index'] = int(grid_index)
+                match['distance'] = float(distance)
+                matches.append(match)
+            result.append(matches)
+        return result
 
     def process_sample_grid(
             self,
@@ -316,17 +403,19 @@ class OrchestratorGridDriver(OrchestratorDriver):
             # Configure blank measurement
             self.measure_grid_sample(blank_sample, name=blank_name, empty=True)
         
-        # Find the closest sample in the grid by euclidean distance
-        available = self.grid_data[self.config['components']].to_array('component').transpose(...,'component')
-        selected = xr.Dataset(sample).to_array('component')
-        dist = (selected - available).pipe(np.square).sum('component')  # no sqrt needed for just min distance
-        sample_index = dist.argmin()
+        # Find the closest available sample in the grid by euclidean distance
+        if self.grid_index is None:
+            self._build_grid_index()
+        if len(self.grid_index) == 0:
+            raise ValueError("All grid samples have been measured. Call reset_grid to start over.")
+        _, indices = self._nearest_grid_indices([sample])
+        sample_index = int(indices[0, 0])
         
         # Get the data variables from grid_data and add them individually to sample dict
         grid_sample = self.grid_data.isel(sample=sample_index).reset_coords()
         for var_name in grid_sample.data_vars:
             sample[var_name] = grid_sample[var_name].item()
-        self.update_status(f"Found closest sample: index {sample_index.item()}")
+        self.update_status(f"Found closest sample: index {sample_index}")
         
         # Generate sample name if not provided
         if name is None:
@@ -359,8 +448,8 @@ class OrchestratorGridDriver(OrchestratorDriver):
         for client_name in self.config['client'].keys():
             self.get_client(client_name).enqueue(task_name='set_sample', **sample_data)
         
-        # Update grid data - remove measured sample
-        self.grid_data = self.grid_data.drop_isel(sample=sample_index)
+        # Mark the measured sample as used; grid_data itself is kept whole
+        self.grid_index.remove(sample_index)
         self.grid_sample_count += 1
         
         # Predict next sample if requested
@@ -40,6 +40,8 @@ class OT2HTTPDriver(OT2DeckWebAppMixin, Driver):
     defaults["loaded_modules"] = {}  # Persistent storage for loaded modules
     defaults["available_tips"] = {}  # Persistent storage for available tips, Format: {mount: [(tiprack_id, well_name), ...]}
     defaults["prep_targets"] = []  # Persistent storage for prep target well locations
+    # tip tracking updates the config on every pickup, so only append the changes
+    config_backend = 'journal'
 
     def __init__(self, overrides=None):
         self.app = None
@@ -42,6 +42,8 @@ class PrepareDriver(MassBalanceDriver):
 
         self.stocks = []
         self.targets = []
+        self._feasibility_stocks_cache: list[Solution] = []
+        self._feasibility_stocks_signature = None
         self.process_stocks()
 
     def status(self):
@@ -59,45 +61,140 @@ class PrepareDriver(MassBalanceDriver):
         targets: dict | list[dict],
         enable_multistep_dilution: bool | None = None,
     ) -> list[dict | None]:
+        return self.is_feasible_batch(
+            targets,
+            enable_multistep_dilution=enable_multistep_dilution,
+        )["results"]
+
+    def is_feasible_batch(
+        self,
+        targets: dict | list[dict],
+        enable_multistep_dilution: bool | None = None,
+        n_workers: int | None = None,
+        return_targets: bool = True,
+    ) -> dict:
+        """Check whether each target can be made from the configured stocks.
+
+        Stocks are parsed once per stock configuration (see
+        ``_feasibility_stocks``) and all targets are balanced in a single
+        mass-balance pass. If that pass raises, targets are re-balanced one at
+        a time so that a single bad target only fails itself.
+
+        Parameters
+        ----------
+        targets : dict or list of dict
+            Target solution specifications; fixed compositions are applied to each.
+        enable_multistep_dilution : bool, optional
+            Defaults to the ``enable_multistep_dilution`` config value.
+        n_workers : int, optional
+            Worker processes used for the balance (0 for one per CPU). Defaults to
+            ``balance_workers`` when ``balance_mode`` is ``'parallel'``, else 1.
+        return_targets : bool
+            If False, skip serializing the balanced targets and return only the mask.
+
+        Returns
+        -------
+        dict
+            ``feasible``: one bool per target, ``n_feasible``: number of feasible
+            targets and, if return_targets, ``results``: the balanced target as a
+            dict (or None if infeasible) per target.
+        """
         targets_to_check = listify(targets)
-        self.process_stocks()
-        minimum_volume = self.config.get("minimum_volume", "100 ul")
+        stocks = self._feasibility_stocks()
         if enable_multistep_dilution is None:
             enable_multistep_dilution = bool(self.config.get("enable_multistep_dilution", False))
+        if n_workers is None:
+            if self.config.get("balance_mode", "serial") == "parallel":
+                n_workers = int(self.config.get("balance_workers", 0))
+            else:
+                n_workers = 1
 
-        results: list[dict | None] = []
+        target_solutions: list[Solution | None] = []
         for target in targets_to_check:
             try:
-                mb = MassBalance(minimum_volume=minimum_volume)
-                for stock in self.stocks:
-                    mb.stocks.append(stock)
-
                 target_with_fixed = self.apply_fixed_comps(target.copy())
-                target_solution = Solution(**target_with_fixed)
-                mb.targets.append(target_solution)
-                mb.balance(
-                    tol=self.config.get("tol", 1e-3),
-                    enable_multistep_dilution=bool(enable_multistep_dilution),
-                    multistep_max_steps=int(self.config.get("multistep_max_steps", 2)),
-                    multistep_diluent_policy=str(self.config.get("multistep_diluent_policy", "primary_solvent")),
-                )
-
-                if (
-                    mb.balanced
-                    and len(mb.balanced) > 0
-                    and mb.balanced[0].get("balanced_target") is not None
-                ):
-                    results.append(mb.balanced[0]["balanced_target"].to_dict())
-                else:
-                    results.append(None)
+                target_solutions.append(Solution(**target_with_fixed))
             except Exception as e:
-                warnings.warn(
-                    f"Exception during feasibility check for target "
-                    f"{target.get('name', 'Unnamed')}: {str(e)}",
-                    stacklevel=2,
-                )
-                results.append(None)
-        return results
+                self._warn_feasibility_exception(target, e)
+                target_solutions.append(None)
+        valid = [idx for idx, solution in enumerate(target_solutions) if solution is not None]
+
+        balance_kwargs = dict(
+            enable_multistep_dilution=bool(enable_multistep_dilution),
+            n_workers=int(n_workers),
+        )
+        try:
+            balanced = self._balance_for_feasibility(
+                stocks, [target_solutions[idx] for idx in valid], **balance_kwargs
+            )
+        except Exception:
+            balanced = []
+            for idx in valid:
+                try:
+                    balanced.extend(
+                        self._balance_for_feasibility(stocks, [target_solutions[idx]], **balance_kwargs)
+                    )
+                except Exception as e:
+                    self._warn_feasibility_exception(targets_to_check[idx], e)
+                    balanced.append(None)
+
+        feasible = [False] * len(targets_to_check)
+        results: list[dict | None] = [None] * len(targets_to_check)
+        for idx, entry in zip(valid, balanced):
+            if entry is not None and entry.get("balanced_target") is not None:
+                feasible[idx] = True
+                if return_targets:
+                    results[idx] = entry["balanced_target"].to_dict()
+
+        out = {"feasible": feasible, "n_feasible": sum(feasible)}
+        if return_targets:
+            out["results"] = results
+        return out
+
+    def _process_stocks_with_diagnostics(self, capture_diagnostics):
+        diagnostics = super()._process_stocks_with_diagnostics(capture_diagnostics)
+        # every re-parse (e.g., after a component database change) refreshes the feasibility stocks
+        self._feasibility_stocks_cache = list(self.stocks)
+        self._feasibility_stocks_signature = self._config_signature(self.config["stocks"])
+        return diagnostics
+
+    def _feasibility_stocks(self) -> list[Solution]:
+        """Stocks parsed from ``config['stocks']``, re-parsed only when that config changes"""
+        if self._config_signature(self.config["stocks"]) != self._feasibility_stocks_signature:
+            self.process_stocks()
+        return self._feasibility_stocks_cache
+
+    def _balance_for_feasibility(
+        self,
+        stocks: list[Solution],
+        targets: list[Solution],
+        enable_multistep_dilution: bool,
+        n_workers: int,
+    ) -> list[dict]:
+        if not targets:
+            return []
+        mb = MassBalance(minimum_volume=self.config.get("minimum_volume", "100 ul"))
+        mb.stocks.extend(stocks)
+        mb.targets.extend(targets)
+        self._update_balance_cache()
+        mb.balance_cache = self.balance_cache
+        mb.balance(
+            tol=self.config.get("tol", 1e-3),
+            enable_multistep_dilution=enable_multistep_dilution,
+            multistep_max_steps=int(self.config.get("multistep_max_steps", 2)),
+            multistep_diluent_policy=str(self.config.get("multistep_diluent_policy", "primary_solvent")),
+            n_workers=n_workers,
+            max_solves=int(self.config.get("balance_max_solves", 128)),
+        )
+        return mb.balanced
+
+    @staticmethod
+    def _warn_feasibility_exception(target: dict, exception: Exception) -> None:
+        warnings.warn(
+            f"Exception during feasibility check for target "
+            f"{target.get('name', 'Unnamed')}: {str(exception)}",
+            stacklevel=3,
+        )
 
     def apply_fixed_comps(self, target: dict) -> dict:
         result = target.copy()
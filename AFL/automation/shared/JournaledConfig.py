@@ -0,0 +1,305 @@
+import json
+import copy
+import bisect
+import pathlib
+
+from AFL.automation.shared.PersistentConfig import PersistentConfig
+
+class JournaledConfig(PersistentConfig):
+    ''' A PersistentConfig that appends only the changes to disk
+
+    Rather than rewriting the full history on every change, each modification
+    appends a single JSON line to the journal file at ``path`` holding only the
+    keys that were set or deleted. Every ``checkpoint_interval`` entries a full
+    copy of the config is appended instead, so that any historical config can be
+    rebuilt by replaying at most ``checkpoint_interval`` deltas. When the journal
+    grows past ``max_history`` entries or ``max_history_size_mb`` it is compacted
+    by rewriting it from the oldest retained entry.
+
+    Journal lines look like::
+
+        {"t": "<datetime key>", "checkpoint": {...full config...}}
+        {"t": "<datetime key>", "set": {"key": value}, "del": ["other_key"]}
+
+    If the journal does not exist but ``legacy_path`` points to a history file
+    written by PersistentConfig, that history is migrated into the journal.
+    '''
+    def __init__(
+        self,
+        path,
+        defaults=None,
+        overrides=None,
+        lock=False,
+        write=True,
+        max_history=10000,
+        max_history_size_mb=100,
+        write_debounce_seconds=0.1,
+        checkpoint_interval=100,
+        legacy_path=None,
+        datetime_key_format='%y/%d/%m %H:%M:%S.%f'
+                ):
+        '''Constructor
+
+        See PersistentConfig for a description of the shared parameters.
+
+        Parameters
+        ---------
+        checkpoint_interval: int
+            Number of delta entries between full checkpoints of the config.
+
+        legacy_path: str or pathlib.Path, **optional**
+            Path to a PersistentConfig json history file to migrate from if the
+            journal at ``path`` does not exist yet.
+        '''
+        self.checkpoint_interval = checkpoint_interval
+        self.legacy_path = pathlib.Path(legacy_path) if legacy_path is not None else None
+        self._reset_index()
+        super().__init__(
+            path=path,
+            defaults=defaults,
+            overrides=overrides,
+            lock=lock,
+            write=write,
+            max_history=max_history,
+            max_history_size_mb=max_history_size_mb,
+            write_debounce_seconds=write_debounce_seconds,
+            compact_json=True,
+            datetime_key_format=datetime_key_format,
+        )
+
+    def _reset_index(self):
+        self._entries = []          # parsed journal records, oldest first
+        self._positions = {}        # datetime key -> index in self._entries
+        self._checkpoints = []      # indices of checkpoint records (sorted)
+        self._key_changes = {}      # config key -> indices of records that set/deleted it
+        self._line_bytes = []       # serialized size of each record
+        self._bytes = 0
+        self._state = {}            # config as of the last journaled record
+
+    def _index_record(self,record,size):
+        '''Apply a record to the running state and update the lookup indices'''
+        idx = len(self._entries)
+        if 'checkpoint' in record:
+            for key in self._state:
+                if key not in record['checkpoint']:
+                    self._key_changes.setdefault(key,[]).append(idx)
+            self._state = dict(record['checkpoint'])
+            changed = record['checkpoint'].keys()
+            self._checkpoints.append(idx)
+        else:
+            if not self._entries:
+                # a journal should always start with a checkpoint; treat it as empty if not
+                self._checkpoints.append(idx)
+            for key in record.get('del',[]):
+                self._state.pop(key,None)
+            self._state.update(record.get('set',{}))
+            changed = list(record.get('set',{}).keys()) + list(record.get('del',[]))
+        for key in changed:
+            self._key_changes.setdefault(key,[]).append(idx)
+        self._entries.append(record)
+        self._positions[record['t']] = idx
+        self._line_bytes.append(size)
+        self._bytes += size
+
+    @staticmethod
+    def _serialize(record):
+        return json.dumps(record,separators=(',',':')) + '\n'
+
+    def _make_record(self,datetime_key,config):
+        '''Build a delta (or checkpoint) record taking the journal from self._state to config
+
+        Returns None if config does not differ from the last journaled state.
+        '''
+        since_checkpoint = len(self._entries) - self._checkpoints[-1] if self._checkpoints else None
+        if since_checkpoint is None or since_checkpoint >= self.checkpoint_interval:
+            return {'t':datetime_key,'checkpoint':copy.deepcopy(config)}
+
+        changed = {k:copy.deepcopy(v) for k,v in config.items() if k not in self._state or self._state[k] != v}
+        deleted = [k for k in self._state if k not in config]
+        if not changed and not deleted:
+            return None
+        record = {'t':datetime_key}
+        if changed:
+            record['set'] = changed
+        if deleted:
+            record['del'] = deleted
+        return record
+
+    def _load(self):
+        self._reset_index()
+        corrupt = False
+        with open(self.path,'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # most likely a partially written final line; everything before it is intact
+                    corrupt = True
+                    continue
+                self._index_record(record,len(line.encode('utf-8')))
+        if corrupt and self.write:
+            # drop the bad line so the next append does not land on the end of it
+            self._rewrite(self._entries)
+        return copy.deepcopy(self._state)
+
+    def _init_storage(self):
+        self._reset_index()
+        if self.legacy_path is None or not self.legacy_path.exists():
+            return {}
+        with open(self.legacy_path,'r') as f:
+            legacy_history = json.load(f)
+        self._import_history(legacy_history)
+        return copy.deepcopy(self._state)
+
+    def _import_history(self,history):
+        '''Convert a PersistentConfig-style {datetime_key: config} history into journal records'''
+        keys = sorted(history.keys(),key=self._decode_datetime_key)
+        records = []
+        for key in keys:
+            record = self._make_record(key,history[key])
+            if record is None:
+                continue
+            self._index_record(record,len(self._serialize(record).encode('utf-8')))
+            records.append(record)
+        if self.write:
+            self._rewrite(records)
+
+    def _rewrite(self,records):
+        '''Atomically replace the journal file with records'''
+        temp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        try:
+            with open(temp_path,'w') as f:
+                for record in records:
+                    f.write(self._serialize(record))
+            temp_path.replace(self.path)
+        except Exception as e:
+            if temp_path.exists():
+                temp_path.unlink()
+            raise e
+
+    def _do_write(self):
+        '''Append the change since the last write to the journal'''
+        if not self.write:
+            return
+        record = self._make_record(self._get_datetime_key(),self.config)
+        if record is None:
+            return
+        line = self._serialize(record)
+        with open(self.path,'a') as f:
+            f.write(line)
+        self._index_record(record,len(line.encode('utf-8')))
+        self._trim()
+
+    def _trim(self):
+        '''Compact the journal if it exceeds max_history or max_history_size_mb
+
+        Some slack is allowed past max_history so that the rewrite is amortized
+        over many appends rather than happening on every write.
+        '''
+        n_entries = len(self._entries)
+        keep_from = 0
+        if self.max_history is not None and n_entries > self.max_history + max(1,self.max_history//10):
+            keep_from = n_entries - self.max_history
+        if self.max_history_size_mb is not None:
+            limit = self.max_history_size_mb * 1024 * 1024
+            if self._bytes > limit:
+                remaining = self._bytes
+                target = 0.9 * limit
+                idx = 0
+                while remaining > target and idx < n_entries - 1:
+                    remaining -= self._line_bytes[idx]
+                    idx += 1
+                keep_from = max(keep_from,idx)
+        if keep_from > 0:
+            self.compact(keep_from=keep_from)
+
+    def compact(self,keep_from=None):
+        '''Rewrite the journal, dropping entries older than index keep_from
+
+        The oldest retained entry is converted into a checkpoint. If keep_from is
+        None, the whole journal is collapsed into a single checkpoint of the
+        current config.
+        '''
+        if not self._entries:
+            return
+        if keep_from is None:
+            keep_from = len(self._entries) - 1
+        first = self._entries[keep_from]
+        records = [{'t':first['t'],'checkpoint':self._historical_config(first['t'])}]
+        records.extend(self._entries[keep_from+1:])
+
+        self._reset_index()
+        for record in records:
+            self._index_record(record,len(self._serialize(record).encode('utf-8')))
+        if self.write:
+            self._rewrite(records)
+
+    @property
+    def history(self):
+        '''Full {datetime_key: config} history, materialized on request.
+
+        This is provided for compatibility with PersistentConfig and is
+        O(history); prefer revert/get_historical_values for lookups.
+        '''
+        history = {}
+        state = {}
+        for record in self._entries:
+            if 'checkpoint' in record:
+                state = copy.deepcopy(record['checkpoint'])
+            else:
+                for key in record.get('del',[]):
+                    state.pop(key,None)
+                state.update(copy.deepcopy(record.get('set',{})))
+            history[record['t']] = copy.deepcopy(state)
+        return history
+
+    def _get_sorted_history_keys(self):
+        # journal records are appended in time order, so no parsing or sorting is needed
+        return [record['t'] for record in self._entries]
+
+    def _nth_history_key(self,nth):
+        return self._entries[nth]['t']
+
+    def _historical_config(self,datetime_key):
+        '''Rebuild the config at datetime_key from the nearest checkpoint'''
+        idx = self._positions[datetime_key]
+        start = self._checkpoints[bisect.bisect_right(self._checkpoints,idx) - 1]
+        state = {}
+        for record in self._entries[start:idx+1]:
+            if 'checkpoint' in record:
+                state = copy.deepcopy(record['checkpoint'])
+            else:
+                for key in record.get('del',[]):
+                    state.pop(key,None)
+                state.update(copy.deepcopy(record.get('set',{})))
+        return state
+
+    def get_historical_values(self,key,convert_to_datetime=False):
+        '''Convenience method for gathering historical values of a parameter
+
+        Uses the per-key change index, so the cost scales with the number of
+        entries returned rather than with the size of each historical config.
+        '''
+        dates = []
+        values = []
+        changes = self._key_changes.get(key,[])
+        for n,idx in enumerate(changes):
+            record = self._entries[idx]
+            if 'checkpoint' in record:
+                if key not in record['checkpoint']:
+                    continue
+                value = record['checkpoint'][key]
+            elif key in record.get('set',{}):
+                value = record['set'][key]
+            else:
+                continue  # deleted here
+            end = changes[n+1] if n+1 < len(changes) else len(self._entries)
+            for record in self._entries[idx:end]:
+                if convert_to_datetime:
+                    dates.append(self._decode_datetime_key(record['t']))
+                else:
+                    dates.append(record['t'])
+                values.append(copy.deepcopy(value))
+        return dates,values
@@ -1,58 +1,180 @@
 import threading
+import time
 import warnings
 from queue import Empty, Full
-import time
+import itertools
 
 class MutableQueue:
     '''Thread-safe, mutable queue
-    
+
     Unlike the standard library CPython queue, this class supportes positional inserts, deletions, and reordering. The tradeoff is performance for both reads and writes to the queue.
+
+    Items that are dicts with a 'uuid' key are indexed by str(uuid) so they can be
+    looked up, removed, and reordered by uuid without scanning the queue.
     '''
+    # Iteration ids are drawn from one process-wide counter seeded with the boot time
+    # in microseconds, so they are unique across queues and a restarted server never
+    # hands out an id a client may still hold. Microseconds keep the ids below 2**53,
+    # so browsers can still compare them exactly.
+    _iteration_ids = itertools.count(time.time_ns() // 1000)
+
     def __init__(self):
         # Queue storage object
         self.queue = list()
-        
+
         # Lock must be held whenever the queue list is mutated
-        self.lock = threading.Lock() 
-        
+        self.lock = threading.Lock()
+
         # Notify not_empty whenever an item is added to the queue; a
         # thread waiting to get is notified then.
         self.not_empty = threading.Condition(self.lock)
 
-        self.iteration_id = time.time()
-        
+        # Notify changed whenever the queue contents or iteration id change;
+        # threads long-polling for task completion wait on this.
+        self.changed = threading.Condition(self.lock)
+
+        # str(uuid) -> item, and a lazily rebuilt str(uuid) -> position map
+        self._items = {}
+        self._positions = None
+
+        # iteration ids increase on every change so clients can cheaply detect staleness
+        self.iteration_id = next(MutableQueue._iteration_ids)
+
+    @staticmethod
+    def _key(item):
+        if isinstance(item,dict) and 'uuid' in item:
+            return str(item['uuid'])
+        return None
+
+    def _bump(self):
+        '''Advance the iteration id; must be called with self.lock held'''
+        self.iteration_id = next(MutableQueue._iteration_ids)
+        self._positions = None
+
     def qsize(self):
         return len(self.queue)
 
     def iterationid(self):
         return self.iteration_id
 
+    def mark_changed(self):
+        '''Bump the iteration id and wake any threads waiting in wait_for_change'''
+        with self.lock:
+            self._bump()
+            self.changed.notify_all()
+
+    def wait_for_change(self,predicate,timeout=None):
+        '''Block until predicate() is true, re-checking it after every queue change
+
+        predicate is called with the queue lock held. Returns the last value of
+        predicate(), which is falsy if the timeout expired.
+        '''
+        with self.changed:
+            return self.changed.wait_for(predicate,timeout=timeout)
+
     def empty(self):
         with self.lock:
             return not self.qsize()
-        
+
     def _put(self,item,loc):
         self.queue.insert(loc,item)
-        self.iteration_id = time.time()
-            
+        key = self._key(item)
+        if key is not None:
+            self._items[key] = item
+        self._bump()
+        self.changed.notify_all()
+
     def _get(self,loc=0):
-        self.iteration_id = time.time()
-        return self.queue.pop(loc)
-    
+        item = self.queue.pop(loc)
+        key = self._key(item)
+        if key is not None:
+            self._items.pop(key,None)
+        self._bump()
+        return item
+
     def put(self,item,loc):
         '''Insert an item at the top of the queue'''
         with self.lock:
             self._put(item,loc)
             self.not_empty.notify()# notify any waiting threads
-        
+
+    def insert_many(self,items,loc=None):
+        '''Insert several items as a contiguous block starting at loc (default: the end)'''
+        items = list(items)
+        if not items:
+            return
+        with self.lock:
+            if loc is None:
+                loc = self.qsize()
+            self.queue[loc:loc] = items
+            for item in items:
+                key = self._key(item)
+                if key is not None:
+                    self._items[key] = item
+            self._bump()
+            self.changed.notify_all()
+            self.not_empty.notify(len(items))
+
     def remove(self,loc):
         '''Remove an item from the queue'''
         with self.lock:
-            self.iteration_id = time.time()
             if loc>=self.qsize():
                 raise IndexError
             self._get(loc)
-        
+            self.changed.notify_all()
+
+    def remove_many(self,uuids):
+        '''Atomically remove the items with the given uuids
+
+        Raises KeyError without removing anything if any uuid is not queued.
+        Returns the removed items in queue order.
+        '''
+        keys = {str(uuid) for uuid in uuids}
+        with self.lock:
+            missing = keys - self._items.keys()
+            if missing:
+                raise KeyError(f'uuids not in queue: {sorted(missing)}')
+            removed = [item for item in self.queue if self._key(item) in keys]
+            self.queue[:] = [item for item in self.queue if self._key(item) not in keys]
+            for key in keys:
+                del self._items[key]
+            self._bump()
+            self.changed.notify_all()
+        return removed
+
+    def find(self,uuid):
+        '''Return the queued item with this uuid, or None'''
+        return self._items.get(str(uuid),None)
+
+    def index(self,uuid):
+        '''Return the current position of the item with this uuid
+
+        Raises KeyError if the uuid is not queued.
+        '''
+        with self.lock:
+            if self._positions is None:
+                self._positions = {}
+                for n,item in enumerate(self.queue):
+                    key = self._key(item)
+                    if key is not None:
+                        self._positions[key] = n
+            return self._positions[str(uuid)]
+
+    def reorder(self,uuids):
+        '''Atomically reorder the queue to follow the order of uuids
+
+        Every queued item must appear in uuids; uuids that are not queued (e.g.,
+        tasks that started running in the meantime) are ignored. Raises
+        ValueError and leaves the queue untouched otherwise.
+        '''
+        with self.lock:
+            new_queue = [self._items[key] for key in map(str,uuids) if key in self._items]
+            if len(new_queue) != len(self.queue) or len({id(item) for item in new_queue}) != len(new_queue):
+                raise ValueError('reordered uuids do not match the queued items')
+            self.queue[:] = new_queue
+            self._bump()
+            self.changed.notify_all()
+
     def get(self,loc=0,block=True,timeout=None):
         '''Get next item from queue'''
         if timeout is not None:
@@ -64,23 +186,24 @@ class MutableQueue:
             else:
                 while not self.qsize():
                     self.not_empty.wait() #releases self.lock until notify
-                    
+
             if loc>=self.qsize():
                 raise IndexError
 
             return self._get(loc)
-        
+
     def move(self,old_index,new_index=None):
         '''Move item in queue'''
         with self.lock:
-            self.iteration_id = time.time()
+            self._bump()
+            self.changed.notify_all()
             if new_index is None:
                 new_index = self.qsize()
-            
+
             if old_index<new_index:
                 self.queue.insert(new_index+1,self.queue[old_index])
                 del self.queue[old_index]
-                
+
             elif old_index>new_index:
                 self.queue.insert(new_index,self.queue[old_index])
                 del self.queue[old_index+1]
@@ -89,5 +212,7 @@ class MutableQueue:
         '''Remove all items from the queue'''
         with self.lock:
             self.queue.clear()
-            self.iteration_id = time.time()
-            
+            self._items.clear()
+            self._bump()
+            self.changed.notify_all()
+
@@ -92,13 +92,9 @@ class PersistentConfig(MutableMapping):
         
         need_update=False
         if self.path.exists():
-            with open(self.path,'r') as f:
-                self.history = json.load(f)
-            key = self._get_sorted_history_keys()[-1] #use latest key
-            self.config = copy.deepcopy(self.history[key])
+            self.config = self._load()
         else:
-            self.config = {}
-            self.history = {self._get_datetime_key():{}}
+            self.config = self._init_storage()
             need_update=True
         
         if defaults is not None:
@@ -118,6 +114,18 @@ class PersistentConfig(MutableMapping):
             
         self.lock = lock #In case of True, only lock configuration at end of constructor
                 
+    def _load(self):
+        '''Read the history file at self.path and return the latest config'''
+        with open(self.path,'r') as f:
+            self.history = json.load(f)
+        key = self._get_sorted_history_keys()[-1] #use latest key
+        return copy.deepcopy(self.history[key])
+
+    def _init_storage(self):
+        '''Set up an empty history when no file exists yet and return the initial config'''
+        self.history = {self._get_datetime_key():{}}
+        return {}
+
     def __str__(self):
         return f'<PersistentConfig entries: {len(self.config)} last_saved: {self._get_sorted_history_keys()[-1]}>'
     
@@ -189,13 +197,20 @@ class PersistentConfig(MutableMapping):
             datetime formatted string as defined by datetime_key_format
         '''
         if nth is not None:
-            key = list(self._get_sorted_history_keys())[nth] #supports negative indexing
+            key = self._nth_history_key(nth)
         elif datetime_key is not None:
             key = datetime_key
         else:
             raise ValueError('Must supply nth or datetime_key!')
-        self.config = copy.deepcopy(self.history[key])
+        self.config = self._historical_config(key)
         self._update_history(immediate=True)  # Immediate write for revert
+
+    def _nth_history_key(self,nth):
+        return list(self._get_sorted_history_keys())[nth] #supports negative indexing
+
+    def _historical_config(self,datetime_key):
+        '''Return a copy of the config stored under datetime_key'''
+        return copy.deepcopy(self.history[datetime_key])
     
     def get_historical_values(self,key,convert_to_datetime=False):
         '''Convenience method for gathering historical values of a parameter
@@ -255,12 +270,23 @@ class PersistentConfig(MutableMapping):
         if self.max_history_size_mb is None:
             return
             
-        while self._estimate_history_size_mb() > self.max_history_size_mb:
-            keys = self._get_sorted_history_keys()
+        # Serialize each entry once and subtract sizes as entries are removed,
+        # rather than re-serializing the whole history after every removal
+        sizes = {}
+        for key, value in self.history.items():
+            try:
+                sizes[key] = len(json.dumps({key: value}, separators=(',', ':')).encode('utf-8'))
+            except Exception:
+                sizes[key] = 10 * 1024  # Assume ~10KB per entry
+        total_mb = sum(sizes.values()) / (1024 * 1024)
+        keys = self._get_sorted_history_keys()
+        while total_mb > self.max_history_size_mb:
             if len(keys) <= 1:  # Keep at least one entry
                 break
             # Remove oldest entry
-            del self.history[keys[0]]
+            oldest = keys.pop(0)
+            del self.history[oldest]
+            total_mb -= sizes[oldest] / (1024 * 1024)
     
     def _do_write(self):
         '''Perform the actual write to disk'''
@@ -0,0 +1,141 @@
+'''Compact binary encoding for responses containing numpy arrays
+
+JSON-encoding a large array as nested lists is slow and roughly 20x larger than
+the raw data. This module encodes a JSON-like structure (dicts with str keys,
+lists, tuples, str, int, float, bool, None) that may contain numpy arrays as a
+small JSON header followed by the raw little-endian array buffers::
+
+    b'AFLA' | version (u8) | 3 reserved bytes | header length (u32 LE) | header JSON | buffers
+
+Arrays in the structure are replaced in the header by references to their
+buffer; every buffer starts on an 8-byte boundary. ``decode`` rebuilds the
+arrays with ``np.frombuffer`` so no data is copied, which also means the
+returned arrays are read-only views of the payload.
+
+Servers use ``binary_requested`` to check whether a client sent
+``Accept: application/x-afl-arrays``; JSON remains the default so browsers are
+unaffected.
+'''
+import json
+import struct
+
+import numpy as np
+
+BINARY_MIMETYPE = 'application/x-afl-arrays'
+
+MAGIC = b'AFLA'
+VERSION = 1
+ALIGNMENT = 8
+_PREAMBLE = struct.Struct('<4sB3xI')
+
+# marker key for arrays and tuples in the header; dicts using it can't be encoded
+_TAG = '__afl__'
+
+
+def _pad(n):
+    return (-n) % ALIGNMENT
+
+
+def encode(obj):
+    '''Encode obj to bytes, raising TypeError if it contains unsupported types'''
+    buffers = []
+
+    def _add_array(arr, scalar=False):
+        if arr.dtype.hasobject:
+            raise TypeError('object arrays cannot be binary encoded')
+        if arr.dtype.byteorder == '>':
+            arr = arr.astype(arr.dtype.newbyteorder('<'))
+        shape = list(arr.shape)  # ascontiguousarray promotes 0-d arrays to 1-d
+        arr = np.ascontiguousarray(arr)
+        buffers.append(arr)
+        return {
+            _TAG: 'ndarray',
+            'buffer': len(buffers) - 1,
+            'descr': np.lib.format.dtype_to_descr(arr.dtype),
+            'shape': shape,
+            'scalar': scalar,
+        }
+
+    def _convert(item):
+        if item is None or isinstance(item, (bool, int, float, str)):
+            return item
+        if isinstance(item, np.ndarray):
+            return _add_array(item)
+        if isinstance(item, np.generic):
+            return _add_array(np.asarray(item), scalar=True)
+        if isinstance(item, list):
+            return [_convert(v) for v in item]
+        if isinstance(item, tuple):
+            return {_TAG: 'tuple', 'items': [_convert(v) for v in item]}
+        if isinstance(item, dict):
+            if _TAG in item or not all(isinstance(k, str) for k in item):
+                raise TypeError('only dicts with str keys can be binary encoded')
+            return {k: _convert(v) for k, v in item.items()}
+        raise TypeError(f'cannot binary encode objects of type {type(item).__name__}')
+
+    body = _convert(obj)
+
+    offsets = []
+    offset = 0
+    for arr in buffers:
+        offsets.append([offset, arr.nbytes])
+        offset += arr.nbytes + _pad(arr.nbytes)
+    header = json.dumps({'body': body, 'buffers': offsets}).encode('utf8')
+    header += b' ' * _pad(_PREAMBLE.size + len(header))
+
+    parts = [_PREAMBLE.pack(MAGIC, VERSION, len(header)), header]
+    for arr in buffers:
+        parts.append(arr.reshape(-1).view(np.uint8).data if arr.nbytes else b'')
+        parts.append(b'\0' * _pad(arr.nbytes))
+    return b''.join(parts)
+
+
+def decode(data):
+    '''Decode bytes produced by encode; arrays are read-only views of data'''
+    data = memoryview(data)
+    magic, version, header_len = _PREAMBLE.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('not an AFL binary array payload')
+    if version > VERSION:
+        raise ValueError(f'unsupported binary array payload version {version}')
+    start = _PREAMBLE.size
+    header = json.loads(bytes(data[start:start + header_len]))
+    base = start + header_len
+
+    def _restore(item):
+        if isinstance(item, list):
+            return [_restore(v) for v in item]
+        if not isinstance(item, dict):
+            return item
+        tag = item.get(_TAG, None)
+        if tag == 'ndarray':
+            offset, nbytes = header['buffers'][item['buffer']]
+            dtype = np.lib.format.descr_to_dtype(item['descr'])
+            count = nbytes // dtype.itemsize if dtype.itemsize else 0
+            arr = np.frombuffer(data, dtype=dtype, count=count, offset=base + offset)
+            arr = arr.reshape(item['shape'])
+            return arr[()] if item['scalar'] else arr
+        if tag == 'tuple':
+            return tuple(_restore(v) for v in item['items'])
+        return {k: _restore(v) for k, v in item.items()}
+
+    return _restore(header['body'])
+
+
+def binary_requested():
+    '''True if the current flask request explicitly accepts the binary encoding'''
+    from flask import has_request_context, request
+    if not has_request_context():
+        return False
+    return any(mimetype == BINARY_MIMETYPE for mimetype, _ in request.accept_mimetypes)
+
+
+def make_response(obj):
+    '''Build a flask response holding the binary encoding of obj'''
+    from flask import Response
+    return Response(encode(obj), mimetype=BINARY_MIMETYPE)
+
+
+def is_binary_response(response):
+    '''True if a requests.Response carries the binary encoding'''
+    return response.headers.get('Content-Type', '').split(';')[0].strip() == BINARY_MIMETYPE
@@ -0,0 +1,247 @@
+'''Typed, tagged serialization of Python objects for transport between servers and clients
+
+Every encoded value starts with a short plain-text envelope naming the codec
+used for the payload and its compression::
+
+    AFLC1:<kind>:<compression>:<payload>
+
+so that recognising an encoded value (``is_encoded``) is a prefix check and never
+requires decoding it. Payloads are produced by the first codec that accepts the
+object:
+
+=========  ==============================================  ===================================
+kind       objects                                         payload
+=========  ==============================================  ===================================
+npy        numpy arrays without object dtype               ``.npy`` bytes (no pickle)
+xarray     xarray Dataset/DataArray of non-object arrays   ``to_dict(data='array')`` encoded
+                                                           with ``array_transport``
+arrow      pandas DataFrame (requires pyarrow)             Arrow IPC stream
+pickle     anything else                                   pickle
+=========  ==============================================  ===================================
+
+Payloads can optionally be compressed with ``zstd`` (requires zstandard), ``lz4``
+(requires lz4) or ``zlib``.
+
+``encode``/``decode`` work on bytes and are used for streamed transfers;
+``dumps``/``loads`` wrap the payload in base64 so it can be embedded in JSON.
+'''
+import base64
+import io
+import pickle
+import zlib
+
+import numpy as np
+
+from AFL.automation.shared import array_transport
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:
+    pyarrow = None
+
+MIMETYPE = 'application/x-afl-codec'
+PREFIX = 'AFLC1:'
+_BPREFIX = PREFIX.encode('ascii')
+
+CHUNK_SIZE = 1024 * 1024
+
+# errors that mean "this codec can't represent the object", so the next one is tried
+_UNSUPPORTED = (TypeError, ValueError, NotImplementedError)
+if pyarrow is not None:
+    _UNSUPPORTED = _UNSUPPORTED + (pyarrow.ArrowException,)
+
+
+def _encode_npy(obj):
+    if not isinstance(obj, np.ndarray) or obj.dtype.hasobject:
+        return None
+    buffer = io.BytesIO()
+    np.lib.format.write_array(buffer, obj, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def _decode_npy(payload):
+    return np.lib.format.read_array(io.BytesIO(payload), allow_pickle=False)
+
+
+def _encode_xarray(obj):
+    try:
+        import pandas as pd
+        import xarray as xr
+    except ImportError:
+        return None
+    if not isinstance(obj, (xr.Dataset, xr.DataArray)):
+        return None
+    if any(isinstance(index, pd.MultiIndex) for index in obj.indexes.values()):
+        return None
+    kind = 'Dataset' if isinstance(obj, xr.Dataset) else 'DataArray'
+    return array_transport.encode({'type': kind, 'data': obj.to_dict(data='array')})
+
+
+def _decode_xarray(payload):
+    import xarray as xr
+    decoded = array_transport.decode(payload)
+    cls = xr.Dataset if decoded['type'] == 'Dataset' else xr.DataArray
+    # arrays decoded from the payload are read-only views; give xarray its own copies
+    return cls.from_dict(decoded['data']).copy(deep=True)
+
+
+def _encode_arrow(obj):
+    if pyarrow is None:
+        return None
+    try:
+        import pandas as pd
+    except ImportError:
+        return None
+    if not isinstance(obj, pd.DataFrame):
+        return None
+    table = pyarrow.Table.from_pandas(obj)
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _decode_arrow(payload):
+    if pyarrow is None:
+        raise ImportError('pyarrow is required to decode arrow payloads')
+    return pyarrow.ipc.open_stream(pyarrow.py_buffer(payload)).read_all().to_pandas()
+
+
+def _encode_pickle(obj):
+    return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+# tried in order; the first encoder returning bytes wins
+ENCODERS = [
+    ('npy', _encode_npy),
+    ('xarray', _encode_xarray),
+    ('arrow', _encode_arrow),
+    ('pickle', _encode_pickle),
+]
+
+DECODERS = {
+    'npy': _decode_npy,
+    'xarray': _decode_xarray,
+    'arrow': _decode_arrow,
+    'pickle': pickle.loads,
+}
+
+
+def available_compressions():
+    '''Names of the compression schemes usable in this environment'''
+    modules = [('zstd', zstandard), ('lz4', lz4), ('zlib', zlib)]
+    return [name for name, module in modules if module is not None]
+
+
+def _compress(payload, compression):
+    if compression is None or compression == 'none':
+        return payload
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError('zstandard is required for zstd compression')
+        return zstandard.ZstdCompressor().compress(payload)
+    if compression == 'lz4':
+        if lz4 is None:
+            raise ImportError('lz4 is required for lz4 compression')
+        return lz4.frame.compress(payload)
+    if compression == 'zlib':
+        return zlib.compress(payload)
+    raise ValueError(f'Unknown compression {compression!r}')
+
+
+def _decompress(payload, compression):
+    if compression == 'none':
+        return payload
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ImportError('zstandard is required to decode zstd payloads')
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if compression == 'lz4':
+        if lz4 is None:
+            raise ImportError('lz4 is required to decode lz4 payloads')
+        return lz4.frame.decompress(payload)
+    if compression == 'zlib':
+        return zlib.decompress(payload)
+    raise ValueError(f'Unknown compression {compression!r}')
+
+
+def _encode_payload(obj):
+    for kind, encoder in ENCODERS:
+        try:
+            payload = encoder(obj)
+        except _UNSUPPORTED:
+            continue
+        if payload is not None:
+            return kind, payload
+    raise TypeError(f'No codec could encode object of type {type(obj).__name__}')
+
+
+def encode(obj, compression=None):
+    '''Encode obj to bytes: the envelope followed by the (compressed) payload'''
+    kind, payload = _encode_payload(obj)
+    payload = _compress(payload, compression)
+    header = f'{PREFIX}{kind}:{compression or "none"}:'.encode('ascii')
+    return header + payload
+
+
+def _split_header(data):
+    '''Return (kind, compression, payload offset) for an encoded byte string'''
+    head = bytes(data[:64])
+    if not head.startswith(_BPREFIX):
+        raise ValueError('Not an encoded value')
+    end = head.find(b':', head.find(b':', len(_BPREFIX)) + 1)
+    if end < 0:
+        raise ValueError('Truncated envelope')
+    kind, compression = head[len(_BPREFIX):end].decode('ascii').split(':')
+    return kind, compression, end + 1
+
+
+def decode(data):
+    '''Decode bytes (or any buffer) produced by encode'''
+    kind, compression, offset = _split_header(data)
+    payload = _decompress(memoryview(data)[offset:], compression)
+    return DECODERS[kind](payload)
+
+
+def dumps(obj, compression=None):
+    '''Encode obj to a str that can be embedded in JSON'''
+    kind, payload = _encode_payload(obj)
+    payload = _compress(payload, compression)
+    return f'{PREFIX}{kind}:{compression or "none"}:' + base64.b64encode(payload).decode('ascii')
+
+
+def loads(value):
+    '''Decode a str produced by dumps'''
+    if not value.startswith(PREFIX):
+        raise ValueError('Not an encoded value')
+    prefix_end = value.index(':', value.index(':', len(PREFIX)) + 1)
+    kind, compression = value[len(PREFIX):prefix_end].split(':')
+    payload = _decompress(base64.b64decode(value[prefix_end + 1:]), compression)
+    return DECODERS[kind](payload)
+
+
+def is_encoded(value):
+    '''Cheap check for a value produced by dumps (str) or encode (bytes)'''
+    if isinstance(value, str):
+        return value.startswith(PREFIX)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value[:len(_BPREFIX)]) == _BPREFIX
+    return False
+
+
+def iter_chunks(data, chunk_size=CHUNK_SIZE):
+    '''Yield data as bytes in chunk_size pieces for streamed requests and responses'''
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield bytes(view[start:start + chunk_size])
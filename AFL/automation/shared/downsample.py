@@ -0,0 +1,155 @@
+'''Reduce arrays to what a plot can show before they are sent to a browser
+
+A line plot a few hundred pixels wide can't show more than a few hundred points per
+trace, and an image can't show more than one value per pixel, so the plotting
+endpoints can decimate a variable to a point budget server-side:
+
+- ``lttb`` (1D): Largest-Triangle-Three-Buckets, which keeps the points that best
+  preserve the visual shape of a line;
+- ``minmax`` (1D): the smallest and largest value of each bucket, so that narrow
+  peaks survive;
+- ``mean`` (any dimensionality): block means over windows of neighbouring values;
+- ``stride``: every n-th value, the only choice for non-numeric data.
+
+``downsample`` applies one of these to an xarray DataArray and keeps its coordinates
+in step with the data.
+'''
+import math
+
+import numpy as np
+
+METHODS = ('auto', 'lttb', 'minmax', 'mean', 'stride')
+
+_NUMERIC_KINDS = 'fiub'
+
+
+def stride_indices(size, n_out):
+    '''Indices of n_out evenly spaced values out of size, including the first and last'''
+    if n_out >= size:
+        return np.arange(size)
+    if n_out <= 1:
+        return np.zeros(min(size, max(n_out, 0)), dtype=int)
+    return np.unique(np.linspace(0, size - 1, n_out).round().astype(int))
+
+
+def lttb_indices(x, y, n_out):
+    '''Indices of the n_out points of (x, y) chosen by Largest-Triangle-Three-Buckets
+
+    The first and last points are always kept; the rest are split into n_out - 2 buckets,
+    and from each the point forming the largest triangle with the previously kept point
+    and the mean of the next bucket is kept. Non-finite points are only kept from buckets
+    that contain nothing else.
+    '''
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return stride_indices(n, n_out)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    out = np.empty(n_out, dtype=int)
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+    with np.errstate(invalid='ignore'):
+        for i in range(n_out - 2):
+            lo, hi = edges[i], edges[i + 1]
+            next_hi = edges[i + 2] if i + 2 < len(edges) else n
+            next_x = x[hi:next_hi]
+            next_y = y[hi:next_hi]
+            finite = np.isfinite(next_y)
+            avg_x = next_x[finite].mean() if finite.any() else next_x.mean()
+            avg_y = next_y[finite].mean() if finite.any() else y[a]
+            area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+            a = lo + int(np.argmax(np.where(np.isfinite(area), area, -1.0)))
+            out[i + 1] = a
+    return out
+
+
+def minmax_indices(y, n_out):
+    '''Sorted indices of the smallest and largest value of each of n_out // 2 buckets of y'''
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return stride_indices(n, n_out)
+
+    edges = np.linspace(0, n, n_out // 2 + 1).astype(int)
+    low = np.where(np.isnan(y), np.inf, y)
+    high = np.where(np.isnan(y), -np.inf, y)
+    kept = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        kept.append(lo + int(np.argmin(low[lo:hi])))
+        kept.append(lo + int(np.argmax(high[lo:hi])))
+    return np.unique(kept)
+
+
+def _budget(max_points, dim):
+    if isinstance(max_points, dict):
+        budget = max_points.get(dim)
+    else:
+        budget = max_points
+    return None if budget is None else int(budget)
+
+
+def resolve_method(data_array, method='auto'):
+    '''The method downsample uses for data_array when asked for method'''
+    if method not in METHODS:
+        raise ValueError(f'method must be one of {METHODS}, not {method!r}')
+    numeric = data_array.dtype.kind in _NUMERIC_KINDS
+    if method == 'auto':
+        if not numeric:
+            return 'stride'
+        return 'lttb' if data_array.ndim == 1 else 'mean'
+    if method in ('lttb', 'minmax', 'mean') and not numeric:
+        raise ValueError(f'{method} needs numeric data, not dtype {data_array.dtype}')
+    if method in ('lttb', 'minmax') and data_array.ndim != 1:
+        raise ValueError(f'{method} only applies to 1D data; use mean or stride for {data_array.ndim}D')
+    return method
+
+
+def downsample(data_array, max_points, method='auto'):
+    '''Reduce data_array to at most max_points values along each dimension
+
+    Parameters
+    ----------
+    data_array : xr.DataArray
+        Data to reduce; its coordinates are reduced along with it.
+    max_points : int or dict
+        Budget for every dimension, or per dimension name (dimensions not in the dict
+        are kept whole).
+    method : str
+        One of METHODS; 'auto' picks lttb for 1D numeric data, mean for higher
+        dimensions and stride for non-numeric data.
+
+    Returns
+    -------
+    tuple of (xr.DataArray, str)
+        The reduced array and the method used (None if nothing needed reducing).
+    '''
+    method = resolve_method(data_array, method)
+    over = {}  # dimensions larger than their budget
+    for dim in data_array.dims:
+        budget = _budget(max_points, dim)
+        if budget is not None and data_array.sizes[dim] > max(budget, 1):
+            over[dim] = max(budget, 1)
+    if not over:
+        return data_array, None
+
+    if method == 'mean':
+        factors = {dim: math.ceil(data_array.sizes[dim] / budget) for dim, budget in over.items()}
+        # coordinates that can't be averaged (labels, strings) have no meaning once blocks are merged
+        unaveraged = [
+            name for name, coord in data_array.coords.items()
+            if set(coord.dims) & set(factors) and coord.dtype.kind not in _NUMERIC_KINDS + 'mM'
+        ]
+        reduced = data_array.drop_vars(unaveraged).coarsen(factors, boundary='pad').mean()
+        return reduced, method
+
+    dim = data_array.dims[0]
+    if method == 'lttb':
+        coord = data_array.coords.get(dim)
+        x = coord.values if coord is not None and coord.dtype.kind in _NUMERIC_KINDS else np.arange(data_array.size)
+        return data_array.isel({dim: lttb_indices(x, data_array.values, over[dim])}), method
+    if method == 'minmax':
+        return data_array.isel({dim: minmax_indices(data_array.values, over[dim])}), method
+    return data_array.isel({d: stride_indices(data_array.sizes[d], budget) for d, budget in over.items()}), method
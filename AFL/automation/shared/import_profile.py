@@ -0,0 +1,84 @@
+'''
+Import-time profiling for server startup.
+
+Runs an import statement in a fresh interpreter with ``python -X importtime`` and
+summarizes which modules it spent its time on, e.g.::
+
+    python -m AFL.automation.shared.import_profile AFL.automation.APIServer.APIServer
+
+The launcher exposes the same report for a driver through ``--profile-imports``.
+'''
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def profile_imports(code, python=None):
+    '''
+    Execute code in a new interpreter and return the import times it incurred.
+
+    Parameters
+    ----------
+    code : str
+        Python source to run, typically one or more import statements.
+    python : str, optional
+        Interpreter to use; defaults to the running one.
+
+    Returns
+    -------
+    list of dict
+        One entry per imported module with keys 'module', 'self_us', 'cumulative_us'
+        and 'depth', in the order python reports them (children before parents).
+    '''
+    python = sys.executable if python is None else python
+    # resolve modules the way this process does, e.g. a driver next to the script that was started
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+    proc = subprocess.run(
+        [python, '-X', 'importtime', '-c', code],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f'import profiling failed:\n{proc.stderr}')
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        rows.append({
+            'module': module,
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': (len(indent) - 1) // 2,
+        })
+    return rows
+
+
+def format_report(rows, top=25):
+    '''Render the slowest top-level imports and the modules with the largest own cost.'''
+    total_us = sum(row['cumulative_us'] for row in rows if row['depth'] == 0)
+    lines = [f'total import time: {total_us / 1e6:.3f} s ({len(rows)} modules)', '']
+
+    lines.append(f'{"cumulative [ms]":>16}  module')
+    for row in sorted(rows, key=lambda row: row['cumulative_us'], reverse=True)[:top]:
+        lines.append(f'{row["cumulative_us"] / 1e3:16.1f}  {"  " * row["depth"]}{row["module"]}')
+
+    lines += ['', f'{"self [ms]":>16}  module']
+    for row in sorted(rows, key=lambda row: row['self_us'], reverse=True)[:top]:
+        lines.append(f'{row["self_us"] / 1e3:16.1f}  {row["module"]}')
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Report the import time of AFL modules')
+    parser.add_argument('modules', nargs='+', help='modules to import')
+    parser.add_argument('--top', type=int, default=25, help='number of modules to list')
+    args = parser.parse_args()
+    print(format_report(profile_imports('\n'.join(f'import {module}' for module in args.modules)), top=args.top))
@@ -8,7 +8,6 @@ except:
         print(f'Could not find AFL.automation on system path, adding {os.path.abspath(Path(__file__).parent.parent)} to PYTHONPATH')
 
 from AFL.automation.APIServer.APIServer import APIServer
-from AFL.automation.APIServer.data.DataTiled import DataTiled
 
 from AFL.automation.shared.PersistentConfig import PersistentConfig
 
@@ -31,6 +30,30 @@ except AttributeError:
     pass
 driver_cls = getattr(driver_module,main_module_name)
 
+parser = argparse.ArgumentParser(prog = f'AFL // {main_module_name}',
+                                description = f'AFL APIServer launcher for {main_module_name}')
+parser.add_argument('--no-waitress', action='store_true',
+                    help='Disable the waitress WSGI server')
+
+parser.add_argument('-i', '--interactive', action='store_true',
+                    help='Start in interactive mode')
+parser.add_argument('--profile-imports', action='store_true',
+                    help='Report the import time of the server and this driver, then exit')
+args = parser.parse_args()
+
+if args.profile_imports:
+        from AFL.automation.shared.import_profile import profile_imports, format_report
+        if driver_module.__name__ == '__main__':
+                # a driver started as a script is loaded from its file under its own name, so that its
+                # `if __name__ == '__main__'` launcher block does not run
+                driver_import = (f'import importlib.util; '
+                                 f'_spec = importlib.util.spec_from_file_location({main_module_name!r}, {main_module_fullpath!r}); '
+                                 f'_spec.loader.exec_module(importlib.util.module_from_spec(_spec))')
+        else:
+                driver_import = f'import {driver_module.__name__}'
+        print(format_report(profile_imports(f'import AFL.automation.APIServer.APIServer\n{driver_import}')))
+        sys.exit(0)
+
 
 AFL_GLOBAL_CONFIG = PersistentConfig(
         os.path.join(os.path.expanduser('~'),'.afl','config.json'),
@@ -39,6 +62,8 @@ AFL_GLOBAL_CONFIG = PersistentConfig(
         'system_serial': 'Default',
         'tiled_server' : '',
         'tiled_api_key': '',
+        'tiled_writer': {},
+        'task_history': {},
         'bind_address': '0.0.0.0',
         'ports': {},
         'driver_custom_configs': {},
@@ -88,9 +113,11 @@ else:
         ca_status_port = 5064
 
 if len(AFL_GLOBAL_CONFIG['tiled_server'])>0:
+        from AFL.automation.APIServer.data.DataTiled import DataTiled
         data = DataTiled(AFL_GLOBAL_CONFIG['tiled_server'],
                 api_key = AFL_GLOBAL_CONFIG['tiled_api_key'],
-                backup_path= os.path.join(os.path.expanduser('~'),'.afl','json-backup'),)
+                backup_path= os.path.join(os.path.expanduser('~'),'.afl','json-backup'),
+                **AFL_GLOBAL_CONFIG.get('tiled_writer', {}))
 else:
         data = None
 
@@ -140,15 +167,6 @@ def _reconstitute_objects(obj_dict,data=None):
 '''
 
 
-parser = argparse.ArgumentParser(prog = f'AFL // {main_module_name}',
-                                description = f'AFL APIServer launcher for {main_module_name}')
-parser.add_argument('--no-waitress', action='store_true',
-                    help='Disable the waitress WSGI server')
-
-parser.add_argument('-i', '--interactive', action='store_true',
-                    help='Start in interactive mode')
-args = parser.parse_args()
-
 if main_module_name in AFL_GLOBAL_CONFIG['driver_custom_configs']:
         print(f'launching from custom config for {main_module_name}')
         driver = _reconstitute_objects(AFL_GLOBAL_CONFIG['driver_custom_configs'][main_module_name],data=data)
@@ -164,6 +182,7 @@ server.create_queue(
         start_ca=start_ca,
         ca_prefix=f"AFL:{AFL_GLOBAL_CONFIG['system_serial']}:{main_module_name}:",
         ca_port=ca_status_port,
+        **AFL_GLOBAL_CONFIG.get('task_history', {}),
 )
 #server.add_unqueued_routes()
 server.init_logging(toaddrs=AFL_GLOBAL_CONFIG['owner_email'])
@@ -1,23 +1,37 @@
 import base64
+import binascii
 import pickle
 from pickle import UnpicklingError
 import copy
 
+from AFL.automation.shared import codec
 
-def serialize(obj):
-    pickled = pickle.dumps(obj)
-    pickled_b64 = base64.b64encode(pickled)
-    pickled_str = pickled_b64.decode('utf8')
-    return pickled_str
+
+def serialize(obj, compression=None):
+    '''Encode obj as a JSON-embeddable string using the typed codec (see codec.dumps)'''
+    return codec.dumps(obj, compression=compression)
 
 def is_serialized(obj):
+    '''Check whether obj is a serialized string without deserializing it
+
+    Recognises codec envelopes and strings written by the legacy pickle+base64
+    serializer, whose decoded bytes start with a pickle protocol header.
+    '''
+    if not isinstance(obj, str):
+        return False
+    if codec.is_encoded(obj):
+        return True
     try:
-        deserialize(obj)
-    except:
+        header = base64.b64decode(obj[:4].encode() + b'==')
+    except (binascii.Error, ValueError):
         return False
-    return True
+    return len(header) >= 2 and header[0] == pickle.PROTO[0] and 2 <= header[1] <= pickle.HIGHEST_PROTOCOL
 
 def deserialize(pickled_str):
+    if codec.is_encoded(pickled_str):
+        return codec.loads(pickled_str)
+
+    # legacy pickle+base64 string
     pickled_b64 = copy.deepcopy(pickled_str).encode()
     
     # the b'==' ensures the string is always correctly padeded
@@ -0,0 +1,128 @@
+'''
+Task timestamps as written to run metadata.
+
+QueueDaemon records when each task started and ended in ``meta`` using the
+human-readable QUEUE_TIME_FORMAT (e.g. ``12/07/25 14:30:45-123456``), which does not
+sort correctly as a string. Next to each of those it writes sortable fields
+(see sortable_fields) that Tiled can order server-side:
+
+    <name>_epoch : float, seconds since the Unix epoch
+    <name>_iso   : str, ISO-8601 in UTC, which sorts lexicographically
+
+Entries recorded before these fields existed can be updated with
+backfill_sortable_timestamps.
+'''
+import datetime
+import re
+
+QUEUE_TIME_FORMAT = '%m/%d/%y %H:%M:%S-%f %Z%z'
+
+# names of the meta timestamps that get sortable companions
+TIMESTAMP_FIELDS = ('started', 'ended')
+
+# QueueDaemon-style: MM/DD/YY HH:MM:SS-ffffff [TZ][+-HHMM], e.g. 12/07/25 14:30:45-123456 EST-0500
+_QUEUE_TIME = re.compile(
+    r'^(\d{2})/(\d{2})/(\d{2})\s+(\d{2}):(\d{2}):(\d{2})(?:-(\d{1,6}))?(?:\s+[A-Za-z_]+)?(?:([+-]\d{4}))?\s*$'
+)
+# Display-style/legacy: YYYY-MM-DD HH:MM:SS
+_DISPLAY_TIME = re.compile(r'^(\d{4})-(\d{2})-(\d{2})\s+(\d{2}):(\d{2}):(\d{2})')
+
+
+def parse_timestamp(value):
+    '''Parse a QueueDaemon or display-style timestamp; returns None if value isn't one.'''
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+
+    match = _QUEUE_TIME.match(text)
+    if match:
+        month, day, year, hour, minute, second = map(int, match.groups()[:6])
+        microseconds = match.group(7) or '0'
+        microsecond = int(microseconds.ljust(6, '0')[:6])
+        return datetime.datetime(2000 + year, month, day, hour, minute, second, microsecond)
+
+    match = _DISPLAY_TIME.match(text)
+    if match:
+        year, month, day, hour, minute, second = map(int, match.groups())
+        return datetime.datetime(year, month, day, hour, minute, second)
+
+    return None
+
+
+def sortable_fields(name, timestamp):
+    '''
+    The sortable companions of the timestamp called name.
+
+    Naive datetimes are taken to be in the local time zone, as QueueDaemon records them.
+    '''
+    epoch = timestamp.timestamp()
+    iso = datetime.datetime.fromtimestamp(epoch, tz=datetime.timezone.utc).isoformat(timespec='microseconds')
+    return {f'{name}_epoch': epoch, f'{name}_iso': iso}
+
+
+def add_sortable_fields(meta):
+    '''
+    Add sortable fields to a meta dict for each timestamp that lacks them.
+
+    Returns True if meta was changed.
+    '''
+    changed = False
+    for name in TIMESTAMP_FIELDS:
+        if f'{name}_epoch' in meta:
+            continue
+        timestamp = parse_timestamp(meta.get(name))
+        if timestamp is None:
+            continue
+        meta.update(sortable_fields(name, timestamp))
+        changed = True
+    return changed
+
+
+def backfill_sortable_timestamps(container, dry_run=False):
+    '''
+    Add sortable timestamp fields to the run metadata of every entry in a Tiled container.
+
+    The ``meta`` dict may sit at the top of the metadata or under ``attrs`` (as written
+    by DataTiled); both are updated. Entries that already have the fields are left alone.
+
+    Parameters
+    ----------
+    container : tiled container client
+        Typically the run_documents node.
+    dry_run : bool
+        Only count the entries that would be updated.
+
+    Returns
+    -------
+    dict
+        'checked', 'updated' and 'failed' (entry key -> error message)
+    '''
+    checked = 0
+    updated = 0
+    failed = {}
+    for key, item in container.items():
+        checked += 1
+        try:
+            metadata = _to_dict(item.metadata)
+            changed = False
+            for parent in (metadata, metadata.get('attrs')):
+                if isinstance(parent, dict) and isinstance(parent.get('meta'), dict):
+                    changed = add_sortable_fields(parent['meta']) or changed
+            if changed:
+                if not dry_run:
+                    item.replace_metadata(metadata=metadata)
+                updated += 1
+        except Exception as e:
+            failed[str(key)] = str(e)
+    return {'checked': checked, 'updated': updated, 'failed': failed}
+
+
+def _to_dict(obj):
+    '''Deep copy of a (possibly read-only) metadata mapping as plain dicts.'''
+    if hasattr(obj, 'items'):
+        return {key: _to_dict(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_to_dict(value) for value in obj]
+    return obj
@@ -1,3 +1,6 @@
+import functools
+
+import numpy as np
 import pint
 
 units = pint.UnitRegistry()
@@ -14,6 +17,8 @@ DEFAULT_UNITS['molality'] = 'mol/kg'
 
 SUPPORTED_TYPES = ['volume', 'mass', 'density', 'molarity', 'molality', 'concentration','dimensionless']
 
+_DEFAULT_UNIT_OBJECTS = {unit_type: units.Unit(unit) for unit_type, unit in DEFAULT_UNITS.items()}
+
 
 def has_units(value: pint.Quantity) -> bool:
     return hasattr(value, 'units')
@@ -48,7 +53,7 @@ def is_concentration(value: pint.Quantity) -> bool:
 def is_dimensionless(value: pint.Quantity) -> bool:
     return len(value.dimensionality) == 0
 
-def get_unit_type(value: pint.Quantity) -> str:
+def _classify(value) -> str | None:
     if is_volume(value):
         return 'volume'
     elif is_molarity(value):
@@ -63,13 +68,63 @@ def get_unit_type(value: pint.Quantity) -> str:
         return 'concentration'
     elif is_dimensionless(value):
         return 'dimensionless'
+    return None
+
+
+# Parsing a unit string and checking/converting dimensionality are the expensive
+# parts of pint and are repeated for the same few units on every Component
+# property set, so both are memoized. Only immutable results are cached
+# (magnitudes, Unit objects, floats), never Quantities.
+
+@functools.lru_cache(maxsize=4096)
+def _parse(value: str):
+    """Return (magnitude, Unit) for a quantity string or (number, None) for a plain number"""
+    parsed = units(value)
+    if has_units(parsed):
+        return parsed.magnitude, parsed.units
+    return parsed, None
+
+
+@functools.lru_cache(maxsize=1024)
+def _unit_type(unit: pint.Unit) -> str | None:
+    """Unit type of a Unit (see get_unit_type) or None if it is not a supported type"""
+    return _classify(units.Quantity(1.0, unit))
+
+
+@functools.lru_cache(maxsize=1024)
+def _is_unit_type(unit: pint.Unit, unit_type: str) -> bool:
+    return _IS_TYPE[unit_type](units.Quantity(1.0, unit))
+
+
+@functools.lru_cache(maxsize=1024)
+def _factor_to_default(unit: pint.Unit, unit_type: str) -> float:
+    """Multiplicative factor converting unit to DEFAULT_UNITS[unit_type]"""
+    return float(units.Quantity(1.0, unit).to(_DEFAULT_UNIT_OBJECTS[unit_type]).magnitude)
+
+
+def isclose(a, b) -> bool:
+    """np.isclose for two quantities, comparing magnitudes directly when the units already agree"""
+    if has_units(a) and has_units(b) and a.units == b.units:
+        return bool(np.isclose(a.magnitude, b.magnitude))
+    return bool(np.isclose(a, b))
+
+
+def get_unit_type(value: pint.Quantity) -> str:
+    if has_units(value):
+        unit_type = _unit_type(value.units)
     else:
+        unit_type = _classify(value)
+    if unit_type is None:
         raise ValueError(f'Unit system ({value}) not recognized as one of: {SUPPORTED_TYPES}')
+    return unit_type
 
 def to_quantity(value: str | pint.Quantity) -> pint.Quantity:
     """Convert a string to a pint quantity"""
     if isinstance(value, str):
-        return units(value)
+        magnitude, unit = _parse(value)
+        if unit is None:
+            return magnitude
+        return units.Quantity(magnitude, unit)
     return value
 
 
@@ -79,52 +134,39 @@ def enforce_units(value:None | str | pint.Quantity, unit_type:str) -> pint.Quant
     if value is None:
         return value
 
-    value = to_quantity(value)
-
-    if unit_type.lower() not in SUPPORTED_TYPES:
+    unit_type = unit_type.lower()
+    if unit_type not in SUPPORTED_TYPES:
         raise ValueError(f'Not configured to enforce unit_type: {unit_type}')
 
-    if unit_type.lower() == 'dimensionless':
+    if isinstance(value, str):
+        magnitude, unit = _parse(value)
+    elif has_units(value):
+        magnitude, unit = value.magnitude, value.units
+    else:
+        magnitude, unit = value, None
+
+    if unit_type == 'dimensionless':
         # this should return the value as an int/float; pint converts strings to pure numerical types if no unit is provided
-        return value
+        return to_quantity(value)
 
-    if not has_units(value):
+    if unit is None:
         raise ValueError('Supplied value must have units!')
 
-    elif unit_type.lower() == 'volume':
-        if not is_volume(value):
-            raise ValueError(f'Supplied value must be a volume not {value.dimensionality}')
-        else:
-            value = value.to(DEFAULT_UNITS['volume'])
-
-    elif unit_type.lower() == 'mass':
-        if not is_mass(value):
-            raise ValueError(f'Supplied value must be a mass not {value.dimensionality}')
-        else:
-            value = value.to(DEFAULT_UNITS['mass'])
-
-    elif unit_type.lower() == 'density':
-        if not is_density(value):
-            raise ValueError(f'Supplied value must be a density not {value.dimensionality}')
-        else:
-            value = value.to(DEFAULT_UNITS['density'])
-
-    elif unit_type.lower() == 'concentration':
-        if not is_concentration(value):
-            raise ValueError(f'Supplied value must be a concentration not {value.dimensionality}')
-        else:
-            value = value.to(DEFAULT_UNITS['concentration'])
-
-    elif unit_type.lower() == 'molarity':
-        if not is_molarity(value):
-            raise ValueError(f'Supplied value must be a molarity not {value.dimensionality}')
-        else:
-            value = value.to(DEFAULT_UNITS['molarity'])
-
-    elif unit_type.lower() == 'molality':
-        if not is_molality(value):
-            raise ValueError(f'Supplied value must be a molality not {value.dimensionality}')
-        else:
-            value = value.to(DEFAULT_UNITS['molality'])
+    if not _is_unit_type(unit, unit_type):
+        raise ValueError(f'Supplied value must be a {unit_type} not {unit.dimensionality}')
 
-    return value
+    default_unit = _DEFAULT_UNIT_OBJECTS[unit_type]
+    if unit == default_unit and not isinstance(value, str) and not hasattr(magnitude, 'shape'):
+        # already canonical; Quantities are never mutated in place, so the value can be shared
+        return value
+    return units.Quantity(magnitude * _factor_to_default(unit, unit_type), default_unit)
+
+
+_IS_TYPE = {
+    'volume': is_volume,
+    'mass': is_mass,
+    'density': is_density,
+    'concentration': is_concentration,
+    'molarity': is_molarity,
+    'molality': is_molality,
+}
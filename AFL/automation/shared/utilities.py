@@ -1,19 +1,14 @@
 import types
 import datetime
 import logging
-from AFL.automation.shared.units import has_units
-
-try:
-    import matplotlib.pyplot as plt
-except ModuleNotFoundError:
-    logging.warning('importing Matplotlib failed, do you want plotting to work?')
 import io
 
 
 def listify(obj):
     if isinstance(obj, str) or isinstance(obj, dict) or not hasattr(obj, "__iter__"):
         obj = [obj]
-    elif has_units(obj):
+    elif hasattr(obj, 'units'):
+        # (shared.units.has_units, inlined so listify doesn't pull in pint)
         #special handling for pint quanitites whch, for some reason
         #have __iter__ defined for single values...
         try:
@@ -33,6 +28,8 @@ def makeRegistar():
     return registrarDecorator
 
 def mpl_plot_to_bytes(fig=None,format='svg'):
+    # pyplot is imported here rather than at module level: it costs every server ~1 s at startup
+    import matplotlib.pyplot as plt
     if fig is None:
         fig = plt.gcf()
     byte_str  = io.BytesIO()
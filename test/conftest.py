@@ -5,6 +5,23 @@ from AFL.automation.mixcalc.MixDB import MixDB
 import json
 import werkzeug
 
+def pytest_addoption(parser):
+    parser.addoption("--benchmark", action="store_true", default=False, help="also run the timing reports marked benchmark")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: timing report, skipped unless --benchmark is given")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+    skip = pytest.mark.skip(reason="timing report; run with --benchmark")
+    for item in items:
+        if item.get_closest_marker("benchmark") is not None:
+            item.add_marker(skip)
+
+
 @pytest.fixture(autouse=True)
 def _set_test_afl_home(monkeypatch, tmp_path):
     afl_home = tmp_path / ".afl"
@@ -4,6 +4,8 @@ Tests for AFL.automation.APIServer core functionality
 import pytest
 import tempfile
 import json
+import threading
+import time
 from pathlib import Path
 
 from AFL.automation.APIServer import APIServer
@@ -214,3 +216,523 @@ def test_apiserver_module_all():
     import AFL.automation.APIServer as apiserver_module
     assert hasattr(apiserver_module, '__all__')
     assert 'APIServer' in apiserver_module.__all__
+
+
+class _FlaskResponse:
+    """Minimal requests.Response stand-in wrapping a Flask test response"""
+
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.text = response.get_data(as_text=True)
+        self._json = response.get_json(silent=True)
+
+    def json(self):
+        return self._json
+
+
+class TestWaitForTask:
+    """Test the /wait_for_task long-poll endpoint and Client.wait"""
+
+    @pytest.fixture
+    def running_server(self):
+        server = APIServer(name='TestWaitServer')
+        server.add_standard_routes()
+        server.create_queue(DummyDriver(name='TestWaitDriver'), add_unqueued=False)
+        server.init()
+        client = server.app.test_client()
+        token = client.post('/login', json={'username': 'test', 'password': 'domo_arigato'}).get_json()['token']
+        headers = {'Authorization': f'Bearer {token}'}
+        yield server, client, headers
+        server.queue_daemon.terminate()
+
+    def test_wait_for_task_returns_meta_on_completion(self, running_server):
+        server, client, headers = running_server
+        task_uuid = client.post('/enqueue', headers=headers, json={'task_name': 'test_command1'}).get_data(as_text=True)
+
+        response = client.get('/wait_for_task', query_string={'uuid': task_uuid, 'timeout': 10})
+
+        assert response.status_code == 200
+        result = response.get_json()
+        assert result['status'] == 'complete'
+        assert result['meta']['exit_state'] == 'Success!'
+        # sortable companions of the started/ended timestamps
+        meta = result['meta']
+        assert meta['started_epoch'] <= meta['ended_epoch']
+        assert meta['started_iso'] <= meta['ended_iso']
+
+    def test_wait_for_task_times_out_as_pending(self, running_server):
+        server, client, headers = running_server
+        server.queue_daemon.paused = True
+        task_uuid = client.post('/enqueue', headers=headers, json={'task_name': 'test_command1'}).get_data(as_text=True)
+
+        response = client.get('/wait_for_task', query_string={'uuid': task_uuid, 'timeout': 0.2})
+
+        assert response.get_json() == {'status': 'pending'}
+        server.queue_daemon.paused = False
+
+    def test_wait_for_removed_task_without_history(self, running_server):
+        server, client, headers = running_server
+        server.queue_daemon.paused = True
+        task_uuid = client.post('/enqueue', headers=headers, json={'task_name': 'test_command1'}).get_data(as_text=True)
+        client.post('/remove_item', headers=headers, json={'uuid': task_uuid})
+
+        response = client.get('/wait_for_task', query_string={'uuid': task_uuid, 'for_history': 0, 'timeout': 5})
+
+        assert response.get_json()['status'] == 'complete'
+        server.queue_daemon.paused = False
+
+    def test_wait_for_task_refused_over_held_request_cap(self, running_server):
+        server, client, headers = running_server
+        server.queue_daemon.paused = True
+        task_uuid = client.post('/enqueue', headers=headers, json={'task_name': 'test_command1'}).get_data(as_text=True)
+        held = 0
+        while server._acquire_held_request():
+            held += 1
+        assert held == server.max_held_requests == server.threads - 4
+
+        refused = client.get('/wait_for_task', query_string={'uuid': task_uuid, 'timeout': 5})
+        server._release_held_request()
+        pending = client.get('/wait_for_task', query_string={'uuid': task_uuid, 'timeout': 0.2})
+
+        assert refused.status_code == 503
+        assert refused.headers['Retry-After'] == '1'
+        assert pending.get_json() == {'status': 'pending'}
+        # the long-poll gave its slot back
+        assert server._acquire_held_request()
+        server.queue_daemon.paused = False
+
+    def test_client_wait_backs_off_on_503(self, monkeypatch):
+        from AFL.automation.APIServer import Client as client_module
+
+        api_client = client_module.Client('localhost', port='5000')
+        sleeps = []
+        responses = [(503, {'Retry-After': '2'}, None), (200, {}, {'status': 'complete', 'meta': {'exit_state': 'Success!'}})]
+
+        class _Response:
+            def __init__(self, status_code, headers, payload):
+                self.status_code = status_code
+                self.headers = headers
+                self._payload = payload
+                self.text = ''
+
+            def json(self):
+                return self._payload
+
+        monkeypatch.setattr(api_client.session, 'get', lambda url, **kwargs: _Response(*responses.pop(0)))
+        monkeypatch.setattr(client_module.time, 'sleep', sleeps.append)
+
+        meta = api_client.wait(target_uuid='QD-1', first_check_delay=0)
+
+        assert meta == {'exit_state': 'Success!'}
+        assert sleeps == [2.0]
+
+    def test_client_wait_uses_long_poll(self, running_server, monkeypatch):
+        from AFL.automation.APIServer.Client import Client
+
+        server, flask_client, headers = running_server
+        api_client = Client('localhost', port='5000')
+        api_client.headers = headers
+        requested_paths = []
+
+        def fake_get(url, headers=None, params=None, timeout=None, **kwargs):
+            path = url.replace(api_client.url, '')
+            requested_paths.append(path)
+            return _FlaskResponse(flask_client.get(path, headers=headers, query_string=params))
+
+        monkeypatch.setattr(api_client.session, 'get', fake_get)
+        task_uuid = flask_client.post('/enqueue', headers=headers, json={'task_name': 'test_command1'}).get_data(as_text=True)
+
+        meta = api_client.wait(target_uuid=task_uuid)
+
+        assert meta['exit_state'] == 'Success!'
+        assert requested_paths == ['/wait_for_task']
+        assert api_client.supports_wait_for_task is True
+
+    def test_client_wait_falls_back_to_polling(self, monkeypatch):
+        from AFL.automation.APIServer.Client import Client
+
+        api_client = Client('localhost', port='5000')
+
+        class _Response:
+            def __init__(self, status_code, payload=None):
+                self.status_code = status_code
+                self._payload = payload
+                self.text = ''
+
+            def json(self):
+                return self._payload
+
+        def fake_get(url, **kwargs):
+            if url.endswith('/wait_for_task'):
+                return _Response(404)
+            return _Response(200, [[{'uuid': 'QD-1', 'meta': {'exit_state': 'Success!'}}], [], []])
+
+        monkeypatch.setattr(api_client.session, 'get', fake_get)
+
+        meta = api_client.wait(target_uuid='QD-1', first_check_delay=0)
+
+        assert meta == {'exit_state': 'Success!'}
+        assert api_client.supports_wait_for_task is False
+
+
+class TestGetHistory:
+    """Test the paged /get_history endpoint and incremental Client.get_queue"""
+
+    @pytest.fixture
+    def server_with_history(self):
+        return self._server_with_history(5)
+
+    @staticmethod
+    def _server_with_history(n_tasks, prefix='QD'):
+        server = APIServer(name='TestHistoryServer')
+        server.add_standard_routes()
+        server.create_queue(DummyDriver(name='TestHistoryDriver'), add_unqueued=False)
+        for i in range(n_tasks):
+            server.history.append({'uuid': f'{prefix}-{i}', 'task': {'task_name': 'test_command1'}, 'meta': {'return_val': i}})
+        return server, server.app.test_client()
+
+    def test_get_history_since(self, server_with_history):
+        server, client = server_with_history
+        first = server.history.first_iteration
+
+        page = client.get('/get_history', query_string={'since': first + 1, 'limit': 2}).get_json()
+
+        assert [t['uuid'] for t in page['entries']] == ['QD-2', 'QD-3']
+        assert page['first_iteration'] == first
+        assert page['last_iteration'] == first + 4
+        assert page['total'] == 5
+
+    def test_get_history_by_uuid(self, server_with_history):
+        server, client = server_with_history
+
+        assert client.get('/get_history', query_string={'uuid': 'QD-3'}).get_json()['meta']['return_val'] == 3
+        assert client.get('/get_history', query_string={'uuid': 'missing'}).status_code == 404
+
+    def test_get_queue_history_limit(self, server_with_history):
+        server, client = server_with_history
+
+        history, running, queued = client.get('/get_queue', query_string={'history_limit': 2}).get_json()
+
+        assert [t['uuid'] for t in history] == ['QD-3', 'QD-4']
+        assert client.get('/get_queue', query_string={'history_limit': 0}).get_json()[0] == []
+
+    def test_client_get_queue_is_incremental(self, server_with_history, monkeypatch):
+        from AFL.automation.APIServer.Client import Client
+
+        server, flask_client = server_with_history
+        api_client = Client('localhost', port='5000')
+        api_client.supports_queue_iteration = True
+        history_params = []
+
+        def fake_get(url, headers=None, params=None, **kwargs):
+            path = url.replace(api_client.url, '')
+            if path == '/get_history':
+                history_params.append(dict(params))
+            return _FlaskResponse(flask_client.get(path, headers=headers, query_string=params))
+
+        monkeypatch.setattr(api_client.session, 'get', fake_get)
+
+        history, running, queued = api_client.get_queue()
+        assert [t['uuid'] for t in history] == [f'QD-{i}' for i in range(5)]
+
+        server.history.append({'uuid': 'QD-5', 'task': {}, 'meta': {}})
+        server.task_queue.mark_changed()
+        history, running, queued = api_client.get_queue()
+
+        assert [t['uuid'] for t in history][-1] == 'QD-5'
+        assert len(history) == 6
+        assert history_params[-1]['since'] == server.history.first_iteration + 4
+
+    def test_client_history_cache_resets_on_restart(self, monkeypatch):
+        from AFL.automation.APIServer.Client import Client
+
+        api_client = Client('localhost', port='5000')
+        api_client.supports_queue_iteration = True
+        current = {}
+
+        def fake_get(url, headers=None, params=None, **kwargs):
+            path = url.replace(api_client.url, '')
+            return _FlaskResponse(current['client'].get(path, headers=headers, query_string=params))
+
+        monkeypatch.setattr(api_client.session, 'get', fake_get)
+
+        _, current['client'] = self._server_with_history(3, prefix='RUN1')
+        assert [t['uuid'] for t in api_client.get_queue()[0]] == ['RUN1-0', 'RUN1-1', 'RUN1-2']
+
+        # the restarted server has run more tasks than the client has cached
+        time.sleep(0.001)
+        _, current['client'] = self._server_with_history(5, prefix='RUN2')
+        history = api_client.get_queue()[0]
+        assert [t['uuid'] for t in history] == [f'RUN2-{i}' for i in range(5)]
+
+    @pytest.mark.parametrize('page', ['afl_app/js/servers.js', 'server_page/index-new.html'])
+    def test_web_history_cache_resets_on_restart(self, page):
+        import re
+        import shutil
+        import subprocess
+
+        node = shutil.which('node')
+        if node is None:
+            pytest.skip('node is not installed')
+
+        source = (Path(__file__).resolve().parents[1] / 'AFL' / 'automation' / 'apps' / page).read_text()
+        if page.endswith('.js'):
+            script = source + '''
+                var client = {address: '', cachedHistory: null};
+                var fetchNewHistory = function (callback) {
+                    Server.prototype.fetchNewHistory.call(client, callback);
+                };
+                var $ = {ajax: function (opts) { opts.success(serverPage(opts.data)); }};
+            '''
+        else:
+            function = re.search(r'var historyCache = \[\];.*?\n        }\n', source, re.S).group(0)
+            script = function + '''
+                var $ = {get: function (url, data, success) { success(serverPage(data)); }};
+            '''
+
+        runs = []
+        for n_tasks, prefix in ((3, 'RUN1'), (5, 'RUN2')):
+            server, _ = self._server_with_history(n_tasks, prefix=prefix)
+            runs.append({
+                'entries': [{'uuid': t['uuid'], 'iteration': t['iteration']} for t in server.history],
+                'first_iteration': server.history.first_iteration,
+                'last_iteration': server.history.last_iteration,
+            })
+            time.sleep(0.001)
+
+        script += '''
+            var runs = %s;
+            var run = runs[0];
+            function serverPage(data) {
+                var entries = run.entries.filter(function (t) { return t.iteration > data.since; });
+                return {entries: entries.slice(0, data.limit), first_iteration: run.first_iteration,
+                        last_iteration: run.last_iteration, total: run.entries.length};
+            }
+            var seen = [];
+            fetchNewHistory(function (history) {
+                seen.push(history.map(function (t) { return t.uuid; }));
+                run = runs[1];  // the server restarts
+                fetchNewHistory(function (history) {
+                    seen.push(history.map(function (t) { return t.uuid; }));
+                });
+            });
+            console.log(JSON.stringify(seen));
+        ''' % json.dumps(runs)
+        output = subprocess.run([node, '-e', script], capture_output=True, text=True, check=True).stdout
+        assert json.loads(output.splitlines()[-1]) == [
+            ['RUN1-0', 'RUN1-1', 'RUN1-2'],
+            [f'RUN2-{i}' for i in range(5)],
+        ]
+
+
+class TestClientSession:
+    """Test connection pooling in Client against a live server"""
+
+    @pytest.fixture
+    def live_server(self):
+        waitress = pytest.importorskip('waitress')
+        server = APIServer(name='TestSessionServer')
+        server.add_standard_routes()
+        server.create_queue(DummyDriver(name='TestSessionDriver'), add_unqueued=False)
+        wsgi_server = waitress.create_server(server.app, host='127.0.0.1', port=0, threads=4)
+        thread = threading.Thread(target=wsgi_server.run, daemon=True)
+        thread.start()
+        yield wsgi_server.effective_port
+        wsgi_server.close()
+
+    def test_client_reuses_connections(self, live_server):
+        from AFL.automation.APIServer.Client import Client
+
+        with Client('127.0.0.1', port=live_server) as client:
+            for _ in range(20):
+                client.get_queue()
+            pools = client.session.get_adapter(client.url).poolmanager.pools
+            assert len(pools) == 1
+            pool = pools[next(iter(pools.keys()))]
+            assert pool.num_connections == 1
+            assert pool.num_requests == 20
+
+    def test_client_streams_dropbox_objects(self, live_server):
+        import numpy as np
+        from AFL.automation.APIServer.Client import Client
+
+        with Client('127.0.0.1', port=live_server, compression='zlib') as client:
+            client.login('test', populate_commands=False)
+            arr = np.random.default_rng(0).random((100, 100))
+
+            uid = client.deposit_obj(arr)
+            result = client.retrieve_obj(uid)
+
+        assert client.supports_streamed_objects is True
+        np.testing.assert_array_equal(result, arr)
+
+    def test_pooled_request_latency(self, live_server):
+        """Micro-benchmark: per-request latency with and without connection reuse"""
+        import requests
+        from AFL.automation.APIServer.Client import Client
+
+        n_requests = 50
+        url = f'http://127.0.0.1:{live_server}/get_queue_iteration'
+
+        start = time.perf_counter()
+        for _ in range(n_requests):
+            requests.get(url)
+        unpooled = (time.perf_counter() - start) / n_requests
+
+        with Client('127.0.0.1', port=live_server) as client:
+            client.session.get(url)  # open the connection
+            start = time.perf_counter()
+            for _ in range(n_requests):
+                client.session.get(url)
+            pooled = (time.perf_counter() - start) / n_requests
+
+        print(f'\nper-request latency: unpooled {unpooled*1e3:.2f} ms, pooled {pooled*1e3:.2f} ms')
+        assert pooled < unpooled * 2
+
+
+class TestBinaryArrayTransport:
+    """Test content negotiation of binary array responses"""
+
+    @pytest.fixture
+    def server(self):
+        server = APIServer(name='TestBinaryServer')
+        server.add_standard_routes()
+        server.create_queue(DummyDriver(name='TestBinaryDriver'), add_unqueued=False)
+        client = server.app.test_client()
+        token = client.post('/login', json={'username': 'test', 'password': 'domo_arigato'}).get_json()['token']
+        return server, client, {'Authorization': f'Bearer {token}'}
+
+    def test_get_driver_object_negotiates_binary(self, server):
+        import numpy as np
+        from AFL.automation.shared import array_transport, serialization
+
+        server, client, headers = server
+        server.driver.detector_image = np.arange(100.0).reshape(10, 10)
+
+        default = client.get('/get_driver_object', headers=headers, json={'name': 'detector_image'})
+        binary = client.get(
+            '/get_driver_object',
+            headers={**headers, 'Accept': array_transport.BINARY_MIMETYPE},
+            json={'name': 'detector_image'},
+        )
+
+        assert default.mimetype == 'application/json'
+        np.testing.assert_array_equal(serialization.deserialize(default.get_json()['obj']), server.driver.detector_image)
+        assert binary.mimetype == array_transport.BINARY_MIMETYPE
+        np.testing.assert_array_equal(array_transport.decode(binary.data), server.driver.detector_image)
+
+    def test_unencodable_object_falls_back_to_pickle(self, server):
+        from AFL.automation.shared import array_transport
+
+        server, client, headers = server
+        server.driver.some_object = {1, 2, 3}
+
+        response = client.get(
+            '/get_driver_object',
+            headers={**headers, 'Accept': array_transport.BINARY_MIMETYPE},
+            json={'name': 'some_object'},
+        )
+
+        assert response.mimetype == 'application/json'
+
+
+class TestNdjsonRendering:
+    """Test streaming of unqueued results with render_hint='ndjson'"""
+
+    def test_ndjson_streams_one_line_per_item(self):
+        server = APIServer(name='TestNdjsonServer')
+
+        def events(**kwargs):
+            for i in range(3):
+                yield {'seq': i, 'stage': 'target_end'}
+
+        with server.app.test_request_context('/events'):
+            response = server.render_unqueued(events, {'render_hint': 'ndjson'})
+            assert response.mimetype == 'application/x-ndjson'
+            lines = b''.join(response.iter_encoded()).decode().splitlines()
+
+        assert [json.loads(line)['seq'] for line in lines] == [0, 1, 2]
+
+    def test_ndjson_stream_holds_a_slot_until_closed(self):
+        server = APIServer(name='TestNdjsonServer', threads=6, max_held_requests=1)
+
+        def events(**kwargs):
+            yield {'seq': 0}
+
+        with server.app.test_request_context('/events'):
+            streaming = server.render_unqueued(events, {'render_hint': 'ndjson'})
+            refused, status, headers = server.render_unqueued(events, {'render_hint': 'ndjson'})
+            assert status == 503
+            assert headers['Retry-After'] == '1'
+            list(streaming.iter_encoded())
+            streaming.close()
+            again = server.render_unqueued(events, {'render_hint': 'ndjson'})
+            assert again.mimetype == 'application/x-ndjson'
+            again.close()
+
+    def test_long_poll_answers_at_once_over_cap(self):
+        server = APIServer(name='TestLongPollServer', max_held_requests=1)
+        timeouts = []
+
+        def get_job(timeout=0, **kwargs):
+            timeouts.append(float(timeout))
+            return {'events': []}
+
+        with server.app.test_request_context('/get_job?timeout=30'):
+            server.render_unqueued(get_job, {'long_poll': 'timeout'})
+            assert server._acquire_held_request()
+            server.render_unqueued(get_job, {'long_poll': 'timeout'})
+            server._release_held_request()
+
+        assert timeouts == [30.0, 0.0]
+        # the first call released its slot when it returned
+        assert server._acquire_held_request()
+
+
+class TestStreamedObjects:
+    """Test codec-streamed deposit_obj/retrieve_obj"""
+
+    @pytest.fixture
+    def server(self):
+        server = APIServer(name='TestStreamServer')
+        server.add_standard_routes()
+        server.create_queue(DummyDriver(name='TestStreamDriver'), add_unqueued=False)
+        client = server.app.test_client()
+        token = client.post('/login', json={'username': 'test', 'password': 'domo_arigato'}).get_json()['token']
+        return server, client, {'Authorization': f'Bearer {token}'}
+
+    def test_streamed_deposit_and_retrieve(self, server):
+        import numpy as np
+        from AFL.automation.shared import codec
+
+        server, client, headers = server
+        arr = np.arange(1000.0)
+
+        response = client.post(
+            '/deposit_obj',
+            headers={**headers, 'Content-Type': codec.MIMETYPE},
+            query_string={'uuid': 'DB-test'},
+            data=codec.encode(arr, compression='zlib'),
+        )
+        assert response.get_data(as_text=True) == 'DB-test'
+        np.testing.assert_array_equal(server.driver.dropbox['DB-test'], arr)
+
+        response = client.get(
+            '/retrieve_obj',
+            headers={**headers, 'Accept': codec.MIMETYPE},
+            json={'uuid': 'DB-test', 'delete': True},
+        )
+        assert response.mimetype == codec.MIMETYPE
+        np.testing.assert_array_equal(codec.decode(response.data), arr)
+        assert 'DB-test' not in server.driver.dropbox
+
+    def test_json_deposit_still_supported(self, server):
+        from AFL.automation.shared import serialization
+
+        server, client, headers = server
+
+        uid = client.post('/deposit_obj', headers=headers, json={'obj': serialization.serialize({'a': 1})}).get_data(as_text=True)
+
+        assert uid.startswith('DB-')
+        assert server.driver.dropbox[uid] == {'a': 1}
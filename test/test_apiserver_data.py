@@ -9,6 +9,8 @@ import numpy as np
 import pandas as pd
 from pathlib import Path
 import importlib
+import threading
+import time
 
 from AFL.automation.APIServer.data import DataPacket, DataJSON, DataTiled, DataTrashcan
 
@@ -263,6 +265,28 @@ class TestDataPacket:
         # System data should remain
         assert dp['driver_name'] == 'TestDriver'
 
+    def test_dict_method_shares_array_payloads(self):
+        """Test that _dict() passes array payloads by reference"""
+        dp = DataTrashcan()
+        arr = np.arange(10)
+        dp['main_array'] = arr
+        assert dp._dict()['main_array'] is arr
+
+    def test_snapshot_is_isolated_and_read_only(self):
+        """Test that snapshot() is unaffected by later writes and cannot be written to"""
+        dp = DataTrashcan()
+        dp['driver_config'] = {'key': 'value'}
+        dp['transient_key'] = 'before'
+
+        snap = dp.snapshot()
+        dp['driver_config']['key'] = 'changed'
+        dp.reset()
+
+        assert snap['driver_config'] == {'key': 'value'}
+        assert snap['transient_key'] == 'before'
+        with pytest.raises(TypeError):
+            snap['transient_key'] = 'after'
+
 
 class TestDataTrashcan:
     """Test DataTrashcan implementation"""
@@ -461,6 +485,151 @@ class TestDataTiled:
             assert captured['client'] is mock_tiled_server['run_documents']
             assert captured['key'] == 'QD-123'
 
+    def test_transmit_passes_arrays_by_reference(self, mock_tiled_server, monkeypatch):
+        """Test that the main array reaches the writer without being copied."""
+        captured = {}
+
+        def fake_write_xarray_dataset(client, dataset, key=None):
+            captured['dataset'] = dataset
+
+        tiled_mod = importlib.import_module('AFL.automation.APIServer.data.DataTiled')
+        monkeypatch.setattr(tiled_mod, 'write_xarray_dataset', fake_write_xarray_dataset)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dp = DataTiled('http://localhost:8000', 'test-api-key', tmpdir)
+            arr = np.arange(100.0)
+            dp['sample_name'] = 'Test Sample'
+            dp['main_array'] = arr
+            dp.finalize()
+
+            written = captured['dataset']['main_array'].values
+            assert np.shares_memory(written, arr)
+            assert captured['dataset'].attrs['sample_name'] == 'Test Sample'
+
+    def test_finalize_cost_independent_of_array_size(self, mock_tiled_server, monkeypatch):
+        """Benchmark: finalize time should not scale with the size of the main array."""
+        tiled_mod = importlib.import_module('AFL.automation.APIServer.data.DataTiled')
+        monkeypatch.setattr(tiled_mod, 'write_xarray_dataset', lambda client, dataset, key=None: None)
+
+        def time_finalize(dp, size, repeats=5):
+            arr = np.ones(size)
+            best = float('inf')
+            for _ in range(repeats):
+                dp['driver_config'] = {'key': 'value'}
+                dp['main_array'] = arr
+                start = time.perf_counter()
+                dp.finalize()
+                best = min(best, time.perf_counter() - start)
+            return best
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dp = DataTiled('http://localhost:8000', 'test-api-key', tmpdir)
+            small = time_finalize(dp, 1_000)
+            large = time_finalize(dp, 10_000_000)  # 80 MB of float64
+
+        # copying 80 MB even once costs tens of milliseconds; sharing it costs nothing
+        assert large < 10 * small + 0.01, f'finalize took {small:.5f} s (1k) vs {large:.5f} s (10M)'
+
+    def test_async_writes_preserve_sample_order(self, mock_tiled_server, monkeypatch):
+        """Test that background writes for one sample are delivered in submission order."""
+        written = []
+
+        def fake_write_xarray_dataset(client, dataset, key=None):
+            time.sleep(0.01)
+            written.append(key)
+
+        tiled_mod = importlib.import_module('AFL.automation.APIServer.data.DataTiled')
+        monkeypatch.setattr(tiled_mod, 'write_xarray_dataset', fake_write_xarray_dataset)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dp = DataTiled('http://localhost:8000', 'test-api-key', tmpdir, async_writes=True, write_workers=3)
+            dp['sample_uuid'] = 'SAM-1'
+            for i in range(10):
+                dp['uuid'] = f'QD-{i}'
+                dp['main_array'] = np.arange(5)
+                dp.finalize()
+                assert 'main_array' not in dp.keys()
+
+            assert dp.flush(timeout=10)
+            assert written == [f'QD-{i}' for i in range(10)]
+            status = dp.writer_status()
+            assert status['written'] == 10
+            assert status['depth'] == 0
+            dp.close()
+
+    def test_failed_write_spools_main_array(self, mock_tiled_server, monkeypatch):
+        """Test that a failed synchronous write keeps the measured array in the backup JSON."""
+        def failing_write_job(job):
+            raise ConnectionError('tiled is down')
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dp = DataTiled('http://localhost:8000', 'test-api-key', tmpdir)
+            monkeypatch.setattr(dp, '_write_job', failing_write_job)
+            dp['sample_name'] = 'Test Sample'
+            dp['main_array'] = np.array([[1.0, 2.0], [3.0, 4.0]])
+            dp.finalize()
+
+            files = [f for f in os.listdir(tmpdir) if f.endswith('.json')]
+            assert len(files) == 1
+            with open(os.path.join(tmpdir, files[0])) as f:
+                backup = json.load(f)
+            assert backup['main_data'] == [[1.0, 2.0], [3.0, 4.0]]
+            assert backup['sample_name'] == 'Test Sample'
+
+    def test_async_writes_retry_then_spool(self, mock_tiled_server, monkeypatch):
+        """Test that failed background writes are retried and then spooled to JSON."""
+        attempts = []
+
+        def failing_write_xarray_dataset(client, dataset, key=None):
+            attempts.append(key)
+            raise RuntimeError('tiled is down')
+
+        tiled_mod = importlib.import_module('AFL.automation.APIServer.data.DataTiled')
+        monkeypatch.setattr(tiled_mod, 'write_xarray_dataset', failing_write_xarray_dataset)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dp = DataTiled('http://localhost:8000', 'test-api-key', tmpdir,
+                           async_writes=True, max_retries=2, retry_backoff=0.001)
+            dp['uuid'] = 'QD-fail'
+            dp['main_array'] = np.arange(5)
+            dp.finalize()
+            assert dp.flush(timeout=10)
+
+            assert attempts == ['QD-fail'] * 3
+            status = dp.writer_status()
+            assert status['retried'] == 2
+            assert status['failed'] == 1
+            assert status['spooled'] == 1
+            files = os.listdir(tmpdir)
+            assert len(files) == 1
+            with open(os.path.join(tmpdir, files[0])) as f:
+                assert json.load(f)['uuid'] == 'QD-fail'
+            dp.close()
+
+    def test_async_writes_spool_when_full(self, mock_tiled_server, monkeypatch):
+        """Test that backpressure='spool' writes to the backup store instead of blocking."""
+        release = threading.Event()
+
+        def blocking_write_xarray_dataset(client, dataset, key=None):
+            release.wait(timeout=10)
+
+        tiled_mod = importlib.import_module('AFL.automation.APIServer.data.DataTiled')
+        monkeypatch.setattr(tiled_mod, 'write_xarray_dataset', blocking_write_xarray_dataset)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            dp = DataTiled('http://localhost:8000', 'test-api-key', tmpdir,
+                           async_writes=True, max_pending=1, backpressure='spool')
+            for i in range(3):
+                dp['uuid'] = f'QD-{i}'
+                dp['main_array'] = np.arange(5)
+                dp.finalize()
+
+            assert dp.writer_status()['spooled'] == 2
+            release.set()
+            assert dp.flush(timeout=10)
+            assert dp.writer_status()['written'] == 1
+            dp.close()
+
 
 # Integration test to verify import works
 # Added these since having issues with AFL-agent finding / importing data module
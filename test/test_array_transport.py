@@ -0,0 +1,63 @@
+import json
+
+import numpy as np
+import pytest
+
+from AFL.automation.shared import array_transport
+
+
+def test_round_trip_nested_structure():
+    payload = {
+        'status': 'success',
+        'variable': {
+            'data': np.arange(12, dtype=np.float32).reshape(3, 4),
+            'shape': (3, 4),
+            'mask': np.array([True, False, True]),
+            'times': np.array(['2024-01-01T00:00', '2024-01-02T00:00'], dtype='datetime64[ns]'),
+        },
+        'scalar': np.int64(7),
+        'values': [1, 2.5, None, 'text'],
+    }
+
+    result = array_transport.decode(array_transport.encode(payload))
+
+    assert result['status'] == 'success'
+    np.testing.assert_array_equal(result['variable']['data'], payload['variable']['data'])
+    assert result['variable']['data'].dtype == np.float32
+    assert result['variable']['shape'] == (3, 4)
+    np.testing.assert_array_equal(result['variable']['mask'], payload['variable']['mask'])
+    np.testing.assert_array_equal(result['variable']['times'], payload['variable']['times'])
+    assert result['scalar'] == 7 and isinstance(result['scalar'], np.int64)
+    assert result['values'] == [1, 2.5, None, 'text']
+
+
+def test_decode_is_zero_copy():
+    data = array_transport.encode(np.arange(1000, dtype=np.float64))
+
+    arr = array_transport.decode(data)
+
+    assert np.shares_memory(arr, np.frombuffer(data, dtype=np.uint8))
+    assert not arr.flags.writeable
+
+
+def test_big_endian_and_non_contiguous_arrays():
+    big = np.arange(6, dtype='>i4')
+    strided = np.arange(20, dtype=np.float64).reshape(4, 5)[:, ::2]
+
+    result = array_transport.decode(array_transport.encode([big, strided]))
+
+    np.testing.assert_array_equal(result[0], big)
+    assert result[0].dtype == np.dtype('<i4')
+    np.testing.assert_array_equal(result[1], strided)
+
+
+@pytest.mark.parametrize('obj', [object(), {1: 'a'}, np.array([object()]), {'__afl__': 'x'}])
+def test_unsupported_objects_raise_type_error(obj):
+    with pytest.raises(TypeError):
+        array_transport.encode(obj)
+
+
+def test_binary_is_much_smaller_than_json():
+    arr = np.random.default_rng(0).random(100_000)
+
+    assert len(array_transport.encode(arr)) < len(json.dumps(arr.tolist())) / 2
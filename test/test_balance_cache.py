@@ -0,0 +1,151 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from scipy.optimize import Bounds
+
+from AFL.automation.mixcalc.BalanceCache import BalanceCache
+from AFL.automation.mixcalc.MassBalance import MassBalance
+from AFL.automation.mixcalc.MassBalanceBase import _best_balance_candidate
+from AFL.automation.mixcalc.Solution import Solution
+from AFL.automation.mixcalc.TargetSolution import TargetSolution
+
+MassBalanceBase = sys.modules['AFL.automation.mixcalc.MassBalanceBase']
+
+
+def _sweep(cache, salt_concentration="200 mg/ml", n_targets=4):
+    with MassBalance(minimum_volume="20 ul") as mb:
+        Solution(name="Water", masses={"H2O": "20 g"}, location='1A1')
+        Solution(name="Hexanes", masses={"Hexanes": "20 g"}, location='1A2')
+        Solution(
+            name="Brine",
+            masses={"H2O": "20 g"},
+            concentrations={"NaCl": salt_concentration},
+            solutes=["NaCl"],
+            location='1A3',
+        )
+        for ratio in np.linspace(0.5, 0.8, n_targets):
+            TargetSolution(
+                name=f"Target{ratio:.2f}",
+                mass_fractions={"H2O": ratio, "Hexanes": 1.0 - ratio},
+                concentrations={"NaCl": "25 mg/ml"},
+                total_mass="500 mg",
+                solutes=["NaCl"],
+            )
+    mb.balance_cache = cache
+    return mb
+
+
+def _count_searches(monkeypatch):
+    calls = []
+    search = _best_balance_candidate
+
+    def counting_search(*args, **kwargs):
+        calls.append(1)
+        return search(*args, **kwargs)
+
+    monkeypatch.setattr(MassBalanceBase, '_best_balance_candidate', counting_search)
+    return calls
+
+
+def _transfers(mb):
+    return [
+        {stock.name: mass for stock, mass in entry['transfers'].items()}
+        for entry in mb.balanced
+    ]
+
+
+@pytest.mark.usefixtures("mixdb")
+def test_repeated_balance_is_served_from_cache(tmp_path, monkeypatch):
+    calls = _count_searches(monkeypatch)
+    cache = BalanceCache(tmp_path / 'cache')
+
+    mb = _sweep(cache)
+    mb.balance(tol=1e-3)
+    first = _transfers(mb)
+    assert len(calls) == 4
+    assert cache.info()['entries'] == 4
+
+    # a fresh cache object on the same directory sees the stored entries
+    mb = _sweep(BalanceCache(tmp_path / 'cache'))
+    mb.balance(tol=1e-3)
+    assert len(calls) == 4
+    assert mb.balance_cache.hits == 4
+    assert _transfers(mb) == first
+    assert all(entry['success'] for entry in mb.balanced)
+
+    # a warm cache leaves nothing for the process pool
+    def no_pool(*args, **kwargs):
+        raise AssertionError('cached targets were sent to the pool')
+
+    monkeypatch.setattr(MassBalanceBase, '_iter_parallel_balance', no_pool)
+    mb.balance(tol=1e-3, n_workers=2)
+    assert _transfers(mb) == first
+
+    # different stocks give different keys
+    mb = _sweep(cache, salt_concentration="150 mg/ml")
+    mb.balance(tol=1e-3)
+    assert len(calls) == 8
+
+    # so does a different tolerance
+    mb = _sweep(cache)
+    mb.balance(tol=1e-2)
+    assert len(calls) == 12
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    rng = np.random.default_rng(0)
+    mfm = rng.uniform(size=(3, 3))
+    bounds = Bounds(lb=np.full(3, 0.02), ub=np.full(3, np.inf), keep_feasible=False)
+    cache = BalanceCache(tmp_path / 'cache', max_bytes=10 ** 6)
+
+    keys = []
+    for _ in range(3):
+        target = rng.uniform(size=3)
+        key = BalanceCache.key(mfm, bounds, target, 1e-3, 128)
+        cache.put(key, *_best_balance_candidate(mfm, target, bounds, 1e-3))
+        keys.append(key)
+    entry_size = cache.info()['bytes'] // 3
+
+    assert cache.get(keys[0]) is not None
+    cache.max_bytes = 2 * entry_size
+    target = rng.uniform(size=3)
+    cache.put(BalanceCache.key(mfm, bounds, target, 1e-3, 128), *_best_balance_candidate(mfm, target, bounds, 1e-3))
+
+    assert cache.info()['entries'] == 2
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is None
+    assert len(list((tmp_path / 'cache').iterdir())) == 2
+
+
+def test_cache_counts_entries_of_other_processes(tmp_path):
+    rng = np.random.default_rng(1)
+    mfm = rng.uniform(size=(3, 3))
+    bounds = Bounds(lb=np.full(3, 0.02), ub=np.full(3, np.inf), keep_feasible=False)
+
+    def put(cache):
+        target = rng.uniform(size=3)
+        key = BalanceCache.key(mfm, bounds, target, 1e-3, 128)
+        cache.put(key, *_best_balance_candidate(mfm, target, bounds, 1e-3))
+        return key
+
+    # two caches on one directory stand in for two processes
+    ours = BalanceCache(tmp_path / 'cache', max_bytes=10 ** 6)
+    theirs = BalanceCache(tmp_path / 'cache', max_bytes=10 ** 6)
+    first = put(ours)
+    entry_size = ours.info()['bytes']
+    others = [put(theirs) for _ in range(3)]
+    assert ours.info()['entries'] == 1
+    for age, key in enumerate([first] + others):
+        os.utime(tmp_path / 'cache' / (key + '.afla'), (1000 + age, 1000 + age))
+
+    ours.max_bytes = theirs.max_bytes = 3 * entry_size
+    put(ours)
+
+    assert ours.info()['entries'] == 3
+    assert ours.info()['bytes'] <= ours.max_bytes
+    assert not (tmp_path / 'cache' / (first + '.afla')).exists()
+    assert not (tmp_path / 'cache' / (others[0] + '.afla')).exists()
+    assert len(list((tmp_path / 'cache').iterdir())) == 3
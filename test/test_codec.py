@@ -0,0 +1,73 @@
+import base64
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from AFL.automation.shared import codec, serialization
+
+
+def _dataset():
+    return xr.Dataset(
+        {'I': (('sample', 'q'), np.random.default_rng(0).random((3, 50))), 'flag': ('sample', [True, False, True])},
+        coords={'q': np.linspace(0.01, 0.5, 50), 'sample': ['a', 'b', 'c']},
+        attrs={'instrument': 'SAXS', 'exposure': 1.5},
+    )
+
+
+@pytest.mark.parametrize('obj, kind', [
+    (np.arange(10.0).reshape(2, 5), 'npy'),
+    (_dataset(), 'xarray'),
+    (_dataset()['I'], 'xarray'),
+    (pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']}), 'arrow'),
+    ({'mixed': [1, 'two', 3.0]}, 'pickle'),
+])
+def test_round_trip_uses_typed_codecs(obj, kind):
+    encoded = codec.encode(obj)
+
+    assert encoded.startswith(f'AFLC1:{kind}:'.encode())
+    decoded = codec.decode(encoded)
+    if isinstance(obj, (xr.Dataset, xr.DataArray)):
+        assert decoded.identical(obj)
+    elif isinstance(obj, pd.DataFrame):
+        pd.testing.assert_frame_equal(decoded, obj)
+    elif isinstance(obj, np.ndarray):
+        np.testing.assert_array_equal(decoded, obj)
+    else:
+        assert decoded == obj
+
+
+def test_object_arrays_fall_back_to_pickle():
+    ds = _dataset().assign(notes=('sample', np.array(['x', None, 'z'], dtype=object)))
+
+    assert codec.dumps(ds).startswith('AFLC1:pickle:')
+    assert codec.loads(codec.dumps(ds)).identical(ds)
+
+
+@pytest.mark.parametrize('compression', codec.available_compressions())
+def test_compression_round_trip(compression):
+    arr = np.zeros(100_000)
+
+    encoded = codec.encode(arr, compression=compression)
+
+    assert len(encoded) < arr.nbytes / 10
+    np.testing.assert_array_equal(codec.decode(encoded), arr)
+    np.testing.assert_array_equal(codec.loads(codec.dumps(arr, compression=compression)), arr)
+
+
+def test_is_serialized_does_not_decode(monkeypatch):
+    serialized = serialization.serialize(_dataset())
+    monkeypatch.setitem(codec.DECODERS, 'xarray', lambda payload: pytest.fail('is_serialized decoded the payload'))
+
+    assert serialization.is_serialized(serialized)
+    assert not serialization.is_serialized('plain string')
+    assert not serialization.is_serialized(12)
+
+
+def test_legacy_pickle_strings_are_still_accepted():
+    legacy = base64.b64encode(pickle.dumps({'a': 1})).decode('utf8')
+
+    assert serialization.is_serialized(legacy)
+    assert serialization.deserialize(legacy) == {'a': 1}
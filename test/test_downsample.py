@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+xr = pytest.importorskip("xarray")
+
+from AFL.automation.shared.downsample import downsample, lttb_indices, minmax_indices, stride_indices
+
+
+def test_stride_indices_keep_endpoints():
+    assert stride_indices(10, 20).tolist() == list(range(10))
+    assert stride_indices(11, 3).tolist() == [0, 5, 10]
+    assert stride_indices(5, 1).tolist() == [0]
+
+
+def test_lttb_keeps_peaks_and_endpoints():
+    x = np.linspace(0, 10, 10000)
+    y = np.sin(x)
+    y[4321] = 50.0
+    indices = lttb_indices(x, y, 200)
+    assert len(indices) == 200
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert 4321 in indices
+
+
+def test_lttb_tolerates_nan():
+    y = np.arange(100, dtype=float)
+    y[10:40] = np.nan
+    indices = lttb_indices(np.arange(100), y, 10)
+    assert len(indices) == 10
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_minmax_keeps_extremes_of_each_bucket():
+    y = np.zeros(1000)
+    y[123] = -7.0
+    y[877] = 9.0
+    y[500] = np.nan
+    indices = minmax_indices(y, 20)
+    assert len(indices) <= 20
+    assert {123, 877} <= set(indices.tolist())
+    assert 500 not in indices
+
+
+def test_downsample_dataarray_keeps_coords_in_step():
+    q = np.linspace(0.01, 1.0, 1000)
+    line = xr.DataArray(q ** -2, dims=["q"], coords={"q": q})
+    reduced, method = downsample(line, 100)
+    assert method == "lttb"
+    assert reduced.sizes["q"] == 100
+    np.testing.assert_allclose(reduced.values, reduced.coords["q"].values ** -2)
+
+    image = xr.DataArray(
+        np.arange(1000 * 600, dtype=float).reshape(1000, 600),
+        dims=["y", "x"],
+        coords={"y": np.arange(1000), "x": np.arange(600), "label": ("y", ["a"] * 1000)},
+    )
+    reduced, method = downsample(image, {"y": 256})
+    assert method == "mean"
+    assert dict(reduced.sizes) == {"y": 250, "x": 600}
+    assert reduced.values[0, 0] == image.values[:4, 0].mean()
+    assert reduced.coords["y"].values[0] == 1.5
+    assert "label" not in reduced.coords
+
+    reduced, method = downsample(image, 2000)
+    assert reduced is image and method is None
+    with pytest.raises(ValueError):
+        downsample(image, 100, method="lttb")
+    names = xr.DataArray(np.array(["s"] * 50), dims=["index"])
+    assert downsample(names, 5)[1] == "stride"
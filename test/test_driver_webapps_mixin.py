@@ -7,6 +7,8 @@ pytest.importorskip("tiled.client")
 xr = pytest.importorskip("xarray")
 
 from AFL.automation.APIServer.DriverWebAppsMixin import DriverWebAppsMixin
+from AFL.automation.APIServer.TiledDatasetCache import TiledDatasetCache
+from AFL.automation.APIServer.TiledEntryCache import TiledEntryCache
 
 
 class _DummyDriverWebApps(DriverWebAppsMixin):
@@ -98,6 +100,212 @@ def test_tiled_get_plot_variable_returns_combined_indexed_data():
     assert variable["data"] == [[1.0, 2.0, 3.0], [1.0, 2.0, 3.0]]
 
 
+def test_tiled_get_plot_variable_keeps_array_for_binary_clients():
+    import numpy as np
+    from flask import Flask
+    from AFL.automation.shared import array_transport
+
+    dataset = xr.Dataset({"I": (("q",), [1.0, 2.0, 3.0])}, coords={"q": [0.01, 0.02, 0.03]})
+    driver = _DummyDriverWebApps(dataset)
+
+    app = Flask(__name__)
+    with app.test_request_context(headers={"Accept": array_transport.BINARY_MIMETYPE}):
+        result = driver.tiled_get_plot_variable(entry_ids=["entry-1", "entry-2"], var_name="I")
+
+    assert isinstance(result["variable"]["data"], np.ndarray)
+    assert result["variable"]["data"].shape == (2, 3)
+
+
+def test_tiled_get_plot_variable_windows_and_downsamples():
+    import numpy as np
+
+    q = np.linspace(0.01, 1.0, 1000)
+    dataset = xr.Dataset({"I": (("q",), q ** -2)}, coords={"q": q})
+    driver = _DummyDriverWebApps(dataset)
+    entry_ids = ["entry-1", "entry-2", "entry-3"]
+
+    full = driver.tiled_get_plot_variable(entry_ids=entry_ids, var_name="I")
+    assert full["variable"]["shape"] == [3, 1000]
+    assert "coords" not in full["variable"]
+
+    result = driver.tiled_get_plot_variable(
+        entry_ids=entry_ids, var_name="I", ranges='{"q": [0.5, null]}', max_points='{"q": 50}'
+    )
+    assert result["status"] == "success"
+    variable = result["variable"]
+    assert variable["method"] == "mean"
+    assert variable["source_shape"] == [3, 1000]
+    assert variable["shape"][0] == 3
+    assert 25 < variable["shape"][1] <= 50
+    assert min(variable["coords"]["q"]) > 0.5
+    assert len(variable["coords"]["q"]) == variable["shape"][1]
+
+    result = driver.tiled_get_plot_variable(
+        entry_ids=entry_ids, var_name="q", slices='{"q": [0, 100]}', max_points=10, method="stride"
+    )
+    assert result["variable"]["data"] == q[0:100][[0, 11, 22, 33, 44, 55, 66, 77, 88, 99]].tolist()
+
+    result = driver.tiled_get_plot_variable(entry_ids=entry_ids, var_name="I", max_points=10, method="lttb")
+    assert result["status"] == "error"
+    result = driver.tiled_get_plot_variable(entry_ids=entry_ids, var_name="I", slices="[1, 2]")
+    assert result["status"] == "error"
+
+
+def test_tiled_concat_fetches_concurrently_in_order_and_reports_failures():
+    import threading
+    import time
+
+    class _SlowDriver(DriverWebAppsMixin):
+        def __init__(self):
+            self.active = 0
+            self.max_active = 0
+            self.lock = threading.Lock()
+
+        def _fetch_single_tiled_entry(self, entry_id):
+            with self.lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            # later entries finish first, so results arrive out of order
+            time.sleep(0.002 * (10 - int(entry_id.split("-")[1])))
+            with self.lock:
+                self.active -= 1
+            if entry_id.endswith("-3"):
+                raise KeyError(entry_id)
+            value = float(entry_id.split("-")[1])
+            return xr.Dataset({"I": (("q",), [value, value])}), {
+                "sample_name": entry_id,
+                "sample_uuid": "",
+                "entry_id": entry_id,
+                "sample_composition": None,
+            }
+
+    driver = _SlowDriver()
+    entry_ids = [f"entry-{i}" for i in range(8)]
+
+    with pytest.raises(ValueError, match="Failed to fetch entry 'entry-3'"):
+        driver.tiled_concat_datasets(entry_ids=entry_ids)
+    assert driver.max_active > 1
+
+    result = driver.tiled_concat_datasets(entry_ids=entry_ids, skip_failed=True)
+    expected = [e for e in entry_ids if e != "entry-3"]
+    assert list(result["entry_id"].values) == expected
+    assert result["I"].values[:, 0].tolist() == [float(e.split("-")[1]) for e in expected]
+    assert list(result.attrs["failed_entries"]) == ["entry-3"]
+
+    # partial results are served but not cached
+    manifest = driver.tiled_get_plot_manifest(entry_ids=entry_ids)
+    assert manifest["status"] == "success"
+    assert manifest["manifest"]["sample_count"] == 7
+    assert list(manifest["failed_entries"]) == ["entry-3"]
+    assert driver._get_tiled_dataset_cache().info()["combined"] == 0
+
+
+class _CompositionDriver(DriverWebAppsMixin):
+    """Entries entry-<n> with I = n; even entries also contain component B."""
+
+    def __init__(self):
+        self.fetched = []
+
+    def _fetch_single_tiled_entry(self, entry_id):
+        self.fetched.append(entry_id)
+        n = float(entry_id.split("-")[1])
+        components = ["A", "B"] if n % 2 == 0 else ["A"]
+        return xr.Dataset({"I": (("q",), [n, n, n])}, coords={"q": [0.01, 0.02, 0.03]}), {
+            "sample_name": f"sample-{entry_id}",
+            "sample_uuid": "",
+            "entry_id": entry_id,
+            "sample_composition": {"components": components, "values": [n] * len(components)},
+        }
+
+
+def test_combined_dataset_cache_shares_entries_and_appends():
+    driver = _CompositionDriver()
+    cache = driver._get_tiled_dataset_cache()
+
+    driver._get_or_create_combined_dataset(["entry-1", "entry-3"])
+    assert driver._get_or_create_combined_dataset(["entry-1", "entry-3"]) is not None
+    assert driver.fetched == ["entry-1", "entry-3"]
+
+    # a new selection only fetches its new entries and extends the cached combination
+    concatenated = []
+    concat = driver._concat_entry_datasets
+    driver._concat_entry_datasets = lambda datasets, *args: concatenated.append(len(datasets)) or concat(datasets, *args)
+    appended = driver._get_or_create_combined_dataset(["entry-1", "entry-3", "entry-4", "entry-5"])
+    del driver._concat_entry_datasets
+    assert concatenated == [2]
+    assert sorted(driver.fetched) == ["entry-1", "entry-3", "entry-4", "entry-5"]
+    expected = driver.tiled_concat_datasets(["entry-1", "entry-3", "entry-4", "entry-5"])
+    xr.testing.assert_identical(appended, expected)
+
+    driver.fetched = []
+    driver._get_or_create_combined_dataset(["entry-5", "entry-1"])
+    assert driver.fetched == []
+
+    info = driver.tiled_cache_info()["datasets"]
+    assert info["entries"] == 4
+    assert info["combined"] == 3
+    assert info["combined_hits"] == 1
+    assert info["entry_hits"] == 4
+    assert info["bytes"] == cache.nbytes > 0
+
+
+def test_tiled_dataset_cache_is_bounded_by_bytes():
+    dataset = xr.Dataset({"I": (("q",), [0.0] * 100)})  # 800 bytes
+    cache = TiledDatasetCache(max_bytes=2000)
+
+    cache.put_entry("a", dataset, {})
+    cache.put_entry("b", dataset, {})
+    assert cache.get_entry("a") is not None
+    cache.put_combined(["a", "b"], xr.concat([dataset, dataset], dim="index"))  # 1600 bytes
+    assert cache.info()["bytes"] <= 2000
+    assert cache.get_entry("b") is None
+    assert cache.get_entry("a") is None
+    assert cache.get_combined(["a", "b"]) is not None
+
+    cache.put_entry("huge", xr.Dataset({"I": (("q",), [0.0] * 1000)}), {})
+    assert cache.get_entry("huge") is None
+    assert cache.info()["evictions"] == 2
+    assert cache.longest_cached_prefix(["a", "b", "c"])[0] == ("a", "b")
+    assert cache.longest_cached_prefix(["a", "b"]) is None
+
+
+def test_tiled_dataset_cache_drops_written_entries():
+    driver = _CompositionDriver()
+    cache = driver._get_tiled_dataset_cache()
+    driver._get_or_create_combined_dataset(["entry-1", "entry-2"])
+    driver._get_or_create_combined_dataset(["entry-3", "entry-4"])
+    driver.fetched = []
+
+    TiledEntryCache.notify_write("project/entry-2")
+
+    assert cache.get_entry("entry-2") is None
+    assert cache.get_combined(["entry-1", "entry-2"]) is None
+    assert cache.get_entry("entry-1") is not None
+    assert cache.get_combined(["entry-3", "entry-4"]) is not None
+    driver._get_or_create_combined_dataset(["entry-1", "entry-2"])
+    assert driver.fetched == ["entry-2"]
+    assert cache.nbytes == sum(nbytes for _, nbytes, _ in cache._items.values())
+
+
+def test_tiled_dataset_cache_entries_expire(monkeypatch):
+    import AFL.automation.APIServer.TiledDatasetCache as cache_module
+
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    dataset = xr.Dataset({"I": (("q",), [0.0] * 10)})
+    cache = TiledDatasetCache(ttl=60.0)
+    cache.put_entry("a", dataset, {})
+    cache.put_combined(["a", "b"], dataset)
+
+    now[0] += 30.0
+    assert cache.get_entry("a") is not None
+    now[0] += 31.0
+    assert cache.get_entry("a") is None
+    assert cache.longest_cached_prefix(["a", "b", "c"]) is None
+    assert cache.get_combined(["a", "b"]) is None
+    assert cache.nbytes == 0
+
+
 def test_read_tiled_item_uses_optimize_wide_table_false():
     class _FakeItem:
         def __init__(self):
@@ -250,6 +458,88 @@ def test_get_tiled_run_document_item_resolves_nested_leaf_ids():
     assert nested_item is leaf_item
 
 
+class _CountingTiledContainer(_FakeTiledContainer):
+    walks = 0
+
+    def items(self):
+        type(self).walks += 1
+        return super().items()
+
+
+def _nested_run_documents(dataset, n_batches=3):
+    _CountingTiledContainer.walks = 0
+    return _CountingTiledContainer({
+        f"batch-{b}": _CountingTiledContainer({
+            f"entry-{b}-{i}": _FakeTiledItem(dataset) for i in range(3)
+        })
+        for b in range(n_batches)
+    })
+
+
+def test_get_tiled_run_document_item_caches_nested_resolution():
+    dataset = xr.Dataset({"I": (("q",), [1.0])}, coords={"q": [0.01]})
+    run_documents = _nested_run_documents(dataset)
+    driver = _DummyFullJsonDriver(_FakeTiledClient(run_documents))
+
+    path, item = driver._get_tiled_run_document_item("entry-1-2")
+    walks = _CountingTiledContainer.walks
+    assert path == "batch-1/entry-1-2"
+    assert walks > 0
+
+    for _ in range(5):
+        assert driver._get_tiled_run_document_item("run_documents/entry-1-2") == (path, item)
+    assert _CountingTiledContainer.walks == walks
+    assert driver._get_tiled_entry_cache().info()["hits"] == 5
+
+    # a rewrite of the entry invalidates it
+    TiledEntryCache.notify_write("batch-1/entry-1-2")
+    driver._get_tiled_run_document_item("entry-1-2")
+    assert _CountingTiledContainer.walks > walks
+
+
+def test_tiled_entry_cache_expires_and_evicts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("AFL.automation.APIServer.TiledEntryCache.time.monotonic", lambda: now[0])
+    cache = TiledEntryCache(max_items=2, ttl=10.0)
+
+    cache.put("a", "batch/a", "item-a")
+    cache.put("b", "batch/b", "item-b")
+    assert cache.get("a") == ("batch/a", "item-a")
+    cache.put("c", "batch/c", "item-c")  # evicts b, the least recently used
+    assert cache.get("b") is None
+    assert cache.get("a") == ("batch/a", "item-a")
+
+    now[0] += 11.0
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+    assert cache.info()["entries"] == 0
+
+
+def test_get_tiled_run_document_item_uses_background_index():
+    dataset = xr.Dataset({"I": (("q",), [1.0])}, coords={"q": [0.01]})
+    run_documents = _nested_run_documents(dataset)
+    driver = _DummyFullJsonDriver(_FakeTiledClient(run_documents))
+    driver.TILED_ENTRY_INDEX = True
+
+    assert driver._get_tiled_run_document_item("entry-0-0")[0] == "batch-0/entry-0-0"
+    cache = driver._get_tiled_entry_cache()
+    assert cache.wait_for_index(timeout=5)
+    assert cache.info()["indexed_paths"] == 12
+
+    walks = _CountingTiledContainer.walks
+    for b in range(3):
+        for i in range(3):
+            path, _ = driver._get_tiled_run_document_item(f"entry-{b}-{i}")
+            assert path == f"batch-{b}/entry-{b}-{i}"
+    assert _CountingTiledContainer.walks == walks
+
+    # entries written after the index was built are added to it
+    run_documents["batch-2"]["entry-new"] = _FakeTiledItem(dataset)
+    TiledEntryCache.notify_write("batch-2/entry-new")
+    assert driver._get_tiled_run_document_item("entry-new")[0] == "batch-2/entry-new"
+    assert _CountingTiledContainer.walks == walks
+
+
 def test_tiled_get_metadata_and_full_json_accept_nested_paths():
     dataset = xr.Dataset({"I": (("q",), [1.0, 2.0])}, coords={"q": [0.01, 0.02]})
     nested = _FakeTiledContainer({
@@ -38,6 +38,9 @@ class _FakeResults:
             elif qname == "In":
                 if candidate in value:
                     filtered.append((entry_id, item))
+            elif qname == "KeyPresent":
+                if (candidate is not None) == query.exists:
+                    filtered.append((entry_id, item))
         return _FakeResults(filtered)
 
     def sort(self, *sort_items):
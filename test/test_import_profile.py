@@ -0,0 +1,32 @@
+import json
+import subprocess
+import sys
+
+from AFL.automation.shared.import_profile import format_report, profile_imports
+
+SERVER_IMPORT = 'import AFL.automation.APIServer.APIServer\nimport AFL.automation.APIServer.DummyDriver'
+
+# optional stacks that are only needed once a feature is used
+DEFERRED_MODULES = [
+    'bokeh', 'matplotlib', 'PIL.Image', 'tiled.client', 'dask', 'xarray', 'pandas',
+    'zeroconf', 'caproto.server', 'pint', 'distutils',
+]
+
+# the server imported in ~5 s before plotting, tiled and zeroconf were deferred and takes
+# well under 1 s now; the budget leaves headroom for slow CI machines
+IMPORT_BUDGET_S = 2.5
+
+
+def test_server_import_defers_optional_stacks():
+    code = SERVER_IMPORT + f'\nimport json, sys\nprint(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))'
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert json.loads(proc.stdout.splitlines()[-1]) == []
+
+
+def test_server_import_budget():
+    rows = profile_imports(SERVER_IMPORT)
+    total_s = sum(row['cumulative_us'] for row in rows if row['depth'] == 0) / 1e6
+
+    modules = {row['module'] for row in rows}
+    assert {'AFL.automation.APIServer.APIServer', 'AFL.automation.APIServer.DummyDriver'} <= modules
+    assert total_s < IMPORT_BUDGET_S, format_report(rows, top=15)
@@ -0,0 +1,109 @@
+import json
+import time
+
+import pytest
+
+from AFL.automation.shared.PersistentConfig import PersistentConfig
+from AFL.automation.shared.JournaledConfig import JournaledConfig
+
+
+def _journal_lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_journal_appends_only_changes(tmp_path):
+    path = tmp_path / 'driver.config.jsonl'
+    config = JournaledConfig(path, defaults={'a': 1, 'b': {'nested': [1, 2]}}, write_debounce_seconds=0)
+    config['a'] = 2
+    del config['b']
+
+    lines = _journal_lines(path)
+    assert lines[0]['checkpoint'] == {'a': 1, 'b': {'nested': [1, 2]}}
+    assert lines[1]['set'] == {'a': 2}
+    assert lines[2]['del'] == ['b']
+
+    reloaded = JournaledConfig(path, write_debounce_seconds=0)
+    assert reloaded.config == {'a': 2}
+
+
+def test_nested_mutation_is_detected(tmp_path):
+    path = tmp_path / 'driver.config.jsonl'
+    config = JournaledConfig(path, defaults={'tips': {'left': ['A1', 'A2', 'A3']}}, write_debounce_seconds=0)
+    config['tips']['left'].pop(0)
+    config._update_history()
+
+    assert _journal_lines(path)[-1]['set'] == {'tips': {'left': ['A2', 'A3']}}
+    assert JournaledConfig(path).config['tips']['left'] == ['A2', 'A3']
+
+
+def test_revert_and_historical_values(tmp_path):
+    path = tmp_path / 'driver.config.jsonl'
+    config = JournaledConfig(path, defaults={'x': 0, 'y': 'const'}, write_debounce_seconds=0, checkpoint_interval=3)
+    for i in range(1, 10):
+        time.sleep(0.001)  # keep datetime keys unique
+        config['x'] = i
+
+    dates, values = config.get_historical_values('x')
+    assert values == list(range(10))
+    assert len(dates) == 10
+    _, values = config.get_historical_values('y')
+    assert values == ['const'] * 10
+
+    config.revert(nth=4)
+    assert config['x'] == 4
+    assert config['y'] == 'const'
+
+
+def test_matches_persistent_config_history(tmp_path):
+    legacy = PersistentConfig(tmp_path / 'legacy.json', defaults={'a': 0}, write_debounce_seconds=0)
+    journal = JournaledConfig(tmp_path / 'journal.jsonl', defaults={'a': 0}, write_debounce_seconds=0)
+    for i in range(5):
+        time.sleep(0.001)
+        legacy['a'] = i + 1
+        journal['a'] = i + 1
+        legacy[f'k{i}'] = i
+        journal[f'k{i}'] = i
+
+    assert journal.config == legacy.config
+    assert journal.get_historical_values('k2')[1] == legacy.get_historical_values('k2')[1]
+
+
+def test_migrates_legacy_history(tmp_path):
+    legacy_path = tmp_path / 'driver.config.json'
+    legacy = PersistentConfig(legacy_path, defaults={'a': 0}, write_debounce_seconds=0)
+    for i in range(3):
+        time.sleep(0.001)
+        legacy['a'] = i + 1
+
+    journal = JournaledConfig(tmp_path / 'driver.config.jsonl', legacy_path=legacy_path)
+    assert journal.config == {'a': 3}
+    assert journal.get_historical_values('a')[1] == [0, 1, 2, 3]
+    assert journal.history == legacy.history
+
+
+def test_compaction_bounds_history(tmp_path):
+    path = tmp_path / 'driver.config.jsonl'
+    config = JournaledConfig(path, defaults={'x': 0}, write_debounce_seconds=0, max_history=10, checkpoint_interval=4)
+    for i in range(1, 50):
+        time.sleep(0.0005)
+        config['x'] = i
+
+    lines = _journal_lines(path)
+    assert len(lines) <= 11
+    assert 'checkpoint' in lines[0]
+    assert JournaledConfig(path).config == {'x': 49}
+    assert config.get_historical_values('x')[1][-1] == 49
+
+
+def test_ignores_truncated_final_line(tmp_path):
+    path = tmp_path / 'driver.config.jsonl'
+    config = JournaledConfig(path, defaults={'x': 0}, write_debounce_seconds=0)
+    config['x'] = 1
+    with open(path, 'a') as f:
+        f.write('{"t": "26/01/01 00:00:00.0", "set": {"x"')
+
+    reloaded = JournaledConfig(path, write_debounce_seconds=0)
+    assert reloaded.config == {'x': 1}
+    reloaded['x'] = 2
+    assert JournaledConfig(path).config == {'x': 2}
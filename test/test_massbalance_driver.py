@@ -360,3 +360,74 @@ def test_get_sample_composition_dict_accepts_mixed_formats():
     assert composition['NaCl'] == pytest.approx(
         balanced_target.concentration['NaCl'].to('mg/ml').magnitude
     )
+
+
+def _add_salt_targets(mb, n_targets):
+    for i in range(n_targets):
+        mb.add_target({
+            'name': f'Target{i}',
+            'concentrations': {'NaCl': f'{10 + 5 * i} mg/ml'},
+            'mass_fractions': {'H2O': 1.0},
+            'total_volume': '1 ml',
+            'solutes': ['NaCl']
+        })
+
+
+@pytest.mark.usefixtures("mixdb")
+def test_balance_job_streams_partial_results():
+    mb = _build_balanced_massbalance_driver()
+    mb.reset_targets()
+    _add_salt_targets(mb, 3)
+
+    job = mb.start_balance_job()
+    assert job['state'] == 'running'
+
+    events = list(mb.stream_balance_job(job['job_id']))
+    assert [event['seq'] for event in events] == list(range(len(events)))
+    assert events[0]['stage'] == 'start'
+    assert events[-1]['stage'] == 'done'
+    ends = [event for event in events if event['stage'] == 'target_end']
+    assert [event['completed'] for event in ends] == [1, 2, 3]
+    assert all(event['result']['success'] for event in ends)
+
+    summary = mb.get_balance_job(job['job_id'], since=len(events) - 1)
+    assert summary['state'] == 'done'
+    assert summary['completed'] == summary['total'] == 3
+    assert [event['stage'] for event in summary['events']] == ['done']
+
+    results = mb.get_balance_job_results()['results']
+    assert [results[str(idx)] for idx in range(3)] == mb.balance_report()
+    assert mb.get_balance_progress()['message'] == 'done'
+
+
+@pytest.mark.usefixtures("mixdb")
+def test_balance_job_cancellation():
+    mb = _build_balanced_massbalance_driver()
+    mb.reset_targets()
+    _add_salt_targets(mb, 4)
+
+    solve = mb._solve_single_target
+
+    def solve_then_cancel(*args, **kwargs):
+        solved = solve(*args, **kwargs)
+        mb.cancel_balance_job()
+        return solved
+
+    mb._solve_single_target = solve_then_cancel
+    job = mb.start_balance_job()
+    events = mb.get_balance_job(job['job_id'], timeout=30)['events']
+    while events[-1]['stage'] != 'cancelled':
+        events += mb.get_balance_job(job['job_id'], since=len(events), timeout=30)['events']
+
+    summary = mb.get_balance_job(job['job_id'])
+    assert summary['state'] == 'cancelled'
+    assert summary['completed'] == 1
+    assert list(mb.get_balance_job_results()['results']) == ['0']
+    assert mb.balanced == []
+    assert mb.get_balance_progress()['message'] == 'cancelled'
+
+    # a new job runs normally after a cancelled one
+    del mb._solve_single_target
+    job = mb.start_balance_job()
+    assert list(mb.stream_balance_job(job['job_id']))[-1]['stage'] == 'done'
+    assert len(mb.balanced) == 4
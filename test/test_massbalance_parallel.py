@@ -0,0 +1,102 @@
+import os
+import time
+
+import numpy as np
+import pytest
+from scipy.optimize import Bounds
+
+from AFL.automation.mixcalc.MassBalance import MassBalance
+from AFL.automation.mixcalc.MassBalanceBase import _best_balance_candidate, _iter_parallel_balance
+from AFL.automation.mixcalc.Solution import Solution
+from AFL.automation.mixcalc.TargetSolution import TargetSolution
+
+N_WORKERS = 2
+
+
+def _sweep(n_targets):
+    with MassBalance() as mb:
+        Solution(name="Stock1", masses={"H2O": "20 g"}, location='1A1')
+        Solution(name="Stock2", masses={"Hexanes": "20 g"}, location='1A2')
+        Solution(
+            name="Stock3",
+            masses={"H2O": "20 g"},
+            concentrations={"NaCl": "200 mg/ml"},
+            solutes=["NaCl"],
+            location='1A3',
+        )
+        for ratio in np.linspace(0.0, 1.0, n_targets):
+            TargetSolution(
+                name=f"Target{ratio:.2f}",
+                mass_fractions={"H2O": ratio, "Hexanes": 1.0 - ratio},
+                concentrations={"NaCl": "25 mg/ml"},
+                total_mass="500 mg",
+                solutes=["NaCl"],
+            )
+    return mb
+
+
+@pytest.mark.usefixtures("mixdb")
+def test_parallel_balance_matches_serial():
+    mb = _sweep(7)
+    mb.balance()
+    serial = mb.balanced
+
+    events = []
+    mb.balance(
+        n_workers=N_WORKERS,
+        chunk_size=2,
+        progress_callback=lambda **kwargs: events.append(kwargs),
+    )
+    parallel = mb.balanced
+
+    assert [item['target'] for item in parallel] == mb.targets
+    for expected, result in zip(serial, parallel):
+        assert result['success'] == expected['success']
+        if expected['success']:
+            assert {stock.name: mass for stock, mass in result['transfers'].items()} == {
+                stock.name: mass for stock, mass in expected['transfers'].items()
+            }
+        assert result['diagnosis'].to_dict() == expected['diagnosis'].to_dict()
+
+    ends = [event for event in events if event['stage'] == 'target_end']
+    assert sorted(event['target_idx'] for event in ends) == list(range(7))
+    assert [event['completed'] for event in ends] == list(range(1, 8))
+    assert events[-1]['stage'] == 'done'
+
+
+def test_parallel_balance_benchmark_1k_targets():
+    """Benchmark: candidate search for a synthetic 1k-target sweep over 4 stocks"""
+    rng = np.random.default_rng(0)
+    n_components, n_stocks, n_targets = 4, 4, 1000
+    mass_fraction_matrix = rng.uniform(0.0, 1.0, (n_components, n_stocks))
+    mass_fraction_matrix[rng.uniform(size=mass_fraction_matrix.shape) < 0.5] = 0.0
+    mass_fraction_matrix /= mass_fraction_matrix.sum(axis=0, keepdims=True)
+    bounds = Bounds(lb=np.full(n_stocks, 0.02), ub=np.full(n_stocks, np.inf), keep_feasible=False)
+    target_mass_matrix = mass_fraction_matrix @ rng.dirichlet(np.ones(n_stocks) * 0.3, n_targets).T * 0.5
+    target_mass_matrix = target_mass_matrix.T
+
+    # start the worker processes outside of the timed region
+    list(_iter_parallel_balance(mass_fraction_matrix, bounds, target_mass_matrix[:N_WORKERS], 1e-3, N_WORKERS, 1))
+
+    start = time.perf_counter()
+    serial = [_best_balance_candidate(mass_fraction_matrix, row, bounds, 1e-3) for row in target_mass_matrix]
+    serial_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parallel = {
+        target_idx: (candidate, any_success)
+        for target_idx, candidate, any_success in _iter_parallel_balance(
+            mass_fraction_matrix, bounds, target_mass_matrix, 1e-3, N_WORKERS
+        )
+    }
+    parallel_time = time.perf_counter() - start
+
+    print(f"\n1k-target sweep: serial {serial_time:.2f}s, {N_WORKERS} workers {parallel_time:.2f}s")
+
+    assert sorted(parallel) == list(range(n_targets))
+    for target_idx, (candidate, any_success) in enumerate(serial):
+        assert parallel[target_idx][1] == any_success
+        np.testing.assert_array_equal(parallel[target_idx][0]['transfers'], candidate['transfers'])
+
+    if (os.cpu_count() or 1) >= N_WORKERS * 2:
+        assert parallel_time < serial_time
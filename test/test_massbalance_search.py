@@ -0,0 +1,66 @@
+import sys
+
+import numpy as np
+import pytest
+from scipy.optimize import Bounds
+
+from AFL.automation.mixcalc.MassBalanceBase import _best_balance_candidate, _iter_balance_candidates
+
+MassBalanceBase = sys.modules['AFL.automation.mixcalc.MassBalanceBase']
+
+
+def _synthetic_system(n_stocks, n_targets, seed=0):
+    rng = np.random.default_rng(seed)
+    n_components = 6
+    mass_fraction_matrix = rng.uniform(0.0, 1.0, (n_components, n_stocks))
+    mass_fraction_matrix[rng.uniform(size=mass_fraction_matrix.shape) < 0.5] = 0.0
+    mass_fraction_matrix[rng.integers(0, n_components, n_stocks), np.arange(n_stocks)] += 0.5
+    mass_fraction_matrix /= mass_fraction_matrix.sum(axis=0, keepdims=True)
+    bounds = Bounds(lb=np.full(n_stocks, 0.02), ub=np.full(n_stocks, np.inf), keep_feasible=False)
+    target_mass_matrix = (mass_fraction_matrix @ rng.dirichlet(np.ones(n_stocks) * 0.3, n_targets).T * 0.5).T
+    return mass_fraction_matrix, bounds, target_mass_matrix
+
+
+@pytest.fixture
+def count_solves(monkeypatch):
+    calls = []
+    lsq_linear = MassBalanceBase.lsq_linear
+
+    def _counting_lsq_linear(*args, **kwargs):
+        calls.append(1)
+        return lsq_linear(*args, **kwargs)
+
+    monkeypatch.setattr(MassBalanceBase, 'lsq_linear', _counting_lsq_linear)
+    return calls
+
+
+def test_small_search_matches_exhaustive_enumeration():
+    mass_fraction_matrix, bounds, target_mass_matrix = _synthetic_system(5, 20)
+    for target_masses in target_mass_matrix:
+        best, any_success = _best_balance_candidate(mass_fraction_matrix, target_masses, bounds, 1e-3)
+
+        scores = []
+        for transfers in _iter_balance_candidates(mass_fraction_matrix, target_masses, bounds):
+            candidate = MassBalanceBase._score_candidate(mass_fraction_matrix, target_masses, transfers, 1e-3)
+            scores.append((float(np.sum(np.abs(candidate['difference']))), candidate))
+        assert any_success == any(candidate['success'] for _, candidate in scores)
+        assert np.sum(np.abs(best['difference'])) == pytest.approx(min(score for score, _ in scores))
+
+
+@pytest.mark.parametrize('max_solves', [16, 128])
+def test_search_never_exceeds_solve_budget(count_solves, max_solves):
+    """Benchmark: worst-case solves for 12 stocks stay within the budget instead of 2^12"""
+    mass_fraction_matrix, bounds, target_mass_matrix = _synthetic_system(12, 20, seed=1)
+    worst_case = 0
+    n_success = 0
+    for target_masses in target_mass_matrix:
+        count_solves.clear()
+        _, any_success = _best_balance_candidate(
+            mass_fraction_matrix, target_masses, bounds, 1e-3, max_solves=max_solves
+        )
+        worst_case = max(worst_case, len(count_solves))
+        n_success += any_success
+
+    print(f'\n12 stocks, budget {max_solves}: worst case {worst_case} solves, {n_success}/20 balanced')
+    assert worst_case <= max_solves
+    assert n_success > 0
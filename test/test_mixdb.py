@@ -5,8 +5,9 @@ import pytest
 from tiled.client.container import Container
 
 from AFL.automation.APIServer.data.TiledClients.CatalogOfAFLEvents import CatalogOfAFLEvents
-from AFL.automation.mixcalc.MixDB import MixDB, Tiled_DBEngine
+from AFL.automation.mixcalc.MixDB import MixDB, Pandas_DBEngine, Tiled_DBEngine
 from AFL.automation.shared.exceptions import NotFoundError
+from AFL.automation.shared.warnings import MixWarning
 
 
 def test_mixdb_initialization(mixdb):
@@ -181,3 +182,47 @@ def test_tiled_get_components_container_recovers_from_conflict():
     assert container is engine.client.container
     assert engine.client.lookup_calls == 2
     assert engine.client.create_calls == 1
+
+
+def test_pandas_engine_lookups_follow_changes(sample_dataframe):
+    engine = Pandas_DBEngine(sample_dataframe)
+    assert engine.get_component(name='H2O')['density'] == '1.0 g/ml'
+    uid = engine.add_component({'name': 'D2O', 'density': '1.11 g/ml'})
+    assert engine.get_component(name='D2O')['uid'] == uid
+    engine.update_component({'uid': uid, 'name': 'D2O', 'density': '1.1 g/ml'})
+    assert engine.get_component(uid=uid)['density'] == '1.1 g/ml'
+    engine.remove_component(uid=uid)
+    with pytest.raises(NotFoundError):
+        engine.get_component(name='D2O')
+
+
+def test_new_component_reuses_prototypes_until_db_changes(mixdb):
+    first = mixdb.new_component('Hexanes')
+    second = mixdb.new_component('Hexanes')
+    assert first is not second
+    second.mass = '10 mg'
+    assert first.mass is None
+    assert mixdb.cache_info() == {'hits': 1, 'misses': 1, 'size': 1, 'maxsize': MixDB.component_cache_size}
+
+    solute = mixdb.new_component('Hexanes', solute=True)
+    assert solute.solute and not first.solute
+    assert mixdb.cache_info()['misses'] == 2
+
+    mixdb.add_component({'name': 'Hexanes', 'density': '0.7 g/ml'})
+    assert mixdb.cache_info()['size'] == 0
+    assert mixdb.new_component('Hexanes').density_g_ml == pytest.approx(0.7)
+
+
+def test_new_component_warns_on_every_assumed_solute(mixdb):
+    for _ in range(2):
+        with pytest.warns(MixWarning):
+            assert mixdb.new_component('NaCl').solute
+
+
+def test_new_component_lru_eviction(mixdb, monkeypatch):
+    monkeypatch.setattr(MixDB, 'component_cache_size', 1)
+    mixdb.new_component('H2O')
+    mixdb.new_component('Hexanes')
+    mixdb.new_component('H2O')
+    assert mixdb.cache_info()['misses'] == 3
+    assert mixdb.cache_info()['size'] == 1
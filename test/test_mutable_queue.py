@@ -36,6 +36,66 @@ class MutableQueueTestCase(unittest.TestCase):
         q.move(2, 0)
         self.assertEqual(list(q.queue), ['a', 'b', 'c'])
 
+    def _tasks(self, q, n):
+        tasks = [{'uuid': f'QD-{i}'} for i in range(n)]
+        q.insert_many(tasks)
+        return tasks
+
+    def test_find_and_index(self):
+        q = MutableQueue()
+        tasks = self._tasks(q, 3)
+        self.assertIs(q.find('QD-1'), tasks[1])
+        self.assertIsNone(q.find('QD-9'))
+        self.assertEqual(q.index('QD-2'), 2)
+        q.get()
+        self.assertEqual(q.index('QD-2'), 1)
+        self.assertIsNone(q.find('QD-0'))
+        with self.assertRaises(KeyError):
+            q.index('QD-0')
+
+    def test_remove_many(self):
+        q = MutableQueue()
+        self._tasks(q, 5)
+        removed = q.remove_many(['QD-3', 'QD-1'])
+        self.assertEqual([t['uuid'] for t in removed], ['QD-1', 'QD-3'])
+        self.assertEqual([t['uuid'] for t in q.queue], ['QD-0', 'QD-2', 'QD-4'])
+        with self.assertRaises(KeyError):
+            q.remove_many(['QD-0', 'QD-1'])
+        self.assertEqual(q.qsize(), 3)
+
+    def test_reorder(self):
+        q = MutableQueue()
+        self._tasks(q, 3)
+        q.reorder(['QD-2', 'QD-0', 'QD-1', 'QD-running'])
+        self.assertEqual([t['uuid'] for t in q.queue], ['QD-2', 'QD-0', 'QD-1'])
+        with self.assertRaises(ValueError):
+            q.reorder(['QD-2', 'QD-0'])
+        self.assertEqual(q.index('QD-1'), 2)
+
+    def test_iteration_id_increases(self):
+        q = MutableQueue()
+        first = q.iterationid()
+        q.put('a', 0)
+        second = q.iterationid()
+        q.get()
+        self.assertIsInstance(first, int)
+        self.assertLess(first, second)
+        self.assertLess(second, q.iterationid())
+
+    def test_iteration_ids_unique_across_queues(self):
+        a = MutableQueue()
+        b = MutableQueue()
+        seen = [a.iterationid(), b.iterationid()]
+        for i in range(50):
+            (a if i % 3 else b).put(i, 0)
+            seen.extend([a.iterationid(), b.iterationid()])
+        ids = [a.iterationid(), b.iterationid()]
+        self.assertNotEqual(ids[0], ids[1])
+        self.assertEqual(len(set(seen)), 52)
+        # seeded from the boot time, not from 1, and exact as a JavaScript number
+        self.assertGreater(min(seen), 10**15)
+        self.assertLess(max(seen), 2**53)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -8,6 +8,7 @@ Tests cover:
 - Integration with APIServer
 """
 
+import datetime
 import os
 import pytest
 import json
@@ -416,6 +417,54 @@ class _FakeTiledEntry:
         return self._dataset
 
 
+class _CountingTiledEntry:
+    """Entry that counts how often its metadata is read."""
+
+    reads = 0
+
+    def __init__(self, metadata):
+        self._metadata = metadata
+
+    @property
+    def metadata(self):
+        _CountingTiledEntry.reads += 1
+        return self._metadata
+
+
+class _SearchableFakeTiledContainer:
+    """Stand-in for a Tiled container that answers Eq queries from a server-side index."""
+
+    def __init__(self, entries, _index=None):
+        self._entries = entries
+        self._index = _index
+        self.items_calls = 0
+        if self._index is None:
+            self._index = {}
+            for key, entry in entries.items():
+                attrs = entry.metadata.get('attrs', {})
+                for field in ('sample_uuid', 'task_name'):
+                    if field in attrs:
+                        self._index.setdefault((f'attrs.{field}', attrs[field]), []).append(key)
+
+    def search(self, query):
+        keys = self._index.get((query.key, query.value), [])
+        return _SearchableFakeTiledContainer(
+            {key: self._entries[key] for key in keys if key in self._entries},
+            _index=self._index,
+        )
+
+    def sort(self, *sorting):
+        assert sorting == (('', -1),)
+        return _SearchableFakeTiledContainer(dict(reversed(list(self._entries.items()))), _index=self._index)
+
+    def items(self):
+        self.items_calls += 1
+        return iter(self._entries.items())
+
+    def __len__(self):
+        return len(self._entries)
+
+
 class TestOrchestratorDriverPredictFromTiled:
     def _driver_with_minimal_config(self):
         driver = OrchestratorDriver(overrides={
@@ -720,5 +769,112 @@ class TestOrchestratorDriverPredictFromTiled:
         assert entry_id == 'batch-2/entry-new'
 
 
+class TestRunDocumentLookupScaling:
+    N_ENTRIES = 10_000
+
+    def _driver(self, run_documents):
+        driver = OrchestratorDriver(overrides={'client': {}, 'instrument': []})
+        driver.app = Mock()
+        driver.app.logger = Mock()
+        driver.data = Mock()
+        driver.data.tiled_client = _FakeTiledClient(run_documents)
+        return driver
+
+    @staticmethod
+    def _metadata(i, task_name='expose'):
+        return {
+            'attrs': {
+                'sample_uuid': f'SAM-{i % 2500:05d}',
+                'task_name': task_name,
+                'meta': {'ended': (datetime.datetime(2026, 3, 20) + datetime.timedelta(seconds=i)).isoformat()},
+            }
+        }
+
+    def test_lookup_uses_server_side_queries(self):
+        entries = {f'entry-{i:05d}': _CountingTiledEntry(self._metadata(i)) for i in range(self.N_ENTRIES)}
+        run_documents = _SearchableFakeTiledContainer(entries)
+        driver = self._driver(run_documents)
+
+        _CountingTiledEntry.reads = 0
+        entry_id = driver._get_last_tiled_entry_for_measurement(sample_uuid='SAM-00042', task_name='expose')
+
+        assert entry_id == 'entry-07542'
+        assert run_documents.items_calls == 0
+        assert _CountingTiledEntry.reads <= 4 * 4
+
+    def test_local_index_is_updated_incrementally(self):
+        entries = {f'entry-{i:05d}': _CountingTiledEntry(self._metadata(i)) for i in range(self.N_ENTRIES)}
+        driver = self._driver(_FakeTiledContainer(entries))
+
+        assert driver._get_last_tiled_entry_for_measurement(
+            sample_uuid='SAM-00042', task_name='expose'
+        ) == 'entry-07542'
+
+        entries['entry-new'] = _CountingTiledEntry({
+            'attrs': {'sample_uuid': 'SAM-00042', 'task_name': 'predict', 'meta': {'ended': '2026-03-21T00:00:00'}}
+        })
+        _CountingTiledEntry.reads = 0
+        entry_id, _ = driver._get_latest_predict_tiled_entry(sample_uuid='SAM-00042')
+
+        assert entry_id == 'entry-new'
+        # index the new entry, filter the five candidates by task_name, read the match's timestamp
+        assert _CountingTiledEntry.reads == 1 + 5 + 1
+
+    def test_lookup_against_tiled_catalog(self, tmp_path):
+        pytest.importorskip('tiled')
+        import numpy as np
+        from tiled.catalog import in_memory
+        from tiled.client import Context, from_context
+        from tiled.server.app import build_app
+
+        with Context.from_app(build_app(in_memory(writable_storage=str(tmp_path)))) as context:
+            client = from_context(context)
+            run_documents = client.create_container('run_documents')
+            for i in range(6):
+                metadata = self._metadata(i, task_name='predict' if i % 2 else 'expose')
+                run_documents.write_array(np.arange(3), key=f'entry-{i}', metadata=metadata)
+            run_documents.write_array(
+                np.arange(3),
+                key='entry-flat',
+                metadata={'sample_uuid': 'SAM-00001', 'task_name': 'predict', 'meta': {'ended': '2026-03-20T00:00:00'}},
+            )
+
+            driver = self._driver(None)
+            driver.data.tiled_client = client
+
+            assert driver._get_last_tiled_entry_for_measurement(
+                sample_uuid='SAM-00004', task_name='expose'
+            ) == 'entry-4'
+            entries = driver._find_run_document_entries(sample_uuid='SAM-00001', task_name='predict')
+            assert sorted(entry_id for entry_id, _ in entries) == ['entry-1', 'entry-flat']
+            assert driver._run_document_index['n_indexed'] == 0
+
+    def test_lookup_against_tiled_catalog_falls_back_to_index(self, tmp_path):
+        pytest.importorskip('tiled')
+        import numpy as np
+        from tiled.catalog import in_memory
+        from tiled.client import Context, from_context
+        from tiled.server.app import build_app
+
+        with Context.from_app(build_app(in_memory(writable_storage=str(tmp_path)))) as context:
+            client = from_context(context)
+            run_documents = client.create_container('run_documents')
+            run_documents.write_array(np.arange(3), key='entry-0', metadata=self._metadata(0, task_name='predict'))
+            batch = run_documents.create_container('batch-1')
+            batch.write_array(
+                np.arange(3),
+                key='entry-nested',
+                metadata={'metadata': {'attrs': {'sample_uuid': 'SAM-00007', 'task_name': 'predict'}}},
+            )
+
+            driver = self._driver(None)
+            driver.data.tiled_client = client
+
+            entries = driver._iter_predict_entries_for_sample('SAM-00007')
+            assert [entry_id for entry_id, _ in entries] == ['batch-1/entry-nested']
+            with pytest.raises(ValueError, match='No predict entries found'):
+                driver._iter_predict_entries_for_sample('SAM-99999')
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -0,0 +1,100 @@
+"""
+Tests for OrchestratorGridDriver grid-sample lookup
+"""
+
+import numpy as np
+import pytest
+import xarray as xr
+from scipy.spatial.distance import cdist
+
+from AFL.automation.orchestrator.GridIndex import GridIndex
+from AFL.automation.orchestrator.OrchestratorGridDriver import OrchestratorGridDriver
+
+
+@pytest.fixture(autouse=True)
+def sandbox_home(tmp_path, monkeypatch):
+    """Isolate PersistentConfig writes to a temporary home directory."""
+    home = tmp_path / "home"
+    (home / ".afl").mkdir(parents=True, exist_ok=True)
+    monkeypatch.setenv("HOME", str(home))
+
+
+def _brute_force(coordinates, alive, points, k):
+    live = np.flatnonzero(alive)
+    order = np.argsort(cdist(np.atleast_2d(points), coordinates[live]), axis=1, kind='stable')[:, :k]
+    return live[order]
+
+
+class TestGridIndex:
+
+    def test_nearest_matches_brute_force_with_removals(self):
+        rng = np.random.default_rng(0)
+        coordinates = rng.uniform(size=(500, 3))
+        index = GridIndex(coordinates, ['a', 'b', 'c'])
+        alive = np.ones(len(coordinates), dtype=bool)
+
+        # repeatedly take the sample closest to the same point, crossing the rebuild threshold
+        point = np.array([0.5, 0.5, 0.5])
+        for _ in range(300):
+            _, indices = index.nearest(point)
+            assert indices[0, 0] == _brute_force(coordinates, alive, point, 1)[0, 0]
+            index.remove(indices[0, 0])
+            alive[indices[0, 0]] = False
+        assert len(index) == 200
+
+        points = rng.uniform(size=(20, 3))
+        distances, indices = index.nearest(points, k=5)
+        np.testing.assert_array_equal(indices, _brute_force(coordinates, alive, points, 5))
+        np.testing.assert_allclose(distances, np.sort(cdist(points, coordinates[alive]), axis=1)[:, :5])
+
+    def test_exhausted_grid_pads_results(self):
+        index = GridIndex([[0.0], [1.0]], ['a'])
+        index.remove([0, 0])
+        distances, indices = index.nearest([0.0], k=3)
+        assert indices.tolist() == [[1, -1, -1]]
+        assert distances[0, 1:].tolist() == [np.inf, np.inf]
+        index.remove(1)
+        assert len(index) == 0
+        assert index.nearest([0.0])[1].tolist() == [[-1]]
+
+    def test_scaling_and_partial_components(self):
+        coordinates = np.array([[0.0, 0.0], [0.0, 900.0], [0.5, 1000.0]])
+        point = [0.45, 300.0]
+        assert GridIndex(coordinates, ['x', 'y']).nearest(point)[1][0, 0] == 0
+        assert GridIndex(coordinates, ['x', 'y'], scale='range').nearest(point)[1][0, 0] == 2
+        assert GridIndex(coordinates, ['x', 'y'], scale={'y': 1e6}).nearest(point)[1][0, 0] == 2
+
+        index = GridIndex(coordinates, ['x', 'y'])
+        index.remove(2)
+        assert index.nearest([[0.45]], components=['x'])[1].tolist() == [[0]]
+        assert index.nearest([[850.0]], k=2, components=['y'])[1].tolist() == [[1, 0]]
+
+
+def test_grid_driver_uses_index_without_copying_grid(tmp_path):
+    grid = xr.Dataset(
+        {
+            'water': ('sample', [0.1, 0.5, 0.9, 0.5]),
+            'salt': ('sample', [0.9, 0.5, 0.1, 0.4]),
+            'row': ('sample', ['A', 'B', 'C', 'D']),
+        }
+    )
+    grid_file = tmp_path / 'grid.nc'
+    grid.to_netcdf(grid_file)
+
+    driver = OrchestratorGridDriver(overrides={'components': ['water', 'salt'], 'grid_file': str(grid_file)})
+    driver.reset_grid()
+
+    matches = driver.nearest_grid_samples([{'water': 0.5, 'salt': 0.47}, {'water': 1.0, 'salt': 0.0}], k=2)
+    assert [[m['row'] for m in row] for row in matches] == [['B', 'D'], ['C', 'D']]
+    assert matches[0][0]['grid_index'] == 1
+    assert matches[0][0]['distance'] == pytest.approx(0.03)
+
+    grid_data = driver.grid_data
+    driver.grid_index.remove(1)
+    assert driver.nearest_grid_samples('{"water": 0.5, "salt": 0.47}')[0][0]['row'] == 'D'
+    # only water given: matched on water alone
+    assert [m['row'] for m in driver.nearest_grid_samples({'water': 0.15}, k=3)[0]] == ['A', 'D', 'C']
+    assert driver.grid_data is grid_data
+
+    driver.reset_grid()
+    assert len(driver.grid_index) == 4
@@ -175,3 +175,36 @@ def test_prepare_driver_default_composition_format_is_masses():
     driver.config.write = False
 
     assert driver.config['composition_format'] == 'masses'
+
+
+def test_is_feasible_batch_parses_stocks_once_and_matches_single_checks(monkeypatch):
+    driver = DummyPrepare()
+    _seed_stocks(driver)
+    targets = [
+        _binary_target(),
+        {'name': 'TooMuchNaCl', 'masses': {'H2O': '10 mg', 'NaCl': '400 mg'}},
+        {'name': 'UnknownComponent', 'masses': {'NotInTheDatabase': '10 mg'}},
+        _binary_target() | {'name': 'BinaryBlend2'},
+    ]
+    expected = [driver.is_feasible(target)[0] for target in targets]
+
+    parsed = []
+    process_stocks = driver.process_stocks
+    monkeypatch.setattr(driver, 'process_stocks', lambda: parsed.append(1) or process_stocks())
+
+    with pytest.warns(UserWarning):
+        batch = driver.is_feasible_batch(targets)
+    assert parsed == []
+    assert batch['feasible'] == [result is not None for result in expected]
+    assert batch['feasible'] == [True, False, False, True]
+    assert batch['n_feasible'] == 2
+    assert batch['results'] == expected
+
+    mask_only = driver.is_feasible_batch(targets, return_targets=False)
+    assert mask_only == {'feasible': [True, False, False, True], 'n_feasible': 2}
+
+    driver.add_stock({'name': 'Stock4', 'masses': {'Hexanes': '20 g'}, 'location': '1A4'})
+    parsed.clear()
+    driver.is_feasible_batch(targets[:1])
+    assert parsed == []
+    assert [stock.name for stock in driver._feasibility_stocks()] == ['Stock1', 'Stock2', 'Stock3', 'Stock4']
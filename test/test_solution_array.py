@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from AFL.automation.mixcalc.Solution import Solution
+from AFL.automation.mixcalc.SolutionArray import SolutionArray
+from AFL.automation.shared.units import units
+
+
+def _stocks():
+    water = Solution(name="Water", masses={"H2O": "20 g"}, location='1A1')
+    hexanes = Solution(name="Hexanes", masses={"Hexanes": "10 g"}, location='1A2')
+    brine = Solution(
+        name="Brine",
+        masses={"H2O": "20 g"},
+        concentrations={"NaCl": "200 mg/ml"},
+        solutes=["NaCl"],
+        location='1A3',
+    )
+    return [water, hexanes, brine]
+
+
+@pytest.mark.usefixtures("mixdb")
+def test_from_solutions_matches_solution_properties():
+    stocks = _stocks()
+    solution_array = SolutionArray.from_solutions(stocks)
+
+    assert solution_array.component_names == ["H2O", "Hexanes", "NaCl"]
+    assert list(solution_array.solvent_mask) == [True, True, False]
+    for i, stock in enumerate(stocks):
+        np.testing.assert_allclose(solution_array.mass[i], stock.mass.to('g').magnitude)
+        np.testing.assert_allclose(solution_array.volume[i], stock.volume.to('ml').magnitude)
+        for name, fraction in stock.mass_fraction.items():
+            j = solution_array.index(name)
+            np.testing.assert_allclose(solution_array.mass_fraction[i, j], fraction.magnitude)
+            assert np.isclose(solution_array.quantities('concentration', i)[name], stock.concentration[name])
+        for name, fraction in stock.volume_fraction.items():
+            np.testing.assert_allclose(solution_array.volume_fraction[i, solution_array.index(name)], fraction.magnitude)
+        for name, molarity in stock.molarity.items():
+            assert np.isclose(solution_array.quantities('molarity', i)[name], molarity)
+
+
+@pytest.mark.usefixtures("mixdb")
+def test_mix_matches_measured_solution_sum():
+    stocks = _stocks()
+    transfers = {stocks[0]: "150 mg", stocks[1]: "250 mg", stocks[2]: "100 mg"}
+
+    expected = Solution(name="")
+    for stock, mass in transfers.items():
+        expected = expected + stock.measure_out(mass)
+
+    stock_array = SolutionArray.from_solutions(stocks)
+    transfers_g = np.array([0.15, 0.25, 0.1])
+    mixed = stock_array.mix(transfers_g, names=["mixed"]).to_solution()
+
+    assert mixed.name == "mixed"
+    assert mixed == expected
+    np.testing.assert_allclose(
+        stock_array.transfer_volumes(transfers_g),
+        [stock.measure_out(mass).volume.to('ml').magnitude for stock, mass in transfers.items()],
+    )
+
+
+@pytest.mark.usefixtures("mixdb")
+def test_batched_rescaling():
+    stocks = _stocks()
+    solution_array = SolutionArray.from_solutions(stocks)
+
+    rescaled = solution_array.with_volume([1.0, 2.0, 3.0])
+    np.testing.assert_allclose(rescaled.volume, [1.0, 2.0, 3.0])
+    np.testing.assert_allclose(rescaled.mass_fraction, solution_array.mass_fraction)
+    for stock, solution in zip(stocks, rescaled.to_solutions()):
+        assert stock.measure_out(solution.volume) == solution
+
+    np.testing.assert_allclose(solution_array.with_mass(0.5).mass, [0.5, 0.5, 0.5])
+
+
+@pytest.mark.usefixtures("mixdb")
+def test_density_mismatch_raises():
+    water = Solution(name="Water", masses={"H2O": "20 g"})
+    heavy = Solution(name="Heavy", masses={"H2O": "20 g"})
+    heavy["H2O"].density = 1.1 * units("g/ml")
+    with pytest.raises(ValueError):
+        SolutionArray.from_solutions([water, heavy])
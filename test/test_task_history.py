@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from AFL.automation.APIServer.TaskHistory import TaskHistory
+
+
+def _task(i, return_val=None):
+    return {'uuid': f'QD-{i}', 'task': {'task_name': 'cmd'}, 'meta': {'return_val': return_val}}
+
+
+def test_iterations_and_since():
+    history = TaskHistory(max_entries=10, first_iteration=1)
+    for i in range(5):
+        history.append(_task(i))
+
+    assert len(history) == 5
+    assert [t['iteration'] for t in history] == [1, 2, 3, 4, 5]
+    assert [t['uuid'] for t in history.since(3)] == ['QD-3', 'QD-4']
+    assert [t['uuid'] for t in history.since(0, limit=2)] == ['QD-0', 'QD-1']
+    assert history[-1]['uuid'] == 'QD-4'
+
+
+def test_ring_evicts_oldest():
+    history = TaskHistory(max_entries=3, first_iteration=1)
+    for i in range(5):
+        history.append(_task(i))
+
+    assert len(history) == 3
+    assert history.first_iteration == 3
+    assert history.last_iteration == 5
+    assert history.find('QD-0') is None
+    assert history.find('QD-4')['iteration'] == 5
+    assert [t['uuid'] for t in history.since(0)] == ['QD-2', 'QD-3', 'QD-4']
+
+
+def test_spill_keeps_evicted_entries(tmp_path):
+    history = TaskHistory(max_entries=2, spill_path=tmp_path / 'history.jsonl', first_iteration=1)
+    for i in range(6):
+        history.append(_task(i, return_val=[i]))
+
+    assert len(history) == 6
+    assert history.find('QD-1')['meta']['return_val'] == [1]
+    assert [t['uuid'] for t in history.since(1, limit=3)] == ['QD-1', 'QD-2', 'QD-3']
+    assert [t['iteration'] for t in history] == [1, 2, 3, 4, 5, 6]
+
+
+def test_large_return_values_are_summarized_in_listings():
+    history = TaskHistory(max_listed_return_val_bytes=100)
+    big = list(range(1000))
+    history.append(_task(0, return_val=big))
+    history.append(_task(1, return_val='a string result'))
+
+    listed = history.tail()
+    assert listed[0]['meta']['return_val_truncated'] is True
+    assert isinstance(listed[0]['meta']['return_val'], str)
+    assert listed[1]['meta']['return_val'] == 'a string result'
+    assert history.find('QD-0')['meta']['return_val'] == big
+
+
+def test_clear_keeps_counting():
+    history = TaskHistory(first_iteration=1)
+    history.append(_task(0))
+    history.append(_task(1))
+    history.clear()
+
+    assert len(history) == 0
+    assert history.since(0) == []
+    assert history.append(_task(2)) == 3
+    assert history.first_iteration == 3
+    with pytest.raises(IndexError):
+        history[1]
+
+
+def test_iterations_continue_above_previous_run():
+    previous = TaskHistory()
+    for i in range(3):
+        previous.append(_task(i))
+    time.sleep(0.001)
+    restarted = TaskHistory()
+
+    assert restarted.first_iteration > previous.last_iteration
+    assert restarted.append(_task(3)) > previous.last_iteration
+    assert previous.last_iteration < 2**53
@@ -1,5 +1,6 @@
 import io
 import json
+import time
 from types import SimpleNamespace
 
 import pytest
@@ -229,3 +230,95 @@ def test_tiled_upload_data_rejects_unsupported_extension(server_client):
     payload = response.get_json()
     assert payload["status"] == "error"
     assert "infer upload format" in payload["message"] or "Unsupported file format" in payload["message"]
+
+
+def test_tiled_concat_prefetch_benchmark(seeded_tiled_client, monkeypatch):
+    """Benchmark: sequential vs concurrent entry fetches with injected round-trip latency"""
+    latency = 0.05
+    driver = DummyDriver(name="TestDriver")
+    driver._tiled_client = seeded_tiled_client
+    driver.config.write = False
+
+    run_documents = seeded_tiled_client["run_documents"]
+    for i in range(8):
+        write_xarray_dataset(run_documents, xr.Dataset({"I": (("q",), [float(i)] * 3)}), key=f"bench-{i}")
+    entry_ids = [f"bench-{i}" for i in range(8)]
+
+    get_item = driver._get_tiled_run_document_item
+    read_item = driver._read_tiled_item
+
+    def slow_get_item(entry_id):
+        time.sleep(latency)
+        return get_item(entry_id)
+
+    def slow_read_item(item):
+        time.sleep(latency)
+        return read_item(item)
+
+    monkeypatch.setattr(driver, "_get_tiled_run_document_item", slow_get_item)
+    monkeypatch.setattr(driver, "_read_tiled_item", slow_read_item)
+
+    timings = {}
+    results = {}
+    for workers in (1, 8):
+        monkeypatch.setattr(driver, "TILED_FETCH_WORKERS", workers)
+        start = time.perf_counter()
+        results[workers] = driver.tiled_concat_datasets(entry_ids=entry_ids)
+        timings[workers] = time.perf_counter() - start
+
+    print(f"\ntiled_concat_datasets over {len(entry_ids)} entries: sequential {timings[1]:.3f} s, "
+          f"8 workers {timings[8]:.3f} s")
+    assert results[8].identical(results[1])
+    assert list(results[8]["entry_id"].values) == entry_ids
+    assert timings[8] < timings[1]
+
+
+def test_tiled_search_sorts_server_side_after_backfill(server_client, monkeypatch):
+    driver = server_client.driver
+    sort = json.dumps([{"colId": "meta_ended", "sort": "desc"}])
+
+    def search(offset, limit):
+        response = server_client.client.get(
+            "/tiled_search",
+            query_string={"queries": "[]", "filters": "{}", "sort": sort, "offset": offset, "limit": limit},
+        )
+        payload = response.get_json()
+        assert payload["status"] == "success"
+        return payload
+
+    run_documents = driver._tiled_client["run_documents"]
+    assert not driver._tiled_has_sortable_timestamps(run_documents, [("attrs.meta.ended", -1)])
+
+    report = driver.tiled_backfill_sortable_timestamps(dry_run=True)
+    assert (report["checked"], report["updated"]) == (3, 3)
+    report = driver.tiled_backfill_sortable_timestamps()
+    assert (report["checked"], report["updated"], report["failed"]) == (3, 3, {})
+    assert driver.tiled_backfill_sortable_timestamps()["updated"] == 0
+
+    meta = run_documents["entry-mid"].metadata["attrs"]["meta"]
+    assert meta["ended"] == "12/07/25 10:32:34-000000 "
+    assert meta["ended_iso"].endswith("+00:00")
+    assert isinstance(meta["ended_epoch"], float)
+    assert driver._tiled_has_sortable_timestamps(run_documents, [("attrs.meta.ended", -1)])
+
+    # the Python fallback would parse every entry's timestamp
+    def no_fallback(value):
+        raise AssertionError("temporal sort fell back to parsing timestamps in Python")
+
+    monkeypatch.setattr("AFL.automation.APIServer.DriverWebAppsMixin.parse_timestamp", no_fallback)
+    payload = search(0, 10)
+    assert payload["total_count"] == 3
+    assert [row["id"] for row in payload["data"]] == ["entry-new", "entry-mid", "entry-old"]
+    assert [row["id"] for row in search(1, 1)["data"]] == ["entry-mid"]
+
+    # entries without any timestamp (e.g. uploads) can't be backfilled and don't force the fallback
+    write_xarray_dataset(
+        run_documents,
+        xr.Dataset({"I": (("q",), [0.0])}, coords={"q": [0.1]}, attrs={"sample_name": "uploaded"}),
+        key="entry-uploaded",
+    )
+    assert driver._tiled_has_sortable_timestamps(run_documents, [("attrs.meta.ended", -1)])
+    ids = [row["id"] for row in search(0, 10)["data"]]
+    assert len(ids) == 4
+    assert [i for i in ids if i != "entry-uploaded"] == ["entry-new", "entry-mid", "entry-old"]
+    assert ids.index("entry-uploaded") in (0, 3)
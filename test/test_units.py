@@ -0,0 +1,105 @@
+import time
+
+import numpy as np
+import pytest
+
+from AFL.automation.mixcalc.Solution import Solution
+from AFL.automation.shared import units as units_module
+from AFL.automation.shared.units import DEFAULT_UNITS, enforce_units, get_unit_type, to_quantity, units
+
+
+@pytest.mark.parametrize(
+    "value, unit_type",
+    [
+        ("20 g", "mass"),
+        ("150 ul", "volume"),
+        ("661 kg/m^3", "density"),
+        ("25 mg/ml", "concentration"),
+        ("0.5 molar", "molarity"),
+        ("2 mol/kg", "molality"),
+    ],
+)
+def test_enforce_units_matches_pint(value, unit_type):
+    expected = units(value).to(DEFAULT_UNITS[unit_type])
+    for _ in range(2):  # parsed, then cached
+        result = enforce_units(value, unit_type)
+        assert result.units == expected.units
+        assert np.isclose(result.magnitude, expected.magnitude)
+        assert enforce_units(units(value), unit_type) == result
+
+    canonical = units.Quantity(3.0, DEFAULT_UNITS[unit_type])
+    assert enforce_units(canonical, unit_type) is canonical
+
+
+def test_enforce_units_errors_and_passthrough():
+    with pytest.raises(ValueError, match="must be a volume"):
+        enforce_units("20 g", "volume")
+    with pytest.raises(ValueError, match="must have units"):
+        enforce_units(5.0, "mass")
+    with pytest.raises(ValueError, match="Not configured"):
+        enforce_units("20 g", "temperature")
+
+    assert enforce_units(None, "mass") is None
+    assert enforce_units("0.25", "dimensionless") == 0.25
+    assert to_quantity("2") == 2
+    assert get_unit_type(to_quantity("5 mg/ml")) == "density"
+    with pytest.raises(ValueError):
+        get_unit_type(to_quantity("5 m"))
+
+
+def _make_solution():
+    return Solution(
+        name="Target",
+        masses={"H2O": "300 mg", "Hexanes": "150 mg"},
+        concentrations={"NaCl": "25 mg/ml"},
+        solutes=["NaCl"],
+    )
+
+
+_UNIT_CACHES = [
+    units_module._parse,
+    units_module._unit_type,
+    units_module._is_unit_type,
+    units_module._factor_to_default,
+]
+
+
+@pytest.mark.usefixtures("mixdb")
+def test_solution_construction_reuses_unit_caches():
+    for cache in _UNIT_CACHES:
+        cache.cache_clear()
+    cold = _make_solution()
+    after_cold = [cache.cache_info() for cache in _UNIT_CACHES]
+    warm = _make_solution()
+    after_warm = [cache.cache_info() for cache in _UNIT_CACHES]
+
+    assert warm == cold
+    assert after_cold[0].misses > 0
+    for before, after in zip(after_cold, after_warm):
+        assert after.misses == before.misses
+    assert after_warm[0].hits > after_cold[0].hits
+
+
+@pytest.mark.benchmark
+@pytest.mark.usefixtures("mixdb")
+def test_solution_construction_benchmark():
+    """Benchmark: Solution construction with cold and warm unit caches (run with --benchmark -s)"""
+    n = 50
+
+    elapsed_cold = 0.0
+    for _ in range(n):
+        for cache in _UNIT_CACHES:
+            cache.cache_clear()
+        start = time.perf_counter()
+        cold = _make_solution()
+        elapsed_cold += time.perf_counter() - start
+
+    _make_solution()
+    start = time.perf_counter()
+    for _ in range(n):
+        warm = _make_solution()
+    elapsed_warm = time.perf_counter() - start
+
+    print(f"\nSolution construction: cold units {elapsed_cold / n * 1e3:.2f} ms, "
+          f"cached units {elapsed_warm / n * 1e3:.2f} ms")
+    assert warm == cold